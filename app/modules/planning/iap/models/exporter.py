@@ -1,26 +1,47 @@
-"""PDF export scaffolding for the IAP Builder."""
+"""PDF export for the IAP Builder.
+
+Each form in a package is filled by the forms engine's batch pipeline
+(``modules.forms_creator.batch``): one shared data snapshot for the
+package's operational period, forms filled in a pool of worker processes,
+and the parts merged in ``display_order`` into a single PDF with a bookmark
+per form.
+"""
 
 from __future__ import annotations
 
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
-from .iap_models import IAPPackage
+from .iap_models import FormInstance, IAPPackage
 
 __all__ = ["IAPPacketExporter"]
 
 
 class IAPPacketExporter:
-    """Placeholder exporter that produces stub PDF files.
-
-    The scaffold focuses on generating deterministic filesystem paths and
-    creating an empty file to represent the exported PDF.  The heavy lifting of
-    rendering forms to PDF will be layered in during later milestones.
+    """Build the packet PDF for an :class:`IAPPackage`.
+
+    IAP form IDs (``"ICS-204"``, ``"ICS-204-DIV-A"``) are matched to forms
+    catalog IDs (``"ics_204"``) by normalizing and then dropping trailing
+    qualifiers, so a package can carry several instances of the same form.
+    A form instance's ``fields`` are passed as ``extra_data`` and override
+    context sections for that form only. Forms with no template in the active
+    form set (the cover sheet, the distribution list) are reported through
+    ``progress`` and left out of the packet.
     """
 
-    def __init__(self, base_output_dir: Path):
+    def __init__(
+        self,
+        base_output_dir: Path,
+        form_set_id: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        processes: bool = True,
+    ):
         self.base_output_dir = Path(base_output_dir)
+        self.form_set_id = form_set_id
+        self.max_workers = max_workers
+        self.processes = processes
+        self.last_results: List[Any] = []
 
     def packet_output_path(self, package: IAPPackage, draft: bool = False) -> Path:
         """Return the output path for ``package``.
@@ -35,22 +56,82 @@ class IAPPacketExporter:
         filename = f"IAP_OP{package.op_number}_{status}_{timestamp}.pdf"
         return op_dir / filename
 
-    def export_packet(self, package: IAPPackage, draft: bool = False) -> Path:
-        """Create a placeholder PDF on disk and return its path."""
+    def export_packet(
+        self,
+        package: IAPPackage,
+        draft: bool = False,
+        progress: Optional[Callable[[int, int, Any], None]] = None,
+        context: Optional[Dict[str, Any]] = None,
+        sections: Optional[Dict[str, Any]] = None,
+    ) -> Path:
+        """Fill every form in ``package`` and merge them into one PDF.
+
+        ``progress(done, total, result)`` is called as each form finishes;
+        ``result`` is a ``modules.forms_creator.batch.FormResult``. ``context``
+        reuses an existing data snapshot instead of fetching one; ``sections``
+        are context sections built beforehand on the GUI thread (see
+        ``caller_thread_sections``). Per-form outcomes are kept on
+        ``last_results``.
+        """
+
+        from modules.forms_creator.batch import generate_package
 
         output_path = self.packet_output_path(package, draft=draft)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        if not output_path.exists():
-            output_path.write_bytes(b"%PDF-PLACEHOLDER\n")
+        jobs = [self._job_for(form) for form in self._ordered_forms(package)]
+        output_path, self.last_results = generate_package(
+            jobs,
+            output_path,
+            incident_id=package.incident_id,
+            form_set_id=self.form_set_id,
+            context=context,
+            sections=sections,
+            op_number=package.op_number,
+            max_workers=self.max_workers,
+            processes=self.processes,
+            progress=progress,
+        )
         return output_path
 
+    @staticmethod
+    def caller_thread_sections(package: IAPPackage) -> Dict[str, Any]:
+        """Build the context sections that need the GUI thread (weather).
+
+        Call on the GUI thread before running ``export_packet`` on a worker
+        and pass the result as ``sections``.
+        """
+
+        from modules.forms_creator.context import FormDataContext
+
+        return FormDataContext().caller_thread_sections(package.incident_id, package.op_number)
+
+    @staticmethod
+    def _ordered_forms(package: IAPPackage) -> List[FormInstance]:
+        return sorted(package.forms, key=lambda form: form.display_order)
+
+    def _job_for(self, form: FormInstance):
+        from modules.forms_creator.batch import FormJob
+
+        return FormJob(
+            form_id=self.catalog_form_id(form.form_id),
+            title=form.title or form.form_id,
+            extra_data=dict(form.fields) if form.fields else None,
+        )
+
+    @staticmethod
+    def catalog_form_id(iap_form_id: str, catalog_ids: Optional[Iterable[str]] = None) -> str:
+        """Map an IAP form ID onto the forms catalog (``"ICS-215A"`` -> ``"ics_215a"``)."""
+
+        from modules.forms_creator.batch import catalog_form_id
+
+        return catalog_form_id(iap_form_id, catalog_ids)
+
     def build_table_of_contents(self, package: IAPPackage) -> List[str]:
         """Return a list of strings describing the packet order."""
 
-        return [form.title for form in package.forms]
+        return [form.title for form in self._ordered_forms(package)]
 
     def iter_packet_members(self, package: IAPPackage) -> Iterable[str]:
         """Yield the titles of forms included in the packet order."""
 
-        for form in package.forms:
+        for form in self._ordered_forms(package):
             yield form.title
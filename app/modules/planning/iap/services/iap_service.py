@@ -8,7 +8,7 @@ from pathlib import Path
 
 from utils import incident_storage
 from copy import deepcopy
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
 
 from ..models.autofill import AutofillEngine
 from ..models.exporter import IAPPacketExporter
@@ -193,22 +193,39 @@ class IAPService:
 
         return {}
 
-    def publish(self, package: IAPPackage) -> str:
+    def publish(
+        self,
+        package: IAPPackage,
+        progress: Optional[Callable[[int, int, object], None]] = None,
+        sections: Optional[Dict[str, Any]] = None,
+    ) -> str:
         """Mark ``package`` as published and export the immutable PDF."""
 
         package.status = "published"
         package.version_tag = package.version_tag or f"OP{package.op_number}-FINAL-v1"
         repository = self._require_repository()
         repository.save_package(package)
-        output_path = self.exporter.export_packet(package, draft=False)
+        output_path = self.exporter.export_packet(package, draft=False, progress=progress, sections=sections)
         package.published_pdf_path = str(output_path)
         repository.save_package(package)
         return package.published_pdf_path
 
-    def export_pdf(self, package: IAPPackage, draft: bool = False) -> str:
-        """Export ``package`` to a placeholder PDF path."""
+    def export_pdf(
+        self,
+        package: IAPPackage,
+        draft: bool = False,
+        progress: Optional[Callable[[int, int, object], None]] = None,
+        sections: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Fill and merge ``package`` into a packet PDF and return its path.
+
+        ``progress(done, total, result)`` is forwarded to the exporter and
+        called once per form as it finishes. ``sections`` come from
+        ``exporter.caller_thread_sections`` when the export runs on a worker
+        thread.
+        """
 
-        output_path = self.exporter.export_packet(package, draft=draft)
+        output_path = self.exporter.export_packet(package, draft=draft, progress=progress, sections=sections)
         return str(output_path)
 
     def describe_autofill(self, form: FormInstance) -> List[str]:
@@ -1,9 +1,11 @@
-"""Tests for the placeholder PDF exporter."""
+"""Tests for the IAP packet exporter."""
 
 from __future__ import annotations
 
 from datetime import datetime
 
+from pypdf import PdfReader
+
 from app.modules.planning.iap.models.exporter import IAPPacketExporter
 from app.modules.planning.iap.models.iap_models import FormInstance, IAPPackage
 
@@ -20,15 +22,33 @@ def _build_package() -> IAPPackage:
     return package
 
 
-def test_exporter_creates_placeholder_pdf(tmp_path) -> None:
+def test_exporter_merges_package_forms(tmp_path) -> None:
     package = _build_package()
-    exporter = IAPPacketExporter(tmp_path)
-
-    pdf_path = exporter.export_packet(package, draft=True)
+    package.forms.append(FormInstance(form_id="COVER", title="Cover", op_number=2, display_order=-1))
+    exporter = IAPPacketExporter(tmp_path, max_workers=1)
+    progress = []
+
+    pdf_path = exporter.export_packet(
+        package,
+        draft=True,
+        context={"incident": {"name": "Demo"}},
+        progress=lambda done, total, result: progress.append((done, total)),
+    )
 
     assert pdf_path.exists()
     assert pdf_path.suffix == ".pdf"
-    assert pdf_path.read_bytes().startswith(b"%PDF-PLACEHOLDER")
+    assert pdf_path.read_bytes().startswith(b"%PDF")
+    assert [item.title for item in PdfReader(str(pdf_path)).outline] == ["Incident Objectives", "Communications Plan"]
+    assert [r.form_id for r in exporter.last_results if not r.ok] == ["cover"]
+    assert progress[-1] == (3, 3)
+
+
+def test_iap_form_ids_map_onto_catalog() -> None:
+    catalog = ["ics_204", "ics_215a", "ics_205"]
+
+    assert IAPPacketExporter.catalog_form_id("ICS-215A", catalog) == "ics_215a"
+    assert IAPPacketExporter.catalog_form_id("ICS-204-DIV-A", catalog) == "ics_204"
+    assert IAPPacketExporter.catalog_form_id("COVER", catalog) == "cover"
 
 
 def test_table_of_contents_reflects_form_order() -> None:
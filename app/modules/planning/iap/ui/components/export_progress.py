@@ -0,0 +1,83 @@
+"""Progress dialog that runs a packet export off the GUI thread."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, List
+
+from PySide6 import QtCore, QtWidgets
+
+ProgressCallback = Callable[[int, int, object], None]
+
+
+class _ExportWorker(QtCore.QThread):
+    """Runs ``task(report)`` and keeps its result or error for the dialog."""
+
+    progressed = QtCore.Signal(int, int, object)
+
+    def __init__(self, task: Callable[[ProgressCallback], Any], parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self._task = task
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def run(self) -> None:  # pragma: no cover - executed in worker thread
+        try:
+            self.result = self._task(self.progressed.emit)
+        except Exception as exc:
+            self.error = exc
+
+
+class ExportProgressDialog(QtWidgets.QProgressDialog):
+    """Modal progress dialog for a packet export.
+
+    ``run(task)`` calls ``task(report)`` on a worker thread, where ``report``
+    is the exporter's ``progress(done, total, result)`` callback; each report
+    reaches the dialog as a queued signal. Anything that must be built on the
+    GUI thread (``IAPPacketExporter.caller_thread_sections``) is built before
+    ``run`` and captured by ``task``. ``run`` keeps the GUI responsive
+    with a local event loop until the task ends, then returns its result or
+    re-raises its error.
+    """
+
+    def __init__(self, title: str, parent: QtWidgets.QWidget | None = None) -> None:
+        super().__init__("Preparing forms…", "", 0, 0, parent)
+        self.setWindowTitle(title)
+        self.setWindowModality(QtCore.Qt.WindowModal)
+        self.setCancelButton(None)
+        self.setMinimumDuration(0)
+        self.skipped: List[str] = []
+        self.show()
+
+    def run(self, task: Callable[[ProgressCallback], Any]) -> Any:
+        worker = _ExportWorker(task, self)
+        worker.progressed.connect(self._on_progress)
+        loop = QtCore.QEventLoop(self)
+        worker.finished.connect(loop.quit)
+        worker.start()
+        if not worker.isFinished():
+            loop.exec()
+        worker.wait()
+        # Deliver any progress reports still queued behind ``finished``.
+        QtCore.QCoreApplication.sendPostedEvents(self)
+        if worker.error is not None:
+            raise worker.error
+        return worker.result
+
+    def _on_progress(self, done: int, total: int, result: object) -> None:
+        self.setMaximum(total)
+        self.setValue(done)
+        title = getattr(result, "title", "") or getattr(result, "form_id", "")
+        error = getattr(result, "error", None)
+        if error:
+            self.skipped.append(f"{title}: {error}")
+        self.setLabelText(f"{title} ({done} of {total})")
+
+    def summary(self, path: str) -> str:
+        """Completion message listing any forms left out of the packet."""
+
+        lines = [f"Packet exported to {path}."]
+        if self.skipped:
+            lines.append("")
+            lines.append("Not included:")
+            lines.extend(f"  - {item}" for item in self.skipped)
+        return "\n".join(lines)
@@ -10,6 +10,7 @@ from PySide6 import QtCore, QtWidgets
 
 from ..services.iap_service import DEFAULT_FORMS, IAPService
 from .components.autofill_preview_panel import AutofillPreviewPanel
+from .components.export_progress import ExportProgressDialog
 from .iap_form_editor import IAPFormEditor
 from .iap_packet_viewer import IAPPacketViewer
 from .iap_wizard import IAPCreationWizard
@@ -324,11 +325,18 @@ class IAPBuilderWindow(QtWidgets.QWidget):
     def _on_publish(self) -> None:
         if not self._current_package:
             return
+        progress = ExportProgressDialog("Publish", self)
         try:
-            pdf_path = self.service.publish(self._current_package)
+            package = self._current_package
+            sections = self.service.exporter.caller_thread_sections(package)
+            pdf_path = progress.run(
+                lambda report: self.service.publish(package, progress=report, sections=sections)
+            )
         except Exception as exc:  # pragma: no cover - user facing guard
             QtWidgets.QMessageBox.warning(self, "Publish", f"Unable to publish package: {exc}")
             return
+        finally:
+            progress.close()
         self._reload_packages()
         op_number = self._current_package.op_number
         if op_number in self._packages:
@@ -340,12 +348,19 @@ class IAPBuilderWindow(QtWidgets.QWidget):
     def _on_export(self) -> None:
         if not self._current_package:
             return
+        progress = ExportProgressDialog("Export", self)
         try:
-            pdf_path = self.service.export_pdf(self._current_package, draft=True)
+            package = self._current_package
+            sections = self.service.exporter.caller_thread_sections(package)
+            pdf_path = progress.run(
+                lambda report: self.service.export_pdf(package, draft=True, progress=report, sections=sections)
+            )
         except Exception as exc:  # pragma: no cover - user facing guard
             QtWidgets.QMessageBox.warning(self, "Export", f"Unable to export draft: {exc}")
             return
-        QtWidgets.QMessageBox.information(self, "Export", f"Draft exported to {pdf_path}.")
+        finally:
+            progress.close()
+        QtWidgets.QMessageBox.information(self, "Export", progress.summary(pdf_path))
 
     def _on_duplicate(self) -> None:
         if not self._current_package:
@@ -8,6 +8,7 @@ from PySide6 import QtCore, QtWidgets
 
 from ..models.iap_models import IAPPackage
 from ..services.iap_service import IAPService
+from .components.export_progress import ExportProgressDialog
 
 
 class IAPPacketViewer(QtWidgets.QWidget):
@@ -80,8 +81,16 @@ class IAPPacketViewer(QtWidgets.QWidget):
 
     def _on_export(self) -> None:
         draft = self.watermark_combo.currentText() == "DRAFT"
-        path = self.service.export_pdf(self.package, draft=draft)
-        QtWidgets.QMessageBox.information(self, "Export", f"Packet exported to {path}.")
+        progress = ExportProgressDialog("Export", self)
+        try:
+            package = self.package
+            sections = self.service.exporter.caller_thread_sections(package)
+            path = progress.run(
+                lambda report: self.service.export_pdf(package, draft=draft, progress=report, sections=sections)
+            )
+        finally:
+            progress.close()
+        QtWidgets.QMessageBox.information(self, "Export", progress.summary(path))
 
     def _show_placeholder(self) -> None:
         QtWidgets.QMessageBox.information(self, "Attachments", "Attachment management will be added later.")
@@ -3,14 +3,17 @@
 Runs as a headless service. No GUI. Intended to be started by a process
 manager (systemd, Docker, etc.) or directly from the command line.
 
-This process is a stateless reverse-tunnel proxy: it has no MongoDB
-connection of its own. LAN servers dial out to it and register under a
-connect code; field/remote devices hit `/r/<connect_code>/...` and their
-requests are forwarded down the matching tunnel. See
+This process is a reverse-tunnel proxy with no database of its own (a fleet
+of instances shares placements through SARAPP_ROUTER_STATE_URL). LAN
+servers dial out to it and register under a connect code; field/remote
+devices hit `/r/<connect_code>/...` and their requests are forwarded down
+the matching tunnel. See
 `Design Documents/Instructions/cloud_router_architecture.md`.
 
 Environment variables:
     SARAPP_CLOUD_ROUTER_TOKEN   Shared secret LAN servers must present to register a tunnel
+    SARAPP_ROUTER_STATE_URL     Shared state for running several instances (see the architecture doc)
+    SARAPP_ROUTER_INTERNAL_URL  URL the other instances forward requests to this one at
 
 Usage:
     python main.py
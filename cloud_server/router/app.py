@@ -10,7 +10,6 @@ for the full protocol this module implements.
 from __future__ import annotations
 
 import asyncio
-import base64
 import hmac
 import json
 import logging
@@ -19,14 +18,31 @@ import time
 import uuid
 from typing import Any, Callable
 
+import httpx
 from fastapi import FastAPI, Header, Request, Response, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
 
 from . import config
 from .dashboard import DASHBOARD_HTML
-from .metrics import metrics
+from .fanout import is_shared_path, serve_shared
+from .frames import (
+    STREAM_CHUNK_BYTES,
+    STREAM_FEATURE,
+    FrameError,
+    StreamAborted,
+    StreamReceiver,
+    lane_for,
+    negotiate,
+    split_chunks,
+)
+from .metrics import metrics, render_prometheus, route_label, traffic
+from .peers import CLIENT_IP_HEADER, HOP_HEADER, TOKEN_HEADER, forward_http, forward_ws
 from .rate_limit import SlidingWindowLimiter
-from .registry import TunnelBackpressureError, TunnelConnection, TunnelUnavailableError, registry
+from .response_cache import VERSION_HEADER, CachedResponse, ResponseCache, cached_response, header
+from .registry import TunnelBackpressureError, TunnelConnection, TunnelRegistry, TunnelUnavailableError
+from .registry import registry as default_registry
+from .state import Placement, RouterState, state_from_config
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +52,9 @@ _TOKEN_ENV_VAR = "SARAPP_CLOUD_ROUTER_TOKEN"
 # verbatim (matches the filtering done on the LAN-side tunnel client).
 _STRIPPED_RESPONSE_HEADERS = {"content-length", "transfer-encoding", "connection", "content-encoding"}
 
+# Router-to-router request headers; never proxied down a tunnel.
+_ROUTER_ONLY_HEADERS = {TOKEN_HEADER, HOP_HEADER, CLIENT_IP_HEADER}
+
 
 def _expected_token() -> str:
     return os.environ.get(_TOKEN_ENV_VAR, "").strip()
@@ -45,15 +64,81 @@ def _token_valid(candidate: str, expected: str) -> bool:
     return hmac.compare_digest(candidate, expected)
 
 
-def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = None) -> FastAPI:
+def _has_large_body(request: Request) -> bool:
+    """Whether the request body should be streamed rather than sent whole
+    (no length, or one over a single chunk)."""
+    if "transfer-encoding" in request.headers:
+        return True
+    try:
+        return int(request.headers.get("content-length") or 0) > STREAM_CHUNK_BYTES
+    except ValueError:
+        return False
+
+
+def _content_length(request: Request) -> int:
+    try:
+        return int(request.headers.get("content-length") or 0)
+    except ValueError:
+        return 0
+
+
+async def _stream_request_body(
+    connection: TunnelConnection, request_id: str, request: Request, sent: Callable[[int], None]
+) -> None:
+    seq = 0
+    async for piece in request.stream():
+        for chunk in split_chunks(piece):
+            await connection.send_request_chunk(request_id, seq, chunk)
+            sent(len(chunk))
+            seq += 1
+    await connection.end_streamed_request(request_id)
+
+
+async def _relay_response_body(
+    connection: TunnelConnection, request_id: str, stream: StreamReceiver, relayed: Callable[[int], None]
+) -> Any:
+    try:
+        async for chunk in stream.chunks(timeout=config.REQUEST_TIMEOUT_SECONDS):
+            relayed(len(chunk))
+            yield chunk
+    except StreamAborted as exc:
+        metrics.total_stream_aborts += 1
+        logger.warning("Streamed response %s aborted [%s]: %s", request_id, connection.connect_code, exc)
+        raise
+    finally:
+        if not stream.done:
+            # Field device went away (or the stream failed): stop the LAN
+            # server sending the rest.
+            await connection.cancel_stream(request_id)
+
+
+def create_router_app(
+    *,
+    server_info_fn: Callable[[], dict[str, Any]] | None = None,
+    tunnel_registry: TunnelRegistry | None = None,
+    state: RouterState | None = None,
+    instance_id: str | None = None,
+    internal_url: str | None = None,
+    peer_transport: httpx.AsyncBaseTransport | None = None,
+) -> FastAPI:
+    """``state``, ``instance_id`` and ``internal_url`` place this instance in
+    a fleet (see ``state.py``/``peers.py``); they default to the config.
+    ``tunnel_registry`` and ``peer_transport`` let tests run several
+    instances in one process."""
     app = FastAPI(title="SARApp Cloud Router")
 
-    # Per-app so each router instance (and each test) gets an isolated window,
-    # and so the limit is read from config at app-creation time rather than
-    # frozen at import.
+    registry = tunnel_registry if tunnel_registry is not None else default_registry
+    # Per-app (unless shared through a state backend) so each router instance
+    # and each test gets an isolated window, and so the limit is read from
+    # config at app-creation time rather than frozen at import.
+    state = state if state is not None else state_from_config()
+    instance_id = instance_id or config.INSTANCE_ID
+    internal_url = internal_url if internal_url is not None else config.INTERNAL_URL
+    peer_client = httpx.AsyncClient(transport=peer_transport, timeout=config.REQUEST_TIMEOUT_SECONDS)
     register_limiter = SlidingWindowLimiter(
-        max_events=config.REGISTER_RATE_LIMIT_PER_MINUTE, window_seconds=60.0
+        max_events=config.REGISTER_RATE_LIMIT_PER_MINUTE, window_seconds=60.0, state=state
     )
+    response_cache = ResponseCache(config.RESPONSE_CACHE_MAX_BYTES, config.RESPONSE_CACHE_PATHS)
 
     @app.get("/health")
     async def health() -> dict[str, Any]:
@@ -66,7 +151,7 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
     @app.websocket("/tunnel/register")
     async def tunnel_register(websocket: WebSocket) -> None:
         client_host = websocket.client.host if websocket.client else "unknown"
-        if not register_limiter.allow(client_host):
+        if not await register_limiter.allow(client_host):
             metrics.total_register_rejections += 1
             logger.warning("Rate-limited tunnel registration attempt from %s", client_host)
             await websocket.close(code=1013)
@@ -95,28 +180,51 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
             await websocket.close(code=1002)
             return
 
+        # Peers predating the binary protocol send no ``protocols`` list and
+        # ignore the extra ``protocol`` field of the ack, so they stay on JSON.
+        protocol = negotiate(frame.get("protocols"))
+        streaming = STREAM_FEATURE in (frame.get("features") or [])
         connection = TunnelConnection(
             connect_code=connect_code,
             server_id=str(frame.get("server_id") or ""),
             server_name=str(frame.get("server_name") or connect_code),
             websocket=websocket,
+            protocol=protocol,
+            streaming=streaming,
         )
         registry.register(connection)
-        await websocket.send_text(json.dumps({"type": "registered"}))
-        logger.info("LAN server registered under connect code %s", connect_code)
+        await _claim_placement(connect_code)
+        await websocket.send_text(
+            json.dumps(
+                {"type": "registered", "protocol": protocol, "features": [STREAM_FEATURE] if streaming else []}
+            )
+        )
+        logger.info("LAN server registered under connect code %s (protocol %d)", connect_code, protocol)
 
         async def _receive_loop() -> None:
             while True:
-                reply_frame = json.loads(await websocket.receive_text())
+                message = await websocket.receive()
+                if message.get("type") == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                raw = message.get("bytes") if message.get("bytes") is not None else message.get("text")
+                try:
+                    reply_frame = connection.decode(raw)
+                except FrameError:
+                    logger.warning("Dropped undecodable frame from tunnel %s", connect_code)
+                    continue
                 reply_type = reply_frame.get("type")
-                if reply_type == "response":
+                if reply_type in ("response", "response_start"):
                     connection.resolve_response(reply_frame)
+                elif reply_type in ("response_chunk", "response_end", "window", "cancel"):
+                    connection.dispatch_stream_frame(reply_frame)
                 elif reply_type == "ws_message":
                     connection.dispatch_ws_message(reply_frame)
                 elif reply_type == "ws_close":
                     connection.dispatch_ws_close(reply_frame)
                 elif reply_type == "pong":
                     connection.record_pong(reply_frame)
+                elif reply_type == "cache_version":
+                    connection.record_catalog_version(reply_frame.get("version"))
 
         async def _heartbeat_loop() -> None:
             while True:
@@ -134,6 +242,7 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
                     await connection.send_ping()
                 except Exception:  # noqa: BLE001 - socket already dead, receive loop will unwind too
                     return
+                await _claim_placement(connect_code)
 
         receive_task = asyncio.create_task(_receive_loop())
         heartbeat_task = asyncio.create_task(_heartbeat_loop())
@@ -143,53 +252,181 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
             )
             for task in done:
                 exc = task.exception()
-                if exc is not None and not isinstance(exc, (WebSocketDisconnect, json.JSONDecodeError)):
+                if exc is not None and not isinstance(exc, WebSocketDisconnect):
                     raise exc
         finally:
             for task in (receive_task, heartbeat_task):
                 task.cancel()
-            registry.deregister(connect_code)
+            # A newer registration under the same code keeps its place.
+            if registry.get(connect_code) is connection:
+                registry.deregister(connect_code)
+                await _release_placement(connect_code)
+            response_cache.drop_tunnel(connect_code)
+            traffic.drop_tunnel(connect_code)
             connection.fail_all()
             logger.info("LAN server disconnected (connect code %s)", connect_code)
 
+    async def _claim_placement(connect_code: str) -> None:
+        if not internal_url:
+            return  # peers could not reach this instance anyway
+        try:
+            await state.claim(connect_code, instance_id, internal_url, config.HEARTBEAT_TIMEOUT_SECONDS)
+        except Exception:  # noqa: BLE001 - the tunnel still serves requests landing here
+            logger.exception("Could not record the placement of %s", connect_code)
+
+    async def _release_placement(connect_code: str) -> None:
+        if not internal_url:
+            return
+        try:
+            await state.release(connect_code, instance_id)
+        except Exception:  # noqa: BLE001 - the placement expires on its own
+            logger.exception("Could not release the placement of %s", connect_code)
+
+    def _trusted_hop(headers: Any) -> bool:
+        """Whether the request was forwarded by a router peer (which stamps
+        the router token when one is configured)."""
+        if HOP_HEADER not in headers:
+            return False
+        expected_token = _expected_token()
+        return not expected_token or _token_valid(str(headers.get(TOKEN_HEADER) or ""), expected_token)
+
+    def _client_ip(headers: Any, client: Any) -> str | None:
+        if _trusted_hop(headers) and headers.get(CLIENT_IP_HEADER):
+            return headers[CLIENT_IP_HEADER]
+        return client.host if client else None
+
+    async def _peer_placement(connect_code: str, headers: Any) -> Placement | None:
+        """Where to forward a request for a tunnel this instance lacks."""
+        if HOP_HEADER in headers:
+            return None  # forwarded once already
+        try:
+            placement = await state.locate(connect_code)
+        except Exception:  # noqa: BLE001 - treat an unreachable backend as "offline"
+            logger.exception("Could not look up the placement of %s", connect_code)
+            return None
+        if placement is None or placement.instance_id == instance_id or not placement.internal_url:
+            return None
+        return placement
+
     @app.api_route(
         "/r/{connect_code}/{path:path}",
         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"],
     )
     async def proxy_http(connect_code: str, path: str, request: Request) -> Response:
+        started = time.perf_counter()
+        route = route_label(path)
+        response = await _proxy_http(connect_code, path, request, route)
+        # Streamed bodies are counted as they are relayed.
+        traffic.request_finished(
+            request.method,
+            route,
+            response.status_code,
+            time.perf_counter() - started,
+            bytes_in=_content_length(request),
+            bytes_out=len(getattr(response, "body", b"")),
+        )
+        return response
+
+    async def _proxy_http(connect_code: str, path: str, request: Request, route: str) -> Response:
         connection = registry.get(connect_code)
         if connection is None:
+            placement = await _peer_placement(connect_code, request.headers)
+            if placement is not None:
+                metrics.total_forwarded_requests += 1
+                return await forward_http(
+                    peer_client,
+                    placement,
+                    path,
+                    request,
+                    instance_id=instance_id,
+                    token=_expected_token(),
+                    client_ip=_client_ip(request.headers, request.client),
+                )
             return JSONResponse({"detail": "LAN server offline"}, status_code=503)
 
+        # The peer secret and hop headers stop here; the client IP is set
+        # again below from what this instance trusts.
+        headers = {k: v for k, v in request.headers.items() if k not in _ROUTER_ONLY_HEADERS}
+        cache_key = None
+        cached = None
+        if response_cache.is_cacheable(request.method, path):
+            cache_key = response_cache.key(connect_code, path, request.url.query, request.headers)
+            cached = response_cache.get(cache_key)
+            if cached is not None and cached.version is not None and cached.version == connection.catalog_version:
+                metrics.total_cache_hits += 1
+                return cached_response(cached, request.headers.get("if-none-match"))
+            # The device's own validator is answered from the cache below;
+            # upstream, revalidate the cached copy or fetch a full one.
+            headers.pop("if-none-match", None)
+            if cached is not None:
+                headers["if-none-match"] = cached.etag
+
         request_id = uuid.uuid4().hex
-        body = await request.body()
-        if len(body) > config.MAX_REQUEST_BODY_BYTES:
-            metrics.total_request_failures_413 += 1
-            logger.warning(
-                "Rejected oversized request body (%d bytes) for %s %s [%s]",
-                len(body),
-                request.method,
-                path,
-                connect_code,
-            )
-            return JSONResponse({"detail": "Request body too large"}, status_code=413)
+        # Peers that stream take large bodies in chunks as they arrive;
+        # everything else is sent as one frame, under the size cap.
+        streamed = connection.streaming and _has_large_body(request)
+        body = b""
+        if not streamed:
+            body = await request.body()
+            if len(body) > config.MAX_REQUEST_BODY_BYTES:
+                metrics.total_request_failures_413 += 1
+                logger.warning(
+                    "Rejected oversized request body (%d bytes) for %s %s [%s]",
+                    len(body),
+                    request.method,
+                    path,
+                    connect_code,
+                )
+                return JSONResponse({"detail": "Request body too large"}, status_code=413)
 
         metrics.total_requests += 1
-        headers = dict(request.headers)
-        if request.client:
-            headers["x-sarapp-client-ip"] = request.client.host
+        client_ip = _client_ip(request.headers, request.client)
+        if client_ip:
+            headers[CLIENT_IP_HEADER] = client_ip
+        tunnel_stats = traffic.tunnel_started(connect_code, len(body))
+        tunnel_started = time.perf_counter()
+        tunnel_status = 503
         try:
-            future = await connection.send_request(
-                request_id=request_id,
-                method=request.method,
-                path=f"/{path}",
-                query=request.url.query,
-                headers=headers,
-                body_b64=base64.b64encode(body).decode("ascii"),
-            )
+            if streamed:
+                metrics.total_streamed_requests += 1
+                future = await connection.start_streamed_request(
+                    request_id=request_id,
+                    method=request.method,
+                    path=f"/{path}",
+                    query=request.url.query,
+                    headers=headers,
+                )
+                def _sent(size: int) -> None:
+                    tunnel_stats.bytes_in += size
+
+                try:
+                    await _stream_request_body(connection, request_id, request, _sent)
+                except StreamAborted:
+                    # The LAN server stopped the upload (it answered early, or
+                    # the tunnel dropped); the response future says which.
+                    pass
+                except ClientDisconnect:
+                    connection.forget_request(request_id)
+                    await connection.cancel_stream(request_id)
+                    tunnel_status = 400
+                    return Response(status_code=400)
+            else:
+                future = await connection.send_request(
+                    request_id=request_id,
+                    method=request.method,
+                    path=f"/{path}",
+                    query=request.url.query,
+                    headers=headers,
+                    body=body,
+                    lane=lane_for(request.method, f"/{path}"),
+                )
             response_frame = await asyncio.wait_for(future, timeout=config.REQUEST_TIMEOUT_SECONDS)
+            tunnel_status = response_frame.get("status", 502)
         except asyncio.TimeoutError:
-            connection.pending_requests.pop(request_id, None)
+            tunnel_status = 504
+            connection.forget_request(request_id)
+            if streamed:
+                await connection.cancel_stream(request_id)
             metrics.total_request_timeouts += 1
             logger.warning("LAN server timed out for %s %s [%s]", request.method, path, connect_code)
             return JSONResponse({"detail": "LAN server timed out"}, status_code=504)
@@ -200,21 +437,62 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
         except TunnelUnavailableError:
             metrics.total_request_failures_503 += 1
             return JSONResponse({"detail": "LAN server disconnected"}, status_code=503)
+        finally:
+            traffic.tunnel_finished(tunnel_stats, tunnel_status, time.perf_counter() - tunnel_started)
+        tunnel_stats.bytes_out += len(response_frame.get("body") or b"")
 
         headers = {
             key: value
             for key, value in response_frame.get("headers", {}).items()
             if key.lower() not in _STRIPPED_RESPONSE_HEADERS
         }
-        body_bytes = base64.b64decode(response_frame.get("body") or "")
-        return Response(content=body_bytes, status_code=response_frame.get("status", 502), headers=headers)
+        status = response_frame.get("status", 502)
+        stream = response_frame.get("stream")
+        if cache_key is not None and stream is None:
+            version = header(headers, VERSION_HEADER)
+            if status == 304 and cached is not None:
+                metrics.total_cache_revalidations += 1
+                cached.version = version
+                return cached_response(cached, request.headers.get("if-none-match"))
+            etag = header(headers, "etag")
+            if status == 200 and etag:
+                metrics.total_cache_misses += 1
+                entry = CachedResponse(headers=headers, body=response_frame.get("body") or b"", etag=etag, version=version)
+                response_cache.put(cache_key, entry)
+                return cached_response(entry, request.headers.get("if-none-match"))
+        if stream is not None:
+            metrics.total_streamed_responses += 1
+
+            def _relayed(size: int) -> None:
+                tunnel_stats.bytes_out += size
+                traffic.add_route_bytes_out(request.method, route, size)
+
+            return StreamingResponse(
+                _relay_response_body(connection, request_id, stream, _relayed), status_code=status, headers=headers
+            )
+        return Response(content=response_frame.get("body") or b"", status_code=status, headers=headers)
 
     @app.websocket("/r/{connect_code}/{path:path}")
     async def proxy_ws(websocket: WebSocket, connect_code: str, path: str) -> None:
         connection = registry.get(connect_code)
         if connection is None:
+            placement = await _peer_placement(connect_code, websocket.headers)
+            if placement is not None:
+                metrics.total_forwarded_ws += 1
+                await forward_ws(
+                    websocket,
+                    placement,
+                    path,
+                    instance_id=instance_id,
+                    token=_expected_token(),
+                    client_ip=_client_ip(websocket.headers, websocket.client),
+                )
+                return
             await websocket.close(code=1013)
             return
+        if is_shared_path(path):
+            await serve_shared(websocket, connection, path)
+            return
 
         channel_id = uuid.uuid4().hex
         try:
@@ -235,7 +513,7 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
                     await websocket.close(code=item.get("code", 1000), reason=item.get("reason", ""))
                     return
                 if item.get("binary"):
-                    await websocket.send_bytes(base64.b64decode(item.get("data", "")))
+                    await websocket.send_bytes(item.get("data", b""))
                 else:
                     await websocket.send_text(item.get("data", ""))
 
@@ -251,10 +529,9 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
                 if message.get("type") == "websocket.disconnect":
                     break
                 if message.get("text") is not None:
-                    await connection.send_ws_message(channel_id, message["text"], binary=False)
+                    await connection.send_ws_message(channel_id, message["text"])
                 elif message.get("bytes") is not None:
-                    encoded = base64.b64encode(message["bytes"]).decode("ascii")
-                    await connection.send_ws_message(channel_id, encoded, binary=True)
+                    await connection.send_ws_message(channel_id, message["bytes"])
         except WebSocketDisconnect:
             pass
         finally:
@@ -276,10 +553,13 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
                 "connect_code": connection.connect_code,
                 "server_id": connection.server_id,
                 "server_name": connection.server_name,
+                "protocol": connection.protocol,
+                "streaming": connection.streaming,
                 "connected_seconds_ago": now - connection.connected_at,
                 "last_pong_seconds_ago": now - connection.last_pong_at,
                 "pending_request_count": len(connection.pending_requests),
                 "ws_channel_count": len(connection.ws_channels),
+                "ws_subscriber_count": connection.ws_subscriber_count(),
             }
             for connection in registry.list_connections()
         ]
@@ -290,16 +570,30 @@ def create_router_app(*, server_info_fn: Callable[[], dict[str, Any]] | None = N
         if unauthorized is not None:
             return unauthorized
 
-        return JSONResponse({"tunnels": _tunnel_summaries()})
+        placements = [
+            {"connect_code": p.connect_code, "instance_id": p.instance_id, "internal_url": p.internal_url}
+            for p in await state.list_placements()
+        ]
+        return JSONResponse({"instance_id": instance_id, "tunnels": _tunnel_summaries(), "placements": placements})
 
     @app.get("/admin/metrics")
-    async def admin_metrics(x_router_token: str | None = Header(default=None)) -> Response:
+    async def admin_metrics(
+        x_router_token: str | None = Header(default=None), accept: str | None = Header(default=None)
+    ) -> Response:
         unauthorized = _require_admin_token(x_router_token)
         if unauthorized is not None:
             return unauthorized
 
+        # Prometheus asks for text/plain (or OpenMetrics); anything else gets JSON.
+        if accept and ("text/plain" in accept or "application/openmetrics-text" in accept):
+            return PlainTextResponse(
+                render_prometheus(registry.list_connections(), response_cache.stats()),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
         snapshot = metrics.snapshot()
         snapshot["active_tunnel_count"] = registry.active_tunnel_count()
+        snapshot["response_cache"] = response_cache.stats()
+        snapshot["latency"] = traffic.snapshot()
         return JSONResponse(snapshot)
 
     # --- Read-only status dashboard -----------------------------------
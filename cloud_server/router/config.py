@@ -10,6 +10,8 @@ value governs.
 from __future__ import annotations
 
 import os
+import socket
+import uuid
 
 
 def _float_env(name: str, default: float) -> float:
@@ -31,5 +33,24 @@ HEARTBEAT_INTERVAL_SECONDS = _float_env("SARAPP_ROUTER_HEARTBEAT_INTERVAL_SECOND
 HEARTBEAT_TIMEOUT_SECONDS = _float_env("SARAPP_ROUTER_HEARTBEAT_TIMEOUT_SECONDS", 45.0)
 MAX_PENDING_REQUESTS_PER_TUNNEL = _int_env("SARAPP_ROUTER_MAX_PENDING_REQUESTS", 200)
 MAX_WS_CHANNELS_PER_TUNNEL = _int_env("SARAPP_ROUTER_MAX_WS_CHANNELS", 100)
+MAX_WS_SUBSCRIBERS_PER_TUNNEL = _int_env("SARAPP_ROUTER_MAX_WS_SUBSCRIBERS", 1000)
+WS_FANOUT_QUEUE_SIZE = _int_env("SARAPP_ROUTER_WS_QUEUE_SIZE", 256)
 MAX_REQUEST_BODY_BYTES = _int_env("SARAPP_ROUTER_MAX_BODY_BYTES", 10 * 1024 * 1024)
+RESPONSE_CACHE_MAX_BYTES = _int_env("SARAPP_ROUTER_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+RESPONSE_CACHE_PATHS = tuple(
+    path.strip()
+    for path in os.environ.get(
+        "SARAPP_ROUTER_CACHE_PATHS", "/api/master/,/api/resource-types,/api/hazard-types,/api/lookup/"
+    ).split(",")
+    if path.strip()
+)
+MAX_ROUTE_SERIES = _int_env("SARAPP_ROUTER_MAX_ROUTE_SERIES", 256)
 REGISTER_RATE_LIMIT_PER_MINUTE = _int_env("SARAPP_ROUTER_REGISTER_RATE_LIMIT", 10)
+
+# Running several router instances (see ``state.py`` and ``peers.py``).
+# Unset STATE_URL keeps state in process: a single instance.
+STATE_URL = os.environ.get("SARAPP_ROUTER_STATE_URL", "").strip()
+INSTANCE_ID = os.environ.get("SARAPP_ROUTER_INSTANCE_ID", "").strip() or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+# How the other instances reach this one, e.g. ``http://10.0.0.5:8765``.
+# Without it this instance holds tunnels only for requests that land on it.
+INTERNAL_URL = os.environ.get("SARAPP_ROUTER_INTERNAL_URL", "").strip()
@@ -0,0 +1,168 @@
+"""Router-side fan-out of incident change feeds to remote subscribers.
+
+The LAN server's ``/api/incidents/{id}/ws`` feed is one-way: every client of
+an incident gets the same broadcasts, and whatever a client sends is only
+read to notice the disconnect. So instead of one tunnel channel per remote
+viewer — each broadcast crossing the LAN server's uplink once per viewer —
+the router opens one channel per incident per tunnel (a ``SharedFeed``) and
+copies each message to every field-device socket subscribed to it.
+
+Each subscriber has a bounded queue (``config.WS_FANOUT_QUEUE_SIZE``
+messages). One that falls that far behind is evicted, closed with
+``1013``/``"slow_consumer"``, rather than holding messages for it or slowing
+the others; it reconnects and resyncs like after any other drop. The
+upstream channel is closed when the last subscriber leaves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import WebSocket
+
+from . import config
+from .metrics import metrics
+from .registry import TunnelBackpressureError, TunnelConnection
+
+logger = logging.getLogger(__name__)
+
+_SHARED_PATH = re.compile(r"^api/incidents/[^/]+/ws$")
+
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+def is_shared_path(path: str) -> bool:
+    """Whether the WebSocket at ``path`` (as routed, no leading slash) is a
+    broadcast-only feed that subscribers can share."""
+    return bool(_SHARED_PATH.match(path))
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    queue: "asyncio.Queue[dict[str, Any]]"
+    evicted: bool = False
+
+
+@dataclass(eq=False)
+class SharedFeed:
+    connection: TunnelConnection
+    path: str
+    channel_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    subscribers: list[_Subscriber] = field(default_factory=list)
+    _pump_task: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        upstream = self.connection.register_ws_channel(self.channel_id)
+        self._pump_task = asyncio.create_task(self._pump(upstream))
+        metrics.total_ws_channels_opened += 1
+        await self.connection.open_ws_channel(self.channel_id, f"/{self.path}")
+
+    def subscribe(self) -> _Subscriber:
+        if self.connection.ws_subscriber_count() >= config.MAX_WS_SUBSCRIBERS_PER_TUNNEL:
+            raise TunnelBackpressureError("LAN server tunnel is at its websocket subscriber limit")
+        subscriber = _Subscriber(asyncio.Queue(maxsize=config.WS_FANOUT_QUEUE_SIZE))
+        self.subscribers.append(subscriber)
+        metrics.total_ws_subscribers += 1
+        return subscriber
+
+    async def unsubscribe(self, subscriber: _Subscriber) -> None:
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if self.subscribers or self.connection.shared_feeds.get(self.path) is not self:
+            return
+        del self.connection.shared_feeds[self.path]
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+        self.connection.close_ws_channel_locally(self.channel_id)
+        await self.connection.send_ws_close(self.channel_id)
+
+    def _evict(self, subscriber: _Subscriber) -> None:
+        subscriber.evicted = True
+        self.subscribers.remove(subscriber)
+        metrics.total_ws_slow_consumer_evictions += 1
+        logger.warning("Evicted slow websocket subscriber from %s [%s]", self.path, self.connection.connect_code)
+        # Its backlog is moot once it has to resync; make room for the close.
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait({"type": "closed", "code": SLOW_CONSUMER_CLOSE_CODE, "reason": "slow_consumer"})
+
+    async def _pump(self, upstream: "asyncio.Queue[dict[str, Any]]") -> None:
+        while True:
+            item = await upstream.get()
+            if item.get("type") == "closed":
+                if self.connection.shared_feeds.get(self.path) is self:
+                    del self.connection.shared_feeds[self.path]
+                for subscriber in self.subscribers:
+                    while not subscriber.queue.empty():
+                        subscriber.queue.get_nowait()
+                    subscriber.queue.put_nowait(item)
+                self.subscribers.clear()
+                return
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self._evict(subscriber)
+
+
+async def _join(connection: TunnelConnection, path: str) -> tuple[SharedFeed, _Subscriber]:
+    feed = connection.shared_feeds.get(path)
+    if feed is not None:
+        return feed, feed.subscribe()
+    feed = SharedFeed(connection, path)
+    # Registered before the first await so concurrent subscribers share it.
+    subscriber = feed.subscribe()
+    connection.shared_feeds[path] = feed
+    try:
+        await feed.open()
+    except Exception:
+        await feed.unsubscribe(subscriber)
+        raise
+    return feed, subscriber
+
+
+async def serve_shared(websocket: WebSocket, connection: TunnelConnection, path: str) -> None:
+    """Serve one field-device socket from the shared feed for ``path``."""
+    try:
+        feed, subscriber = await _join(connection, path)
+    except TunnelBackpressureError:
+        metrics.total_request_failures_503 += 1
+        logger.warning("LAN server busy (ws limit) for %s [%s]", path, connection.connect_code)
+        await websocket.close(code=1013)
+        return
+
+    async def _pump_downstream() -> None:
+        while True:
+            item = await subscriber.queue.get()
+            if item.get("type") == "closed":
+                await websocket.close(code=item.get("code", 1000), reason=item.get("reason", ""))
+                return
+            if item.get("binary"):
+                await websocket.send_bytes(item.get("data", b""))
+            else:
+                await websocket.send_text(item.get("data", ""))
+
+    async def _drain_upstream() -> None:
+        # The feed is broadcast-only; messages are read just to notice the
+        # disconnect, as the LAN server itself does.
+        while True:
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                return
+
+    await websocket.accept()
+    tasks = {asyncio.create_task(_pump_downstream()), asyncio.create_task(_drain_upstream())}
+    try:
+        done, _pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled():
+                task.exception()  # a dropped socket either way; nothing to report
+    finally:
+        for task in tasks:
+            task.cancel()
+        await feed.unsubscribe(subscriber)
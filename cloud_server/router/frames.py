@@ -0,0 +1,473 @@
+"""Tunnel frame codecs: the v1 JSON text protocol and the v2 binary one.
+
+Both sides of the tunnel handle frames as dicts with a ``type`` field (see
+``Design Documents/Instructions/cloud_router_architecture.md``). Bodies are
+always raw ``bytes`` in those dicts — the ``body`` of ``request``/``response``
+and the ``data`` of a binary ``ws_message`` — and a codec turns a dict into
+what goes on the wire:
+
+- ``JsonCodec`` (protocol 1): one JSON text message per frame, bodies as
+  base64 strings. What every peer predating v2 speaks.
+- ``BinaryCodec`` (protocol 2): one WebSocket binary message per frame, a
+  fixed header, the remaining metadata as compact JSON, then the raw body —
+  no base64, so no 33% inflation and no encode/decode pass over the body::
+
+      0      1      2      3      4                  20       24
+      +------+------+------+------+------------------+--------+------...+------...
+      | ver  | type | flags| rsvd | id (16 bytes)    | metalen| meta    | body
+      +------+------+------+------+------------------+--------+------...+------...
+
+  ``id`` is the request or channel id (32 hex characters, as the router
+  mints them), zero for frames without one.
+
+The protocol is negotiated at registration: the LAN server lists what it
+speaks in ``register.protocols`` and the router answers with its choice in
+``registered.protocol``. A peer that sends or gets no list is on protocol 1.
+
+Bodies too large for one frame are streamed as ``*_start`` / ``*_chunk`` /
+``*_end`` frames under per-request flow control: the sender may have at most
+``STREAM_WINDOW_BYTES`` of a stream's chunks unconsumed at the receiver and
+waits for ``window`` credit (``SendWindow``) as the receiver works through
+them (``StreamReceiver``). Either side ends a stream early with ``cancel``.
+Streaming is a registration feature (``STREAM_FEATURE``) separate from the
+wire protocol, so it works over either codec.
+
+Traffic sharing the tunnel rides one of three priority lanes (``lane_for``):
+``critical`` (status and emergency updates, location posts, heartbeats and
+flow-control frames), ``interactive`` (everything else, WebSocket channels
+included) and ``bulk`` (downloads, exports, snapshots, and any body large
+enough to stream). Each side caps concurrent work per lane
+(``lane_limits``), so bulk traffic can never hold the slots critical
+traffic needs, and writes outbound frames through a ``LaneScheduler`` that
+serves the lanes by weight, so a critical frame waits behind at most the
+one frame already being written rather than a queue of 64 KB chunks. The
+lane is derived from the request on both sides, never sent on the wire.
+
+``cloud_server/router/frames.py`` (router) and ``lan_server/tunnel_frames.py``
+(LAN server) are copies — the router image ships without the LAN server
+package. Keep the two identical.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import struct
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+PROTOCOL_JSON = 1
+PROTOCOL_BINARY = 2
+SUPPORTED_PROTOCOLS = (PROTOCOL_BINARY, PROTOCOL_JSON)
+
+_HEADER = struct.Struct("!BBBx16sI")
+HEADER_SIZE = _HEADER.size
+
+FLAG_BINARY = 0x01  # ws_message: data is bytes rather than UTF-8 text
+
+STREAM_FEATURE = "stream"
+STREAM_CHUNK_BYTES = 64 * 1024
+# Both sides assume this initial window rather than negotiating one.
+STREAM_WINDOW_BYTES = 256 * 1024
+
+LANE_CRITICAL = "critical"
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+LANES = (LANE_CRITICAL, LANE_INTERACTIVE, LANE_BULK)
+# Frames written from each lane per scheduling round while all are backed up.
+LANE_WEIGHTS = {LANE_CRITICAL: 8, LANE_INTERACTIVE: 4, LANE_BULK: 1}
+
+_CRITICAL_PREFIXES = ("/api/mobile/location",)
+# Writes to these are status changes and check-ins from the field.
+_CRITICAL_WRITE_SUFFIXES = ("/status", "/emergency", "/heartbeat", "/checkin", "/comm-ping")
+_BULK_SUFFIXES = ("/download", "/snapshot", "/export")
+
+_TYPE_CODES = {
+    "request": 1,
+    "response": 2,
+    "ws_open": 3,
+    "ws_message": 4,
+    "ws_close": 5,
+    "ping": 6,
+    "pong": 7,
+    "request_start": 8,
+    "request_chunk": 9,
+    "request_end": 10,
+    "response_start": 11,
+    "response_chunk": 12,
+    "response_end": 13,
+    "window": 14,
+    "cancel": 15,
+    "cache_version": 16,
+}
+_TYPE_NAMES = {code: name for name, code in _TYPE_CODES.items()}
+
+_ID_FIELDS = {
+    "request": "request_id",
+    "response": "request_id",
+    "request_start": "request_id",
+    "request_chunk": "request_id",
+    "request_end": "request_id",
+    "response_start": "request_id",
+    "response_chunk": "request_id",
+    "response_end": "request_id",
+    "window": "request_id",
+    "cancel": "request_id",
+    "ws_open": "channel_id",
+    "ws_message": "channel_id",
+    "ws_close": "channel_id",
+}
+_BODY_FIELDS = {
+    "request": "body",
+    "response": "body",
+    "request_chunk": "body",
+    "response_chunk": "body",
+    "ws_message": "data",
+}
+_NO_ID = bytes(16)
+
+
+class FrameError(ValueError):
+    """Raised for a frame that cannot be encoded or decoded."""
+
+
+class StreamAborted(Exception):
+    """A streamed body ended early: cancelled, out of order or over its window."""
+
+
+def negotiate(offered: Iterable[Any] | None) -> int:
+    """The highest protocol both this side and the ``offered`` list speak."""
+    versions = set()
+    for version in offered or ():
+        try:
+            versions.add(int(version))
+        except (TypeError, ValueError):
+            continue
+    for version in SUPPORTED_PROTOCOLS:
+        if version in versions:
+            return version
+    return PROTOCOL_JSON
+
+
+class JsonCodec:
+    """Protocol 1: JSON text frames with base64 bodies."""
+
+    protocol = PROTOCOL_JSON
+
+    def encode(self, frame: dict[str, Any]) -> str:
+        wire = dict(frame)
+        field = _BODY_FIELDS.get(frame.get("type"))
+        if field is not None and field in wire:
+            value = wire[field]
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                wire[field] = base64.b64encode(value).decode("ascii")
+                if frame.get("type") == "ws_message":
+                    wire["binary"] = True
+            elif frame.get("type") == "ws_message":
+                wire.setdefault("binary", False)
+            else:
+                raise FrameError(f"{field} of a {frame.get('type')} frame must be bytes")
+        return json.dumps(wire)
+
+    def decode(self, raw: str | bytes) -> dict[str, Any]:
+        try:
+            frame = json.loads(raw)
+        except (TypeError, ValueError) as exc:
+            raise FrameError(f"Undecodable JSON frame: {exc}") from exc
+        if not isinstance(frame, dict):
+            raise FrameError("JSON frame is not an object")
+        frame_type = frame.get("type")
+        field = _BODY_FIELDS.get(frame_type)
+        if field is not None:
+            value = frame.get(field) or ""
+            if frame_type == "ws_message" and not frame.get("binary"):
+                frame[field] = value
+            else:
+                try:
+                    frame[field] = base64.b64decode(value)
+                except (TypeError, ValueError) as exc:
+                    raise FrameError(f"Bad base64 in {frame_type} frame") from exc
+        return frame
+
+
+class BinaryCodec:
+    """Protocol 2: binary frames with raw bodies."""
+
+    protocol = PROTOCOL_BINARY
+
+    def encode(self, frame: dict[str, Any]) -> bytes:
+        frame_type = frame.get("type")
+        code = _TYPE_CODES.get(frame_type)
+        if code is None:
+            raise FrameError(f"Unknown frame type: {frame_type!r}")
+        meta = dict(frame)
+        del meta["type"]
+        id_field = _ID_FIELDS.get(frame_type)
+        raw_id = _NO_ID
+        if id_field is not None:
+            try:
+                raw_id = bytes.fromhex(str(meta.pop(id_field, "") or ""))
+            except ValueError as exc:
+                raise FrameError(f"{id_field} must be 32 hex characters") from exc
+            if len(raw_id) != 16:
+                raise FrameError(f"{id_field} must be 32 hex characters")
+        flags = 0
+        body = b""
+        field = _BODY_FIELDS.get(frame_type)
+        if field is not None:
+            value = meta.pop(field, b"")
+            meta.pop("binary", None)
+            if isinstance(value, str):
+                body = value.encode("utf-8")
+            else:
+                body = bytes(value)
+                if frame_type == "ws_message":
+                    flags |= FLAG_BINARY
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8") if meta else b""
+        return b"".join((_HEADER.pack(PROTOCOL_BINARY, code, flags, raw_id, len(meta_bytes)), meta_bytes, body))
+
+    def decode(self, raw: str | bytes) -> dict[str, Any]:
+        if not isinstance(raw, (bytes, bytearray, memoryview)):
+            raise FrameError("Binary protocol frame arrived as text")
+        view = memoryview(raw)
+        if len(view) < HEADER_SIZE:
+            raise FrameError("Truncated frame header")
+        version, code, flags, raw_id, meta_len = _HEADER.unpack_from(view)
+        if version != PROTOCOL_BINARY:
+            raise FrameError(f"Unsupported frame version {version}")
+        frame_type = _TYPE_NAMES.get(code)
+        if frame_type is None:
+            raise FrameError(f"Unknown frame type code {code}")
+        end = HEADER_SIZE + meta_len
+        if end > len(view):
+            raise FrameError("Truncated frame metadata")
+        try:
+            frame: dict[str, Any] = json.loads(bytes(view[HEADER_SIZE:end])) if meta_len else {}
+        except ValueError as exc:
+            raise FrameError(f"Undecodable frame metadata: {exc}") from exc
+        frame["type"] = frame_type
+        id_field = _ID_FIELDS.get(frame_type)
+        if id_field is not None:
+            frame[id_field] = raw_id.hex()
+        field = _BODY_FIELDS.get(frame_type)
+        if field is not None:
+            body = bytes(view[end:])
+            if frame_type == "ws_message":
+                binary = bool(flags & FLAG_BINARY)
+                frame["binary"] = binary
+                try:
+                    frame[field] = body if binary else body.decode("utf-8")
+                except UnicodeDecodeError as exc:
+                    raise FrameError("Text ws_message is not UTF-8") from exc
+            else:
+                frame[field] = body
+        return frame
+
+
+def codec_for(protocol: int) -> JsonCodec | BinaryCodec:
+    return BinaryCodec() if protocol == PROTOCOL_BINARY else JsonCodec()
+
+
+def lane_for(method: str, path: str, *, streamed: bool = False) -> str:
+    """The priority lane of a tunneled request; ``streamed`` requests (a
+    body in chunks, either way) are bulk whatever their path."""
+    if streamed:
+        return LANE_BULK
+    path = path.split("?", 1)[0].rstrip("/")
+    if path.startswith(_CRITICAL_PREFIXES):
+        return LANE_CRITICAL
+    if method.upper() not in ("GET", "HEAD") and (path.endswith(_CRITICAL_WRITE_SUFFIXES) or "/emergency" in path):
+        return LANE_CRITICAL
+    if path.endswith(_BULK_SUFFIXES) or "/export" in path:
+        return LANE_BULK
+    return LANE_INTERACTIVE
+
+
+def lane_limits(total: int) -> dict[str, int]:
+    """Split a concurrency cap across the lanes: a quarter reserved for
+    critical work, an eighth for bulk, the rest interactive."""
+    critical = max(1, total // 4)
+    bulk = max(1, total // 8)
+    return {LANE_CRITICAL: critical, LANE_INTERACTIVE: max(1, total - critical - bulk), LANE_BULK: bulk}
+
+
+class LaneScheduler:
+    """Writes encoded frames through ``write`` one at a time. A frame sent
+    while nothing else is being written goes straight out; the rest queue
+    per lane and are written by weighted round robin over the lanes with
+    frames queued.
+
+    Frames within a lane keep their order, so every frame of one request or
+    channel must use the same lane (control frames may use any). A failed
+    write fails the frames still queued, and every later ``send``, with the
+    same error — the connection is gone.
+    """
+
+    def __init__(self, write: Callable[[str | bytes], Awaitable[None]], weights: dict[str, int] = LANE_WEIGHTS) -> None:
+        self._write = write
+        self._weights = dict(weights)
+        self._credits = dict(weights)
+        self._queues: dict[str, deque[tuple[str | bytes, asyncio.Future[None]]]] = {lane: deque() for lane in LANES}
+        self._writing = False
+        self._task: asyncio.Task[None] | None = None
+        self._error: BaseException | None = None
+
+    def queued(self) -> dict[str, int]:
+        return {lane: len(queue) for lane, queue in self._queues.items()}
+
+    async def send(self, wire: str | bytes, lane: str = LANE_INTERACTIVE) -> None:
+        """Write ``wire``, or queue it on ``lane`` and wait until it is written."""
+        if self._error is not None:
+            raise self._error
+        if not self._writing:
+            self._writing = True
+            try:
+                await self._write(wire)
+            except Exception as exc:
+                self._fail(exc)
+                raise
+            finally:
+                self._writing = False
+                self._drain_queued()
+            return
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queues[lane].append((wire, future))
+        await future
+
+    def close(self, exc: BaseException | None = None) -> None:
+        """Stop writing; queued and later sends fail with ``exc``."""
+        self._fail(exc or ConnectionError("Tunnel closed"))
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def _fail(self, exc: BaseException) -> None:
+        if self._error is None:
+            self._error = exc
+        for queue in self._queues.values():
+            while queue:
+                _wire, future = queue.popleft()
+                if not future.done():
+                    future.set_exception(self._error)
+
+    def _drain_queued(self) -> None:
+        if self._error is None and any(self._queues.values()):
+            self._writing = True
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    def _next(self) -> tuple[str | bytes, asyncio.Future[None]]:
+        for _ in range(2):
+            for lane in LANES:
+                if self._queues[lane] and self._credits[lane] > 0:
+                    self._credits[lane] -= 1
+                    return self._queues[lane].popleft()
+            # Every lane with frames has used its share: next round.
+            self._credits = dict(self._weights)
+        raise RuntimeError("no frames queued")
+
+    async def _drain(self) -> None:
+        try:
+            while self._error is None and any(self._queues.values()):
+                wire, future = self._next()
+                if future.done():
+                    continue  # its sender gave up waiting
+                try:
+                    await self._write(wire)
+                except asyncio.CancelledError:
+                    if not future.done():
+                        future.set_exception(self._error or ConnectionError("Tunnel closed"))
+                    raise
+                except Exception as exc:  # noqa: BLE001 - reported to every sender
+                    if not future.done():
+                        future.set_exception(exc)
+                    self._fail(exc)
+                    return
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            self._writing = False
+
+
+def split_chunks(data: bytes, size: int = STREAM_CHUNK_BYTES) -> Iterable[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+class SendWindow:
+    """Sending half of a stream's flow control."""
+
+    def __init__(self, credit: int = STREAM_WINDOW_BYTES) -> None:
+        self.credit = credit
+        self.cancelled = False
+        self._changed = asyncio.Event()
+
+    def grant(self, amount: int) -> None:
+        self.credit += max(0, int(amount))
+        self._changed.set()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._changed.set()
+
+    async def acquire(self, size: int, timeout: float) -> None:
+        """Wait until ``size`` bytes may be sent, then take them from the credit."""
+        while not self.cancelled and self.credit < size:
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError as exc:
+                raise StreamAborted("Receiver granted no window in time") from exc
+        if self.cancelled:
+            raise StreamAborted("Stream cancelled by the receiver")
+        self.credit -= size
+
+
+class StreamReceiver:
+    """Receiving half of a stream: buffers at most one window of chunks and
+    grants credit back through ``grant`` as ``chunks()`` hands them on."""
+
+    def __init__(self, grant: Callable[[int], Awaitable[None]], window: int = STREAM_WINDOW_BYTES) -> None:
+        self.window = window
+        self.done = False
+        self._grant = grant
+        self._queue: "asyncio.Queue[bytes | BaseException | None]" = asyncio.Queue()
+        self._next_seq = 0
+        self._buffered = 0
+        self._ungranted = 0
+
+    def feed(self, seq: Any, data: bytes) -> None:
+        if seq != self._next_seq:
+            raise StreamAborted(f"Chunk {seq} arrived, expected {self._next_seq}")
+        if self._buffered + len(data) > self.window:
+            raise StreamAborted("Sender overran the stream window")
+        self._next_seq += 1
+        self._buffered += len(data)
+        self._queue.put_nowait(data)
+
+    def finish(self) -> None:
+        self._queue.put_nowait(None)
+
+    def fail(self, exc: BaseException) -> None:
+        self._queue.put_nowait(exc)
+
+    async def chunks(self, timeout: float) -> AsyncIterator[bytes]:
+        """Yield the body in order; raises ``StreamAborted`` if it ends early
+        or the sender goes ``timeout`` seconds without a frame."""
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+            except asyncio.TimeoutError as exc:
+                raise StreamAborted("Sender stalled") from exc
+            if item is None:
+                self.done = True
+                return
+            if isinstance(item, BaseException):
+                raise item
+            self._buffered -= len(item)
+            yield item
+            # Granted only once the consumer is done with the chunk, so a
+            # slow consumer holds the sender back.
+            self._ungranted += len(item)
+            if self._ungranted >= self.window // 2:
+                amount, self._ungranted = self._ungranted, 0
+                await self._grant(amount)
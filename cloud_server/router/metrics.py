@@ -2,13 +2,41 @@
 
 No external metrics dependency — the router is stateless and single-process
 per the architecture doc, so a plain dataclass is sufficient. Exposed via the
-``GET /admin/metrics`` endpoint in ``app.py``.
+``GET /admin/metrics`` endpoint in ``app.py``, as JSON or, for a scraper that
+asks for ``text/plain``, in the Prometheus text format (``render_prometheus``).
+
+Besides the counters, ``traffic`` keeps latency histograms:
+
+- per route, everything a field device waited for (cache hits included). The
+  LAN server's paths are not known here, so segments holding a digit — ids,
+  in practice — become ``{id}`` and at most ``config.MAX_ROUTE_SERIES``
+  routes are tracked before the rest share ``(other)``;
+- per tunnel, the round trip across it: from sending the request to the
+  LAN server's response frame, with bytes each way and requests in flight.
+
+Set beside the LAN server's own histograms (``/api/diagnostics/metrics``),
+which time its handlers and their Mongo commands, these tell the tunnel's
+share of a slow request from the LAN server's. Buckets are fixed and
+logarithmic, 1-2.5-5 per decade from 1 ms to 30 s.
 """
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
-from typing import Any
+import bisect
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterable
+
+from . import config
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0, 30.0,
+)
+
+OTHER_ROUTE = "(other)"
 
 
 @dataclass
@@ -17,7 +45,17 @@ class RouterMetrics:
     total_request_timeouts: int = 0
     total_request_failures_503: int = 0
     total_request_failures_413: int = 0
+    total_streamed_requests: int = 0
+    total_streamed_responses: int = 0
+    total_stream_aborts: int = 0
+    total_cache_hits: int = 0
+    total_cache_revalidations: int = 0
+    total_cache_misses: int = 0
     total_ws_channels_opened: int = 0
+    total_ws_subscribers: int = 0
+    total_ws_slow_consumer_evictions: int = 0
+    total_forwarded_requests: int = 0
+    total_forwarded_ws: int = 0
     total_heartbeat_timeouts: int = 0
     total_register_rejections: int = 0
 
@@ -26,3 +64,206 @@ class RouterMetrics:
 
 
 metrics = RouterMetrics()
+
+
+class LatencyHistogram:
+    """Counts of observations per bucket (plus overflow) and their sum."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float | None:
+        """Estimate the ``q`` quantile (0..1), interpolating within a bucket."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index >= len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                return lower + (LATENCY_BUCKETS[index] - lower) * ((rank - seen) / count)
+            seen += count
+        return LATENCY_BUCKETS[-1]
+
+
+@dataclass(eq=False)
+class TrafficStats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: dict[str, int] = field(default_factory=dict)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    in_flight: int = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.latency.count,
+            "p50": self.latency.quantile(0.5),
+            "p95": self.latency.quantile(0.95),
+            "p99": self.latency.quantile(0.99),
+            "statuses": dict(self.statuses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "in_flight": self.in_flight,
+        }
+
+
+def route_label(path: str) -> str:
+    """``path`` (as routed, no leading slash) with id-like segments folded."""
+    return "/" + "/".join("{id}" if any(c.isdigit() for c in segment) else segment for segment in path.split("/"))
+
+
+class TrafficMetrics:
+    def __init__(self) -> None:
+        self.routes: dict[tuple[str, str], TrafficStats] = {}
+        self.tunnels: dict[str, TrafficStats] = {}
+
+    def _route(self, method: str, route: str) -> TrafficStats:
+        stats = self.routes.get((method, route))
+        if stats is None:
+            if len(self.routes) >= config.MAX_ROUTE_SERIES:
+                route = OTHER_ROUTE
+                stats = self.routes.get((method, route))
+            if stats is None:
+                stats = self.routes[(method, route)] = TrafficStats()
+        return stats
+
+    def request_finished(
+        self, method: str, route: str, status: int, seconds: float, bytes_in: int = 0, bytes_out: int = 0
+    ) -> None:
+        stats = self._route(method, route)
+        stats.latency.observe(seconds)
+        status_class = f"{status // 100}xx"
+        stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+
+    def add_route_bytes_out(self, method: str, route: str, size: int) -> None:
+        self._route(method, route).bytes_out += size
+
+    def tunnel_started(self, connect_code: str, bytes_in: int = 0) -> TrafficStats:
+        """Count a request onto the tunnel; finish it on the returned stats,
+        which outlive a reconnect under the same code."""
+        stats = self.tunnels.get(connect_code)
+        if stats is None:
+            stats = self.tunnels[connect_code] = TrafficStats()
+        stats.in_flight += 1
+        stats.bytes_in += bytes_in
+        return stats
+
+    @staticmethod
+    def tunnel_finished(stats: TrafficStats, status: int, seconds: float, bytes_out: int = 0) -> None:
+        stats.in_flight -= 1
+        stats.latency.observe(seconds)
+        status_class = f"{status // 100}xx"
+        stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+        stats.bytes_out += bytes_out
+
+    def drop_tunnel(self, connect_code: str) -> None:
+        self.tunnels.pop(connect_code, None)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "routes": {f"{method} {route}": stats.snapshot() for (method, route), stats in self.routes.items()},
+            "tunnels": {code: stats.snapshot() for code, stats in self.tunnels.items()},
+        }
+
+    def reset(self) -> None:
+        self.routes.clear()
+        self.tunnels.clear()
+
+
+traffic = TrafficMetrics()
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, histogram: LatencyHistogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def render_prometheus(connections: Iterable[Any], cache_stats: dict[str, int]) -> str:
+    """Counters, histograms and the live queue depths of ``connections`` in
+    the Prometheus text format (0.0.4)."""
+    connections = list(connections)
+    lines: list[str] = []
+    for name, value in metrics.snapshot().items():
+        metric = f"sarapp_router_{name.removeprefix('total_')}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+    lines += [
+        "# HELP sarapp_router_request_duration_seconds Time field devices waited, by route.",
+        "# TYPE sarapp_router_request_duration_seconds histogram",
+    ]
+    routes = sorted(traffic.routes.items())
+    for (method, route), stats in routes:
+        lines += _histogram_lines(
+            "sarapp_router_request_duration_seconds", f'method="{method}",route="{_label(route)}"', stats.latency
+        )
+    lines.append("# TYPE sarapp_router_responses_total counter")
+    for (method, route), stats in routes:
+        for status_class, count in sorted(stats.statuses.items()):
+            lines.append(
+                f'sarapp_router_responses_total{{method="{method}",route="{_label(route)}",status="{status_class}"}} {count}'
+            )
+
+    tunnels = sorted(traffic.tunnels.items())
+    lines += [
+        "# HELP sarapp_router_tunnel_round_trip_seconds Request frame sent to response frame received.",
+        "# TYPE sarapp_router_tunnel_round_trip_seconds histogram",
+    ]
+    for code, stats in tunnels:
+        lines += _histogram_lines("sarapp_router_tunnel_round_trip_seconds", f'connect_code="{_label(code)}"', stats.latency)
+    for metric, attribute, kind in (
+        ("sarapp_router_tunnel_request_bytes_total", "bytes_in", "counter"),
+        ("sarapp_router_tunnel_response_bytes_total", "bytes_out", "counter"),
+        ("sarapp_router_tunnel_requests_in_flight", "in_flight", "gauge"),
+    ):
+        lines.append(f"# TYPE {metric} {kind}")
+        for code, stats in tunnels:
+            lines.append(f'{metric}{{connect_code="{_label(code)}"}} {getattr(stats, attribute)}')
+
+    lines += ["# TYPE sarapp_router_active_tunnels gauge", f"sarapp_router_active_tunnels {len(connections)}"]
+    gauges = {
+        "sarapp_router_tunnel_pending_requests": lambda c: len(c.pending_requests),
+        "sarapp_router_tunnel_ws_channels": lambda c: len(c.ws_channels),
+        "sarapp_router_tunnel_ws_subscribers": lambda c: c.ws_subscriber_count(),
+        "sarapp_router_tunnel_ws_queued_messages": lambda c: sum(
+            subscriber.queue.qsize() for feed in c.shared_feeds.values() for subscriber in feed.subscribers
+        ) + sum(queue.qsize() for queue in c.ws_channels.values()),
+    }
+    for metric, read in gauges.items():
+        lines.append(f"# TYPE {metric} gauge")
+        for connection in connections:
+            lines.append(f'{metric}{{connect_code="{_label(connection.connect_code)}"}} {read(connection)}')
+    lines.append("# TYPE sarapp_router_tunnel_send_queue gauge")
+    for connection in connections:
+        for lane, depth in connection.scheduler.queued().items():
+            lines.append(
+                f'sarapp_router_tunnel_send_queue{{connect_code="{_label(connection.connect_code)}",lane="{lane}"}} {depth}'
+            )
+
+    for name, value in sorted(cache_stats.items()):
+        lines += [f"# TYPE sarapp_router_response_cache_{name} gauge", f"sarapp_router_response_cache_{name} {value}"]
+    return "\n".join(lines) + "\n"
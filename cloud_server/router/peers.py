@@ -0,0 +1,139 @@
+"""Forwarding field-device traffic to the router instance holding a tunnel.
+
+With several router instances behind one load balancer, a field device's
+request lands on any of them, while its LAN server's tunnel is held by one.
+An instance without the tunnel looks up its placement (``state.py``) and
+relays the request over plain HTTP/WebSocket to the holder's internal URL,
+under the same ``/r/<connect_code>/...`` path.
+
+Forwarded requests carry ``HOP_HEADER`` (the forwarding instance's id) and
+the router token, and are never forwarded again: a holder that has since
+lost the tunnel answers them itself, as offline. The field device's address
+travels in ``x-sarapp-client-ip``, which the holder keeps for hop requests
+instead of stamping the forwarding instance's.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import httpx
+from fastapi import Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from websockets.asyncio.client import connect as ws_connect
+
+from .state import Placement
+
+logger = logging.getLogger(__name__)
+
+HOP_HEADER = "x-sarapp-router-hop"
+TOKEN_HEADER = "x-router-token"
+CLIENT_IP_HEADER = "x-sarapp-client-ip"
+
+# Hop-by-hop headers, and the ones httpx/the ASGI server recompute.
+_SKIPPED_REQUEST_HEADERS = {"host", "content-length", "transfer-encoding", "connection", "upgrade"}
+_SKIPPED_RESPONSE_HEADERS = {"content-length", "transfer-encoding", "connection"}
+# Set by the WebSocket client itself.
+_SKIPPED_WS_HEADERS = _SKIPPED_REQUEST_HEADERS | {
+    "sec-websocket-key",
+    "sec-websocket-version",
+    "sec-websocket-extensions",
+    "sec-websocket-protocol",
+}
+
+
+def _peer_headers(headers: Any, skipped: set[str], instance_id: str, token: str, client_ip: str | None) -> dict[str, str]:
+    forwarded = {key: value for key, value in headers.items() if key.lower() not in skipped}
+    forwarded[HOP_HEADER] = instance_id
+    if token:
+        forwarded[TOKEN_HEADER] = token
+    if client_ip:
+        forwarded[CLIENT_IP_HEADER] = client_ip
+    return forwarded
+
+
+async def forward_http(
+    client: httpx.AsyncClient,
+    placement: Placement,
+    path: str,
+    request: Request,
+    *,
+    instance_id: str,
+    token: str,
+    client_ip: str | None,
+) -> Response:
+    url = f"{placement.internal_url.rstrip('/')}/r/{placement.connect_code}/{path}"
+    upstream = client.build_request(
+        request.method,
+        url,
+        params=request.url.query or None,
+        headers=_peer_headers(request.headers, _SKIPPED_REQUEST_HEADERS, instance_id, token, client_ip),
+        content=request.stream(),
+    )
+    try:
+        response = await client.send(upstream, stream=True)
+    except httpx.HTTPError as exc:
+        logger.warning("Forward of %s to router %s failed: %s", placement.connect_code, placement.instance_id, exc)
+        return Response(content=b'{"detail":"Router peer unreachable"}', status_code=502, media_type="application/json")
+    headers = {
+        key: value for key, value in response.headers.items() if key.lower() not in _SKIPPED_RESPONSE_HEADERS
+    }
+    return StreamingResponse(
+        response.aiter_raw(), status_code=response.status_code, headers=headers, background=BackgroundTask(response.aclose)
+    )
+
+
+async def forward_ws(
+    websocket: WebSocket,
+    placement: Placement,
+    path: str,
+    *,
+    instance_id: str,
+    token: str,
+    client_ip: str | None,
+) -> None:
+    base = placement.internal_url.rstrip("/")
+    url = "ws" + base.removeprefix("http") + f"/r/{placement.connect_code}/{path}"
+    if websocket.url.query:
+        url += f"?{websocket.url.query}"
+    headers = _peer_headers(websocket.headers, _SKIPPED_WS_HEADERS, instance_id, token, client_ip)
+    try:
+        upstream = await ws_connect(url, additional_headers=headers)
+    except Exception as exc:  # noqa: BLE001 - any handshake failure means the peer can't serve it
+        logger.warning("WebSocket forward of %s to router %s failed: %s", placement.connect_code, placement.instance_id, exc)
+        await websocket.close(code=1013)
+        return
+
+    await websocket.accept()
+
+    async def _pump_downstream() -> None:
+        async for message in upstream:
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_text(message)
+        await websocket.close(code=upstream.close_code or 1000, reason=upstream.close_reason or "")
+
+    async def _pump_upstream() -> None:
+        while True:
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                return
+            if message.get("text") is not None:
+                await upstream.send(message["text"])
+            elif message.get("bytes") is not None:
+                await upstream.send(message["bytes"])
+
+    tasks = {asyncio.create_task(_pump_downstream()), asyncio.create_task(_pump_upstream())}
+    try:
+        done, _pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled():
+                task.exception()  # a dropped socket on either side; nothing to report
+    finally:
+        for task in tasks:
+            task.cancel()
+        await upstream.close()
@@ -1,29 +1,21 @@
-"""In-memory sliding-window rate limiter.
+"""Sliding-window rate limiter.
 
-Best-effort, single-process protection for ``/tunnel/register`` — not a
-distributed limiter. Fine for the router's stateless, single-instance
-deployment; would need shared state if the router is ever horizontally
-scaled (see ``Design Documents/Instructions/cloud_router_architecture.md``).
+Best-effort protection for ``/tunnel/register``. The window lives in the
+router's state backend (``state.py``): in process for a single instance,
+shared when a fleet of instances points at the same backend, so an attacker
+cannot multiply the limit by spreading attempts across them.
 """
 
 from __future__ import annotations
 
-import time
-from collections import defaultdict, deque
+from .state import LocalState, RouterState
 
 
 class SlidingWindowLimiter:
-    def __init__(self, max_events: int, window_seconds: float) -> None:
+    def __init__(self, max_events: int, window_seconds: float, state: RouterState | None = None) -> None:
         self._max_events = max_events
         self._window_seconds = window_seconds
-        self._events: dict[str, deque[float]] = defaultdict(deque)
+        self._state = state or LocalState()
 
-    def allow(self, key: str) -> bool:
-        now = time.monotonic()
-        events = self._events[key]
-        while events and now - events[0] > self._window_seconds:
-            events.popleft()
-        if len(events) >= self._max_events:
-            return False
-        events.append(now)
-        return True
+    async def allow(self, key: str) -> bool:
+        return await self._state.try_acquire(key, self._max_events, self._window_seconds)
@@ -8,12 +8,23 @@ full tunnel frame protocol these connections speak.
 from __future__ import annotations
 
 import asyncio
-import json
 import time
 from dataclasses import dataclass, field
 from typing import Any
 
 from . import config
+from .frames import (
+    LANE_BULK,
+    LANE_CRITICAL,
+    LANE_INTERACTIVE,
+    PROTOCOL_JSON,
+    LaneScheduler,
+    SendWindow,
+    StreamAborted,
+    StreamReceiver,
+    codec_for,
+    lane_limits,
+)
 
 
 class TunnelUnavailableError(Exception):
@@ -37,21 +48,69 @@ class TunnelConnection:
     server_id: str
     server_name: str
     websocket: Any
+    protocol: int = PROTOCOL_JSON
+    streaming: bool = False
+    # The LAN server's master catalog version (``response_cache``); None
+    # until it first reports one.
+    catalog_version: str | None = None
     connected_at: float = field(default_factory=time.monotonic)
     last_pong_at: float = field(default_factory=time.monotonic)
     pending_requests: dict[str, "asyncio.Future[dict[str, Any]]"] = field(default_factory=dict)
+    # The priority lane of each request counted against its lane's cap
+    # (``frames.lane_for``): until its response, or for a streamed response
+    # until the last chunk.
+    pending_lanes: dict[str, str] = field(default_factory=dict)
     ws_channels: dict[str, "asyncio.Queue[dict[str, Any]]"] = field(default_factory=dict)
-    _send_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
-
-    async def _send(self, frame: dict[str, Any]) -> None:
-        async with self._send_lock:
-            await self.websocket.send_text(json.dumps(frame))
+    # Chunked bodies in flight, keyed by request_id: responses being
+    # received, and request bodies being sent.
+    inbound_streams: dict[str, StreamReceiver] = field(default_factory=dict)
+    send_windows: dict[str, SendWindow] = field(default_factory=dict)
+    # ``fanout.SharedFeed`` per broadcast-only WebSocket path.
+    shared_feeds: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.codec = codec_for(self.protocol)
+        self.scheduler = LaneScheduler(self._write)
+
+    def decode(self, raw: str | bytes) -> dict[str, Any]:
+        """Decode one frame received from this LAN server (raises ``FrameError``)."""
+        return self.codec.decode(raw)
+
+    async def _write(self, wire: str | bytes) -> None:
+        if isinstance(wire, bytes):
+            await self.websocket.send_bytes(wire)
+        else:
+            await self.websocket.send_text(wire)
+
+    async def _send(self, frame: dict[str, Any], lane: str) -> None:
+        await self.scheduler.send(self.codec.encode(frame), lane)
 
     async def send_ping(self) -> None:
-        await self._send({"type": "ping", "ts": time.time()})
+        await self._send({"type": "ping", "ts": time.time()}, LANE_CRITICAL)
 
     def record_pong(self, frame: dict[str, Any]) -> None:
         self.last_pong_at = time.monotonic()
+        self.record_catalog_version(frame.get("catalog_version"))
+
+    def record_catalog_version(self, version: Any) -> None:
+        if version is not None:
+            self.catalog_version = str(version)
+
+    def _reserve_request(self, request_id: str, lane: str) -> "asyncio.Future[dict[str, Any]]":
+        # Each lane has its own share of the cap, so a burst of downloads
+        # cannot use up the slots an emergency update needs.
+        limit = lane_limits(config.MAX_PENDING_REQUESTS_PER_TUNNEL)[lane]
+        if sum(1 for pending_lane in self.pending_lanes.values() if pending_lane == lane) >= limit:
+            raise TunnelBackpressureError(f"LAN server tunnel is at its concurrent {lane} request limit")
+        future: "asyncio.Future[dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self.pending_requests[request_id] = future
+        self.pending_lanes[request_id] = lane
+        return future
+
+    def forget_request(self, request_id: str) -> None:
+        """Stop waiting for a request's response (timed out or abandoned)."""
+        self.pending_requests.pop(request_id, None)
+        self.pending_lanes.pop(request_id, None)
 
     async def send_request(
         self,
@@ -61,13 +120,10 @@ class TunnelConnection:
         path: str,
         query: str,
         headers: dict[str, str],
-        body_b64: str,
+        body: bytes,
+        lane: str = LANE_INTERACTIVE,
     ) -> "asyncio.Future[dict[str, Any]]":
-        if len(self.pending_requests) >= config.MAX_PENDING_REQUESTS_PER_TUNNEL:
-            raise TunnelBackpressureError("LAN server tunnel is at its concurrent request limit")
-        loop = asyncio.get_running_loop()
-        future: "asyncio.Future[dict[str, Any]]" = loop.create_future()
-        self.pending_requests[request_id] = future
+        future = self._reserve_request(request_id, lane)
         await self._send(
             {
                 "type": "request",
@@ -76,17 +132,120 @@ class TunnelConnection:
                 "path": path,
                 "query": query,
                 "headers": headers,
-                "body": body_b64,
-            }
+                "body": body,
+            },
+            lane,
+        )
+        return future
+
+    async def start_streamed_request(
+        self,
+        *,
+        request_id: str,
+        method: str,
+        path: str,
+        query: str,
+        headers: dict[str, str],
+    ) -> "asyncio.Future[dict[str, Any]]":
+        """Like ``send_request``, but the body follows in ``send_request_chunk``
+        calls and an ``end_streamed_request``. Streamed requests ride the
+        bulk lane."""
+        future = self._reserve_request(request_id, LANE_BULK)
+        self.send_windows[request_id] = SendWindow()
+        await self._send(
+            {
+                "type": "request_start",
+                "request_id": request_id,
+                "method": method,
+                "path": path,
+                "query": query,
+                "headers": headers,
+            },
+            LANE_BULK,
         )
         return future
 
+    async def send_request_chunk(self, request_id: str, seq: int, body: bytes) -> None:
+        """Send one body chunk once the LAN server has window for it; raises
+        ``StreamAborted`` if it cancelled the upload."""
+        window = self.send_windows.get(request_id)
+        if window is None:
+            raise StreamAborted("Request stream is closed")
+        await window.acquire(len(body), timeout=config.REQUEST_TIMEOUT_SECONDS)
+        await self._send({"type": "request_chunk", "request_id": request_id, "seq": seq, "body": body}, LANE_BULK)
+
+    async def end_streamed_request(self, request_id: str) -> None:
+        self.send_windows.pop(request_id, None)
+        await self._send({"type": "request_end", "request_id": request_id}, LANE_BULK)
+
+    async def cancel_stream(self, request_id: str) -> None:
+        """Abandon both directions of a streamed request."""
+        window = self.send_windows.pop(request_id, None)
+        if window is not None:
+            window.cancel()
+        self.inbound_streams.pop(request_id, None)
+        self.pending_lanes.pop(request_id, None)
+        try:
+            await self._send({"type": "cancel", "request_id": request_id}, LANE_CRITICAL)
+        except Exception:  # noqa: BLE001 - tunnel may already be gone
+            pass
+
+    async def _grant_window(self, request_id: str, credit: int) -> None:
+        await self._send({"type": "window", "request_id": request_id, "credit": credit}, LANE_CRITICAL)
+
     def resolve_response(self, frame: dict[str, Any]) -> None:
+        """Resolve a request with its ``response``, or with its
+        ``response_start`` carrying the receiver of the chunks to come
+        under ``"stream"``."""
         request_id = frame.get("request_id")
         future = self.pending_requests.pop(request_id, None)
+        if frame.get("type") == "response_start":
+            # The body is still to come, so the request keeps its lane slot
+            # until the stream ends (``dispatch_stream_frame``/``cancel_stream``).
+            if future is None or future.done():
+                # Timed out on this side already; stop the LAN server sending.
+                asyncio.get_running_loop().create_task(self.cancel_stream(request_id))
+                return
+            stream = StreamReceiver(lambda credit: self._grant_window(request_id, credit))
+            self.inbound_streams[request_id] = stream
+            frame["stream"] = stream
+        else:
+            self.pending_lanes.pop(request_id, None)
         if future is not None and not future.done():
             future.set_result(frame)
 
+    def dispatch_stream_frame(self, frame: dict[str, Any]) -> None:
+        """Route a ``response_chunk``/``response_end``/``window``/``cancel`` frame."""
+        request_id = frame.get("request_id")
+        frame_type = frame.get("type")
+        if frame_type == "window":
+            window = self.send_windows.get(request_id)
+            if window is not None:
+                window.grant(frame.get("credit", 0))
+            return
+        if frame_type == "cancel":
+            window = self.send_windows.pop(request_id, None)
+            if window is not None:
+                window.cancel()
+            stream = self.inbound_streams.pop(request_id, None)
+            self.pending_lanes.pop(request_id, None)
+            if stream is not None:
+                stream.fail(StreamAborted("LAN server cancelled the response"))
+            return
+        stream = self.inbound_streams.get(request_id)
+        if stream is None:
+            return
+        if frame_type == "response_end":
+            del self.inbound_streams[request_id]
+            self.pending_lanes.pop(request_id, None)
+            stream.finish()
+            return
+        try:
+            stream.feed(frame.get("seq"), frame.get("body") or b"")
+        except StreamAborted as exc:
+            stream.fail(exc)
+            asyncio.get_running_loop().create_task(self.cancel_stream(request_id))
+
     def register_ws_channel(self, channel_id: str) -> "asyncio.Queue[dict[str, Any]]":
         if len(self.ws_channels) >= config.MAX_WS_CHANNELS_PER_TUNNEL:
             raise TunnelBackpressureError("LAN server tunnel is at its concurrent websocket channel limit")
@@ -95,23 +254,23 @@ class TunnelConnection:
         return queue
 
     async def open_ws_channel(self, channel_id: str, path: str) -> None:
-        await self._send({"type": "ws_open", "channel_id": channel_id, "path": path})
+        await self._send({"type": "ws_open", "channel_id": channel_id, "path": path}, LANE_INTERACTIVE)
 
-    async def send_ws_message(self, channel_id: str, data: str, *, binary: bool) -> None:
-        await self._send({"type": "ws_message", "channel_id": channel_id, "data": data, "binary": binary})
+    async def send_ws_message(self, channel_id: str, data: str | bytes) -> None:
+        """Forward a field-device message; ``bytes`` data is a binary message."""
+        await self._send({"type": "ws_message", "channel_id": channel_id, "data": data}, LANE_INTERACTIVE)
 
     async def send_ws_close(self, channel_id: str) -> None:
         try:
-            await self._send({"type": "ws_close", "channel_id": channel_id})
+            await self._send({"type": "ws_close", "channel_id": channel_id}, LANE_INTERACTIVE)
         except Exception:  # noqa: BLE001 - tunnel may already be gone
             pass
 
     def dispatch_ws_message(self, frame: dict[str, Any]) -> None:
         queue = self.ws_channels.get(frame.get("channel_id"))
         if queue is not None:
-            queue.put_nowait(
-                {"type": "message", "data": frame.get("data", ""), "binary": bool(frame.get("binary"))}
-            )
+            data = frame.get("data", "")
+            queue.put_nowait({"type": "message", "data": data, "binary": isinstance(data, bytes)})
 
     def dispatch_ws_close(self, frame: dict[str, Any]) -> None:
         queue = self.ws_channels.pop(frame.get("channel_id"), None)
@@ -121,6 +280,9 @@ class TunnelConnection:
     def close_ws_channel_locally(self, channel_id: str) -> None:
         self.ws_channels.pop(channel_id, None)
 
+    def ws_subscriber_count(self) -> int:
+        return sum(len(feed.subscribers) for feed in self.shared_feeds.values())
+
     def fail_all(self) -> None:
         """Called once when the tunnel itself drops."""
 
@@ -128,6 +290,14 @@ class TunnelConnection:
             if not future.done():
                 future.set_exception(TunnelUnavailableError("LAN server tunnel disconnected"))
         self.pending_requests.clear()
+        self.pending_lanes.clear()
+        self.scheduler.close(TunnelUnavailableError("LAN server tunnel disconnected"))
+        for stream in self.inbound_streams.values():
+            stream.fail(StreamAborted("LAN server tunnel disconnected"))
+        self.inbound_streams.clear()
+        for window in self.send_windows.values():
+            window.cancel()
+        self.send_windows.clear()
         for queue in self.ws_channels.values():
             queue.put_nowait({"type": "closed", "reason": "tunnel_disconnected", "code": 1001})
         self.ws_channels.clear()
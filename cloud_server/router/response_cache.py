@@ -0,0 +1,117 @@
+"""Per-tunnel cache of master catalog GET responses.
+
+Remote clients fetch the same catalogs (``config.RESPONSE_CACHE_PATHS``:
+master personnel and lists, resource/hazard types, lookups) over and over,
+and each fetch otherwise crosses the LAN server's uplink. The LAN server
+tags catalog responses with an ``ETag`` and its catalog version
+(``X-SARApp-Catalog-Version``), and tells the router whenever that version
+moves (``cache_version`` frames, repeated in every ``pong``). So the router:
+
+- serves a cached copy without touching the tunnel while its version is the
+  tunnel's current one;
+- once the version has moved, revalidates with ``If-None-Match`` — a ``304``
+  costs a header frame instead of the catalog — and re-tags the copy;
+- answers a field device's own ``If-None-Match`` locally.
+
+Entries are keyed by connect code, path, query and the request headers a
+catalog response can depend on (``VARY_HEADERS``), evicted least recently
+used past ``config.RESPONSE_CACHE_MAX_BYTES``, and dropped when their
+tunnel disconnects. ``RESPONSE_CACHE_MAX_BYTES=0`` turns the cache off.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+from fastapi import Response
+
+VERSION_HEADER = "x-sarapp-catalog-version"
+VARY_HEADERS = ("accept", "authorization")
+
+CacheKey = tuple[str, str, str, tuple[str, ...]]
+
+
+@dataclass
+class CachedResponse:
+    headers: dict[str, str]
+    body: bytes
+    etag: str
+    version: str | None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def header(headers: Mapping[str, Any], name: str) -> str | None:
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, paths: tuple[str, ...]) -> None:
+        self.max_bytes = max_bytes
+        self.paths = tuple(path.lstrip("/") for path in paths)
+        self._entries: "OrderedDict[CacheKey, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def is_cacheable(self, method: str, path: str) -> bool:
+        """``path`` as routed, without the leading slash."""
+        return self.enabled and method == "GET" and path.startswith(self.paths)
+
+    @staticmethod
+    def key(connect_code: str, path: str, query: str, headers: Mapping[str, str]) -> CacheKey:
+        return (connect_code, path, query, tuple(headers.get(name, "") for name in VARY_HEADERS))
+
+    def get(self, key: CacheKey) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: CacheKey, entry: CachedResponse) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            # One catalog may not crowd out the rest.
+            if entry.size > self.max_bytes // 4:
+                return
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _key, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def drop_tunnel(self, connect_code: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == connect_code]:
+                self._size -= self._entries.pop(key).size
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+def cached_response(entry: CachedResponse, if_none_match: str | None) -> Response:
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers={"etag": entry.etag})
+    return Response(content=entry.body, status_code=200, headers=entry.headers)
@@ -0,0 +1,165 @@
+"""Router state that several router instances can share.
+
+A single router keeps everything in memory. To run several (one process per
+core, or per node behind a load balancer) they must agree on two things:
+
+- **placements** — which instance holds each connect code's tunnel, and the
+  internal URL its peers reach it at, so a field-device request landing on
+  any instance can be forwarded to the one holding the tunnel (``peers.py``).
+  A placement is claimed when a tunnel registers, renewed with every
+  heartbeat and expires ``config.HEARTBEAT_TIMEOUT_SECONDS`` after the last
+  renewal, so an instance that dies without releasing its placements stops
+  attracting traffic on its own;
+- **rate-limit windows** — so ``/tunnel/register`` attempts are counted
+  across the fleet rather than per instance (``rate_limit.py``).
+
+Backends:
+
+- ``LocalState`` — in process. The default, for a single instance; routers
+  built around the same ``LocalState`` (tests) behave like a fleet.
+- ``MongoState`` — a MongoDB database shared by the fleet, selected with a
+  ``mongodb://`` ``SARAPP_ROUTER_STATE_URL``. pymongo is synchronous, so its
+  calls run on worker threads; its rate limit is approximate (concurrent
+  attempts may both be let through at the boundary).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Protocol
+
+from . import config
+
+
+@dataclass
+class Placement:
+    connect_code: str
+    instance_id: str
+    internal_url: str
+    expires_at: float  # wall-clock seconds; instances share no monotonic clock
+
+
+class RouterState(Protocol):
+    async def claim(self, connect_code: str, instance_id: str, internal_url: str, ttl_seconds: float) -> None:
+        """Record (or renew) ``instance_id`` as the holder of ``connect_code``.
+        The latest registration wins, as it does within one instance."""
+
+    async def release(self, connect_code: str, instance_id: str) -> None:
+        """Drop the placement, unless another instance has claimed it since."""
+
+    async def locate(self, connect_code: str) -> Placement | None:
+        """The live placement of ``connect_code``, if any."""
+
+    async def list_placements(self) -> list[Placement]: ...
+
+    async def try_acquire(self, key: str, max_events: int, window_seconds: float) -> bool:
+        """Record an event for ``key`` unless ``max_events`` already fall in
+        the trailing window; whether it was recorded."""
+
+
+class LocalState:
+    def __init__(self) -> None:
+        self._placements: dict[str, Placement] = {}
+        self._events: dict[str, deque[float]] = defaultdict(deque)
+
+    async def claim(self, connect_code: str, instance_id: str, internal_url: str, ttl_seconds: float) -> None:
+        self._placements[connect_code] = Placement(connect_code, instance_id, internal_url, time.time() + ttl_seconds)
+
+    async def release(self, connect_code: str, instance_id: str) -> None:
+        placement = self._placements.get(connect_code)
+        if placement is not None and placement.instance_id == instance_id:
+            del self._placements[connect_code]
+
+    async def locate(self, connect_code: str) -> Placement | None:
+        placement = self._placements.get(connect_code)
+        if placement is None or placement.expires_at < time.time():
+            return None
+        return placement
+
+    async def list_placements(self) -> list[Placement]:
+        now = time.time()
+        return [placement for placement in self._placements.values() if placement.expires_at >= now]
+
+    async def try_acquire(self, key: str, max_events: int, window_seconds: float) -> bool:
+        now = time.monotonic()
+        events = self._events[key]
+        while events and now - events[0] > window_seconds:
+            events.popleft()
+        if len(events) >= max_events:
+            return False
+        events.append(now)
+        return True
+
+
+class MongoState:
+    def __init__(self, url: str, database: str = "sarapp_router") -> None:
+        from pymongo import ASCENDING, MongoClient
+
+        self._client: Any = MongoClient(url, serverSelectionTimeoutMS=5000)
+        db = self._client[database]
+        self._placements = db["tunnel_placements"]
+        self._events = db["rate_limit_events"]
+        # Mongo's TTL monitor sweeps expired documents about once a minute;
+        # reads filter on expiry themselves.
+        self._placements.create_index("expires_at", expireAfterSeconds=0)
+        self._events.create_index("expires_at", expireAfterSeconds=0)
+        self._events.create_index([("key", ASCENDING), ("at", ASCENDING)])
+
+    @staticmethod
+    def _placement(doc: dict[str, Any]) -> Placement:
+        return Placement(
+            connect_code=doc["_id"],
+            instance_id=doc["instance_id"],
+            internal_url=doc["internal_url"],
+            expires_at=doc["expires_at"].replace(tzinfo=timezone.utc).timestamp(),
+        )
+
+    async def claim(self, connect_code: str, instance_id: str, internal_url: str, ttl_seconds: float) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        await asyncio.to_thread(
+            self._placements.replace_one,
+            {"_id": connect_code},
+            {"instance_id": instance_id, "internal_url": internal_url, "expires_at": expires_at},
+            upsert=True,
+        )
+
+    async def release(self, connect_code: str, instance_id: str) -> None:
+        await asyncio.to_thread(self._placements.delete_one, {"_id": connect_code, "instance_id": instance_id})
+
+    async def locate(self, connect_code: str) -> Placement | None:
+        doc = await asyncio.to_thread(
+            self._placements.find_one, {"_id": connect_code, "expires_at": {"$gte": datetime.now(timezone.utc)}}
+        )
+        return self._placement(doc) if doc else None
+
+    async def list_placements(self) -> list[Placement]:
+        def _list() -> list[dict[str, Any]]:
+            return list(self._placements.find({"expires_at": {"$gte": datetime.now(timezone.utc)}}))
+
+        return [self._placement(doc) for doc in await asyncio.to_thread(_list)]
+
+    async def try_acquire(self, key: str, max_events: int, window_seconds: float) -> bool:
+        def _acquire() -> bool:
+            now = datetime.now(timezone.utc)
+            since = now - timedelta(seconds=window_seconds)
+            if self._events.count_documents({"key": key, "at": {"$gt": since}}) >= max_events:
+                return False
+            self._events.insert_one({"key": key, "at": now, "expires_at": now + timedelta(seconds=window_seconds)})
+            return True
+
+        return await asyncio.to_thread(_acquire)
+
+
+def state_from_config() -> RouterState:
+    """The backend ``config.STATE_URL`` selects: a fresh ``LocalState`` when
+    unset, ``MongoState`` for a ``mongodb://``/``mongodb+srv://`` URL."""
+    url = config.STATE_URL
+    if not url:
+        return LocalState()
+    if url.startswith(("mongodb://", "mongodb+srv://")):
+        return MongoState(url)
+    raise ValueError(f"Unsupported SARAPP_ROUTER_STATE_URL scheme: {url.split(':', 1)[0]!r}")
@@ -1,7 +1,8 @@
 """SARApp cloud router runtime.
 
-Runs as a headless service. Unlike a LAN server, this process has no MongoDB
-connection and runs no ``sarapp_db`` routers — it is a stateless reverse
+Runs as a headless service. Unlike a LAN server, this process runs no
+``sarapp_db`` routers and needs no MongoDB of its own (only a shared one
+when several instances run, see ``router/state.py``) — it is a reverse
 proxy that forwards field-device traffic to whichever LAN server has
 registered a reverse tunnel under a given connect code. See
 ``Design Documents/Instructions/cloud_router_architecture.md``.
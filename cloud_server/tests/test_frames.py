@@ -0,0 +1,191 @@
+"""Unit tests for the tunnel frame codecs and stream flow control."""
+
+import asyncio
+import json
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from router.frames import (
+    HEADER_SIZE,
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    BinaryCodec,
+    FrameError,
+    LANE_BULK,
+    LANE_CRITICAL,
+    LANE_INTERACTIVE,
+    JsonCodec,
+    LaneScheduler,
+    SendWindow,
+    StreamAborted,
+    StreamReceiver,
+    lane_for,
+    lane_limits,
+    negotiate,
+)
+
+_REQUEST = {
+    "type": "request",
+    "request_id": "0123456789abcdef0123456789abcdef",
+    "method": "POST",
+    "path": "/api/upload",
+    "query": "a=1",
+    "headers": {"content-type": "application/octet-stream"},
+    "body": b"\x00\x01binary\xff",
+}
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), BinaryCodec()])
+def test_codecs_round_trip_frames(codec) -> None:
+    assert codec.decode(codec.encode(_REQUEST)) == _REQUEST
+    channel = "fedcba9876543210fedcba9876543210"
+    text = codec.decode(codec.encode({"type": "ws_message", "channel_id": channel, "data": "hi"}))
+    assert text["data"] == "hi" and not text["binary"]
+    raw = codec.decode(codec.encode({"type": "ws_message", "channel_id": channel, "data": b"\xff"}))
+    assert raw["data"] == b"\xff" and raw["binary"]
+    assert codec.decode(codec.encode({"type": "ping", "ts": 1.5})) == {"type": "ping", "ts": 1.5}
+
+
+def test_json_codec_speaks_the_v1_wire_format() -> None:
+    wire = json.loads(JsonCodec().encode(_REQUEST))
+    assert wire["body"] == "AAFiaW5hcnn/"
+    v1_message = json.dumps({"type": "ws_message", "channel_id": "c", "binary": True, "data": "/w=="})
+    assert JsonCodec().decode(v1_message)["data"] == b"\xff"
+
+
+def test_binary_codec_sends_the_body_raw() -> None:
+    wire = BinaryCodec().encode(_REQUEST)
+    assert wire[0] == PROTOCOL_BINARY and wire.endswith(_REQUEST["body"])
+    assert bytes.fromhex(_REQUEST["request_id"]) == wire[4:20]
+    assert len(wire) < HEADER_SIZE + len(JsonCodec().encode(_REQUEST))
+
+
+def test_binary_codec_rejects_malformed_frames() -> None:
+    codec = BinaryCodec()
+    with pytest.raises(FrameError):
+        codec.decode(b"\x02\x01")
+    with pytest.raises(FrameError):
+        codec.decode(b"\x09" + codec.encode({"type": "ping"})[1:])
+    with pytest.raises(FrameError):
+        codec.encode({"type": "ws_open", "channel_id": "not-hex"})
+    with pytest.raises(FrameError):
+        codec.decode("text")
+
+
+def test_negotiate_picks_the_highest_shared_protocol() -> None:
+    assert negotiate([PROTOCOL_JSON, PROTOCOL_BINARY]) == PROTOCOL_BINARY
+    assert negotiate([PROTOCOL_JSON, 99]) == PROTOCOL_JSON
+    assert negotiate(None) == PROTOCOL_JSON
+    assert negotiate(["x"]) == PROTOCOL_JSON
+
+
+def test_lan_server_copy_matches() -> None:
+    root = pathlib.Path(__file__).resolve().parents[2]
+    router_copy = root / "cloud_server" / "router" / "frames.py"
+    lan_copy = root / "lan_server" / "tunnel_frames.py"
+    assert router_copy.read_text(encoding="utf-8") == lan_copy.read_text(encoding="utf-8")
+
+
+def test_stream_receiver_orders_bounds_and_grants_window() -> None:
+    async def _run() -> None:
+        granted: list[int] = []
+
+        async def _grant(credit: int) -> None:
+            granted.append(credit)
+
+        stream = StreamReceiver(_grant, window=8)
+        stream.feed(0, b"abcd")
+        stream.feed(1, b"efgh")
+        with pytest.raises(StreamAborted):
+            stream.feed(2, b"i")  # window full until something is consumed
+        with pytest.raises(StreamAborted):
+            stream.feed(5, b"")
+        stream.finish()
+        assert [chunk async for chunk in stream.chunks(timeout=1)] == [b"abcd", b"efgh"]
+        assert stream.done and granted == [4, 4]
+
+    asyncio.run(_run())
+
+
+def test_send_window_waits_for_credit_and_stops_on_cancel() -> None:
+    async def _run() -> None:
+        window = SendWindow(credit=4)
+        await window.acquire(4, timeout=1)
+        waiter = asyncio.create_task(window.acquire(2, timeout=1))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        window.grant(2)
+        await waiter
+        with pytest.raises(StreamAborted):
+            await window.acquire(1, timeout=0.01)
+        window.cancel()
+        with pytest.raises(StreamAborted):
+            await window.acquire(0, timeout=1)
+
+    asyncio.run(_run())
+
+
+def test_lane_for_classifies_requests() -> None:
+    assert lane_for("POST", "/api/mobile/location") == LANE_CRITICAL
+    assert lane_for("PATCH", "/api/incidents/7/operations/teams/3/status") == LANE_CRITICAL
+    assert lane_for("GET", "/api/incidents/7/operations/teams/3/status") == LANE_INTERACTIVE
+    assert lane_for("GET", "/api/incidents/7/attachments/9/download") == LANE_BULK
+    assert lane_for("GET", "/api/incidents/7/snapshot") == LANE_BULK
+    assert lane_for("POST", "/api/mobile/location", streamed=True) == LANE_BULK
+    assert lane_for("GET", "/api/incidents") == LANE_INTERACTIVE
+
+
+def test_lane_limits_reserve_a_share_for_critical_work() -> None:
+    assert lane_limits(200) == {LANE_CRITICAL: 50, LANE_INTERACTIVE: 125, LANE_BULK: 25}
+    assert all(limit >= 1 for limit in lane_limits(1).values())
+
+
+def test_lane_scheduler_puts_critical_frames_ahead_of_queued_bulk() -> None:
+    async def _run() -> None:
+        written: list[str] = []
+        gate = asyncio.Event()
+
+        async def _write(wire: str) -> None:
+            if not written:
+                await gate.wait()  # hold the first write so the rest queue
+            written.append(wire)
+
+        scheduler = LaneScheduler(_write)
+        sends = [asyncio.create_task(scheduler.send("bulk-0", LANE_BULK))]
+        await asyncio.sleep(0)
+        sends += [asyncio.create_task(scheduler.send(f"bulk-{n}", LANE_BULK)) for n in range(1, 4)]
+        sends += [asyncio.create_task(scheduler.send(f"crit-{n}", LANE_CRITICAL)) for n in range(2)]
+        await asyncio.sleep(0)
+        assert scheduler.queued() == {LANE_CRITICAL: 2, LANE_INTERACTIVE: 0, LANE_BULK: 3}
+
+        gate.set()
+        await asyncio.gather(*sends)
+        assert written == ["bulk-0", "crit-0", "crit-1", "bulk-1", "bulk-2", "bulk-3"]
+
+    asyncio.run(_run())
+
+
+def test_lane_scheduler_fails_queued_sends_when_closed() -> None:
+    async def _run() -> None:
+        gate = asyncio.Event()
+
+        async def _write(wire: str) -> None:
+            await gate.wait()
+
+        scheduler = LaneScheduler(_write)
+        first = asyncio.create_task(scheduler.send("a", LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(scheduler.send("b", LANE_INTERACTIVE))
+        await asyncio.sleep(0)
+        scheduler.close(ConnectionError("gone"))
+        with pytest.raises(ConnectionError):
+            await queued
+        with pytest.raises(ConnectionError):
+            await scheduler.send("c", LANE_CRITICAL)
+        first.cancel()
+
+    asyncio.run(_run())
@@ -0,0 +1,44 @@
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+from router import config
+from router.metrics import OTHER_ROUTE, LatencyHistogram, TrafficMetrics, route_label
+
+
+def test_histogram_quantiles_interpolate_within_log_buckets() -> None:
+    histogram = LatencyHistogram()
+    assert histogram.quantile(0.5) is None
+    for _ in range(90):
+        histogram.observe(0.003)  # (0.0025, 0.005]
+    for _ in range(10):
+        histogram.observe(0.4)  # (0.25, 0.5]
+
+    assert histogram.count == 100
+    assert 0.0025 < histogram.quantile(0.5) <= 0.005
+    assert 0.25 < histogram.quantile(0.99) <= 0.5
+    histogram.observe(120.0)
+    assert histogram.counts[-1] == 1
+
+
+def test_route_labels_fold_ids_and_series_are_capped(monkeypatch) -> None:
+    assert route_label("api/incidents/2024-017/tasks/5") == "/api/incidents/{id}/tasks/{id}"
+    assert route_label("api/hazard-types") == "/api/hazard-types"
+
+    monkeypatch.setattr(config, "MAX_ROUTE_SERIES", 2)
+    traffic = TrafficMetrics()
+    for route in ("/a", "/b", "/c", "/d"):
+        traffic.request_finished("GET", route, 200, 0.01)
+    assert set(traffic.routes) == {("GET", "/a"), ("GET", "/b"), ("GET", OTHER_ROUTE)}
+    assert traffic.routes[("GET", OTHER_ROUTE)].latency.count == 2
+
+
+def test_tunnel_stats_survive_a_reconnect_mid_request() -> None:
+    traffic = TrafficMetrics()
+    stats = traffic.tunnel_started("CODE", bytes_in=10)
+    traffic.drop_tunnel("CODE")
+    traffic.tunnel_finished(stats, 200, 0.02, bytes_out=5)
+
+    assert "CODE" not in traffic.tunnels
+    assert stats.in_flight == 0 and stats.latency.count == 1
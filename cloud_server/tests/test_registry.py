@@ -8,6 +8,7 @@ sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
 import pytest
 
 from router import config
+from router.frames import LANE_BULK, LANE_CRITICAL
 from router.registry import (
     TunnelBackpressureError,
     TunnelConnection,
@@ -28,7 +29,7 @@ def test_send_request_and_resolve_response() -> None:
     async def _run() -> None:
         conn = TunnelConnection(connect_code="X", server_id="s", server_name="n", websocket=_FakeWebSocket())
         future = await conn.send_request(
-            request_id="r1", method="GET", path="/x", query="", headers={}, body_b64=""
+            request_id="r1", method="GET", path="/x", query="", headers={}, body=b""
         )
         assert json.loads(conn.websocket.sent[0])["type"] == "request"
         conn.resolve_response({"request_id": "r1", "status": 200, "headers": {}, "body": ""})
@@ -42,7 +43,7 @@ def test_fail_all_rejects_pending_requests() -> None:
     async def _run() -> None:
         conn = TunnelConnection(connect_code="X", server_id="s", server_name="n", websocket=_FakeWebSocket())
         future = await conn.send_request(
-            request_id="r1", method="GET", path="/x", query="", headers={}, body_b64=""
+            request_id="r1", method="GET", path="/x", query="", headers={}, body=b""
         )
         conn.fail_all()
         with pytest.raises(TunnelUnavailableError):
@@ -81,9 +82,61 @@ def test_send_request_raises_backpressure_at_cap(monkeypatch) -> None:
 
     async def _run() -> None:
         conn = TunnelConnection(connect_code="X", server_id="s", server_name="n", websocket=_FakeWebSocket())
-        await conn.send_request(request_id="r1", method="GET", path="/x", query="", headers={}, body_b64="")
+        await conn.send_request(request_id="r1", method="GET", path="/x", query="", headers={}, body=b"")
         with pytest.raises(TunnelBackpressureError):
-            await conn.send_request(request_id="r2", method="GET", path="/x", query="", headers={}, body_b64="")
+            await conn.send_request(request_id="r2", method="GET", path="/x", query="", headers={}, body=b"")
+
+    asyncio.run(_run())
+
+
+def test_request_caps_are_per_lane(monkeypatch) -> None:
+    monkeypatch.setattr(config, "MAX_PENDING_REQUESTS_PER_TUNNEL", 8)
+
+    async def _run() -> None:
+        conn = TunnelConnection(connect_code="X", server_id="s", server_name="n", websocket=_FakeWebSocket())
+        # A quarter of the cap is reserved for critical requests, an eighth for bulk.
+        await conn.send_request(
+            request_id="d1", method="GET", path="/a/download", query="", headers={}, body=b"", lane=LANE_BULK
+        )
+        with pytest.raises(TunnelBackpressureError):
+            await conn.send_request(
+                request_id="d2", method="GET", path="/b/download", query="", headers={}, body=b"", lane=LANE_BULK
+            )
+        await conn.send_request(
+            request_id="c1", method="POST", path="/api/mobile/location", query="", headers={}, body=b"", lane=LANE_CRITICAL
+        )
+
+        conn.forget_request("d1")
+        await conn.send_request(
+            request_id="d3", method="GET", path="/c/download", query="", headers={}, body=b"", lane=LANE_BULK
+        )
+        assert conn.pending_lanes == {"c1": LANE_CRITICAL, "d3": LANE_BULK}
+
+    asyncio.run(_run())
+
+
+def test_streamed_response_holds_its_lane_until_the_last_chunk(monkeypatch) -> None:
+    monkeypatch.setattr(config, "MAX_PENDING_REQUESTS_PER_TUNNEL", 8)
+
+    async def _run() -> None:
+        conn = TunnelConnection(connect_code="X", server_id="s", server_name="n", websocket=_FakeWebSocket())
+
+        async def _download(request_id: str) -> None:
+            await conn.send_request(
+                request_id=request_id, method="GET", path="/a/download", query="", headers={}, body=b"",
+                lane=LANE_BULK,
+            )
+
+        await _download("d1")
+        conn.resolve_response({"type": "response_start", "request_id": "d1", "status": 200, "headers": {}})
+        with pytest.raises(TunnelBackpressureError):
+            await _download("d2")
+
+        conn.dispatch_stream_frame({"type": "response_end", "request_id": "d1"})
+        await _download("d3")
+        conn.resolve_response({"type": "response_start", "request_id": "d3", "status": 200, "headers": {}})
+        await conn.cancel_stream("d3")
+        assert conn.pending_lanes == {}
 
     asyncio.run(_run())
 
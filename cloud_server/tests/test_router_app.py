@@ -22,6 +22,10 @@ from fastapi.testclient import TestClient
 
 from router import config
 from router.app import create_router_app
+from router.frames import PROTOCOL_BINARY, PROTOCOL_JSON, STREAM_CHUNK_BYTES, STREAM_WINDOW_BYTES, BinaryCodec
+from router.metrics import metrics, traffic
+from router.registry import TunnelRegistry
+from router.state import LocalState
 
 
 class ASGIWebSocketSession:
@@ -68,6 +72,14 @@ class ASGIWebSocketSession:
     async def send_text(self, text: str) -> None:
         await self._to_app.put({"type": "websocket.receive", "text": text})
 
+    async def send_bytes(self, data: bytes) -> None:
+        await self._to_app.put({"type": "websocket.receive", "bytes": data})
+
+    async def receive_bytes(self) -> bytes:
+        message = await self._from_app.get()
+        assert message["type"] == "websocket.send"
+        return message["bytes"]
+
     async def receive_text(self) -> str:
         message = await self._from_app.get()
         assert message["type"] == "websocket.send"
@@ -85,22 +97,31 @@ class ASGIWebSocketSession:
                 pass
 
 
-async def _open_registered_tunnel(app, connect_code: str, token: str = "") -> ASGIWebSocketSession:
+async def _open_registered_tunnel(
+    app,
+    connect_code: str,
+    token: str = "",
+    protocols: list[int] | None = None,
+    features: list[str] | None = None,
+) -> ASGIWebSocketSession:
     tunnel = ASGIWebSocketSession(app, "/tunnel/register")
     await tunnel.connect()
-    await tunnel.send_text(
-        json.dumps(
-            {
-                "type": "register",
-                "connect_code": connect_code,
-                "server_id": "srv-1",
-                "server_name": "Test LAN Server",
-                "token": token,
-            }
-        )
-    )
+    register = {
+        "type": "register",
+        "connect_code": connect_code,
+        "server_id": "srv-1",
+        "server_name": "Test LAN Server",
+        "token": token,
+    }
+    if protocols is not None:
+        register["protocols"] = protocols
+    if features is not None:
+        register["features"] = features
+    await tunnel.send_text(json.dumps(register))
     ack = json.loads(await tunnel.receive_text())
     assert ack["type"] == "registered"
+    assert ack["protocol"] == (PROTOCOL_JSON if protocols is None else max(protocols))
+    assert ack["features"] == (features or [])
     return tunnel
 
 
@@ -156,12 +177,14 @@ def test_ws_proxy_round_trip() -> None:
         app = create_router_app()
         tunnel = await _open_registered_tunnel(app, "TEST-0002")
 
-        field_ws = ASGIWebSocketSession(app, "/r/TEST-0002/api/incidents/TEST-1/ws")
+        # Any socket but an incident feed is relayed one channel per socket
+        # (incident feeds are shared; see the fan-out tests below).
+        field_ws = ASGIWebSocketSession(app, "/r/TEST-0002/api/relay/ws")
         await field_ws.connect()
 
         open_frame = json.loads(await tunnel.receive_text())
         assert open_frame["type"] == "ws_open"
-        assert open_frame["path"] == "/api/incidents/TEST-1/ws"
+        assert open_frame["path"] == "/api/relay/ws"
         channel_id = open_frame["channel_id"]
 
         await tunnel.send_text(
@@ -195,6 +218,251 @@ def test_ws_proxy_round_trip() -> None:
     asyncio.run(_run())
 
 
+def test_binary_protocol_round_trip_carries_raw_bodies() -> None:
+    codec = BinaryCodec()
+    payload = bytes(range(256)) * 4
+
+    async def _run() -> None:
+        app = create_router_app()
+        tunnel = await _open_registered_tunnel(app, "TEST-0003", protocols=[PROTOCOL_BINARY, PROTOCOL_JSON])
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            request_task = asyncio.create_task(client.post("/r/TEST-0003/api/upload", content=payload))
+
+            request_frame = codec.decode(await tunnel.receive_bytes())
+            assert request_frame["type"] == "request"
+            assert request_frame["path"] == "/api/upload"
+            assert request_frame["body"] == payload
+
+            await tunnel.send_bytes(
+                codec.encode(
+                    {
+                        "type": "response",
+                        "request_id": request_frame["request_id"],
+                        "status": 201,
+                        "headers": {"content-type": "application/octet-stream"},
+                        "body": payload[::-1],
+                    }
+                )
+            )
+            response = await request_task
+            assert response.status_code == 201
+            assert response.content == payload[::-1]
+
+        field_ws = ASGIWebSocketSession(app, "/r/TEST-0003/api/relay/ws")
+        await field_ws.connect()
+        channel_id = codec.decode(await tunnel.receive_bytes())["channel_id"]
+
+        await tunnel.send_bytes(codec.encode({"type": "ws_message", "channel_id": channel_id, "data": b"\x00\xff"}))
+        assert await field_ws.receive_bytes() == b"\x00\xff"
+        await tunnel.send_bytes(codec.encode({"type": "ws_message", "channel_id": channel_id, "data": "text"}))
+        assert await field_ws.receive_text() == "text"
+
+        await field_ws.send_bytes(b"\x01\x02")
+        upstream = codec.decode(await tunnel.receive_bytes())
+        assert upstream["data"] == b"\x01\x02" and upstream["binary"] is True
+
+        await field_ws.close()
+        await tunnel.close()
+
+    asyncio.run(_run())
+
+
+def test_streamed_bodies_flow_under_window_control(monkeypatch) -> None:
+    # Streamed bodies bypass the single-frame cap entirely.
+    monkeypatch.setattr(config, "MAX_REQUEST_BODY_BYTES", 1024)
+    codec = BinaryCodec()
+    upload = bytes(range(256)) * 1600  # 400 KiB: more than one window
+    download = b"pdf-page " * 50_000
+
+    async def _run() -> None:
+        app = create_router_app()
+        tunnel = await _open_registered_tunnel(
+            app, "TEST-STREAM", protocols=[PROTOCOL_BINARY], features=["stream"]
+        )
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            request_task = asyncio.create_task(client.post("/r/TEST-STREAM/api/attachments", content=upload))
+
+            start = codec.decode(await tunnel.receive_bytes())
+            assert start["type"] == "request_start" and start["path"] == "/api/attachments"
+            request_id = start["request_id"]
+
+            received = b""
+            while len(received) < STREAM_WINDOW_BYTES:
+                chunk = codec.decode(await tunnel.receive_bytes())
+                assert chunk["type"] == "request_chunk" and len(chunk["body"]) <= STREAM_CHUNK_BYTES
+                received += chunk["body"]
+            # The router stops at the window until the LAN side grants more.
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(tunnel.receive_bytes(), timeout=0.1)
+            await tunnel.send_bytes(codec.encode({"type": "window", "request_id": request_id, "credit": len(received)}))
+            while True:
+                frame = codec.decode(await tunnel.receive_bytes())
+                if frame["type"] == "request_end":
+                    break
+                received += frame["body"]
+            assert received == upload
+
+            await tunnel.send_bytes(
+                codec.encode({"type": "response_start", "request_id": request_id, "status": 200, "headers": {}})
+            )
+            for seq, offset in enumerate(range(0, len(download), STREAM_CHUNK_BYTES)):
+                body = download[offset:offset + STREAM_CHUNK_BYTES]
+                await tunnel.send_bytes(
+                    codec.encode({"type": "response_chunk", "request_id": request_id, "seq": seq, "body": body})
+                )
+                # The router grants credit back as the field device reads.
+                if (seq + 1) * STREAM_CHUNK_BYTES % (STREAM_WINDOW_BYTES // 2) == 0:
+                    grant = codec.decode(await tunnel.receive_bytes())
+                    assert grant["type"] == "window" and grant["credit"] == STREAM_WINDOW_BYTES // 2
+            await tunnel.send_bytes(codec.encode({"type": "response_end", "request_id": request_id}))
+
+            response = await request_task
+            assert response.status_code == 200
+            assert response.content == download
+
+        await tunnel.close()
+
+    asyncio.run(_run())
+
+
+def test_incident_feed_is_shared_by_remote_subscribers() -> None:
+    async def _run() -> None:
+        app = create_router_app()
+        tunnel = await _open_registered_tunnel(app, "TEST-FAN")
+
+        viewers = [ASGIWebSocketSession(app, "/r/TEST-FAN/api/incidents/TEST-1/ws") for _ in range(3)]
+        for viewer in viewers:
+            await viewer.connect()
+        open_frame = json.loads(await tunnel.receive_text())
+        assert open_frame["type"] == "ws_open" and open_frame["path"] == "/api/incidents/TEST-1/ws"
+        channel_id = open_frame["channel_id"]
+
+        event = json.dumps({"collection": "tasks", "op": "updated"})
+        await tunnel.send_text(json.dumps({"type": "ws_message", "channel_id": channel_id, "data": event}))
+        for viewer in viewers:
+            assert await viewer.receive_text() == event
+
+        # Viewer traffic and departures stay at the router until the last one leaves.
+        await viewers[0].send_text("keepalive")
+        await viewers[0].close()
+        await viewers[1].close()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(tunnel.receive_text(), timeout=0.1)
+        await viewers[2].close()
+        close_frame = json.loads(await tunnel.receive_text())
+        assert close_frame == {"type": "ws_close", "channel_id": channel_id}
+
+        await tunnel.close()
+
+    asyncio.run(_run())
+
+
+def test_incident_feed_evicts_slow_subscriber(monkeypatch) -> None:
+    monkeypatch.setattr(config, "WS_FANOUT_QUEUE_SIZE", 2)
+
+    async def _run() -> None:
+        app = create_router_app()
+        tunnel = await _open_registered_tunnel(app, "TEST-SLOW")
+        fast = ASGIWebSocketSession(app, "/r/TEST-SLOW/api/incidents/TEST-1/ws")
+        slow = ASGIWebSocketSession(app, "/r/TEST-SLOW/api/incidents/TEST-1/ws")
+        await fast.connect()
+        channel_id = json.loads(await tunnel.receive_text())["channel_id"]
+        await slow.connect()
+
+        # Stall the slow viewer's socket so its queue backs up.
+        stalled = asyncio.Event()
+        original_put = slow._from_app.put
+
+        async def _stalled_put(message):
+            if message["type"] == "websocket.send":
+                await stalled.wait()
+            await original_put(message)
+
+        slow._from_app.put = _stalled_put
+
+        for n in range(6):
+            await tunnel.send_text(json.dumps({"type": "ws_message", "channel_id": channel_id, "data": str(n)}))
+            assert await fast.receive_text() == str(n)
+
+        stalled.set()
+        messages = [await slow.receive_raw() for _ in range(2)]
+        while messages[-1]["type"] != "websocket.close":
+            messages.append(await slow.receive_raw())
+        assert messages[-1]["code"] == 1013 and messages[-1]["reason"] == "slow_consumer"
+
+        await tunnel.send_text(json.dumps({"type": "ws_message", "channel_id": channel_id, "data": "after"}))
+        assert await fast.receive_text() == "after"
+
+        await fast.close()
+        await tunnel.close()
+
+    asyncio.run(_run())
+
+
+def test_catalog_gets_are_served_from_the_router_cache() -> None:
+    async def _run() -> None:
+        app = create_router_app()
+        tunnel = await _open_registered_tunnel(app, "TEST-CACHE")
+        catalog = b'[{"id": 1, "name": "Heat"}]'
+
+        async def _answer(status: int, version: str, body: bytes = b"") -> dict:
+            request_frame = json.loads(await tunnel.receive_text())
+            await tunnel.send_text(
+                json.dumps(
+                    {
+                        "type": "response",
+                        "request_id": request_frame["request_id"],
+                        "status": status,
+                        "headers": {"etag": '"v1"', "x-sarapp-catalog-version": version},
+                        "body": base64.b64encode(body).decode("ascii"),
+                    }
+                )
+            )
+            return request_frame
+
+        async def _no_tunnel_trip() -> None:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(tunnel.receive_text(), timeout=0.1)
+
+        await tunnel.send_text(json.dumps({"type": "cache_version", "version": 5}))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            url = "/r/TEST-CACHE/api/hazard-types"
+            first_task = asyncio.create_task(client.get(url, headers={"If-None-Match": '"stale"'}))
+            first_frame = await _answer(200, "5", catalog)
+            assert "if-none-match" not in first_frame["headers"]
+            assert (await first_task).content == catalog
+
+            second = await client.get(url)
+            await _no_tunnel_trip()
+            assert second.status_code == 200 and second.content == catalog
+            assert (await client.get(url, headers={"If-None-Match": '"v1"'})).status_code == 304
+
+            # A catalog write on the LAN server moves the version: the next
+            # load revalidates, and an unchanged catalog costs only a 304.
+            await tunnel.send_text(json.dumps({"type": "pong", "ts": 0, "catalog_version": 6}))
+            await asyncio.sleep(0.01)
+            third_task = asyncio.create_task(client.get(url))
+            third_frame = await _answer(304, "6")
+            assert third_frame["headers"]["if-none-match"] == '"v1"'
+            assert (await third_task).content == catalog
+            assert (await client.get(url)).content == catalog
+            await _no_tunnel_trip()
+
+            # Paths off the allow-list always go to the LAN server.
+            other_task = asyncio.create_task(client.get("/r/TEST-CACHE/api/incidents"))
+            await _answer(200, "6", b"[]")
+            await other_task
+
+        await tunnel.close()
+
+    asyncio.run(_run())
+
+
 def test_heartbeat_timeout_disconnects_stale_tunnel_and_fails_pending(monkeypatch) -> None:
     monkeypatch.setattr(config, "HEARTBEAT_INTERVAL_SECONDS", 0.05)
     monkeypatch.setattr(config, "HEARTBEAT_TIMEOUT_SECONDS", 0.3)
@@ -254,6 +522,41 @@ def test_request_backpressure_returns_503(monkeypatch) -> None:
     asyncio.run(_run())
 
 
+def test_streaming_download_holds_the_bulk_lane_until_it_ends(monkeypatch) -> None:
+    monkeypatch.setattr(config, "MAX_PENDING_REQUESTS_PER_TUNNEL", 8)  # one bulk slot
+
+    async def _run() -> None:
+        registry = TunnelRegistry()
+        app = create_router_app(tunnel_registry=registry)
+        tunnel = await _open_registered_tunnel(app, "TEST-BULK")
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            first = asyncio.create_task(client.get("/r/TEST-BULK/api/exports/1/download"))
+            request_id = json.loads(await tunnel.receive_text())["request_id"]
+            await tunnel.send_text(
+                json.dumps({"type": "response_start", "request_id": request_id, "status": 200, "headers": {}})
+            )
+            await tunnel.send_text(
+                json.dumps({"type": "response_chunk", "request_id": request_id, "seq": 0, "body": "cGFydA=="})
+            )
+
+            connection = registry.get("TEST-BULK")
+            while request_id not in connection.inbound_streams:
+                await asyncio.sleep(0.01)
+            # Headers are out but the body is not: the slot is still taken.
+            second = await client.get("/r/TEST-BULK/api/exports/2/download")
+            assert second.status_code == 503
+
+            await tunnel.send_text(json.dumps({"type": "response_end", "request_id": request_id}))
+            assert (await first).content == b"part"
+            assert connection.pending_lanes == {}
+
+        await tunnel.close()
+
+    asyncio.run(_run())
+
+
 def test_oversized_body_returns_413() -> None:
     async def _run() -> None:
         app = create_router_app()
@@ -288,6 +591,7 @@ def test_admin_endpoints_require_token(monkeypatch) -> None:
             assert authorized.status_code == 200
             body = authorized.json()
             assert any(t["connect_code"] == "TEST-ADMIN" for t in body["tunnels"])
+            assert body["instance_id"] == config.INSTANCE_ID
 
             metrics_response = await client.get(
                 "/admin/metrics", headers={"X-Router-Token": "secret-token"}
@@ -300,6 +604,53 @@ def test_admin_endpoints_require_token(monkeypatch) -> None:
     asyncio.run(_run())
 
 
+def test_admin_metrics_exports_latency_histograms_to_prometheus(monkeypatch) -> None:
+    monkeypatch.setenv("SARAPP_CLOUD_ROUTER_TOKEN", "secret-token")
+    traffic.reset()
+
+    async def _run() -> None:
+        app = create_router_app()
+        tunnel = await _open_registered_tunnel(app, "TEST-PROM", token="secret-token")
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            request_task = asyncio.create_task(client.get("/r/TEST-PROM/api/incidents/42/tasks"))
+            request_frame = json.loads(await tunnel.receive_text())
+            await tunnel.send_text(
+                json.dumps(
+                    {
+                        "type": "response",
+                        "request_id": request_frame["request_id"],
+                        "status": 200,
+                        "headers": {},
+                        "body": base64.b64encode(b"[1, 2, 3]").decode("ascii"),
+                    }
+                )
+            )
+            assert (await request_task).status_code == 200
+
+            text = await client.get(
+                "/admin/metrics", headers={"X-Router-Token": "secret-token", "Accept": "text/plain"}
+            )
+            assert text.headers["content-type"].startswith("text/plain")
+            body = text.text
+            assert 'sarapp_router_request_duration_seconds_count{method="GET",route="/api/incidents/{id}/tasks"} 1' in body
+            assert 'sarapp_router_tunnel_round_trip_seconds_count{connect_code="TEST-PROM"} 1' in body
+            assert 'sarapp_router_tunnel_response_bytes_total{connect_code="TEST-PROM"} 9' in body
+            assert 'sarapp_router_tunnel_requests_in_flight{connect_code="TEST-PROM"} 0' in body
+            assert 'sarapp_router_tunnel_pending_requests{connect_code="TEST-PROM"} 0' in body
+            assert "sarapp_router_requests_total " in body
+
+            as_json = (await client.get("/admin/metrics", headers={"X-Router-Token": "secret-token"})).json()
+            route = as_json["latency"]["routes"]["GET /api/incidents/{id}/tasks"]
+            assert route["count"] == 1 and route["statuses"] == {"2xx": 1}
+
+        await tunnel.close()
+        assert "TEST-PROM" not in traffic.tunnels
+
+    asyncio.run(_run())
+
+
 def test_register_rate_limit_rejects_excess_attempts(monkeypatch) -> None:
     monkeypatch.setattr(config, "REGISTER_RATE_LIMIT_PER_MINUTE", 2)
 
@@ -321,6 +672,95 @@ def test_register_rate_limit_rejects_excess_attempts(monkeypatch) -> None:
     asyncio.run(_run())
 
 
+def test_register_rate_limit_is_shared_across_instances(monkeypatch) -> None:
+    monkeypatch.setattr(config, "REGISTER_RATE_LIMIT_PER_MINUTE", 2)
+
+    async def _run() -> None:
+        state = LocalState()
+        app_a = create_router_app(tunnel_registry=TunnelRegistry(), state=state, instance_id="router-a")
+        app_b = create_router_app(tunnel_registry=TunnelRegistry(), state=state, instance_id="router-b")
+
+        for i, app in enumerate((app_a, app_b)):
+            tunnel = await _open_registered_tunnel(app, f"RLS-{i}")
+            await tunnel.close()
+
+        tunnel = ASGIWebSocketSession(app_a, "/tunnel/register")
+        message = await tunnel.start()
+        assert message["type"] == "websocket.close"
+        assert message.get("code") == 1013
+
+    asyncio.run(_run())
+
+
+def test_http_request_is_forwarded_to_the_instance_holding_the_tunnel(monkeypatch) -> None:
+    monkeypatch.setenv("SARAPP_CLOUD_ROUTER_TOKEN", "secret-token")
+
+    async def _run() -> None:
+        state = LocalState()
+        app_b = create_router_app(
+            tunnel_registry=TunnelRegistry(), state=state, instance_id="router-b", internal_url="http://router-b"
+        )
+        app_a = create_router_app(
+            tunnel_registry=TunnelRegistry(),
+            state=state,
+            instance_id="router-a",
+            internal_url="http://router-a",
+            peer_transport=httpx.ASGITransport(app=app_b),
+        )
+        tunnel = await _open_registered_tunnel(app_b, "TEST-FWD", token="secret-token")
+        assert (await state.locate("TEST-FWD")).instance_id == "router-b"
+
+        before = metrics.total_forwarded_requests
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app_a), base_url="http://testserver") as client:
+            request_task = asyncio.create_task(client.post("/r/TEST-FWD/api/reports?x=1", content=b"hello"))
+
+            request_frame = json.loads(await tunnel.receive_text())
+            assert request_frame["method"] == "POST"
+            assert request_frame["path"] == "/api/reports"
+            assert request_frame["query"] == "x=1"
+            assert base64.b64decode(request_frame["body"]) == b"hello"
+            # The field device's address survives the hop.
+            assert request_frame["headers"]["x-sarapp-client-ip"] == "127.0.0.1"
+            # The router-to-router headers, the shared secret among them, do not.
+            assert "x-router-token" not in request_frame["headers"]
+            assert "x-sarapp-router-hop" not in request_frame["headers"]
+
+            await tunnel.send_text(
+                json.dumps(
+                    {
+                        "type": "response",
+                        "request_id": request_frame["request_id"],
+                        "status": 201,
+                        "headers": {"content-type": "application/json"},
+                        "body": base64.b64encode(b'{"ok": true}').decode("ascii"),
+                    }
+                )
+            )
+            response = await request_task
+            assert response.status_code == 201
+            assert response.json() == {"ok": True}
+        assert metrics.total_forwarded_requests == before + 1
+
+        await tunnel.close()
+        assert await state.locate("TEST-FWD") is None
+
+    asyncio.run(_run())
+
+
+def test_forwarded_requests_are_not_forwarded_again() -> None:
+    async def _run() -> None:
+        state = LocalState()
+        # A stale placement pointing back at the forwarding instance's peer.
+        await state.claim("TEST-LOOP", "router-b", "http://router-b", ttl_seconds=30)
+        app = create_router_app(tunnel_registry=TunnelRegistry(), state=state, instance_id="router-a")
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            response = await client.get("/r/TEST-LOOP/api/health-check", headers={"x-sarapp-router-hop": "router-b"})
+        assert response.status_code == 503
+
+    asyncio.run(_run())
+
+
 def test_dashboard_page_served_without_auth() -> None:
     app = create_router_app()
     client = TestClient(app)
@@ -0,0 +1,58 @@
+import asyncio
+import pathlib
+import sys
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from router import config
+from router.state import LocalState, state_from_config
+
+
+def test_placements_are_claimed_renewed_and_released() -> None:
+    async def _run() -> None:
+        state = LocalState()
+        await state.claim("CODE-1", "router-a", "http://router-a", ttl_seconds=30)
+        placement = await state.locate("CODE-1")
+        assert placement is not None and placement.instance_id == "router-a"
+
+        # The latest registration wins; the old holder's release is a no-op.
+        await state.claim("CODE-1", "router-b", "http://router-b", ttl_seconds=30)
+        await state.release("CODE-1", "router-a")
+        assert (await state.locate("CODE-1")).instance_id == "router-b"
+
+        await state.release("CODE-1", "router-b")
+        assert await state.locate("CODE-1") is None
+
+    asyncio.run(_run())
+
+
+def test_placements_expire_without_renewal() -> None:
+    async def _run() -> None:
+        state = LocalState()
+        await state.claim("CODE-2", "router-a", "http://router-a", ttl_seconds=-1)
+        assert await state.locate("CODE-2") is None
+        assert await state.list_placements() == []
+
+    asyncio.run(_run())
+
+
+def test_try_acquire_limits_events_per_key() -> None:
+    async def _run() -> None:
+        state = LocalState()
+        assert await state.try_acquire("10.0.0.1", max_events=2, window_seconds=60)
+        assert await state.try_acquire("10.0.0.1", max_events=2, window_seconds=60)
+        assert not await state.try_acquire("10.0.0.1", max_events=2, window_seconds=60)
+        assert await state.try_acquire("10.0.0.2", max_events=2, window_seconds=60)
+
+    asyncio.run(_run())
+
+
+def test_state_from_config_rejects_unknown_schemes(monkeypatch) -> None:
+    monkeypatch.setattr(config, "STATE_URL", "")
+    assert isinstance(state_from_config(), LocalState)
+
+    monkeypatch.setattr(config, "STATE_URL", "redis://cache:6379")
+    with pytest.raises(ValueError):
+        state_from_config()
@@ -1,7 +1,9 @@
 """SARApp connectivity framework."""
 
+from .backoff import Backoff
 from .connection_manager import ConnectionManager, build_cloud_url
 from .discovery import DiscoveryBroadcaster, DiscoveryClient
+from .health_monitor import HealthMonitor
 from .heartbeat import HeartbeatTracker
 from .local_server_controller import LocalServerController, LocalServerError, PortUnavailableError
 from .server_info import (
@@ -10,11 +12,13 @@ from .server_info import (
     ConnectionSnapshot,
     ConnectionState,
     DEFAULT_SERVER_PORT,
+    ProbeResult,
     ServerInfo,
     ServerStatus,
 )
 
 __all__ = [
+    "Backoff",
     "ConnectionHealth",
     "ConnectionManager",
     "ConnectionMode",
@@ -23,10 +27,12 @@ __all__ = [
     "DEFAULT_SERVER_PORT",
     "DiscoveryBroadcaster",
     "DiscoveryClient",
+    "HealthMonitor",
     "HeartbeatTracker",
     "LocalServerController",
     "LocalServerError",
     "PortUnavailableError",
+    "ProbeResult",
     "ServerInfo",
     "ServerStatus",
     "build_cloud_url",
@@ -0,0 +1,43 @@
+"""Jittered exponential backoff for SARApp reconnect loops.
+
+Fixed retry delays make every client that lost the same server retry in
+lockstep, and make a client wait the full delay even after a one-off blip.
+:class:`Backoff` starts short, doubles per consecutive failure up to a cap,
+and randomizes each delay over its upper half ("equal jitter") so clients
+spread out without ever retrying in a tight loop.
+"""
+
+from __future__ import annotations
+
+import random
+from collections.abc import Callable
+
+
+class Backoff:
+    """Delay schedule for consecutive failures; ``reset`` after a success."""
+
+    def __init__(
+        self,
+        *,
+        base_seconds: float = 0.25,
+        max_seconds: float = 30.0,
+        factor: float = 2.0,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.factor = factor
+        self._rng = rng
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        """Seconds to wait before the next attempt."""
+
+        ceiling = min(self.max_seconds, self.base_seconds * self.factor ** self.attempts)
+        if ceiling < self.max_seconds:
+            # Stop growing at the cap so a long outage cannot overflow the power.
+            self.attempts += 1
+        return ceiling / 2 + self._rng() * ceiling / 2
+
+    def reset(self) -> None:
+        self.attempts = 0
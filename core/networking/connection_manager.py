@@ -3,27 +3,44 @@
 The rest of the application should depend on :class:`ConnectionManager` state
 instead of knowing whether a server was found via LAN broadcast, cloud health
 checks, manual entry, or offline fallback.
+
+Endpoints are probed in parallel: at startup the first server path to answer
+wins, and afterwards a :class:`~.health_monitor.HealthMonitor` tracks the
+round-trip time of every known path, fails over as soon as the active one
+stops answering, and moves to a clearly faster one when it appears.
 """
 
 from __future__ import annotations
 
 import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import replace
-from typing import Protocol
+from typing import TYPE_CHECKING, Protocol
+from urllib.parse import urlparse
 
 import httpx
 
 from .discovery import DiscoveryClient
 from .heartbeat import HeartbeatTracker
 from .server_info import (
+    DEFAULT_LOCAL_SERVER_NAME,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+    HEALTH_PATH,
     ConnectionHealth,
     ConnectionMode,
     ConnectionSnapshot,
     ConnectionState,
+    ProbeResult,
     ServerInfo,
     utc_now,
 )
 
+if TYPE_CHECKING:
+    from .health_monitor import HealthMonitor
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,10 +77,14 @@ class ConnectionManager:
         cloud_url: str | None = None,
         request_timeout_seconds: float = 2.0,
         heartbeat_timeout_seconds: float = 10.0,
+        include_local_server: bool = True,
     ) -> None:
         self.discovery_client = discovery_client or DiscoveryClient()
         self.cloud_url = cloud_url
         self.request_timeout_seconds = request_timeout_seconds
+        # Probe a server already listening on this machine (e.g. the one
+        # Offline Mode launched last session) alongside LAN and cloud.
+        self.include_local_server = include_local_server
         self.heartbeats = HeartbeatTracker(timeout_seconds=heartbeat_timeout_seconds)
         self._snapshot = ConnectionSnapshot(
             state=ConnectionState.DISCONNECTED,
@@ -72,32 +93,35 @@ class ConnectionManager:
             message="Not connected",
         )
         self._listeners: list[SnapshotListener] = []
+        self._monitor: HealthMonitor | None = None
 
     @property
     def snapshot(self) -> ConnectionSnapshot:
         return self._snapshot
 
     def add_listener(self, listener: SnapshotListener) -> None:
+        """Listeners run on the thread that changed the snapshot, which is the
+        health monitor's thread after startup; Qt code goes through
+        ``utils.connection_relay.gui_relay`` instead."""
+
         self._listeners.append(listener)
 
     def startup_connect(
         self, *, discovery_timeout_seconds: float = 3.0
     ) -> ConnectionSnapshot:
-        """Run the launch workflow: LAN discovery, cloud fallback, offline prompt state."""
+        """Run the launch workflow: race LAN discovery against probes of every
+        known endpoint (cloud included) and connect to the first that answers;
+        otherwise expose the offline prompt state."""
 
         self._set_snapshot(
             ConnectionState.DISCOVERING,
             None,
             ConnectionHealth.UNKNOWN,
-            "Searching LAN for SARApp Servers",
+            "Searching for SARApp Servers",
         )
-        servers = self.discover_servers(timeout_seconds=discovery_timeout_seconds)
-        if servers:
-            return self.connect_to_server(servers[0], mode=ConnectionMode.LAN)
-
-        cloud_snapshot = self.try_cloud_connection()
-        if cloud_snapshot.is_connected:
-            return cloud_snapshot
+        result = self.race_endpoints(discovery_timeout_seconds=discovery_timeout_seconds)
+        if result is not None:
+            return self.switch_to(result)
 
         # Do not silently switch to offline: the UI decides whether the user
         # accepts Offline Mode, but the manager clearly exposes that it is valid.
@@ -109,12 +133,135 @@ class ConnectionManager:
         )
         return self.snapshot
 
-    def discover_servers(self, *, timeout_seconds: float = 3.0) -> list[ServerInfo]:
-        servers = self.discovery_client.discover(timeout_seconds=timeout_seconds)
+    def discover_servers(self, *, timeout_seconds: float = 3.0, until_first: bool = False) -> list[ServerInfo]:
+        servers = self.discovery_client.discover(timeout_seconds=timeout_seconds, until_first=until_first)
         for server in servers:
             self.heartbeats.observe(server)
         return servers
 
+    def cloud_server(self) -> ServerInfo | None:
+        """The cloud path as a server record, if a cloud URL is configured."""
+
+        if not self.cloud_url:
+            return None
+        parsed = urlparse(self.cloud_url)
+        # Keep the full URL (scheme + host + any /r/<connect-code> path) as the
+        # host so ServerInfo.base_url routes API traffic through the cloud
+        # router's tunnel path instead of the bare hostname.
+        return ServerInfo(
+            server_id="cloud",
+            server_name="SARApp Cloud",
+            host=self.cloud_url.rstrip("/"),
+            port=parsed.port or (443 if parsed.scheme == "https" else 80),
+        )
+
+    def candidate_endpoints(self) -> list[tuple[ServerInfo, ConnectionMode]]:
+        """Every server path worth probing: LAN servers heard or connected to
+        so far, a server on this machine, and the cloud."""
+
+        endpoints: dict[str, tuple[ServerInfo, ConnectionMode]] = {}
+        for server in self.heartbeats.known_servers():
+            mode = ConnectionMode.CLOUD if server.server_id == "cloud" else ConnectionMode.LAN
+            endpoints.setdefault(server.base_url, (server, mode))
+        if self.include_local_server:
+            local = DiscoveryClient.manual_server(DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT, name=DEFAULT_LOCAL_SERVER_NAME)
+            endpoints.setdefault(local.base_url, (local, ConnectionMode.LAN))
+        cloud = self.cloud_server()
+        if cloud is not None:
+            endpoints.setdefault(cloud.base_url, (cloud, ConnectionMode.CLOUD))
+        return list(endpoints.values())
+
+    def probe(self, base_url: str, *, timeout_seconds: float | None = None) -> float | None:
+        """Round-trip time of one health check in seconds, or None if the
+        server did not answer with a 2xx in time."""
+
+        started = time.perf_counter()
+        try:
+            response = httpx.get(
+                f"{base_url}{HEALTH_PATH}",
+                timeout=self.request_timeout_seconds if timeout_seconds is None else timeout_seconds,
+            )
+        except httpx.HTTPError as exc:
+            logger.info("SARApp server health check failed for %s: %s", base_url, exc)
+            return None
+        if not 200 <= response.status_code < 300:
+            return None
+        return time.perf_counter() - started
+
+    def probe_endpoints(
+        self,
+        endpoints: list[tuple[ServerInfo, ConnectionMode]] | None = None,
+        *,
+        discovery_timeout_seconds: float = 0.0,
+        timeout_seconds: float | None = None,
+    ) -> list[ProbeResult]:
+        """Probe ``endpoints`` (default: all candidates), plus any LAN server
+        heard within ``discovery_timeout_seconds``, in parallel. Returns the
+        ones that answered, fastest first."""
+
+        return self._probe_parallel(endpoints, discovery_timeout_seconds, timeout_seconds, first_only=False)
+
+    def race_endpoints(
+        self,
+        endpoints: list[tuple[ServerInfo, ConnectionMode]] | None = None,
+        *,
+        discovery_timeout_seconds: float = 0.0,
+        timeout_seconds: float | None = None,
+    ) -> ProbeResult | None:
+        """Like :meth:`probe_endpoints`, but return the first path to answer
+        without waiting for the rest."""
+
+        results = self._probe_parallel(endpoints, discovery_timeout_seconds, timeout_seconds, first_only=True)
+        return results[0] if results else None
+
+    def _probe_parallel(
+        self,
+        endpoints: list[tuple[ServerInfo, ConnectionMode]] | None,
+        discovery_timeout_seconds: float,
+        timeout_seconds: float | None,
+        *,
+        first_only: bool,
+    ) -> list[ProbeResult]:
+        if endpoints is None:
+            endpoints = self.candidate_endpoints()
+        known_urls = {server.base_url for server, _mode in endpoints}
+
+        def _probe_one(server: ServerInfo, mode: ConnectionMode) -> list[ProbeResult]:
+            rtt = self.probe(server.base_url, timeout_seconds=timeout_seconds)
+            return [] if rtt is None else [ProbeResult(server, mode, rtt)]
+
+        def _discover() -> list[ProbeResult]:
+            try:
+                servers = self.discover_servers(timeout_seconds=discovery_timeout_seconds, until_first=first_only)
+            except OSError as exc:
+                logger.info("SARApp LAN discovery failed: %s", exc)
+                return []
+            results: list[ProbeResult] = []
+            for server in servers:
+                if server.base_url not in known_urls:
+                    results += _probe_one(server, ConnectionMode.LAN)
+            return results
+
+        tasks: list[Callable[[], list[ProbeResult]]] = [
+            lambda server=server, mode=mode: _probe_one(server, mode) for server, mode in endpoints
+        ]
+        if discovery_timeout_seconds > 0:
+            tasks.append(_discover)
+        if not tasks:
+            return []
+
+        results: list[ProbeResult] = []
+        pool = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="sarapp-probe")
+        try:
+            for future in as_completed([pool.submit(task) for task in tasks]):
+                results += future.result()
+                if first_only and results:
+                    break
+        finally:
+            # Stragglers finish on their own, bounded by the probe timeout.
+            pool.shutdown(wait=False, cancel_futures=True)
+        return sorted(results, key=lambda result: result.rtt_seconds)
+
     def connect_to_server(
         self, server: ServerInfo, *, mode: ConnectionMode
     ) -> ConnectionSnapshot:
@@ -125,7 +272,8 @@ class ConnectionManager:
             f"Connecting to {server.server_name}",
             server,
         )
-        if not self._check_server_health(server.base_url):
+        rtt = self.probe(server.base_url)
+        if rtt is None:
             self._set_snapshot(
                 ConnectionState.DISCONNECTED,
                 None,
@@ -134,19 +282,27 @@ class ConnectionManager:
                 server,
             )
             return self.snapshot
-        connected = replace(server, connected_timestamp=utc_now(), last_heartbeat=utc_now())
+        return self.switch_to(ProbeResult(server, mode, rtt))
+
+    def switch_to(self, result: ProbeResult, *, reason: str = "") -> ConnectionSnapshot:
+        """Make a probed path the active connection."""
+
+        connected = replace(result.server, connected_timestamp=utc_now(), last_heartbeat=utc_now())
         self.heartbeats.observe(connected)
         state = (
             ConnectionState.CONNECTED_LAN
-            if mode == ConnectionMode.LAN
+            if result.mode == ConnectionMode.LAN
             else ConnectionState.CONNECTED_CLOUD
         )
+        message = f"Connected to {connected.server_name}"
+        if reason:
+            message = f"{message} ({reason})"
+        self._set_snapshot(state, result.mode, ConnectionHealth.HEALTHY, message, connected)
+        return self.snapshot
+
+    def mark_disconnected(self, message: str) -> ConnectionSnapshot:
         self._set_snapshot(
-            state,
-            mode,
-            ConnectionHealth.HEALTHY,
-            f"Connected to {connected.server_name}",
-            connected,
+            ConnectionState.DISCONNECTED, None, ConnectionHealth.DISCONNECTED, message, self.snapshot.server
         )
         return self.snapshot
 
@@ -156,7 +312,8 @@ class ConnectionManager:
         return self.connect_to_server(DiscoveryClient.manual_server(host, port), mode=ConnectionMode.LAN)
 
     def try_cloud_connection(self) -> ConnectionSnapshot:
-        if not self.cloud_url:
+        cloud = self.cloud_server()
+        if cloud is None:
             self._set_snapshot(
                 ConnectionState.DISCONNECTED,
                 None,
@@ -164,19 +321,8 @@ class ConnectionManager:
                 "Cloud URL is not configured",
             )
             return self.snapshot
-        from urllib.parse import urlparse
-        _parsed = urlparse(self.cloud_url)
-        _cloud_port = _parsed.port or (443 if _parsed.scheme == "https" else 80)
-        # Keep the full URL (scheme + host + any /r/<connect-code> path) as the
-        # host so ServerInfo.base_url routes API traffic through the cloud
-        # router's tunnel path instead of the bare hostname.
-        cloud = ServerInfo(
-            server_id="cloud",
-            server_name="SARApp Cloud",
-            host=self.cloud_url.rstrip("/"),
-            port=_cloud_port,
-        )
-        if not self._check_server_health(self.cloud_url.rstrip("/")):
+        rtt = self.probe(cloud.base_url)
+        if rtt is None:
             self._set_snapshot(
                 ConnectionState.DISCONNECTED,
                 None,
@@ -184,21 +330,30 @@ class ConnectionManager:
                 "Cloud is unavailable",
             )
             return self.snapshot
-        self._set_snapshot(
-            ConnectionState.CONNECTED_CLOUD,
-            ConnectionMode.CLOUD,
-            ConnectionHealth.HEALTHY,
-            "Connected to SARApp Cloud",
-            cloud,
-        )
-        return self.snapshot
+        return self.switch_to(ProbeResult(cloud, ConnectionMode.CLOUD, rtt))
 
     def enter_offline_mode(self) -> ConnectionSnapshot:
         self._set_snapshot(ConnectionState.OFFLINE, ConnectionMode.OFFLINE, ConnectionHealth.DISCONNECTED, "Offline Mode active")
         return self.snapshot
 
+    def start_health_monitor(self, **options: float) -> "HealthMonitor":
+        """Start (once) the background RTT monitor that drives failover;
+        ``options`` go to :class:`~.health_monitor.HealthMonitor`."""
+
+        from .health_monitor import HealthMonitor
+
+        if self._monitor is None:
+            self._monitor = HealthMonitor(self, **options)
+            self._monitor.start()
+        return self._monitor
+
+    def stop_health_monitor(self) -> None:
+        if self._monitor is not None:
+            self._monitor.stop()
+            self._monitor = None
+
     def refresh_health(self) -> ConnectionSnapshot:
-        """Update health from heartbeat age; future failover can hook in here."""
+        """Update health from heartbeat age; the health monitor keeps it fresh."""
 
         server = self.snapshot.server
         if server is None:
@@ -211,12 +366,7 @@ class ConnectionManager:
         return self.snapshot
 
     def _check_server_health(self, base_url: str) -> bool:
-        try:
-            response = httpx.get(f"{base_url}/health", timeout=self.request_timeout_seconds)
-            return 200 <= response.status_code < 300
-        except httpx.HTTPError as exc:
-            logger.info("SARApp server health check failed for %s: %s", base_url, exc)
-            return False
+        return self.probe(base_url) is not None
 
     def _set_snapshot(
         self,
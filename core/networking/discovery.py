@@ -90,8 +90,9 @@ class DiscoveryClient:
         self.port = port
         self.bind_host = bind_host
 
-    def discover(self, *, timeout_seconds: float = 3.0) -> list[ServerInfo]:
-        """Return unique servers heard during the timeout window."""
+    def discover(self, *, timeout_seconds: float = 3.0, until_first: bool = False) -> list[ServerInfo]:
+        """Return unique servers heard during the timeout window, or as soon
+        as the first one is heard with ``until_first``."""
 
         servers: dict[str, ServerInfo] = {}
         deadline = time.monotonic() + timeout_seconds
@@ -110,6 +111,8 @@ class DiscoveryClient:
                 server = self._decode_packet(data, address[0])
                 if server is not None:
                     servers[server.server_id] = server
+                    if until_first:
+                        break
         return list(servers.values())
 
     @staticmethod
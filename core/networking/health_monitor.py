@@ -0,0 +1,191 @@
+"""Background health monitoring and failover for the active server path.
+
+The monitor probes the active server every ``interval_seconds`` and keeps an
+exponentially weighted round-trip time per path. Every
+``survey_interval_seconds`` it also probes every other known path (and
+listens ``survey_discovery_seconds`` for new LAN announcements), so it
+always knows what it could fail over to and how fast each alternative is:
+
+- the active path stops answering -> race the alternatives, first answer
+  wins; after ``failures_before_disconnect`` misses with no alternative the
+  connection is reported as lost;
+- an alternative is consistently faster by ``switch_ratio`` and at least
+  ``min_gain_seconds`` -> switch to it (e.g. back to the LAN server once it
+  is reachable again after a cloud failover);
+- disconnected -> keep racing every path on a jittered backoff.
+
+Offline Mode is the user's explicit choice, so the monitor leaves it alone.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from .backoff import Backoff
+from .server_info import ConnectionMode, ConnectionState, ProbeResult, ServerInfo
+
+if TYPE_CHECKING:
+    from .connection_manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Tracks per-path RTT and drives :class:`ConnectionManager` failover."""
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        *,
+        interval_seconds: float = 0.5,
+        probe_timeout_seconds: float = 0.5,
+        survey_interval_seconds: float = 5.0,
+        survey_discovery_seconds: float = 0.5,
+        discovery_timeout_seconds: float = 2.0,
+        switch_ratio: float = 0.6,
+        min_gain_seconds: float = 0.02,
+        failures_before_disconnect: int = 3,
+        rtt_weight: float = 0.3,
+    ) -> None:
+        self.manager = manager
+        self.interval_seconds = interval_seconds
+        self.probe_timeout_seconds = probe_timeout_seconds
+        self.survey_interval_seconds = survey_interval_seconds
+        self.survey_discovery_seconds = survey_discovery_seconds
+        self.discovery_timeout_seconds = discovery_timeout_seconds
+        self.switch_ratio = switch_ratio
+        self.min_gain_seconds = min_gain_seconds
+        self.failures_before_disconnect = failures_before_disconnect
+        self.rtt_weight = rtt_weight
+        self.backoff = Backoff(max_seconds=15.0)
+        self._rtt: dict[str, float] = {}
+        self._failures = 0
+        self._next_survey = 0.0
+        self._retry_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sarapp-health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.probe_timeout_seconds + self.discovery_timeout_seconds + 1.0)
+
+    def rtt_for(self, base_url: str) -> float | None:
+        """Smoothed round-trip time of a path, if it has answered."""
+
+        return self._rtt.get(base_url)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.check_once()
+            except Exception:  # noqa: BLE001 - the monitor must outlive any one bad probe
+                logger.exception("SARApp health monitor check failed")
+            self._stop_event.wait(self.interval_seconds)
+
+    def check_once(self, *, now: float | None = None) -> None:
+        """One monitoring step; the thread calls this every interval."""
+
+        now = time.monotonic() if now is None else now
+        snapshot = self.manager.snapshot
+        if snapshot.mode == ConnectionMode.OFFLINE or snapshot.state in {
+            ConnectionState.DISCOVERING,
+            ConnectionState.CONNECTING,
+        }:
+            return
+        if snapshot.is_connected and snapshot.server is not None:
+            self._check_active(snapshot.server, now)
+        else:
+            self._reconnect(now)
+
+    def _record(self, base_url: str, rtt: float) -> float:
+        previous = self._rtt.get(base_url)
+        smoothed = rtt if previous is None else previous + self.rtt_weight * (rtt - previous)
+        self._rtt[base_url] = smoothed
+        return smoothed
+
+    def _alternatives(self, active_url: str) -> list[tuple[ServerInfo, ConnectionMode]]:
+        return [
+            (server, mode)
+            for server, mode in self.manager.candidate_endpoints()
+            if server.base_url != active_url
+        ]
+
+    def _check_active(self, server: ServerInfo, now: float) -> None:
+        rtt = self.manager.probe(server.base_url, timeout_seconds=self.probe_timeout_seconds)
+        if rtt is None:
+            self._failures += 1
+            self._rtt.pop(server.base_url, None)
+            result = self.manager.race_endpoints(
+                self._alternatives(server.base_url), timeout_seconds=self.probe_timeout_seconds
+            )
+            if result is not None:
+                logger.warning("%s stopped answering; failing over to %s", server.server_name, result.server.server_name)
+                self._adopt(result, "failover")
+            elif self._failures >= self.failures_before_disconnect:
+                logger.warning("Lost connection to %s and no other server path answers", server.server_name)
+                self.manager.mark_disconnected(f"Lost connection to {server.server_name}")
+                self._retry_at = now + self.backoff.next_delay()
+            return
+
+        self._failures = 0
+        active_rtt = self._record(server.base_url, rtt)
+        self.manager.heartbeats.observe(server)
+        if now < self._next_survey:
+            return
+        self._next_survey = now + self.survey_interval_seconds
+        results = self.manager.probe_endpoints(
+            self._alternatives(server.base_url),
+            discovery_timeout_seconds=self.survey_discovery_seconds,
+            timeout_seconds=self.probe_timeout_seconds,
+        )
+        best: tuple[ProbeResult, float] | None = None
+        for result in results:
+            smoothed = self._record(result.server.base_url, result.rtt_seconds)
+            if best is None or smoothed < best[1]:
+                best = (result, smoothed)
+        if best is None:
+            return
+        result, best_rtt = best
+        if best_rtt <= active_rtt * self.switch_ratio and active_rtt - best_rtt >= self.min_gain_seconds:
+            logger.info(
+                "Switching from %s (%.0f ms) to %s (%.0f ms)",
+                server.server_name,
+                active_rtt * 1000,
+                result.server.server_name,
+                best_rtt * 1000,
+            )
+            self._adopt(result, "lower latency")
+
+    def _reconnect(self, now: float) -> None:
+        if now < self._retry_at:
+            return
+        result = self.manager.race_endpoints(
+            discovery_timeout_seconds=self.discovery_timeout_seconds,
+            timeout_seconds=self.probe_timeout_seconds,
+        )
+        if result is None:
+            self._retry_at = now + self.backoff.next_delay()
+            return
+        logger.info("Reconnected to %s", result.server.server_name)
+        self._adopt(result, "reconnected")
+
+    def _adopt(self, result: ProbeResult, reason: str) -> None:
+        # The user may have chosen Offline Mode while the probes ran.
+        if self.manager.snapshot.mode == ConnectionMode.OFFLINE:
+            return
+        self._record(result.server.base_url, result.rtt_seconds)
+        self.manager.switch_to(result, reason=reason)
+        self._failures = 0
+        self.backoff.reset()
+        self._next_survey = 0.0
@@ -182,3 +182,12 @@ class ConnectionSnapshot:
     @property
     def is_connected(self) -> bool:
         return self.state in {ConnectionState.CONNECTED_LAN, ConnectionState.CONNECTED_CLOUD}
+
+
+@dataclass(slots=True)
+class ProbeResult:
+    """A server path that answered a health probe, and how quickly."""
+
+    server: ServerInfo
+    mode: ConnectionMode
+    rtt_seconds: float
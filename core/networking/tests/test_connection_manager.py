@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import time
+
+from core.networking import Backoff, ConnectionManager, ConnectionState, HealthMonitor, ServerInfo
+from core.networking.discovery import DiscoveryClient
+
+
+class _FakeDiscovery(DiscoveryClient):
+    def __init__(self, servers: list[ServerInfo] | None = None) -> None:
+        super().__init__()
+        self.servers = servers or []
+
+    def discover(self, *, timeout_seconds: float = 3.0, until_first: bool = False) -> list[ServerInfo]:
+        return list(self.servers)
+
+
+class _FakeManager(ConnectionManager):
+    """Answers probes from a table of base_url -> (delay, rtt or None)."""
+
+    def __init__(self, paths: dict[str, tuple[float, float | None]], **kwargs) -> None:
+        kwargs.setdefault("discovery_client", _FakeDiscovery())
+        super().__init__(include_local_server=False, **kwargs)
+        self.paths = paths
+
+    def probe(self, base_url: str, *, timeout_seconds: float | None = None) -> float | None:
+        delay, rtt = self.paths.get(base_url, (0.0, None))
+        time.sleep(delay)
+        return rtt
+
+
+def _lan(host: str, server_id: str) -> ServerInfo:
+    return ServerInfo(server_id=server_id, server_name=f"LAN {server_id}", host=host, port=8765)
+
+
+def test_backoff_grows_to_cap_with_equal_jitter() -> None:
+    low = Backoff(base_seconds=1.0, max_seconds=8.0, rng=lambda: 0.0)
+    assert [low.next_delay() for _ in range(6)] == [0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+    high = Backoff(base_seconds=1.0, max_seconds=8.0, rng=lambda: 0.999999)
+    assert max(high.next_delay() for _ in range(2000)) < 8.0
+    high.reset()
+    assert high.next_delay() < 1.0
+
+
+def test_race_returns_first_path_to_answer() -> None:
+    manager = _FakeManager(
+        {"http://10.0.0.5:8765": (0.5, 0.5), "https://cloud.example/r/ABC": (0.0, 0.04)},
+        cloud_url="https://cloud.example/r/ABC",
+    )
+    manager.heartbeats.observe(_lan("10.0.0.5", "lan-1"))
+
+    started = time.monotonic()
+    snapshot = manager.startup_connect(discovery_timeout_seconds=2.0)
+
+    assert time.monotonic() - started < 0.4
+    assert snapshot.state == ConnectionState.CONNECTED_CLOUD
+    assert snapshot.server.server_id == "cloud"
+
+
+def test_probe_endpoints_includes_discovered_servers_fastest_first() -> None:
+    manager = _FakeManager(
+        {"http://10.0.0.5:8765": (0.0, 0.002), "https://cloud.example": (0.0, 0.08)},
+        cloud_url="https://cloud.example",
+        discovery_client=_FakeDiscovery([_lan("10.0.0.5", "lan-1")]),
+    )
+
+    results = manager.probe_endpoints(discovery_timeout_seconds=0.1)
+
+    assert [result.server.server_id for result in results] == ["lan-1", "cloud"]
+    assert manager.heartbeats.record_for("lan-1") is not None
+
+
+def test_monitor_fails_over_when_active_path_stops_answering() -> None:
+    paths = {"http://10.0.0.5:8765": (0.0, 0.002), "https://cloud.example": (0.0, 0.08)}
+    manager = _FakeManager(paths, cloud_url="https://cloud.example")
+    manager.connect_manual("10.0.0.5", 8765)
+    monitor = HealthMonitor(manager, survey_interval_seconds=60.0)
+    monitor.check_once(now=0.0)
+    assert manager.snapshot.state == ConnectionState.CONNECTED_LAN
+
+    paths["http://10.0.0.5:8765"] = (0.0, None)
+    monitor.check_once(now=0.5)
+
+    assert manager.snapshot.state == ConnectionState.CONNECTED_CLOUD
+    assert "failover" in manager.snapshot.message
+
+
+def test_monitor_switches_to_clearly_faster_path() -> None:
+    paths = {"https://cloud.example": (0.0, 0.12), "http://10.0.0.5:8765": (0.0, 0.003)}
+    manager = _FakeManager(paths, cloud_url="https://cloud.example")
+    manager.try_cloud_connection()
+    manager.heartbeats.observe(_lan("10.0.0.5", "lan-1"))
+    monitor = HealthMonitor(manager)
+
+    monitor.check_once(now=0.0)
+
+    assert manager.snapshot.state == ConnectionState.CONNECTED_LAN
+    assert monitor.rtt_for("http://10.0.0.5:8765") == 0.003
+
+
+def test_monitor_reports_loss_then_reconnects_on_backoff() -> None:
+    paths = {"http://10.0.0.5:8765": (0.0, 0.002)}
+    manager = _FakeManager(paths)
+    manager.connect_manual("10.0.0.5", 8765)
+    paths["http://10.0.0.5:8765"] = (0.0, None)
+    monitor = HealthMonitor(manager, failures_before_disconnect=2)
+
+    monitor.check_once(now=0.0)
+    assert manager.snapshot.is_connected
+    monitor.check_once(now=0.5)
+    assert manager.snapshot.state == ConnectionState.DISCONNECTED
+
+    paths["http://10.0.0.5:8765"] = (0.0, 0.002)
+    monitor.check_once(now=0.5)  # still inside the backoff delay
+    assert manager.snapshot.state == ConnectionState.DISCONNECTED
+    monitor.check_once(now=60.0)
+    assert manager.snapshot.state == ConnectionState.CONNECTED_LAN
+
+
+def test_monitor_leaves_offline_mode_alone() -> None:
+    manager = _FakeManager({"https://cloud.example": (0.0, 0.01)}, cloud_url="https://cloud.example")
+    manager.enter_offline_mode()
+
+    HealthMonitor(manager).check_once(now=0.0)
+
+    assert manager.snapshot.state == ConnectionState.OFFLINE
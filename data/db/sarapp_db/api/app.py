@@ -11,26 +11,25 @@ import time
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-# Header the cloud router stamps with the real field-device IP before
-# forwarding a request down the reverse tunnel (see
-# cloud_server/router/app.py). Only trusted when the request actually
-# arrived over the tunnel's loopback hop (client.host == 127.0.0.1) — a
-# direct LAN client could otherwise set this header itself to spoof another
-# address in the traffic log.
-_TUNNEL_CLIENT_IP_HEADER = "x-sarapp-client-ip"
-_LOOPBACK_HOST = "127.0.0.1"
+from sarapp_db.api.tunnel import client_address
+from sarapp_db.mongo import mongo_client
+from sarapp_db.services import catalog_versions, request_metrics
 
 
-def _client_address(request: Request) -> str:
-    host = request.client.host if request.client else ""
-    if host == _LOOPBACK_HOST:
-        forwarded = request.headers.get(_TUNNEL_CLIENT_IP_HEADER)
-        if forwarded:
-            return forwarded
-    return host
+def _content_length(headers: Any) -> int:
+    try:
+        return int(headers.get("content-length") or 0)
+    except ValueError:
+        return 0
+
+
+async def _count_streamed_bytes(body_iterator: Any, method: str, route: str) -> Any:
+    async for chunk in body_iterator:
+        request_metrics.metrics.add_bytes_out(method, route, len(chunk))
+        yield chunk
 
 
 def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
@@ -45,6 +44,11 @@ def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
             duration_ms).  Used by the LAN server console's API traffic tab.
             Must be fast and non-raising; WebSocket traffic is not captured.
     """
+    # Before any route touches Mongo: the shared client is built with the
+    # listeners registered at that point.
+    mongo_client.add_command_listener(request_metrics.MONGO_LISTENER)
+    mongo_client.add_command_listener(catalog_versions.MASTER_WRITE_LISTENER)
+
     app = FastAPI(
         title="SARApp API",
         version="0.1.0",
@@ -57,8 +61,34 @@ def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
         allow_origins=["*"],
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", catalog_versions.VERSION_HEADER],
     )
 
+    @app.middleware("http")
+    async def _catalog_versions(request: Request, call_next):
+        # See sarapp_db.services.catalog_versions.
+        if not catalog_versions.is_catalog_path(request.url.path):
+            return await call_next(request)
+        if request.method not in ("GET", "HEAD"):
+            response = await call_next(request)
+            if response.status_code < 400:
+                catalog_versions.bump()
+            return response
+        # Read first: a write landing mid-request leaves this copy tagged
+        # with the older version, so it is revalidated after the bump.
+        version = str(catalog_versions.current())
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = catalog_versions.etag_for(body)
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        headers.update({"ETag": etag, catalog_versions.VERSION_HEADER: version})
+        if catalog_versions.etag_matches(request.headers.get("if-none-match"), etag):
+            headers.pop("content-type", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, status_code=200, headers=headers, media_type=response.media_type)
+
     if request_log_fn is not None:
 
         @app.middleware("http")
@@ -69,7 +99,7 @@ def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
                 request_log_fn(
                     {
                         "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
-                        "client": _client_address(request),
+                        "client": client_address(request),
                         "method": request.method,
                         "path": request.url.path,
                         "query": request.url.query,
@@ -81,6 +111,32 @@ def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
                 pass
             return response
 
+    @app.middleware("http")
+    async def _record_request_metrics(request: Request, call_next):
+        # See sarapp_db.services.request_metrics. Added last, so it times
+        # every other middleware too.
+        started = time.perf_counter()
+        usage = request_metrics.metrics.request_started()
+        status = 500
+        response = None
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route_path = request_metrics.route_template(request.scope)
+            request_metrics.metrics.request_finished(
+                request.method,
+                route_path,
+                status,
+                time.perf_counter() - started,
+                usage,
+                bytes_in=_content_length(request.headers),
+                bytes_out=_content_length(response.headers) if response is not None else 0,
+            )
+            if response is not None and "content-length" not in response.headers:
+                response.body_iterator = _count_streamed_bytes(response.body_iterator, request.method, route_path)
+
     # -------------------------------------------------------------------------
     # Health / server-info (mirrors the old ThreadingHTTPServer endpoints)
     # -------------------------------------------------------------------------
@@ -139,6 +195,12 @@ def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
     from sarapp_db.api.routers import public_information
     app.include_router(public_information.router, prefix="/api", tags=["public-information"])
 
+    # Fixed paths under /incidents/{id}/forms/ go ahead of the forms
+    # router's /incidents/{id}/forms/{instance_id}.
+    from sarapp_db.api.routers import form_context, form_jobs
+    app.include_router(form_context.router, prefix="/api", tags=["forms"])
+    app.include_router(form_jobs.router, prefix="/api", tags=["forms"])
+
     from sarapp_db.api.routers import forms
     app.include_router(forms.master_router, prefix="/api/forms", tags=["forms"])
     app.include_router(forms.incident_router, prefix="/api", tags=["forms"])
@@ -199,6 +261,8 @@ def create_app(server_info_fn=None, request_log_fn=None) -> FastAPI:
 
     from sarapp_db.api.routers import gis
     app.include_router(gis.router, prefix="/api", tags=["gis"])
+    from sarapp_db.api.routers import search_probability
+    app.include_router(search_probability.router, prefix="/api", tags=["gis"])
 
     from sarapp_db.api.routers import finance
     app.include_router(finance.router, prefix="/api", tags=["finance"])
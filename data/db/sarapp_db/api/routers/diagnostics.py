@@ -5,16 +5,30 @@ server-side timestamp and server id. Meant to be hit through the cloud
 router's tunnel (``/r/<connect_code>/api/diagnostics/echo``) from a mobile
 device or curl to prove the full mobile -> cloud router -> LAN server ->
 back round trip works, independent of any incident/auth state.
+
+GET /api/diagnostics/metrics — request latency histograms, Mongo command
+latency and live gauges in the Prometheus text format (see
+``sarapp_db.services.request_metrics``). LAN only: requests forwarded down
+the cloud tunnel get 403. When SARAPP_METRICS_TOKEN is set, scrapers must
+also send it as ``Authorization: Bearer <token>``.
 """
 from __future__ import annotations
 
+import os
+import secrets
 from datetime import datetime, timezone
 from typing import Any
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from sarapp_db.api.tunnel import came_through_tunnel
+from sarapp_db.services import request_metrics
 
 router = APIRouter()
 
+_METRICS_TOKEN_ENV_VAR = "SARAPP_METRICS_TOKEN"
+
 
 def _utcnow() -> str:
     return datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -38,3 +52,15 @@ async def echo_get() -> dict[str, Any]:
     """GET variant so the round trip can be tested from a plain browser tab."""
 
     return {"received": None, "server_time_utc": _utcnow()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request) -> PlainTextResponse:
+    if came_through_tunnel(request):
+        raise HTTPException(status_code=403, detail="Metrics are only served on the LAN")
+    token = os.environ.get(_METRICS_TOKEN_ENV_VAR, "").strip()
+    if token and not secrets.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Metrics token required")
+    return PlainTextResponse(
+        request_metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
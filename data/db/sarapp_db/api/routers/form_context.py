@@ -0,0 +1,30 @@
+"""Server-side form data context (see sarapp_db/services/form_context.py).
+
+`GET /api/incidents/{id}/forms/context?sections=incident,organization,channels`
+returns the forms engine's context sections, assembled and cached next to
+the database, so a client builds a form's data with one request.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from sarapp_db.services import form_context
+
+router = APIRouter()
+
+
+@router.get("/incidents/{incident_id}/forms/context")
+def get_form_context(
+    incident_id: str,
+    request: Request,
+    sections: str = Query(..., description="Comma-separated context section names"),
+    op: Optional[int] = Query(None, description="Operational period number; defaults to the current one"),
+) -> Dict[str, Any]:
+    names = [name.strip() for name in sections.split(",") if name.strip()]
+    if not names:
+        raise HTTPException(status_code=400, detail="No sections requested")
+    return form_context.build_sections(request.app, incident_id, names, op)
+
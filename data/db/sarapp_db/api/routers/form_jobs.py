@@ -0,0 +1,126 @@
+"""Batch form export jobs (see sarapp_db/services/form_jobs.py).
+
+POST a list of forms (or an IAP operational period) and the server fills
+them next to the database, reporting progress as `form_jobs` change events
+on the incident WebSocket. Finished PDFs are downloaded from GridFS.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from sarapp_db.api.routers import iap
+from sarapp_db.services import form_jobs
+
+router = APIRouter()
+
+
+class FormJobItem(BaseModel):
+    form_id: str
+    title: str = ""
+    extra_data: Optional[Dict[str, Any]] = None
+
+
+class FormJobCreate(BaseModel):
+    forms: List[FormJobItem] = Field(default_factory=list)
+    # Prepend every form of this operational period's IAP package, in
+    # display order, with each form's saved fields as its extra data.
+    iap_op_number: Optional[int] = None
+    form_set_id: Optional[str] = None
+    merge: bool = True
+    title: str = ""
+    # Overrides applied to every form (e.g. a `weather` section).
+    extra_data: Optional[Dict[str, Any]] = None
+    requested_by: Optional[str] = None
+
+
+def _iap_forms(incident_id: str, op_number: int) -> List[Dict[str, Any]]:
+    from modules.forms_creator.batch import catalog_form_id
+
+    package = iap.require_package(incident_id, op_number)
+    forms = sorted(package.get("forms") or [], key=lambda form: form.get("display_order", 0))
+    return [
+        {
+            "form_id": catalog_form_id(str(form.get("form_id") or "")),
+            "title": form.get("title") or form.get("form_id") or "",
+            "extra_data": dict(form.get("fields") or {}) or None,
+        }
+        for form in forms
+    ]
+
+
+@router.post("/incidents/{incident_id}/forms/jobs", status_code=202)
+def create_form_job(incident_id: str, body: FormJobCreate, request: Request) -> Dict[str, Any]:
+    forms: List[Dict[str, Any]] = []
+    if body.iap_op_number is not None:
+        forms.extend(_iap_forms(incident_id, body.iap_op_number))
+    forms.extend(item.model_dump() for item in body.forms)
+    if body.extra_data:
+        for form in forms:
+            form["extra_data"] = {**body.extra_data, **(form.get("extra_data") or {})}
+    title = body.title or (f"IAP OP {body.iap_op_number}" if body.iap_op_number is not None else "")
+    try:
+        doc = form_jobs.submit(
+            incident_id,
+            forms,
+            app=request.app,
+            form_set_id=body.form_set_id,
+            op_number=body.iap_op_number,
+            merge=body.merge,
+            title=title,
+            requested_by=body.requested_by,
+        )
+    except form_jobs.FormJobQueueFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc)) from exc
+    except form_jobs.FormJobError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return form_jobs.public_doc(doc)
+
+
+@router.get("/incidents/{incident_id}/forms/jobs")
+def list_form_jobs(incident_id: str) -> List[Dict[str, Any]]:
+    return [form_jobs.public_doc(doc) for doc in form_jobs.list_jobs(incident_id)]
+
+
+@router.get("/incidents/{incident_id}/forms/jobs/{job_id}")
+def get_form_job(incident_id: str, job_id: str) -> Dict[str, Any]:
+    doc = form_jobs.get_job(incident_id, job_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Form job not found")
+    return form_jobs.public_doc(doc)
+
+
+def _iter_chunks(stream: Any) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = stream.readchunk()
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        stream.close()
+
+
+@router.get("/incidents/{incident_id}/forms/jobs/{job_id}/outputs/{index}/download")
+def download_form_job_output(incident_id: str, job_id: str, index: int) -> StreamingResponse:
+    try:
+        entry, stream = form_jobs.open_output(incident_id, job_id, index)
+    except Exception as exc:
+        raise HTTPException(status_code=404, detail="Form job output not found") from exc
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(str(entry.get('filename') or 'forms.pdf'))}",
+        "Content-Length": str(stream.length),
+    }
+    return StreamingResponse(_iter_chunks(stream), media_type="application/pdf", headers=headers)
+
+
+@router.delete("/incidents/{incident_id}/forms/jobs/{job_id}")
+def delete_form_job(incident_id: str, job_id: str) -> Dict[str, bool]:
+    if not form_jobs.delete_job(incident_id, job_id):
+        raise HTTPException(status_code=404, detail="Form job not found")
+    return {"ok": True}
@@ -1,15 +1,21 @@
 """GIS spatial features router — per-incident."""
 from __future__ import annotations
 
+import logging
+import math
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Body, HTTPException
+import numpy as np
+from fastapi import APIRouter, Body, HTTPException, Response
 
 from sarapp_db.mongo.database_manager import get_incident_db
 from sarapp_db.mongo.collection_names import IncidentCollections
 from sarapp_db.mongo.int_id import _ensure_int_ids, next_int_id
 from sarapp_db.mongo.repository import BaseRepository
+from sarapp_db.services import geometry_engine, heatmap_tiles
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -285,3 +291,279 @@ def delete_link(incident_id: str, link_id: int) -> None:
     doc = repo.find_one({"incident_id": incident_id, "int_id": link_id})
     if doc:
         repo.update_one(doc["_id"], {"deleted": True})
+
+
+# -------------------------------------------------------------------------
+# Batch analysis (vectorized — see sarapp_db/services/geometry_engine.py)
+# -------------------------------------------------------------------------
+
+# Feature types a team can be "assigned inside" via its current task.
+_ASSIGNMENT_AREA_TYPES = ("task_area", "assignment_area", "search_segment")
+
+
+class _TeamsRepository(BaseRepository):
+    collection_name = IncidentCollections.TEAMS
+    soft_deletes = False
+
+
+class _TasksRepository(BaseRepository):
+    collection_name = IncidentCollections.OPERATIONS_TASKS
+    soft_deletes = False
+
+
+def _analysis_geometries(incident_id: str, body: Dict[str, Any]) -> tuple[list, list[str]]:
+    """Resolve a request body's `feature_ids` and/or `geometries_wkt` into
+    parallel (ids, wkts) lists. Raw WKT entries get `None` as their id."""
+    ids: list = []
+    wkts: list[str] = []
+    feature_ids = body.get("feature_ids") or []
+    if feature_ids:
+        try:
+            wanted = [int(fid) for fid in feature_ids]
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="feature_ids must be integers")
+        repo = _features_repo(incident_id)
+        _ensure_int_ids(repo._col)
+        docs = repo.find_many({"incident_id": incident_id, "int_id": {"$in": wanted}, "deleted": {"$ne": True}})
+        by_id = {d.get("int_id"): d for d in docs}
+        missing = [fid for fid in wanted if fid not in by_id]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Spatial features not found: {missing}")
+        for fid in wanted:
+            ids.append(fid)
+            wkts.append(by_id[fid].get("geometry_wkt") or "")
+    for wkt in body.get("geometries_wkt") or []:
+        ids.append(None)
+        wkts.append(str(wkt))
+    if not wkts:
+        raise HTTPException(status_code=400, detail="feature_ids or geometries_wkt is required")
+    return ids, wkts
+
+
+def _parse_or_400(wkts: list[str]):
+    try:
+        return geometry_engine.from_wkt(wkts)
+    except geometry_engine.GeometryEngineError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/incidents/{incident_id}/gis/analysis/buffer")
+def analysis_buffer(incident_id: str, body: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """Buffer many geometries in one call. `distance_m` is a number or a list
+    parallel to the inputs; `dissolve` merges overlapping results."""
+    ids, wkts = _analysis_geometries(incident_id, body)
+    geometries = _parse_or_400(wkts)
+    distance = body.get("distance_m")
+    if distance is None:
+        raise HTTPException(status_code=400, detail="distance_m is required")
+    dissolve = bool(body.get("dissolve", False))
+    try:
+        buffered = geometry_engine.buffer(geometries, distance, dissolve=dissolve)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    out_wkts = geometry_engine.to_wkt(buffered)
+    if dissolve:
+        return {"geometries": [{"id": None, "geometry_wkt": out_wkts[0]}]}
+    return {"geometries": [{"id": fid, "geometry_wkt": w} for fid, w in zip(ids, out_wkts)]}
+
+
+@router.post("/incidents/{incident_id}/gis/analysis/dissolve")
+def analysis_dissolve(incident_id: str, body: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    _ids, wkts = _analysis_geometries(incident_id, body)
+    merged = geometry_engine.dissolve(_parse_or_400(wkts))
+    return {"geometry_wkt": geometry_engine.to_wkt([merged])[0]}
+
+
+@router.post("/incidents/{incident_id}/gis/analysis/measure")
+def analysis_measure(incident_id: str, body: Dict[str, Any] = Body(...)) -> List[Dict[str, Any]]:
+    """Area (m²) and length/perimeter (m) per geometry, in local UTM."""
+    ids, wkts = _analysis_geometries(incident_id, body)
+    try:
+        areas, lengths = geometry_engine.measure(_parse_or_400(wkts))
+    except geometry_engine.GeometryEngineError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return [
+        {"id": fid, "area_m2": float(area), "length_m": float(length)}
+        for fid, area, length in zip(ids, areas, lengths)
+    ]
+
+
+@router.post("/incidents/{incident_id}/gis/analysis/reproject")
+def analysis_reproject(incident_id: str, body: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """Reproject geometries into the batch's local UTM zone (meters)."""
+    ids, wkts = _analysis_geometries(incident_id, body)
+    geometries = _parse_or_400(wkts)
+    try:
+        projection = geometry_engine.projection_for(geometries)
+    except geometry_engine.GeometryEngineError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    local = geometry_engine.to_local(geometries, projection)
+    return {
+        "zone_number": projection.zone_number,
+        "hemisphere": projection.hemisphere,
+        "geometries": [
+            {"id": fid, "geometry_wkt": w} for fid, w in zip(ids, geometry_engine.to_wkt(local))
+        ],
+    }
+
+
+def _area_features_by_task_key(incident_id: str, task_keys: List[str]) -> Dict[str, List[dict]]:
+    """Live area features per task key, whether owned by the task
+    (`source_record_id`) or linked to it via `spatial_feature_links`."""
+    out: Dict[str, List[dict]] = {}
+    if not task_keys:
+        return out
+    features_repo = _features_repo(incident_id)
+    owned = features_repo.find_many({
+        "incident_id": incident_id,
+        "source_record_type": "task",
+        "source_record_id": {"$in": task_keys},
+        "feature_type": {"$in": list(_ASSIGNMENT_AREA_TYPES)},
+        "deleted": {"$ne": True},
+        "is_archived": {"$ne": True},
+    })
+    for doc in owned:
+        out.setdefault(doc["source_record_id"], []).append(doc)
+    links = _links_repo(incident_id).find_many({
+        "incident_id": incident_id,
+        "linked_record_type": "task",
+        "linked_record_id": {"$in": task_keys},
+        "deleted": {"$ne": True},
+    })
+    if links:
+        linked_ids = list({link.get("feature_id") for link in links})
+        linked = {
+            d.get("int_id"): d
+            for d in features_repo.find_many({
+                "incident_id": incident_id,
+                "int_id": {"$in": linked_ids},
+                "feature_type": {"$in": list(_ASSIGNMENT_AREA_TYPES)},
+                "deleted": {"$ne": True},
+                "is_archived": {"$ne": True},
+            })
+        }
+        for link in links:
+            doc = linked.get(link.get("feature_id"))
+            if doc is not None:
+                out.setdefault(link["linked_record_id"], []).append(doc)
+    return out
+
+
+def _team_lonlat(team: dict) -> Optional[tuple[float, float]]:
+    """The team's tracked (lon, lat), or None when either is missing or not
+    a finite number."""
+    try:
+        lon = float(team.get("current_location_lon"))
+        lat = float(team.get("current_location_lat"))
+    except (TypeError, ValueError):
+        return None
+    if not (math.isfinite(lon) and math.isfinite(lat)):
+        return None
+    return lon, lat
+
+
+@router.get("/incidents/{incident_id}/gis/analysis/teams-outside-assignments")
+def teams_outside_assignments(incident_id: str) -> Dict[str, Any]:
+    """Point-in-polygon of every tracked team position against the area
+    features of that team's current task (owned by the task or linked to it).
+
+    Teams with a position but no assigned area are reported as `unassigned`
+    rather than outside."""
+    db = get_incident_db(incident_id)
+    teams: list[dict] = []
+    lonlats: list[tuple[float, float]] = []
+    for team in _TeamsRepository(db).find_many({"current_location_lat": {"$ne": None}}):
+        lonlat = _team_lonlat(team)
+        if lonlat is not None:
+            teams.append(team)
+            lonlats.append(lonlat)
+    if not teams:
+        return {"outside": [], "inside": [], "unassigned": []}
+
+    task_refs = {t.get("current_task_id") for t in teams if t.get("current_task_id") is not None}
+    task_keys: Dict[Any, set[str]] = {}
+    if task_refs:
+        int_refs = [r for r in task_refs if isinstance(r, int)]
+        str_refs = [str(r) for r in task_refs]
+        for task in _TasksRepository(db).find_many(
+            {"$or": [{"int_id": {"$in": int_refs}}, {"task_id": {"$in": str_refs}}]}
+        ):
+            keys = {str(task.get("int_id")), str(task.get("task_id") or task.get("int_id"))}
+            task_keys[task.get("int_id")] = keys
+            if task.get("task_id"):
+                task_keys[task.get("task_id")] = keys
+    all_keys = sorted({k for keys in task_keys.values() for k in keys})
+
+    # Blank or malformed area geometry is skipped, not a reason to fail the
+    # whole check.
+    area_wkts_by_task_key = {
+        key: [doc.get("geometry_wkt") for doc in docs]
+        for key, docs in _area_features_by_task_key(incident_id, all_keys).items()
+    }
+    unique_wkts = list({wkt for wkts in area_wkts_by_task_key.values() for wkt in wkts})
+    parsed = {
+        wkt: geometry
+        for wkt, geometry in zip(unique_wkts, geometry_engine.try_from_wkt(unique_wkts))
+        if geometry is not None
+    }
+    if len(parsed) < len(unique_wkts):
+        logger.warning(
+            "teams-outside-assignments %s: skipped %d area feature(s) with blank or invalid geometry",
+            incident_id,
+            len(unique_wkts) - len(parsed),
+        )
+
+    positions = np.array(lonlats, dtype=float)
+    polygon_wkts: list[str] = []
+    polygon_index: Dict[str, int] = {}
+    pair_team: list[int] = []
+    pair_polygon: list[int] = []
+    for team_idx, team in enumerate(teams):
+        seen: set[int] = set()
+        for key in task_keys.get(team.get("current_task_id"), ()):
+            for wkt in area_wkts_by_task_key.get(key, ()):
+                if wkt not in parsed:
+                    continue
+                poly_idx = polygon_index.get(wkt)
+                if poly_idx is None:
+                    poly_idx = polygon_index[wkt] = len(polygon_wkts)
+                    polygon_wkts.append(wkt)
+                if poly_idx not in seen:
+                    seen.add(poly_idx)
+                    pair_team.append(team_idx)
+                    pair_polygon.append(poly_idx)
+
+    polygons = np.asarray([parsed[wkt] for wkt in polygon_wkts], dtype=object)
+    covered = geometry_engine.covered_by_assigned(positions, polygons, pair_team, pair_polygon)
+    assigned = np.zeros(len(teams), dtype=bool)
+    assigned[np.asarray(pair_team, dtype=np.intp)] = True
+
+    def _row(team: dict) -> Dict[str, Any]:
+        return {
+            "team_id": team.get("int_id"),
+            "team_name": team.get("name", ""),
+            "task_id": team.get("current_task_id"),
+            "lat": team.get("current_location_lat"),
+            "lon": team.get("current_location_lon"),
+        }
+
+    return {
+        "outside": [_row(t) for t, a, c in zip(teams, assigned, covered) if a and not c],
+        "inside": [_row(t) for t, c in zip(teams, covered) if c],
+        "unassigned": [_row(t) for t, a in zip(teams, assigned) if not a],
+    }
+
+
+# -------------------------------------------------------------------------
+# Heatmap tiles (see sarapp_db/services/heatmap_tiles.py)
+# -------------------------------------------------------------------------
+
+@router.get("/incidents/{incident_id}/gis/tiles/{layer}/{z}/{x}/{y}.png")
+def heatmap_tile(incident_id: str, layer: str, z: int, x: int, y: int) -> Response:
+    """PNG density tile for the `clues` or `tracks` layer. Tiles are cached
+    server-side until a matching spatial feature changes."""
+    try:
+        data = heatmap_tiles.point_tile(incident_id, layer, z, x, y)
+    except heatmap_tiles.TileError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return Response(content=data, media_type="image/png", headers={"Cache-Control": "no-cache"})
@@ -94,6 +94,12 @@ def _require_package(
     return doc
 
 
+def require_package(incident_id: str, op_number: int) -> dict[str, Any]:
+    """The stored package for an operational period, for other routers;
+    raises 404 when there is none."""
+    return _require_package(_repo(incident_id), incident_id, op_number)
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
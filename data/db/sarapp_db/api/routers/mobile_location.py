@@ -13,15 +13,20 @@ source. Tracking is manual (start/stop), never tied to login/logout.
 
 from __future__ import annotations
 
+import logging
 from datetime import datetime, timezone
 from typing import Any, Optional
 
 from fastapi import APIRouter, Body, HTTPException
 
+from sarapp_db.api import ws_hub
 from sarapp_db.api.routers.client_connections import resolve_connection_token
 from sarapp_db.mongo.collection_names import IncidentCollections, MasterCollections
 from sarapp_db.mongo.database_manager import get_incident_db, get_master_db
 from sarapp_db.mongo.repository import BaseRepository
+from sarapp_db.services import geofence_engine
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -155,7 +160,23 @@ def submit_location(body: dict[str, Any] = Body(...)) -> dict[str, Any]:
         "current_location_updated_at": body.get("timestamp") or _utcnow(),
         "current_location_person_record": person_record,
     }
-    _teams_repo(incident_id).update_one(team_doc["_id"], updates)
+    # Clients get the fix as a position delta, not the whole team document.
+    _teams_repo(incident_id).update_one(team_doc["_id"], updates, to_clients=False)
+    ws_hub.broadcast_team_position(
+        incident_id,
+        team_doc["_id"],
+        team_doc.get("int_id"),
+        lat,
+        lon,
+        updates["current_location_updated_at"],
+        person_record,
+    )
+    try:
+        geofence_engine.process_fix(incident_id, team_doc, float(lat), float(lon))
+    except Exception:
+        # Geofencing is advisory — a bad feature or projection must never
+        # cost the team its recorded position.
+        logger.exception("Geofence evaluation failed for team %s", team_doc.get("int_id"))
     return {"ok": True, "recorded": True}
 
 
@@ -189,5 +210,7 @@ def stop_location(body: dict[str, Any] = Body(...)) -> dict[str, Any]:
             "current_location_updated_at": None,
             "current_location_person_record": None,
         },
+        to_clients=False,
     )
+    ws_hub.broadcast_team_position(incident_id, team_doc["_id"], team_doc.get("int_id"), None, None, None)
     return {"ok": True, "cleared": True}
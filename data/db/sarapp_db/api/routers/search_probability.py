@@ -0,0 +1,329 @@
+"""Search probability router (MongoDB-backed).
+
+Probability-of-area grid for an incident: initialized from lost-person-
+behavior distance rings around the IPP, updated from task debrief PODs, and
+served back as per-segment POA/POD and as a GIS layer. The math lives in
+sarapp_db/services/probability_grid.py.
+
+The grid is stored as one document holding the compressed cell array. It is
+written through the collection directly, not a BaseRepository: the change
+feed would otherwise push a multi-megabyte blob to every connected client on
+each update. Only the new revision number is broadcast; clients refetch the
+summary, layer or tiles.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Body, HTTPException, Response
+
+from sarapp_db.api import ws_hub
+from sarapp_db.api.routers.gis import _ASSIGNMENT_AREA_TYPES, _area_features_by_task_key
+from sarapp_db.mongo.collection_names import IncidentCollections
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import geometry_engine, heatmap_tiles, probability_grid
+from sarapp_db.services.probability_grid import ProbabilityGrid, ProbabilityGridError
+
+router = APIRouter()
+
+_GRID_DOC_ID = "grid"
+_DEFAULT_LAYER_MAX_CELLS = 2500
+
+# incident_id -> (revision, grid). Keeps segment rasterizations warm between
+# requests; the revision guards against another worker having saved since.
+_grids: Dict[str, tuple[int, ProbabilityGrid]] = {}
+_lock = threading.Lock()
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _col(incident_id: str):
+    return get_incident_db(incident_id)[IncidentCollections.SEARCH_PROBABILITY_GRID]
+
+
+def _load(incident_id: str) -> tuple[dict, ProbabilityGrid]:
+    # Metadata first; the (large) cell array is only read on a cache miss.
+    doc = _col(incident_id).find_one({"_id": _GRID_DOC_ID}, {"grid": 0})
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Search probability grid has not been initialized")
+    revision = int(doc.get("revision") or 0)
+    cached = _grids.get(incident_id)
+    if cached is not None and cached[0] == revision:
+        return doc, cached[1]
+    stored = _col(incident_id).find_one({"_id": _GRID_DOC_ID}, {"grid": 1}) or {}
+    grid = ProbabilityGrid.from_document(stored["grid"])
+    _grids[incident_id] = (revision, grid)
+    return doc, grid
+
+
+def _save(incident_id: str, doc: dict, grid: ProbabilityGrid) -> dict:
+    doc["grid"] = grid.to_document()
+    doc["revision"] = int(doc.get("revision") or 0) + 1
+    doc["updated_at"] = _utcnow()
+    _col(incident_id).replace_one({"_id": _GRID_DOC_ID}, doc, upsert=True)
+    _grids[incident_id] = (doc["revision"], grid)
+    ws_hub.broadcast_change(
+        incident_id,
+        IncidentCollections.SEARCH_PROBABILITY_GRID,
+        "updated",
+        _GRID_DOC_ID,
+        {"_id": _GRID_DOC_ID, "revision": doc["revision"], "updated_at": doc["updated_at"]},
+    )
+    return doc
+
+
+def _segment_key(feature: dict) -> str:
+    """Rasterization cache key; changes whenever the geometry may have."""
+    return f"{feature.get('int_id')}:{feature.get('updated_at') or ''}"
+
+
+def _segment_id(feature: dict) -> str:
+    """Cumulative-POD key; stable across edits to the segment."""
+    return str(feature.get("int_id"))
+
+
+def _segments(incident_id: str) -> List[dict]:
+    db = get_incident_db(incident_id)
+    return list(db[IncidentCollections.SPATIAL_FEATURES].find({
+        "incident_id": incident_id,
+        "feature_type": {"$in": list(_ASSIGNMENT_AREA_TYPES)},
+        "deleted": {"$ne": True},
+        "is_archived": {"$ne": True},
+    }))
+
+
+def _summary(doc: dict, grid: ProbabilityGrid, segments: List[dict]) -> Dict[str, Any]:
+    rows, cols = grid.shape
+    cell_area_km2 = grid.cell_size_m**2 / 1e6
+    pods_by_feature: Dict[Any, float] = {}
+    for key, pod in grid.segment_pods.items():
+        # Grids saved before PODs were keyed by segment id alone hold one
+        # entry per edit ("<int_id>:<updated_at>"); they combine like sorties.
+        feature_id = key.split(":", 1)[0]
+        prior = pods_by_feature.get(feature_id, 0.0)
+        pods_by_feature[feature_id] = 1.0 - (1.0 - prior) * (1.0 - pod)
+    segment_rows = []
+    for feature in segments:
+        wkt = feature.get("geometry_wkt") or ""
+        if not wkt.strip().upper().startswith(("POLYGON", "MULTIPOLYGON")):
+            continue
+        try:
+            cells = grid.rasterize_segment(_segment_key(feature), wkt)
+        except geometry_engine.GeometryEngineError:
+            continue
+        poa = grid.segment_poa(cells)
+        area_km2 = cells.size * cell_area_km2
+        segment_rows.append({
+            "feature_id": feature.get("int_id"),
+            "label": feature.get("label") or feature.get("name") or "",
+            "feature_type": feature.get("feature_type"),
+            "poa": poa,
+            "cumulative_pod": pods_by_feature.get(str(feature.get("int_id")), 0.0),
+            "area_km2": area_km2,
+            "poa_density_per_km2": poa / area_km2 if area_km2 else 0.0,
+        })
+    segment_rows.sort(key=lambda r: r["poa_density_per_km2"], reverse=True)
+    west, south, east, north = grid.bounds_lonlat()
+    return {
+        "ipp_lat": doc.get("ipp_lat"),
+        "ipp_lon": doc.get("ipp_lon"),
+        "ring_distances_m": doc.get("ring_distances_m"),
+        "cell_size_m": grid.cell_size_m,
+        "rows": rows,
+        "cols": cols,
+        "bounds": {"west": west, "south": south, "east": east, "north": north},
+        "rest_of_world_poa": grid.rest_of_world_poa(),
+        "applied_debrief_ids": doc.get("applied_debrief_ids", []),
+        "revision": doc.get("revision", 0),
+        "updated_at": doc.get("updated_at"),
+        "segments": segment_rows,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+@router.put("/incidents/{incident_id}/search-probability")
+def initialize_grid(incident_id: str, body: Dict[str, Any] = Body(...)) -> Dict[str, Any]:
+    """(Re)initialize POA from LPB rings around the IPP.
+
+    Body: `ipp_lat`, `ipp_lon`, `ring_distances_m` (25/50/75/95% distances
+    from the planner's LPB reference for the subject category), optional
+    `cell_size_m` (default 25) and `radius_m`. Discards prior debrief updates;
+    call `/sync` afterwards to reapply them.
+    """
+    try:
+        lat = float(body["ipp_lat"])
+        lon = float(body["ipp_lon"])
+        rings = [float(d) for d in body["ring_distances_m"]]
+        cell_size = float(body.get("cell_size_m") or 25.0)
+        radius = float(body["radius_m"]) if body.get("radius_m") else None
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="ipp_lat, ipp_lon and ring_distances_m are required")
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        raise HTTPException(status_code=400, detail="IPP is out of range")
+    try:
+        grid = ProbabilityGrid.from_lpb_rings(lon, lat, rings, cell_size_m=cell_size, radius_m=radius)
+    except ProbabilityGridError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    with _lock:
+        existing = _col(incident_id).find_one({"_id": _GRID_DOC_ID}, {"revision": 1}) or {}
+        doc = {
+            "_id": _GRID_DOC_ID,
+            "ipp_lat": lat,
+            "ipp_lon": lon,
+            "ring_distances_m": rings,
+            "applied_debrief_ids": [],
+            "revision": existing.get("revision", 0),
+            "created_at": _utcnow(),
+        }
+        doc = _save(incident_id, doc, grid)
+        return _summary(doc, grid, _segments(incident_id))
+
+
+@router.get("/incidents/{incident_id}/search-probability")
+def get_grid_summary(incident_id: str) -> Dict[str, Any]:
+    """Grid metadata plus POA, cumulative POD and POA density per segment,
+    highest density first."""
+    with _lock:
+        doc, grid = _load(incident_id)
+        return _summary(doc, grid, _segments(incident_id))
+
+
+@router.post("/incidents/{incident_id}/search-probability/sync")
+def sync_debriefs(incident_id: str) -> Dict[str, Any]:
+    """Apply every not-yet-applied, non-archived debrief that reports a POD.
+
+    Each debrief is applied once to the union of its task's area features;
+    only those segments' cells are touched. Debriefs without a usable POD
+    (see `probability_grid.debrief_pod`), or whose area features cover no
+    grid cell, are reported as skipped and retried on the next sync.
+
+    Updates go to a copy of the cached grid that replaces it only once
+    saved, so a failed save leaves nothing half-applied.
+    """
+    db = get_incident_db(incident_id)
+    with _lock:
+        doc, grid = _load(incident_id)
+        applied = {i for i in doc.get("applied_debrief_ids") or [] if i is not None}
+        # Debriefs without an int_id cannot be recorded as applied; skip them.
+        debriefs = [
+            d for d in db[IncidentCollections.OPERATIONS_TASK_DEBRIEFS].find({"archived": {"$ne": True}})
+            if d.get("int_id") is not None and d["int_id"] not in applied
+        ]
+        debriefs.sort(key=lambda d: d["int_id"])
+        task_ids = list({d.get("task_id") for d in debriefs if d.get("task_id") is not None})
+        keys_by_task: Dict[Any, List[str]] = {}
+        for task in db[IncidentCollections.OPERATIONS_TASKS].find({"int_id": {"$in": task_ids}}):
+            keys = {str(task.get("int_id")), str(task.get("task_id") or task.get("int_id"))}
+            keys_by_task[task.get("int_id")] = sorted(keys)
+        areas_by_key = _area_features_by_task_key(
+            incident_id, sorted({k for keys in keys_by_task.values() for k in keys})
+        )
+
+        results = []
+        working = grid.copy() if debriefs else grid
+        for debrief in debriefs:
+            debrief_id = debrief.get("int_id")
+            pod = probability_grid.debrief_pod(debrief)
+            features = {
+                f.get("int_id"): f
+                for key in keys_by_task.get(debrief.get("task_id"), ())
+                for f in areas_by_key.get(key, ())
+            }
+            if pod is None or not features:
+                results.append({
+                    "debrief_id": debrief_id,
+                    "status": "skipped",
+                    "reason": "no POD reported" if pod is None else "task has no area features",
+                })
+                continue
+            parts = []
+            for feature in features.values():
+                try:
+                    parts.append(working.rasterize_segment(_segment_key(feature), feature.get("geometry_wkt") or ""))
+                except geometry_engine.GeometryEngineError:
+                    continue
+            cells = np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+            if cells.size == 0:
+                results.append({
+                    "debrief_id": debrief_id,
+                    "status": "skipped",
+                    "reason": "task areas cover no grid cells",
+                })
+                continue
+            pos = working.apply_search(cells, pod, segment_keys=[_segment_id(f) for f in features.values()])
+            applied.add(debrief_id)
+            results.append({
+                "debrief_id": debrief_id,
+                "status": "applied",
+                "pod": pod,
+                "pos": pos,
+                "feature_ids": sorted(features),
+            })
+
+        if any(r["status"] == "applied" for r in results):
+            doc["applied_debrief_ids"] = sorted(applied)
+            doc = _save(incident_id, doc, working)
+            grid = working
+        return {"results": results, **_summary(doc, grid, _segments(incident_id))}
+
+
+@router.get("/incidents/{incident_id}/search-probability/layer")
+def get_grid_layer(incident_id: str, max_cells: int = _DEFAULT_LAYER_MAX_CELLS) -> Dict[str, Any]:
+    """POA surface as a GeoJSON FeatureCollection of square cells.
+
+    Cells are aggregated into blocks so at most `max_cells` non-empty blocks
+    are returned; each carries its summed `poa` and `poa_density_per_km2`.
+    """
+    with _lock:
+        _doc, grid = _load(incident_id)
+        rows, cols = grid.shape
+        budget = max(1, int(max_cells))
+        factor = 1
+        while (-(-rows // factor)) * (-(-cols // factor)) > budget:
+            factor += 1
+        values, polygons = grid.cell_polygons_lonlat(factor)
+    block_km2 = (grid.cell_size_m * factor) ** 2 / 1e6
+    features = []
+    for value, polygon in zip(values.tolist(), polygons):
+        ring = [[round(x, 7), round(y, 7)] for x, y in polygon.exterior.coords]
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+            "properties": {"poa": value, "poa_density_per_km2": value / block_km2},
+        })
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "properties": {"cell_size_m": grid.cell_size_m * factor, "rest_of_world_poa": grid.rest_of_world_poa()},
+    }
+
+
+@router.get("/incidents/{incident_id}/search-probability/tiles/{z}/{x}/{y}.png")
+def get_grid_tile(incident_id: str, z: int, x: int, y: int) -> Response:
+    """POA surface as a PNG heatmap tile, cached per grid revision."""
+    with _lock:
+        doc, grid = _load(incident_id)
+    try:
+        data = heatmap_tiles.probability_tile(incident_id, grid, int(doc.get("revision") or 0), z, x, y)
+    except heatmap_tiles.TileError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return Response(content=data, media_type="image/png", headers={"Cache-Control": "no-cache"})
+
+
+def _reset_cache(incident_id: Optional[str] = None) -> None:
+    """Drop cached grids (tests, or after an incident database is replaced)."""
+    with _lock:
+        if incident_id is None:
+            _grids.clear()
+        else:
+            _grids.pop(incident_id, None)
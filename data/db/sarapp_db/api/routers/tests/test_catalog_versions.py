@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from sarapp_db.api.app import create_app
+from sarapp_db.mongo.collection_names import MasterCollections
+from sarapp_db.mongo.database_manager import get_master_db
+from sarapp_db.services import catalog_versions
+
+_VERSION = catalog_versions.VERSION_HEADER
+
+
+_HAZARD = {
+    "name": "Cold Exposure",
+    "category": "Environmental",
+    "description": "Exposure to cold conditions.",
+    "aliases": [],
+    "controls": ["Layer clothing"],
+    "ppe": ["Gloves"],
+    "standard_safety_language": "Watch for hypothermia.",
+    "default_spe": {"severity": 3, "probability": 3, "exposure": 3},
+    "active": True,
+}
+
+
+def _clear() -> None:
+    get_master_db()[MasterCollections.HAZARD_TYPES].delete_many({})
+
+
+def test_catalog_gets_carry_etag_and_answer_304() -> None:
+    _clear()
+    with TestClient(create_app()) as client:
+        first = client.get("/api/hazard-types")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert first.headers[_VERSION] == str(catalog_versions.current())
+
+        again = client.get("/api/hazard-types", headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+        assert again.headers["etag"] == etag
+
+        # Non-catalog paths are left alone.
+        assert "etag" not in client.get("/health").headers
+    _clear()
+
+
+def test_catalog_writes_bump_the_version_and_change_the_etag() -> None:
+    _clear()
+    seen: list[int] = []
+    catalog_versions.add_listener(seen.append)
+    try:
+        with TestClient(create_app()) as client:
+            before = client.get("/api/hazard-types")
+            created = client.post("/api/hazard-types", json=_HAZARD)
+            assert created.status_code == 201
+            assert seen == [catalog_versions.current()]
+            assert int(before.headers[_VERSION]) < seen[0]
+
+            after = client.get("/api/hazard-types", headers={"If-None-Match": before.headers["etag"]})
+            assert after.status_code == 200
+            assert after.headers[_VERSION] == str(seen[0])
+            assert [row["name"] for row in after.json()] == ["Cold Exposure"]
+
+            # A rejected write changes nothing.
+            client.post("/api/hazard-types", json={**_HAZARD, "default_spe": {"severity": 9, "probability": 1, "exposure": 1}})
+            assert len(seen) == 1
+    finally:
+        catalog_versions.remove_listener(seen.append)
+    _clear()
+
+
+def test_master_catalog_writes_bump_the_version_whichever_route_makes_them() -> None:
+    listener = catalog_versions.MASTER_WRITE_LISTENER
+
+    def _write(request_id: int, database: str, collection: str, ok: bool = True) -> None:
+        listener.started(SimpleNamespace(
+            database_name=database, command_name="update", command={"update": collection}, request_id=request_id
+        ))
+        done = SimpleNamespace(request_id=request_id)
+        listener.succeeded(done) if ok else listener.failed(done)
+
+    before = catalog_versions.current()
+    _write(1, "sarapp_master", MasterCollections.PERSONNEL)
+    assert catalog_versions.current() == before + 1
+
+    _write(2, "sarapp_master", MasterCollections.PERSONNEL, ok=False)
+    _write(3, "sarapp_master", MasterCollections.CLIENT_CONNECTIONS)
+    _write(4, "sarapp_incident_TEST", "personnel")
+    assert catalog_versions.current() == before + 1
@@ -0,0 +1,72 @@
+"""Server-assembled form context: one request for several sections, cached
+per (incident, op period, section) and invalidated by the change feed.
+"""
+from __future__ import annotations
+
+import sys, pathlib
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[6]))
+
+import os
+os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from sarapp_db.api.app import create_app
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import form_context
+
+
+INCIDENT_ID = "TEST_FORM_CONTEXT"
+URL = f"/api/incidents/{INCIDENT_ID}/forms/context"
+
+
+@pytest.fixture
+def client():
+    db = get_incident_db(INCIDENT_ID)
+    for name in ("communications_log", "communications_plan", "counters"):
+        db[name].delete_many({})
+    form_context.reset()
+    yield TestClient(create_app())
+    form_context.reset()
+
+
+def _log(client: TestClient, message: str) -> None:
+    response = client.post(f"/api/incidents/{INCIDENT_ID}/comms-log", json={"message": message})
+    assert response.status_code == 201
+
+
+def test_returns_requested_sections_in_one_response(client):
+    _log(client, "Team 1 on scene")
+
+    body = client.get(URL, params={"sections": "comm_log,channels,weather,prepared_by,no_such"}).json()
+
+    assert [row["message"] for row in body["sections"]["comm_log"]] == ["Team 1 on scene"]
+    assert body["sections"]["channels"] == []
+    assert body["unavailable"] == ["weather", "prepared_by", "no_such"]
+    assert client.get(URL, params={"sections": " , "}).status_code == 400
+
+
+def test_sections_are_cached_until_a_change_touches_them(client):
+    sections = {"sections": "comm_log,channels"}
+    client.get(URL, params=sections)
+    client.get(URL, params=sections)
+    assert form_context.cache.stats()["hits"] >= 2
+
+    _log(client, "Team 2 departing")
+    hits = form_context.cache.stats()["hits"]
+    body = client.get(URL, params=sections).json()
+
+    assert [row["message"] for row in body["sections"]["comm_log"]] == ["Team 2 departing"]
+    # A comms-log write only drops comm_log; channels (and op_period) still hit.
+    assert form_context.cache.stats()["hits"] == hits + 2
+
+
+def test_unrecognised_collection_changes_drop_the_whole_incident(client):
+    client.get(URL, params={"sections": "channels"})
+    form_context._on_change(INCIDENT_ID, "form_jobs", "updated", "1", None)
+    assert form_context.cache.stats()["entries"] == 2
+
+    form_context._on_change(INCIDENT_ID, "incident_org", "updated", "1", None)
+    assert form_context.cache.stats()["entries"] == 0
@@ -0,0 +1,175 @@
+"""Server-side form export jobs: queueing, in-process data reads, progress
+on the incident change feed, GridFS outputs, and IAP package expansion.
+"""
+from __future__ import annotations
+
+import sys, pathlib
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[6]))
+
+import os
+os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
+
+import io
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from pypdf import PdfReader
+
+from sarapp_db.api import ws_hub
+from sarapp_db.api.app import create_app
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import form_jobs
+
+
+INCIDENT_ID = "TEST_FORM_JOBS"
+NAME_FIELD = "1 Incident Name_5"  # fema ICS-202
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("SARAPP_FORM_RENDER_CACHE_DIR", str(tmp_path / "render_cache"))
+    db = get_incident_db(INCIDENT_ID)
+    for name in ("form_jobs", "iap_packages", "form_job_files.files", "form_job_files.chunks"):
+        db[name].delete_many({})
+    yield TestClient(create_app())
+    form_jobs.shutdown()
+
+
+def _wait(client: TestClient, job_id: str, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/incidents/{INCIDENT_ID}/forms/jobs/{job_id}").json()
+        if job["status"] in (form_jobs.STATUS_COMPLETED, form_jobs.STATUS_FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"form job {job_id} did not finish")
+
+
+def test_job_fills_forms_and_stores_merged_pdf(client):
+    events: list[tuple[str, str]] = []
+
+    def listener(incident_id, collection, op, doc_id, doc):
+        if collection == "form_jobs":
+            events.append((op, (doc or {}).get("status")))
+
+    ws_hub.add_change_listener(listener)
+    try:
+        response = client.post(
+            f"/api/incidents/{INCIDENT_ID}/forms/jobs",
+            json={
+                "title": "Objectives",
+                "forms": [
+                    {"form_id": "ics_202", "extra_data": {"incident": {"name": "Lost Hiker"}}},
+                    {"form_id": "not_a_form"},
+                ],
+            },
+        )
+        assert response.status_code == 202
+        job = _wait(client, response.json()["job_id"])
+    finally:
+        ws_hub.remove_change_listener(listener)
+
+    assert job["status"] == form_jobs.STATUS_COMPLETED
+    assert job["done"] == job["total"] == 2
+    assert {r["form_id"]: r["ok"] for r in job["results"]} == {"ics_202": True, "not_a_form": False}
+    assert [e for e in events if e == ("updated", form_jobs.STATUS_RUNNING)]
+    assert events[-1] == ("updated", form_jobs.STATUS_COMPLETED)
+
+    assert [o["filename"] for o in job["outputs"]] == ["Objectives.pdf"]
+    download = client.get(f"/api/incidents/{INCIDENT_ID}/forms/jobs/{job['job_id']}/outputs/0/download")
+    assert download.status_code == 200
+    fields = PdfReader(io.BytesIO(download.content)).get_fields() or {}
+    assert fields[f"{NAME_FIELD}_f0"]["/V"] == "Lost Hiker"
+
+    assert client.delete(f"/api/incidents/{INCIDENT_ID}/forms/jobs/{job['job_id']}").json() == {"ok": True}
+    assert client.get(f"/api/incidents/{INCIDENT_ID}/forms/jobs/{job['job_id']}").status_code == 404
+    assert get_incident_db(INCIDENT_ID)["form_job_files.files"].count_documents({}) == 0
+
+
+def test_job_reads_sections_from_the_app_in_process(client, monkeypatch):
+    paths: list[str] = []
+    real = form_jobs.in_process_fetch
+
+    def recording(app):
+        fetch, inner = real(app)
+        return (lambda path, **params: paths.append(path) or fetch(path, **params)), inner
+
+    monkeypatch.setattr(form_jobs, "in_process_fetch", recording)
+    response = client.post(
+        f"/api/incidents/{INCIDENT_ID}/forms/jobs",
+        json={"forms": [{"form_id": "ics_202"}], "merge": False},
+    )
+    job = _wait(client, response.json()["job_id"])
+
+    assert job["status"] == form_jobs.STATUS_COMPLETED
+    assert f"/api/incidents/{INCIDENT_ID}" in paths
+    assert [o["form_id"] for o in job["outputs"]] == ["ics_202"]
+
+
+def test_iap_package_expands_in_display_order(client):
+    client.put(
+        f"/api/incidents/{INCIDENT_ID}/iap/packages/3",
+        json={"incident_id": INCIDENT_ID, "op_start": "2026-10-18T06:00", "op_end": "2026-10-18T18:00"},
+    )
+    for order, (form_id, title) in enumerate([("ICS-203", "Organization"), ("ICS-202", "Objectives")]):
+        client.put(
+            f"/api/incidents/{INCIDENT_ID}/iap/packages/3/forms/{form_id}",
+            json={"form_id": form_id, "title": title, "op_number": 3, "display_order": 1 - order},
+        )
+
+    response = client.post(f"/api/incidents/{INCIDENT_ID}/forms/jobs", json={"iap_op_number": 3})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["title"] == "IAP OP 3"
+    assert job["op_number"] == 3
+    assert job["forms"] == [
+        {"form_id": "ics_202", "title": "Objectives"},
+        {"form_id": "ics_203", "title": "Organization"},
+    ]
+    _wait(client, job["job_id"])
+
+
+def test_deleting_a_running_job_stops_the_fill(client, monkeypatch):
+    from modules.forms_creator import batch
+
+    url = f"/api/incidents/{INCIDENT_ID}/forms/jobs"
+    reported: list[int] = []
+    stopped = []
+    submitted = threading.Event()
+
+    def fake_generate_batch(jobs, output_dir, *args, progress=None, **kwargs):
+        progress(1, len(jobs), batch.FormResult(jobs[0].form_id, jobs[0].title))
+        reported.append(1)
+        submitted.wait(5)
+        client.delete(f"{url}/{job_id}")
+        try:
+            progress(2, len(jobs), batch.FormResult(jobs[1].form_id, jobs[1].title))
+        except form_jobs.FormJobCancelled:
+            stopped.append(True)
+            raise
+        reported.append(2)
+        return []
+
+    monkeypatch.setattr(batch, "generate_batch", fake_generate_batch)
+    response = client.post(url, json={"forms": [{"form_id": "ics_202"}, {"form_id": "ics_203"}]})
+    job_id = response.json()["job_id"]
+    submitted.set()
+    deadline = time.monotonic() + 10
+    while not stopped and time.monotonic() < deadline:
+        time.sleep(0.02)
+    form_jobs.shutdown()
+
+    assert stopped and reported == [1]
+    assert client.get(f"{url}/{job_id}").status_code == 404
+    assert not form_jobs._cancelled
+
+
+def test_rejects_empty_and_overfull_requests(client, monkeypatch):
+    url = f"/api/incidents/{INCIDENT_ID}/forms/jobs"
+    assert client.post(url, json={"forms": []}).status_code == 400
+
+    monkeypatch.setattr(form_jobs, "MAX_QUEUED_JOBS", 0)
+    assert client.post(url, json={"forms": [{"form_id": "ics_202"}]}).status_code == 429
@@ -0,0 +1,141 @@
+"""Geofence engine: crossing detection per team between fixes, incremental
+index maintenance from the change feed, and the notification hand-off.
+Pure in-memory — indexes are built directly, never loaded from Mongo.
+"""
+from __future__ import annotations
+
+import sys, pathlib
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))
+
+import os
+os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
+
+import time
+
+import pytest
+
+from sarapp_db.api import ws_hub
+from sarapp_db.services import geofence_engine, geometry_engine
+
+
+INCIDENT_ID = "TEST_GEOFENCE"
+
+# ~160 m x 220 m boxes near (42.90, -85.60).
+_HAZARD = "POLYGON((-85.601 42.899, -85.599 42.899, -85.599 42.901, -85.601 42.901, -85.601 42.899))"
+_SEGMENT = "POLYGON((-85.611 42.899, -85.605 42.899, -85.605 42.905, -85.611 42.905, -85.611 42.899))"
+_CLOSURE = "POLYGON((-85.591 42.899, -85.589 42.899, -85.589 42.901, -85.591 42.901, -85.591 42.899))"
+
+
+def _feature(_id: str, int_id: int, feature_type: str, wkt: str, **extra) -> dict:
+    doc = {"_id": _id, "int_id": int_id, "feature_type": feature_type, "geometry_wkt": wkt, "label": _id}
+    doc.update(extra)
+    return doc
+
+
+@pytest.fixture
+def index():
+    idx = geofence_engine.IncidentGeofenceIndex(geometry_engine.projection_for_lonlat(-85.6, 42.9))
+    idx.upsert_feature(_feature("hz", 1, "hazard_zone", _HAZARD))
+    idx.upsert_feature(_feature(
+        "seg", 2, "search_segment", _SEGMENT, source_record_type="task", source_record_id="T-001",
+    ))
+    idx.upsert_feature(_feature("cl", 3, "closure_area", _CLOSURE))
+    idx.upsert_task({"int_id": 5, "task_id": "T-001"})
+    return idx
+
+
+def _types(events) -> list[str]:
+    return sorted(e.event_type for e in events)
+
+
+def test_hazard_entry_fires_once_per_crossing(index):
+    assert _types(index.evaluate(1, -85.6, 42.9)) == ["hazard_entered"]
+    assert index.evaluate(1, -85.6, 42.9002) == []
+    # Step out (but stay near), then back in.
+    assert index.evaluate(1, -85.5985, 42.9) == []
+    assert _types(index.evaluate(1, -85.6, 42.9)) == ["hazard_entered"]
+
+
+def test_hazard_proximity_fires_when_approaching(index):
+    assert index.evaluate(1, -85.596, 42.9) == []
+    events = index.evaluate(1, -85.5985, 42.9)
+    assert _types(events) == ["hazard_proximity"]
+    assert 0 < events[0].distance_m < geofence_engine.DEFAULT_HAZARD_PROXIMITY_M
+    assert index.evaluate(1, -85.5986, 42.9) == []
+
+
+def test_exclusion_entry(index):
+    assert _types(index.evaluate(1, -85.59, 42.9)) == ["exclusion_entered"]
+
+
+def test_leaving_own_assignment_uses_task_aliases(index):
+    # Team references its task by int_id; the segment is owned by task_id.
+    assert index.evaluate(7, -85.608, 42.902, task_ref=5) == []
+    events = index.evaluate(7, -85.62, 42.902, task_ref=5)
+    assert _types(events) == ["assignment_left"]
+    assert events[0].zone.zone_id == "seg"
+
+
+def test_reassignment_does_not_count_as_leaving(index):
+    index.evaluate(7, -85.608, 42.902, task_ref=5)
+    assert index.evaluate(7, -85.62, 42.902, task_ref=99) == []
+
+
+def test_linked_area_counts_as_assignment(index):
+    index.upsert_feature(_feature("seg2", 4, "assignment_area", _SEGMENT))
+    index.remove_feature("seg")
+    index.upsert_link({"_id": "lnk", "feature_id": 4, "linked_record_type": "task", "linked_record_id": "9"})
+    index.evaluate(3, -85.608, 42.902, task_ref=9)
+    assert _types(index.evaluate(3, -85.62, 42.902, task_ref=9)) == ["assignment_left"]
+
+
+def test_archived_or_deleted_features_leave_the_index(index):
+    index.upsert_feature(_feature("hz", 1, "hazard_zone", _HAZARD, is_archived=True))
+    assert index.evaluate(1, -85.6, 42.9) == []
+
+
+def test_change_feed_updates_loaded_index(index, monkeypatch):
+    monkeypatch.setitem(geofence_engine._indexes, INCIDENT_ID, index)
+    ws_hub.add_change_listener(geofence_engine._on_change)
+
+    ws_hub.broadcast_change(INCIDENT_ID, "spatial_features", "deleted", "hz", None)
+    assert index.evaluate(1, -85.6, 42.9) == []
+
+    ws_hub.broadcast_change(
+        INCIDENT_ID, "spatial_features", "created", "hz2", _feature("hz2", 9, "hazard_zone", _HAZARD),
+    )
+    assert _types(index.evaluate(2, -85.6, 42.9)) == ["hazard_entered"]
+
+
+def test_process_fix_queues_notification(index, monkeypatch):
+    monkeypatch.setitem(geofence_engine._indexes, INCIDENT_ID, index)
+    sent = []
+    monkeypatch.setattr(
+        geofence_engine.notification_service, "emit_notification",
+        lambda incident_id, **kwargs: sent.append((incident_id, kwargs)),
+    )
+    events = geofence_engine.process_fix(INCIDENT_ID, {"int_id": 4, "name": "Team 4"}, 42.9, -85.6)
+    geofence_engine.drain_notifications()
+    assert _types(events) == ["hazard_entered"]
+    assert len(sent) == 1
+    incident_id, kwargs = sent[0]
+    assert incident_id == INCIDENT_ID
+    assert kwargs["title"] == "Team 4 entered hazard zone"
+    assert kwargs["category"] == "safety"
+    assert kwargs["audience_team_id"] == 4
+
+
+def test_evaluation_is_sub_millisecond(index):
+    for i in range(500):
+        index.upsert_feature(_feature(
+            f"extra{i}", 100 + i, "hazard_zone",
+            f"POLYGON(({-85.7 + i * 0.0002} 43.0, {-85.6999 + i * 0.0002} 43.0, "
+            f"{-85.6999 + i * 0.0002} 43.0001, {-85.7 + i * 0.0002} 43.0))",
+        ))
+    index.evaluate(1, -85.6, 42.9)  # builds the tree
+    runs = 200
+    started = time.perf_counter()
+    for i in range(runs):
+        index.evaluate(i % 20, -85.6 + (i % 7) * 0.001, 42.9)
+    per_fix_ms = (time.perf_counter() - started) * 1000.0 / runs
+    assert per_fix_ms < 1.0
@@ -0,0 +1,183 @@
+"""Batch GIS analysis: the vectorized geometry engine (pure, no Mongo) and the
+teams-outside-assignments endpoint that joins team positions to the area
+features of each team's current task.
+"""
+from __future__ import annotations
+
+import sys, pathlib
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))
+
+import os
+os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
+
+import math
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sarapp_db.api.app import create_app
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import geometry_engine
+from utils.coordinates import latlon_to_utm, utm_to_latlon
+
+
+INCIDENT_ID = "TEST_GIS_ANALYSIS"
+
+# ~200 m square around (42.90, -85.60).
+_SQUARE = "POLYGON((-85.601 42.899, -85.599 42.899, -85.599 42.901, -85.601 42.901, -85.601 42.899))"
+
+
+def test_local_projection_matches_scalar_utm_helpers():
+    projection = geometry_engine.projection_for_lonlat(-85.6, 42.9)
+    lonlat = np.array([[-85.6, 42.9], [-85.52, 42.97], [-86.1, 42.5]])
+    xy = projection.forward(lonlat)
+    for (lon, lat), (x, y) in zip(lonlat, xy):
+        expected = latlon_to_utm(lat, lon)
+        assert expected.zone_number == projection.zone_number
+        assert x == pytest.approx(expected.easting, abs=1e-6)
+        assert y == pytest.approx(expected.northing, abs=1e-6)
+    back = projection.inverse(xy)
+    assert np.allclose(back, lonlat, atol=1e-7)
+    lat, lon = utm_to_latlon(projection.zone_number, "T", xy[0, 0], xy[0, 1])
+    assert (lon, lat) == pytest.approx((-85.6, 42.9), abs=1e-7)
+
+
+def test_southern_hemisphere_round_trip():
+    projection = geometry_engine.projection_for_lonlat(147.3, -42.9)
+    lonlat = np.array([[147.3, -42.9], [147.35, -42.85]])
+    assert not projection.northern
+    assert np.allclose(projection.inverse(projection.forward(lonlat)), lonlat, atol=1e-7)
+
+
+def test_buffer_many_points_in_meters():
+    geometries = geometry_engine.from_wkt(["POINT(-85.6 42.9)", "POINT(-85.5 42.95)"])
+    buffered = geometry_engine.buffer(geometries, 100.0)
+    areas, _lengths = geometry_engine.measure(buffered)
+    assert len(buffered) == 2
+    for area in areas:
+        assert area == pytest.approx(math.pi * 100.0**2, rel=0.01)
+
+
+def test_buffer_dissolve_merges_overlaps():
+    geometries = geometry_engine.from_wkt(["POINT(-85.6 42.9)", "POINT(-85.5999 42.9)"])
+    buffered = geometry_engine.buffer(geometries, [50.0, 50.0], dissolve=True)
+    assert len(buffered) == 1
+    assert buffered[0].geom_type == "Polygon"
+
+
+def test_buffer_rejects_non_positive_distance():
+    geometries = geometry_engine.from_wkt(["POINT(-85.6 42.9)"])
+    with pytest.raises(geometry_engine.GeometryEngineError):
+        geometry_engine.buffer(geometries, 0)
+
+
+def test_from_wkt_rejects_garbage():
+    with pytest.raises(geometry_engine.GeometryEngineError):
+        geometry_engine.from_wkt(["POLYGON((nope))"])
+
+
+def test_try_from_wkt_leaves_blank_and_garbage_as_none():
+    parsed = geometry_engine.try_from_wkt([_SQUARE, "", None, "POLYGON((nope))"])
+    assert parsed[0] is not None
+    assert list(parsed[1:]) == [None, None, None]
+
+
+def test_measure_square_area_and_line_length():
+    geometries = geometry_engine.from_wkt([_SQUARE, "LINESTRING(-85.6 42.9, -85.6 42.91)"])
+    areas, lengths = geometry_engine.measure(geometries)
+    assert areas[0] == pytest.approx(163.0 * 222.0, rel=0.05)
+    assert areas[1] == 0.0
+    assert lengths[1] == pytest.approx(1111.0, rel=0.01)
+
+
+def test_locate_points_and_assigned_coverage():
+    polygons = geometry_engine.from_wkt([
+        _SQUARE,
+        "POLYGON((-85.5 42.9, -85.49 42.9, -85.49 42.91, -85.5 42.91, -85.5 42.9))",
+    ])
+    positions = np.array([[-85.6, 42.9], [-85.495, 42.905], [-85.7, 42.9]])
+
+    point_idx, polygon_idx = geometry_engine.locate_points(positions, polygons)
+    assert sorted(zip(point_idx.tolist(), polygon_idx.tolist())) == [(0, 0), (1, 1)]
+
+    # Team 0 is assigned the square (inside); team 1 is assigned the square
+    # too but stands in the other polygon (outside); team 2 has no pairs.
+    covered = geometry_engine.covered_by_assigned(positions, polygons, [0, 1], [0, 0])
+    assert covered.tolist() == [True, False, False]
+
+
+def _clear(db):
+    db["teams"].delete_many({})
+    db["tasks"].delete_many({})
+    db["spatial_features"].delete_many({})
+    db["spatial_feature_links"].delete_many({})
+
+
+def test_teams_outside_assignments_endpoint():
+    db = get_incident_db(INCIDENT_ID)
+    _clear(db)
+    db["tasks"].insert_one({"int_id": 1, "task_id": "T-001", "title": "Sector 4"})
+    db["spatial_features"].insert_one({
+        "int_id": 1,
+        "incident_id": INCIDENT_ID,
+        "feature_type": "task_area",
+        "geometry_wkt": _SQUARE,
+        "source_module": "operations",
+        "source_record_type": "task",
+        "source_record_id": "1",
+    })
+    db["teams"].insert_many([
+        {"int_id": 1, "name": "Team 1", "current_task_id": 1,
+         "current_location_lat": 42.9, "current_location_lon": -85.6},
+        {"int_id": 2, "name": "Team 2", "current_task_id": 1,
+         "current_location_lat": 42.95, "current_location_lon": -85.6},
+        {"int_id": 3, "name": "Team 3", "current_task_id": None,
+         "current_location_lat": 42.9, "current_location_lon": -85.6},
+        {"int_id": 4, "name": "Team 4", "current_task_id": 1,
+         "current_location_lat": None, "current_location_lon": None},
+    ])
+
+    app = create_app()
+    with TestClient(app) as client:
+        res = client.get(f"/api/incidents/{INCIDENT_ID}/gis/analysis/teams-outside-assignments")
+    assert res.status_code == 200
+    body = res.json()
+    assert [r["team_id"] for r in body["inside"]] == [1]
+    assert [r["team_id"] for r in body["outside"]] == [2]
+    assert [r["team_id"] for r in body["unassigned"]] == [3]
+
+    _clear(db)
+
+
+def test_teams_outside_assignments_skips_blank_and_malformed_areas_and_bad_positions():
+    db = get_incident_db(INCIDENT_ID)
+    _clear(db)
+    db["tasks"].insert_one({"int_id": 1, "task_id": "T-001", "title": "Sector 4"})
+    for int_id, wkt in ((1, _SQUARE), (2, ""), (3, "POLYGON((-85.6 42.9, -85.5")):
+        db["spatial_features"].insert_one({
+            "int_id": int_id,
+            "incident_id": INCIDENT_ID,
+            "feature_type": "task_area",
+            "geometry_wkt": wkt,
+            "source_module": "operations",
+            "source_record_type": "task",
+            "source_record_id": "1",
+        })
+    db["teams"].insert_many([
+        {"int_id": 1, "name": "Team 1", "current_task_id": 1,
+         "current_location_lat": 42.9, "current_location_lon": -85.6},
+        {"int_id": 2, "name": "Team 2", "current_task_id": 1,
+         "current_location_lat": 42.9, "current_location_lon": None},
+        {"int_id": 3, "name": "Team 3", "current_task_id": 1,
+         "current_location_lat": "n/a", "current_location_lon": -85.6},
+    ])
+
+    with TestClient(create_app()) as client:
+        res = client.get(f"/api/incidents/{INCIDENT_ID}/gis/analysis/teams-outside-assignments")
+    assert res.status_code == 200
+    body = res.json()
+    assert [r["team_id"] for r in body["inside"]] == [1]
+    assert body["outside"] == [] and body["unassigned"] == []
+
+    _clear(db)
@@ -0,0 +1,160 @@
+"""Heatmap tiles: PNG encoding, seam-free point density rendering, the
+probability-grid layer, change-feed invalidation of the tile cache, and the
+clue tile endpoint.
+"""
+from __future__ import annotations
+
+import sys, pathlib
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))
+
+import os
+os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
+
+import struct
+import time
+import zlib
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sarapp_db.api import ws_hub
+from sarapp_db.api.app import create_app
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import heatmap_tiles
+from sarapp_db.services.probability_grid import ProbabilityGrid
+
+
+INCIDENT_ID = "TEST_HEATMAP_TILES"
+
+
+def _decode(png: bytes) -> np.ndarray:
+    """Decode the encoder's own output (single IDAT, filter 0) to RGBA."""
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", png[16:24])
+    idat_len = struct.unpack(">I", png[33:37])[0]
+    assert png[37:41] == b"IDAT"
+    raw = np.frombuffer(zlib.decompress(png[41:41 + idat_len]), dtype=np.uint8)
+    return raw.reshape(height, width * 4 + 1)[:, 1:].reshape(height, width, 4)
+
+
+def _tile_of(lon: float, lat: float, z: int) -> tuple[int, int, float, float]:
+    mx, my = heatmap_tiles.lonlat_to_mercator(np.array([[lon, lat]]))
+    n = 1 << z
+    return int(mx[0] * n), int(my[0] * n), float(mx[0]), float(my[0])
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    heatmap_tiles.reset()
+    yield
+    heatmap_tiles.reset()
+
+
+def test_empty_tile_is_transparent():
+    image = _decode(heatmap_tiles.empty_tile())
+    assert image.shape == (256, 256, 4)
+    assert image[..., 3].max() == 0
+
+
+def test_point_renders_where_it_lies():
+    z = 14
+    x, y, mx, my = _tile_of(-85.6, 42.9, z)
+    image = _decode(heatmap_tiles.render_points(np.array([mx]), np.array([my]), z, x, y))
+    px = int((mx * (1 << z) - x) * 256)
+    py = int((my * (1 << z) - y) * 256)
+    alpha = image[..., 3]
+    assert alpha[py, px] > 0
+    peak_y, peak_x = np.unravel_index(np.argmax(alpha), alpha.shape)
+    assert abs(peak_x - px) <= 1 and abs(peak_y - py) <= 1
+
+
+def test_tiles_join_without_seams():
+    # A point right on the boundary between two horizontally adjacent tiles
+    # must render the same intensity on both sides of the edge.
+    z = 12
+    n = 1 << z
+    mx = np.array([1000.0 / n])
+    my = np.array([1500.5 / n])
+    left = _decode(heatmap_tiles.render_points(mx, my, z, 999, 1500))
+    right = _decode(heatmap_tiles.render_points(mx, my, z, 1000, 1500))
+    assert left[128, 255, 3] > 0
+    assert abs(int(left[128, 255, 3]) - int(right[128, 0, 3])) <= 8
+
+
+def test_rejects_out_of_range_tiles():
+    with pytest.raises(heatmap_tiles.TileError):
+        heatmap_tiles.validate_tile(3, 8, 0)
+    with pytest.raises(heatmap_tiles.TileError):
+        heatmap_tiles.point_tile(INCIDENT_ID, "nope", 1, 0, 0)
+
+
+def test_track_lines_are_sampled_by_distance():
+    docs = [{"geometry_wkt": "LINESTRING(-85.6 42.9, -85.6 42.91)"}]  # ~1.1 km, 2 vertices
+    mx, my = heatmap_tiles.feature_points(docs, heatmap_tiles.LAYER_TRACKS)
+    assert mx.size > 200
+
+
+def test_probability_tile_covers_grid_only():
+    grid = ProbabilityGrid.from_lpb_rings(-85.6, 42.9, (300, 700, 1300, 2500), cell_size_m=25)
+    z = 14
+    x, y, _mx, _my = _tile_of(-85.6, 42.9, z)
+    inside = _decode(heatmap_tiles.probability_tile(INCIDENT_ID, grid, 1, z, x, y))
+    assert inside[..., 3].max() > 0
+    far_x, far_y, _mx, _my = _tile_of(-80.0, 40.0, z)
+    assert heatmap_tiles.probability_tile(INCIDENT_ID, grid, 1, z, far_x, far_y) == heatmap_tiles.empty_tile()
+
+
+def test_dense_tile_renders_fast():
+    rng = np.random.default_rng(3)
+    z = 13
+    x, y, mx, my = _tile_of(-85.6, 42.9, z)
+    n = 1 << z
+    points_x = (x + rng.random(200_000)) / n
+    points_y = (y + rng.random(200_000)) / n
+    heatmap_tiles.render_points(points_x, points_y, z, x, y)
+    started = time.perf_counter()
+    heatmap_tiles.render_points(points_x, points_y, z, x, y)
+    assert time.perf_counter() - started < 0.1
+
+
+def test_change_feed_invalidates_only_matching_layers():
+    heatmap_tiles._ensure_listening()
+    heatmap_tiles.cache.put((INCIDENT_ID, "clues", 0, 1, 0, 0), b"x")
+    heatmap_tiles.cache.put((INCIDENT_ID, "tracks", 0, 1, 0, 0), b"y")
+
+    ws_hub.broadcast_change(INCIDENT_ID, "spatial_features", "created", "f1", {"feature_type": "clue"})
+
+    assert heatmap_tiles.generation(INCIDENT_ID, "clues") == 1
+    assert heatmap_tiles.generation(INCIDENT_ID, "tracks") == 0
+    assert heatmap_tiles.cache.get((INCIDENT_ID, "clues", 0, 1, 0, 0)) is None
+    assert heatmap_tiles.cache.get((INCIDENT_ID, "tracks", 0, 1, 0, 0)) == b"y"
+
+
+def test_cache_is_byte_bounded():
+    cache = heatmap_tiles.TileCache(max_bytes=10)
+    cache.put(("a",), b"12345")
+    cache.put(("b",), b"12345")
+    cache.get(("a",))
+    cache.put(("c",), b"12345")
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == b"12345"
+    assert cache.size_bytes <= 10
+
+
+def test_clue_tile_endpoint_serves_png():
+    db = get_incident_db(INCIDENT_ID)
+    db["spatial_features"].delete_many({})
+    db["spatial_features"].insert_one({
+        "int_id": 1, "incident_id": INCIDENT_ID, "feature_type": "clue", "geometry_wkt": "POINT(-85.6 42.9)",
+    })
+    z = 15
+    x, y, _mx, _my = _tile_of(-85.6, 42.9, z)
+    app = create_app()
+    with TestClient(app) as client:
+        res = client.get(f"/api/incidents/{INCIDENT_ID}/gis/tiles/clues/{z}/{x}/{y}.png")
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "image/png"
+        assert _decode(res.content)[..., 3].max() > 0
+        assert client.get(f"/api/incidents/{INCIDENT_ID}/gis/tiles/clues/40/0/0.png").status_code == 404
+    db["spatial_features"].delete_many({})
@@ -19,6 +19,7 @@ os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
 
 from fastapi.testclient import TestClient
 
+from sarapp_db.api import ws_hub
 from sarapp_db.api.app import create_app
 from sarapp_db.mongo.collection_names import MasterCollections
 from sarapp_db.mongo.database_manager import get_incident_db, get_master_db
@@ -103,6 +104,31 @@ def test_leader_ping_overwrites():
     _clear()
 
 
+def test_fix_reaches_clients_as_a_position_delta_only(monkeypatch):
+    _clear()
+    _seed()
+    sent: list[dict] = []
+    heard: list[str] = []
+    monkeypatch.setattr(ws_hub.hub, "broadcast", lambda incident_id, event: sent.append(event))
+    listener = lambda incident_id, collection, op, doc_id, doc: heard.append(collection)
+    ws_hub.add_change_listener(listener)
+    try:
+        with TestClient(create_app()) as client:
+            client.post("/api/mobile/location", json={"token": TOKEN_LEADER, "lat": 1.0, "lon": 2.0, "team_id": TEAM_INT_ID})
+            client.post("/api/mobile/location/stop", json={"token": TOKEN_LEADER})
+    finally:
+        ws_hub.remove_change_listener(listener)
+
+    team_id = str(_teams_col().find_one({"int_id": TEAM_INT_ID})["_id"])
+    assert [e.get("type") for e in sent] == ["team_position", "team_position"]
+    assert sent[0]["id"] == team_id and sent[0]["person_record"] == LEADER_ID
+    assert (sent[0]["lat"], sent[0]["lon"]) == (1.0, 2.0)
+    assert (sent[1]["lat"], sent[1]["lon"]) == (None, None)
+    # In-process listeners (form context, geofencing) still see the writes.
+    assert heard.count("teams") == 2
+    _clear()
+
+
 def test_connection_token_ping_records_location():
     _clear()
     _seed()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from sarapp_db.api.app import create_app
+from sarapp_db.mongo import mongo_client
+from sarapp_db.services import request_metrics
+
+
+def test_requests_are_recorded_by_route_template() -> None:
+    request_metrics.reset()
+    with TestClient(create_app()) as client:
+        client.get("/api/hazard-types")
+        client.get("/api/hazard-types/does-not-exist")
+        client.get("/api/hazard-types/also-missing")
+        client.get("/no/such/route")
+
+    routes = request_metrics.metrics.snapshot()["routes"]
+    assert routes["GET /api/hazard-types"]["statuses"] == {"2xx": 1}
+    missing = routes["GET /api/hazard-types/{hazard_type_id}"]
+    assert missing["count"] == 2 and missing["statuses"] == {"4xx": 2}
+    assert missing["bytes_out"] > 0
+    assert routes[f"GET {request_metrics.UNMATCHED_ROUTE}"]["count"] == 1
+    assert request_metrics.metrics.in_flight == 0
+
+
+def test_mongo_time_is_attributed_to_the_request_that_spent_it() -> None:
+    request_metrics.reset()
+    app = create_app()
+
+    @app.get("/test/mongo-heavy")
+    def _mongo_heavy() -> dict:
+        # Sync handlers run on a worker thread, like the repositories do.
+        for _ in range(3):
+            request_metrics.MONGO_LISTENER.succeeded(SimpleNamespace(command_name="find", duration_micros=20_000))
+        return {}
+
+    with TestClient(app) as client:
+        client.get("/test/mongo-heavy")
+    request_metrics.MONGO_LISTENER.succeeded(SimpleNamespace(command_name="find", duration_micros=1_000))
+
+    route = request_metrics.metrics.snapshot()["routes"]["GET /test/mongo-heavy"]
+    assert route["mongo_commands"] == 3
+    assert abs(route["mongo_seconds"] - 0.06) < 1e-9
+    assert request_metrics.metrics.mongo["find"].count == 4
+
+
+def test_diagnostics_metrics_endpoint_serves_prometheus_text() -> None:
+    request_metrics.reset()
+    request_metrics.metrics.add_gauge_source("test_queue", lambda: {"depth": 7, "sent_total": 3})
+    try:
+        with TestClient(create_app()) as client:
+            client.get("/api/diagnostics/echo")
+            response = client.get("/api/diagnostics/metrics")
+    finally:
+        request_metrics.metrics.remove_gauge_source("test_queue")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'sarapp_http_request_duration_seconds_count{method="GET",route="/api/diagnostics/echo"} 1' in text
+    assert 'sarapp_http_request_duration_seconds_bucket{method="GET",route="/api/diagnostics/echo",le="+Inf"} 1' in text
+    assert "sarapp_ws_hub_pending_sends 0" in text
+    assert "# TYPE sarapp_test_queue_depth gauge\nsarapp_test_queue_depth 7" in text
+    assert "# TYPE sarapp_test_queue_sent_total counter" in text
+
+
+def test_diagnostics_metrics_is_refused_through_the_tunnel_and_checks_the_token(monkeypatch) -> None:
+    tunnelled = {"x-sarapp-client-ip": "203.0.113.9"}
+    with TestClient(create_app(), client=("127.0.0.1", 50000)) as client:
+        assert client.get("/api/diagnostics/metrics", headers=tunnelled).status_code == 403
+        assert client.get("/api/diagnostics/metrics").status_code == 200
+
+        monkeypatch.setenv("SARAPP_METRICS_TOKEN", "scrape-me")
+        assert client.get("/api/diagnostics/metrics").status_code == 401
+        authorized = {"Authorization": "Bearer scrape-me"}
+        assert client.get("/api/diagnostics/metrics", headers=authorized).status_code == 200
+
+
+def test_create_app_registers_the_mongo_listener_once() -> None:
+    create_app()
+    create_app()
+
+    assert mongo_client._command_listeners.count(request_metrics.MONGO_LISTENER) == 1
+
+
+def test_quantiles_come_from_the_log_buckets() -> None:
+    histogram = request_metrics.LatencyHistogram()
+    for _ in range(99):
+        histogram.observe(0.004)
+    histogram.observe(2.0)
+
+    assert 0.0025 < histogram.quantile(0.5) <= 0.005
+    assert 1.0 < histogram.quantile(0.999) <= 2.5
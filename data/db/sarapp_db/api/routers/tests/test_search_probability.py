@@ -0,0 +1,253 @@
+"""Probability-of-area grid: LPB ring initialization, the incremental Bayesian
+update from debrief PODs (pure, no Mongo), and the sync endpoint that applies
+debriefs to their task's segments.
+"""
+from __future__ import annotations
+
+import sys, pathlib
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))
+
+import os
+os.environ.setdefault("SARAPP_MONGO_URI", "mongodb://localhost:27017")
+
+import math
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from sarapp_db.api.app import create_app
+from sarapp_db.api.routers import search_probability
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services.probability_grid import ProbabilityGrid, ProbabilityGridError, debrief_pod
+
+
+INCIDENT_ID = "TEST_SEARCH_PROBABILITY"
+
+_IPP = (-85.6, 42.9)
+_RINGS = (300.0, 700.0, 1300.0, 2500.0)
+# ~160 m x 220 m box containing the IPP.
+_SQUARE = "POLYGON((-85.601 42.899, -85.599 42.899, -85.599 42.901, -85.601 42.901, -85.601 42.899))"
+
+
+@pytest.fixture
+def grid():
+    return ProbabilityGrid.from_lpb_rings(*_IPP, _RINGS, cell_size_m=20.0)
+
+
+def _total(grid: ProbabilityGrid) -> float:
+    return float(grid.poa().sum()) + grid.rest_of_world_poa()
+
+
+def test_rings_initialize_a_normalized_surface(grid):
+    assert _total(grid) == pytest.approx(1.0)
+    poa = grid.poa()
+    rows, cols = poa.shape
+    center = poa[rows // 2, cols // 2]
+    corner = poa[0, 0]
+    assert center > corner > 0
+    # Roughly a quarter of the probability sits inside the 25% ring.
+    inner = grid.rasterize_segment("inner", _circle_wkt(_RINGS[0]))
+    assert grid.segment_poa(inner) == pytest.approx(0.25, abs=0.03)
+
+
+def _circle_wkt(radius_m: float) -> str:
+    from sarapp_db.services import geometry_engine
+
+    point = geometry_engine.from_wkt([f"POINT({_IPP[0]} {_IPP[1]})"])
+    return geometry_engine.to_wkt(geometry_engine.buffer(point, radius_m))[0]
+
+
+def test_rings_must_increase():
+    with pytest.raises(ProbabilityGridError):
+        ProbabilityGrid.from_lpb_rings(*_IPP, (500, 300, 900, 1200))
+
+
+def test_search_lowers_segment_and_raises_everything_else(grid):
+    cells = grid.rasterize_segment("seg", _SQUARE)
+    assert cells.size > 0
+    before_seg = grid.segment_poa(cells)
+    before_corner = grid.poa()[0, 0]
+
+    pos = grid.apply_search(cells, 0.8, segment_keys=["seg"])
+
+    assert pos == pytest.approx(before_seg * 0.8)
+    after_seg = grid.segment_poa(cells)
+    assert after_seg == pytest.approx(before_seg * 0.2 / (1 - pos))
+    assert grid.poa()[0, 0] == pytest.approx(before_corner / (1 - pos))
+    assert _total(grid) == pytest.approx(1.0)
+    grid.apply_search(cells, 0.5, segment_keys=["seg"])
+    assert grid.segment_pods["seg"] == pytest.approx(1 - 0.2 * 0.5)
+
+
+def test_document_round_trip(grid):
+    grid.apply_search(grid.rasterize_segment("seg", _SQUARE), 0.6, segment_keys=["seg"])
+    restored = ProbabilityGrid.from_document(grid.to_document())
+    assert np.array_equal(restored.poa(), grid.poa())
+    assert restored.segment_pods == grid.segment_pods
+    assert restored.rest_of_world_poa() == pytest.approx(grid.rest_of_world_poa())
+
+
+def test_debrief_pod_sources():
+    assert debrief_pod({"forms": {"air_sar": {"act_pod": "65"}}}) == pytest.approx(0.65)
+    assert debrief_pod({"forms": {"ground": {"pod": "40%"}}}) == pytest.approx(0.4)
+    # Always percent: a POD of 1 is 1%, not certainty.
+    assert debrief_pod({"forms": {"ground": {"pod": 1}}}) == pytest.approx(0.01)
+    coverage = debrief_pod({"forms": {"area": {"spacing": "20 m", "visibility_distance": "20"}}})
+    assert coverage == pytest.approx(1 - math.exp(-1))
+    assert debrief_pod({"forms": {"ground": {"summary": "nothing found"}}}) is None
+
+
+def test_million_cell_grid_replans_quickly():
+    started = time.perf_counter()
+    big = ProbabilityGrid.from_lpb_rings(*_IPP, (2000, 5000, 9000, 16000), cell_size_m=40.0)
+    assert big.values.size >= 1_000_000
+    segments = [
+        f"POLYGON(({-85.6 + i * 0.01} 42.9, {-85.59 + i * 0.01} 42.9, "
+        f"{-85.59 + i * 0.01} 42.91, {-85.6 + i * 0.01} 42.91, {-85.6 + i * 0.01} 42.9))"
+        for i in range(20)
+    ]
+    for i, wkt in enumerate(segments):
+        big.apply_search(big.rasterize_segment(str(i), wkt), 0.7, segment_keys=[str(i)])
+    elapsed = time.perf_counter() - started
+    assert elapsed < 1.0
+    assert _total(big) == pytest.approx(1.0)
+
+
+def _clear(db):
+    db["tasks"].delete_many({})
+    db["task_debriefs"].delete_many({})
+    db["spatial_features"].delete_many({})
+    db["spatial_feature_links"].delete_many({})
+    db["search_probability_grid"].delete_many({})
+    search_probability._reset_cache()
+
+
+def test_sync_applies_debriefs_once():
+    db = get_incident_db(INCIDENT_ID)
+    _clear(db)
+    db["tasks"].insert_one({"int_id": 1, "task_id": "T-001"})
+    db["spatial_features"].insert_one({
+        "int_id": 1,
+        "incident_id": INCIDENT_ID,
+        "feature_type": "search_segment",
+        "geometry_wkt": _SQUARE,
+        "label": "Seg A",
+        "source_record_type": "task",
+        "source_record_id": "T-001",
+    })
+    db["task_debriefs"].insert_many([
+        {"int_id": 1, "task_id": 1, "forms": {"air_sar": {"act_pod": 70}}},
+        {"int_id": 2, "task_id": 1, "forms": {}},
+    ])
+
+    app = create_app()
+    with TestClient(app) as client:
+        res = client.put(f"/api/incidents/{INCIDENT_ID}/search-probability", json={
+            "ipp_lat": _IPP[1], "ipp_lon": _IPP[0], "ring_distances_m": list(_RINGS), "cell_size_m": 25,
+        })
+        assert res.status_code == 200
+        before = res.json()["segments"][0]["poa"]
+
+        res = client.post(f"/api/incidents/{INCIDENT_ID}/search-probability/sync")
+        assert res.status_code == 200
+        body = res.json()
+        statuses = {r["debrief_id"]: r["status"] for r in body["results"]}
+        assert statuses == {1: "applied", 2: "skipped"}
+        segment = body["segments"][0]
+        assert segment["feature_id"] == 1
+        assert segment["cumulative_pod"] == pytest.approx(0.7)
+        assert segment["poa"] < before
+
+        res = client.post(f"/api/incidents/{INCIDENT_ID}/search-probability/sync")
+        assert [r["debrief_id"] for r in res.json()["results"]] == [2]
+
+        search_probability._reset_cache()
+        layer = client.get(f"/api/incidents/{INCIDENT_ID}/search-probability/layer?max_cells=400").json()
+        assert layer["type"] == "FeatureCollection"
+        assert 0 < len(layer["features"]) <= 400
+        total = sum(f["properties"]["poa"] for f in layer["features"])
+        assert total + layer["properties"]["rest_of_world_poa"] == pytest.approx(1.0)
+
+    _clear(db)
+
+
+def test_sync_failed_save_or_uncovered_area_applies_nothing(monkeypatch):
+    db = get_incident_db(INCIDENT_ID)
+    _clear(db)
+    db["tasks"].insert_many([{"int_id": 1, "task_id": "T-001"}, {"int_id": 2, "task_id": "T-002"}])
+    far_away = "POLYGON((10 10, 10.01 10, 10.01 10.01, 10 10.01, 10 10))"
+    for int_id, task_id, wkt in ((1, "T-001", _SQUARE), (2, "T-002", far_away)):
+        db["spatial_features"].insert_one({
+            "int_id": int_id,
+            "incident_id": INCIDENT_ID,
+            "feature_type": "search_segment",
+            "geometry_wkt": wkt,
+            "source_record_type": "task",
+            "source_record_id": task_id,
+        })
+    db["task_debriefs"].insert_many([
+        {"int_id": 1, "task_id": 1, "forms": {"air_sar": {"act_pod": 50}}},
+        {"int_id": 2, "task_id": 2, "forms": {"air_sar": {"act_pod": 50}}},
+    ])
+
+    app = create_app()
+    with TestClient(app, raise_server_exceptions=False) as client:
+        client.put(f"/api/incidents/{INCIDENT_ID}/search-probability", json={
+            "ipp_lat": _IPP[1], "ipp_lon": _IPP[0], "ring_distances_m": list(_RINGS), "cell_size_m": 25,
+        })
+        real_save = search_probability._save
+
+        def failing_save(*args, **kwargs):
+            raise RuntimeError("write failed")
+
+        monkeypatch.setattr(search_probability, "_save", failing_save)
+        assert client.post(f"/api/incidents/{INCIDENT_ID}/search-probability/sync").status_code == 500
+        monkeypatch.setattr(search_probability, "_save", real_save)
+
+        body = client.post(f"/api/incidents/{INCIDENT_ID}/search-probability/sync").json()
+        results = {r["debrief_id"]: r for r in body["results"]}
+        assert results[1]["status"] == "applied"
+        assert results[2]["status"] == "skipped"
+        assert body["applied_debrief_ids"] == [1]
+        segment = next(s for s in body["segments"] if s["feature_id"] == 1)
+        # Applied once, not on top of the failed attempt.
+        assert segment["cumulative_pod"] == pytest.approx(0.5)
+
+    _clear(db)
+
+
+def test_sync_skips_debriefs_without_id_and_keeps_pod_across_segment_edits():
+    db = get_incident_db(INCIDENT_ID)
+    _clear(db)
+    db["tasks"].insert_one({"int_id": 1, "task_id": "T-001"})
+    db["spatial_features"].insert_one({
+        "int_id": 1,
+        "incident_id": INCIDENT_ID,
+        "feature_type": "search_segment",
+        "geometry_wkt": _SQUARE,
+        "updated_at": "2026-01-01T00:00:00",
+        "source_record_type": "task",
+        "source_record_id": "T-001",
+    })
+    db["task_debriefs"].insert_many([
+        {"task_id": 1, "forms": {"air_sar": {"act_pod": 90}}},
+        {"int_id": 1, "task_id": 1, "forms": {"air_sar": {"act_pod": 50}}},
+    ])
+
+    with TestClient(create_app()) as client:
+        client.put(f"/api/incidents/{INCIDENT_ID}/search-probability", json={
+            "ipp_lat": _IPP[1], "ipp_lon": _IPP[0], "ring_distances_m": list(_RINGS), "cell_size_m": 25,
+        })
+        body = client.post(f"/api/incidents/{INCIDENT_ID}/search-probability/sync").json()
+        assert [r["debrief_id"] for r in body["results"]] == [1]
+
+        db["spatial_features"].update_one({"int_id": 1}, {"$set": {"updated_at": "2026-01-02T00:00:00"}})
+        db["task_debriefs"].insert_one({"int_id": 2, "task_id": 1, "forms": {"air_sar": {"act_pod": 50}}})
+        body = client.post(f"/api/incidents/{INCIDENT_ID}/search-probability/sync").json()
+
+    assert body["applied_debrief_ids"] == [1, 2]
+    assert body["segments"][0]["cumulative_pod"] == pytest.approx(0.75)
+
+    _clear(db)
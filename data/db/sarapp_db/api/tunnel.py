@@ -0,0 +1,27 @@
+"""Requests forwarded down the cloud router's reverse tunnel.
+
+The cloud router (cloud_server/router/app.py) stamps the real field-device
+IP into ``x-sarapp-client-ip`` before forwarding a request. The header is
+only trusted when the request actually arrived over the tunnel's loopback
+hop (client.host == 127.0.0.1) — a direct LAN client could otherwise set it
+itself to spoof another address.
+"""
+from __future__ import annotations
+
+from fastapi import Request
+
+CLIENT_IP_HEADER = "x-sarapp-client-ip"
+_LOOPBACK_HOST = "127.0.0.1"
+
+
+def came_through_tunnel(request: Request) -> bool:
+    """True when the request was forwarded down the cloud router's tunnel."""
+    host = request.client.host if request.client else ""
+    return host == _LOOPBACK_HOST and bool(request.headers.get(CLIENT_IP_HEADER))
+
+
+def client_address(request: Request) -> str:
+    """The field device's IP for tunnelled requests, else the peer address."""
+    if came_through_tunnel(request):
+        return request.headers[CLIENT_IP_HEADER]
+    return request.client.host if request.client else ""
@@ -10,8 +10,9 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import threading
 from collections import defaultdict
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 from fastapi import WebSocket
 
@@ -22,6 +23,9 @@ class IncidentWebSocketHub:
     def __init__(self) -> None:
         self._connections: Dict[str, List[WebSocket]] = defaultdict(list)
         self._loop: asyncio.AbstractEventLoop | None = None
+        # Sends scheduled by broadcast() that have not finished yet.
+        self._pending_sends = 0
+        self._pending_lock = threading.Lock()
 
     async def connect(self, incident_id: str, websocket: WebSocket) -> None:
         # The running server has exactly one event loop for its whole
@@ -51,21 +55,105 @@ class IncidentWebSocketHub:
         if not conns or self._loop is None:
             return
         for ws in list(conns):
-            asyncio.run_coroutine_threadsafe(self._safe_send(incident_id, ws, event), self._loop)
+            with self._pending_lock:
+                self._pending_sends += 1
+            try:
+                asyncio.run_coroutine_threadsafe(self._safe_send(incident_id, ws, event), self._loop)
+            except Exception:
+                with self._pending_lock:
+                    self._pending_sends -= 1
+                raise
 
     async def _safe_send(self, incident_id: str, ws: WebSocket, event: Dict[str, Any]) -> None:
         try:
             await ws.send_json(event)
         except Exception:
             self.disconnect(incident_id, ws)
+        finally:
+            with self._pending_lock:
+                self._pending_sends -= 1
+
+    def stats(self) -> Dict[str, float]:
+        """Connected clients and broadcast sends still queued on the loop."""
+        return {
+            "connections": sum(len(conns) for conns in self._connections.values()),
+            "pending_sends": self._pending_sends,
+        }
 
 
 hub = IncidentWebSocketHub()
 
+ChangeListener = Callable[[str, str, str, str, Optional[Dict[str, Any]]], None]
+
+# In-process observers of the same change feed the WebSocket clients get —
+# for server-side indexes (e.g. sarapp_db.services.geofence_engine) that
+# must stay current without polling Mongo.
+_change_listeners: List[ChangeListener] = []
+
+
+def add_change_listener(listener: ChangeListener) -> None:
+    """Call `listener(incident_id, collection, op, doc_id, doc)` on every
+    change. Listeners run synchronously on the writing thread, so they must
+    be quick; exceptions are logged and swallowed."""
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
 
-def broadcast_change(incident_id: str, collection: str, op: str, doc_id: str, doc: Dict[str, Any] | None) -> None:
+def remove_change_listener(listener: ChangeListener) -> None:
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+
+def broadcast_change(
+    incident_id: str,
+    collection: str,
+    op: str,
+    doc_id: str,
+    doc: Dict[str, Any] | None,
+    *,
+    to_clients: bool = True,
+) -> None:
     """Broadcast a single collection change to all clients watching this incident.
 
-    op is one of "created", "updated", "deleted".
+    op is one of "created", "updated", "deleted". With `to_clients=False`
+    only the in-process change listeners hear it — for writes that send
+    clients their own, smaller event (see `broadcast_team_position`).
+    """
+    if to_clients:
+        hub.broadcast(incident_id, {"collection": collection, "op": op, "id": doc_id, "doc": doc})
+    for listener in list(_change_listeners):
+        try:
+            listener(incident_id, collection, op, doc_id, doc)
+        except Exception:
+            logger.exception("Change listener failed for %s on '%s'", op, collection)
+
+
+def broadcast_team_position(
+    incident_id: str,
+    doc_id: Any,
+    team_id: Any,
+    lat: float | None,
+    lon: float | None,
+    ts: str | None,
+    person_record: Any = None,
+) -> None:
+    """Broadcast a bare position delta for one team's map marker.
+
+    Sent instead of the `teams` change for a recorded or cleared fix (the
+    write itself goes out with `to_clients=False`): clients patch the
+    cached team document's current_location_* fields from it and feed
+    their maps, so a fix costs one small message rather than the whole
+    document. `lat`/`lon` of None means the team's position was cleared.
     """
-    hub.broadcast(incident_id, {"collection": collection, "op": op, "id": doc_id, "doc": doc})
+    hub.broadcast(
+        incident_id,
+        {
+            "type": "team_position",
+            "id": str(doc_id),
+            "team_id": team_id,
+            "lat": lat,
+            "lon": lon,
+            "ts": ts,
+            "person_record": person_record,
+        },
+    )
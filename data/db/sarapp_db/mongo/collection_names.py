@@ -129,6 +129,9 @@ class IncidentCollections:
     # Forms — instances with embedded values; attachment ids reference
     # canonical exports/files stored in IncidentCollections.ATTACHMENTS.
     FORMS = "forms"
+    # Server-side batch form exports; outputs live in the "form_job_files"
+    # GridFS bucket (see sarapp_db.services.form_jobs).
+    FORM_JOBS = "form_jobs"
 
     # Hazards identified during this incident
     HAZARDS = "hazards"
@@ -151,6 +154,9 @@ class IncidentCollections:
     INITIAL_HASTY_TASKS = "initial_hasty_tasks"
     INITIAL_REFLEX_ACTIONS = "initial_reflex_actions"
 
+    # Probability-of-area grid (one document; see services/probability_grid.py)
+    SEARCH_PROBABILITY_GRID = "search_probability_grid"
+
     # Planned event toolkit
     PLANNED_CAMPAIGNS = "planned_campaigns"
     PLANNED_EVENT_SCHEDULES = "planned_event_schedules"
@@ -63,6 +63,7 @@ def create_incident_indexes(incident_db: Database) -> None:
     _create_facilities_indexes(incident_db)
     _create_resource_status_indexes(incident_db)
     _create_iap_indexes(incident_db)
+    _create_form_jobs_indexes(incident_db)
     _create_sitrep_indexes(incident_db)
     logger.debug("Incident database indexes verified: %s", incident_db.name)
 
@@ -259,6 +260,12 @@ def _create_iap_indexes(incident_db: Database) -> None:
     _ensure_index(packages, [("forms.form_id", ASCENDING)])
 
 
+def _create_form_jobs_indexes(incident_db: Database) -> None:
+    jobs = incident_db[IncidentCollections.FORM_JOBS]
+    _ensure_index(jobs, [("status", ASCENDING)])
+    _ensure_index(jobs, [("created_at", DESCENDING)])
+
+
 def _create_meetings_indexes(incident_db: Database) -> None:
     meetings = incident_db[IncidentCollections.MEETINGS]
     _ensure_index(meetings, [("incident_id", ASCENDING)])
@@ -17,6 +17,7 @@ from typing import Optional
 
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, ConfigurationError
+from pymongo.monitoring import CommandListener
 
 from sarapp_db.mongo.errors import DatabaseConnectionError, DatabaseConfigurationError
 
@@ -26,6 +27,7 @@ _URI_ENV_VAR = "SARAPP_MONGO_URI"
 _DEFAULT_URI = "mongodb://localhost:27017"
 
 _client: Optional[MongoClient] = None
+_command_listeners: list[CommandListener] = []
 
 
 def get_mongo_uri() -> str:
@@ -43,6 +45,20 @@ def get_mongo_uri() -> str:
     return _DEFAULT_URI
 
 
+def add_command_listener(listener: CommandListener) -> None:
+    """
+    Register a pymongo command listener for the shared client.
+
+    pymongo fixes a client's listeners when it is created, so call this
+    before the first get_client(). Adding the same listener again is a no-op.
+    """
+    if listener in _command_listeners:
+        return
+    _command_listeners.append(listener)
+    if _client is not None:
+        logger.warning("MongoDB client already created; %r will not see its commands.", listener)
+
+
 def get_client() -> MongoClient:
     """
     Return the shared MongoClient for this server process.
@@ -60,6 +76,7 @@ def get_client() -> MongoClient:
         client: MongoClient = MongoClient(
             uri,
             serverSelectionTimeoutMS=5000,
+            event_listeners=list(_command_listeners),
         )
         client.admin.command("ping")
         _client = client
@@ -69,7 +69,7 @@ class BaseRepository:
         self._col = db[self.collection_name]
         self._incident_id = _incident_id_for_db(db)
 
-    def _broadcast(self, op: str, doc_id: Any, doc: Optional[Dict[str, Any]]) -> None:
+    def _broadcast(self, op: str, doc_id: Any, doc: Optional[Dict[str, Any]], *, to_clients: bool = True) -> None:
         if self._incident_id is None:
             return
         # Documents from collections that predate BaseRepository can carry
@@ -83,7 +83,7 @@ class BaseRepository:
         try:
             from sarapp_db.api.ws_hub import broadcast_change
 
-            broadcast_change(self._incident_id, self.collection_name, op, doc_id, doc)
+            broadcast_change(self._incident_id, self.collection_name, op, doc_id, doc, to_clients=to_clients)
         except Exception:
             logger.exception("Failed to broadcast %s change on '%s'", op, self.collection_name)
 
@@ -111,15 +111,19 @@ class BaseRepository:
         *,
         touch_updated_at: bool = True,
         extra_filter: Optional[Dict[str, Any]] = None,
+        to_clients: bool = True,
     ) -> bool:
         """Apply $set updates to the document with the given _id.
 
         `extra_filter` adds further match constraints (e.g. a parent id) on
         top of `_id` — useful for nested resources scoped under a parent.
+        `to_clients=False` keeps the change off the WebSocket (in-process
+        listeners still see it) for callers that send clients their own,
+        smaller event.
         """
         if touch_updated_at:
             updates = {**updates, "updated_at": _utcnow_iso()}
-        return self.apply_update(doc_id, {"$set": updates}, extra_filter=extra_filter)
+        return self.apply_update(doc_id, {"$set": updates}, extra_filter=extra_filter, to_clients=to_clients)
 
     def apply_update(
         self,
@@ -128,6 +132,7 @@ class BaseRepository:
         *,
         extra_filter: Optional[Dict[str, Any]] = None,
         touch_updated_at: bool = True,
+        to_clients: bool = True,
     ) -> bool:
         """Apply an arbitrary Mongo update document ($push/$pull/$addToSet/
         $set/...) to the document with the given _id, and broadcast the
@@ -149,7 +154,7 @@ class BaseRepository:
         if result.matched_count > 0:
             doc = self._col.find_one({"_id": doc_id})
             op = "deleted" if doc and doc.get("deleted") is True else "updated"
-            self._broadcast(op, doc_id, doc)
+            self._broadcast(op, doc_id, doc, to_clients=to_clients)
         return result.matched_count > 0
 
     def soft_delete(self, doc_id: str) -> bool:
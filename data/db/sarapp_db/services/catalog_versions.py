@@ -0,0 +1,142 @@
+"""
+Version stamp and ETags for the master catalog endpoints.
+
+Catalogs (`CATALOG_PREFIXES`: master personnel and the other master lists,
+resource and hazard types, lookups) are read far more often than they
+change, and remote clients behind the cloud router re-fetch them over a
+constrained uplink. The app's middleware (`sarapp_db.api.app`) therefore:
+
+- answers catalog GETs with a strong `ETag` over the body and the current
+  version in `X-SARApp-Catalog-Version`, and with `304 Not Modified` when
+  `If-None-Match` matches;
+- bumps the version after every successful write under those prefixes.
+
+Routes outside those prefixes write master catalogs too (check-in mirrors
+callsign, role and incident history into master personnel), so
+`MASTER_WRITE_LISTENER`, a pymongo command listener the app registers on
+the shared client, also bumps after every acknowledged write to a master
+collection other than the login, device and audit ones.
+
+Master writes never reach the incident change feed, so the version is the
+one signal that a catalog changed. It is coarse — any catalog write moves
+it — and ETags keep that cheap: after a bump a cached copy is revalidated,
+and only the catalogs that really changed are sent again. The cloud tunnel
+client relays the version to the router (`add_listener` pushes each bump,
+pongs repeat it), which serves its cached copies while the version holds.
+
+The counter starts from the clock, so a restarted server never reuses a
+version an older process handed out.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, List
+
+from pymongo import monitoring
+
+from sarapp_db.mongo.collection_names import MasterCollections
+from sarapp_db.mongo.database_manager import DB_MASTER
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PREFIXES = (
+    "/api/master/",
+    "/api/resource-types",
+    "/api/hazard-types",
+    "/api/lookup/",
+)
+
+VERSION_HEADER = "X-SARApp-Catalog-Version"
+
+_WRITE_COMMANDS = frozenset({"insert", "update", "delete", "findAndModify"})
+
+# Master collections no catalog endpoint serves. Logins, heartbeats, push
+# registrations and audit trails change them constantly.
+_NON_CATALOG_COLLECTIONS = frozenset({
+    MasterCollections.USERS,
+    MasterCollections.USER_SESSIONS,
+    MasterCollections.USER_PROFILES,
+    MasterCollections.CLIENT_CONNECTIONS,
+    MasterCollections.PUSH_TOKENS,
+    MasterCollections.ORGANIZATION_AUDIT_LOG,
+    MasterCollections.RANK_STRUCTURE_AUDIT_LOG,
+})
+
+_lock = threading.Lock()
+_version = int(time.time() * 1000)
+_listeners: List[Callable[[int], None]] = []
+
+
+def is_catalog_path(path: str) -> bool:
+    return path.startswith(CATALOG_PREFIXES)
+
+
+def current() -> int:
+    return _version
+
+
+def bump() -> int:
+    global _version
+    with _lock:
+        _version += 1
+        version = _version
+    for listener in list(_listeners):
+        try:
+            listener(version)
+        except Exception:
+            logger.exception("Catalog version listener failed")
+    return version
+
+
+def add_listener(listener: Callable[[int], None]) -> None:
+    """Call `listener(version)` after every bump, on the writing thread."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[int], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class _MasterWriteListener(monitoring.CommandListener):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: Dict[int, str] = {}  # request_id -> collection
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.database_name != DB_MASTER or event.command_name not in _WRITE_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if collection in _NON_CATALOG_COLLECTIONS:
+            return
+        with self._lock:
+            self._pending[event.request_id] = collection
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        with self._lock:
+            collection = self._pending.pop(event.request_id, None)
+        if collection is not None:
+            bump()
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        with self._lock:
+            self._pending.pop(event.request_id, None)
+
+
+MASTER_WRITE_LISTENER = _MasterWriteListener()
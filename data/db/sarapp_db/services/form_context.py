@@ -0,0 +1,241 @@
+"""
+Server-side form data context assembly.
+
+The forms engine's `FormDataContext` builds each context section (personnel,
+channels, the org chart, liaison, hazards, ...) by reading raw lists from a
+dozen endpoints and joining them. Over a remote link that is dozens of round
+trips per form. `GET /api/incidents/{id}/forms/context?sections=...` runs the
+same builders here instead, reading the routers in-process through the
+fetcher form jobs use (`form_jobs.in_process_fetch`), and returns every
+requested section in one response.
+
+Built sections are cached per (incident, operational period, section):
+
+- incident sections are dropped when the incident's change feed
+  (`ws_hub.add_change_listener`) reports a write to a collection they may
+  read. `_COLLECTION_SECTIONS` narrows the high-churn collections (team
+  positions, logs) to the sections that read them; any other collection
+  drops every section of the incident, and collections no section reads
+  (`_IGNORED_COLLECTIONS`) drop nothing;
+- sections that only read master data (`MASTER_SECTIONS`) are shared by all
+  incidents. Master writes are not on the change feed, so those entries, and
+  as a backstop against writes that bypass `BaseRepository` every entry,
+  also expire after a TTL.
+
+Sections that depend on the requesting workstation (`CLIENT_SECTIONS`:
+the signed-in user's "prepared by" block, the desktop weather poller) are
+never built here; they come back in `unavailable` together with any name
+this server does not know, and the client builds them itself.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sarapp_db.api import ws_hub
+from sarapp_db.mongo.collection_names import IncidentCollections
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_TTL_SECONDS = 300.0
+MASTER_TTL_SECONDS = 30.0
+MAX_ENTRIES = 2048
+
+CLIENT_SECTIONS = frozenset({"prepared_by", "weather"})
+
+MASTER_SECTIONS = frozenset({
+    "aircraft",
+    "comms_resources",
+    "ems_agencies",
+    "equipment",
+    "hazard_types",
+    "hospitals",
+    "master_vehicles",
+    "personnel",
+    "resource_types",
+    "safety_analysis_templates",
+})
+
+_COLLECTION_SECTIONS: Dict[str, frozenset] = {
+    IncidentCollections.TEAMS: frozenset({"teams"}),
+    IncidentCollections.TASKS: frozenset({"tasks"}),
+    IncidentCollections.ICS_214_LOGS: frozenset({"narrative"}),
+    IncidentCollections.COMMUNICATIONS_LOG: frozenset({"comm_log"}),
+    IncidentCollections.MEETINGS: frozenset({"meetings"}),
+    IncidentCollections.IWI_REPORTS: frozenset({"iwi_reports"}),
+    IncidentCollections.SAFETY_REPORTS: frozenset({"safety_reports"}),
+}
+
+_IGNORED_COLLECTIONS = frozenset({
+    IncidentCollections.FORMS,
+    IncidentCollections.FORM_JOBS,
+    IncidentCollections.NOTIFICATIONS,
+    IncidentCollections.SEARCH_PROBABILITY_GRID,
+})
+
+_ALL = "*"
+
+CacheKey = Tuple[Optional[str], Any, str]  # incident (None for master), op number, section
+
+
+class ContextCache:
+    """LRU of built sections, stamped with the invalidation generation they
+    were built under."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[int, float, Any]]" = OrderedDict()
+        self._generations: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _generation_locked(self, incident_id: Optional[str], section: str) -> int:
+        if incident_id is None:
+            return 0
+        # Either a bump of the section or of the whole incident moves the sum.
+        return self._generations.get((incident_id, section), 0) + self._generations.get((incident_id, _ALL), 0)
+
+    def generation(self, incident_id: Optional[str], section: str) -> int:
+        with self._lock:
+            return self._generation_locked(incident_id, section)
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        incident_id, _op, section = key
+        ttl = MASTER_TTL_SECONDS if incident_id is None else INCIDENT_TTL_SECONDS
+        generation = self.generation(incident_id, section)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation or time.monotonic() - entry[1] > ttl:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[2]
+
+    def put(self, key: CacheKey, generation: int, value: Any) -> None:
+        if self.generation(key[0], key[2]) != generation:
+            return  # invalidated while it was being built
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, incident_id: str, sections: Iterable[str] = (_ALL,)) -> None:
+        with self._lock:
+            for section in sections:
+                key = (incident_id, section)
+                self._generations[key] = self._generations.get(key, 0) + 1
+            stale = [
+                key for key, entry in self._entries.items()
+                if key[0] == incident_id and entry[0] != self._generation_locked(incident_id, key[2])
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+cache = ContextCache()
+_listening = False
+_listen_lock = threading.Lock()
+
+
+def _on_change(incident_id: str, collection: str, op: str, doc_id: str, doc: Optional[dict]) -> None:
+    if collection in _IGNORED_COLLECTIONS:
+        return
+    cache.invalidate(incident_id, _COLLECTION_SECTIONS.get(collection, (_ALL,)))
+
+
+def _ensure_listening() -> None:
+    global _listening
+    if not _listening:
+        with _listen_lock:
+            if not _listening:
+                ws_hub.add_change_listener(_on_change)
+                _listening = True
+
+
+def reset() -> None:
+    """Drop every cached section (tests)."""
+    cache.clear()
+
+
+def _key(incident_id: str, op_number: Any, section: str) -> CacheKey:
+    if section in MASTER_SECTIONS:
+        return (None, None, section)
+    return (incident_id, op_number, section)
+
+
+def build_sections(
+    app: Any, incident_id: str, sections: Iterable[str], op_number: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build (or serve from cache) the requested context sections for
+    operational period `op_number` (default: the current one).
+
+    Returns `{"incident_id", "op_number", "sections": {name: value},
+    "unavailable": [names]}`.
+    """
+    from modules.forms_creator.context import FormDataContext
+    from sarapp_db.services.form_jobs import in_process_fetch
+
+    _ensure_listening()
+    fetch, client = in_process_fetch(app)
+    try:
+        ctx = FormDataContext(fetch, server_assembly=False).lazy(incident_id, op_number)
+        known = set(ctx.keys())
+        requested = list(dict.fromkeys(s for s in sections if s))
+        unavailable = [s for s in requested if s in CLIENT_SECTIONS or s.startswith("_") or s not in known]
+        wanted = [s for s in requested if s not in unavailable]
+
+        # The op period picks the cache slot of every section, so it is
+        # resolved (from the cache when possible) first. It is cached under
+        # the number asked for; None stands for "the current period".
+        op_key = _key(incident_id, op_number, "op_period")
+        hit, op_period = cache.get(op_key)
+        if hit:
+            ctx["op_period"] = op_period
+        else:
+            generation = cache.generation(incident_id, "op_period")
+            cache.put(op_key, generation, ctx["op_period"])
+        op_number = ctx["_op_number"]
+
+        result: Dict[str, Any] = {}
+        missing: List[str] = []
+        for section in wanted:
+            if section == "op_period":
+                result[section] = ctx["op_period"]
+                continue
+            hit, value = cache.get(_key(incident_id, op_number, section))
+            if hit:
+                result[section] = value
+            else:
+                missing.append(section)
+        # Stamped before building, so a change that lands mid-build keeps
+        # the result out of the cache.
+        generations = {section: cache.generation(_key(incident_id, op_number, section)[0], section) for section in missing}
+        ctx.prefetch(missing)
+        for section in missing:
+            result[section] = ctx[section]
+            cache.put(_key(incident_id, op_number, section), generations[section], result[section])
+    finally:
+        client.close()
+    return {
+        "incident_id": incident_id,
+        "op_number": op_number,
+        "sections": result,
+        "unavailable": unavailable,
+    }
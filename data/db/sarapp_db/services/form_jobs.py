@@ -0,0 +1,385 @@
+"""
+Server-side batch form export jobs.
+
+A field laptop or tablet asks for a print package (every 204, every 214, a
+whole IAP) with one POST instead of pulling the data and filling PDFs
+itself. Jobs run here, next to MongoDB:
+
+- the data snapshot is read through the forms engine's `FormDataContext`
+  with a fetcher that dispatches into this FastAPI app in-process over
+  `httpx.ASGITransport`, so sections come from the routers without a
+  network hop;
+- forms are filled by `modules.forms_creator.batch.generate_batch`, either
+  inline on the job thread or in a process pool of
+  `SARAPP_FORM_JOB_PROCESSES` workers, through the forms engine's disk render
+  cache so a re-printed package only fills the forms whose values changed;
+- outputs (one merged PDF, or one PDF per form) go to the incident's
+  "form_job_files" GridFS bucket for download.
+
+At most `MAX_RUNNING_JOBS` jobs fill at once and at most `MAX_QUEUED_JOBS`
+wait behind them per server; further submissions are refused. Job state is
+a document in the incident's `form_jobs` collection, written through
+`BaseRepository`, so every status and progress update reaches clients on the
+incident WebSocket as an ordinary `form_jobs` change event.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import gridfs
+import httpx
+from bson import ObjectId
+
+from sarapp_db.mongo.collection_names import IncidentCollections
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.mongo.repository import BaseRepository
+
+logger = logging.getLogger(__name__)
+
+MAX_RUNNING_JOBS = 2
+MAX_QUEUED_JOBS = 16
+MAX_FORMS_PER_JOB = 200
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+_GRIDFS_COLLECTION = "form_job_files"
+_PROCESSES_ENV_VAR = "SARAPP_FORM_JOB_PROCESSES"
+_INTERNAL_BASE_URL = "http://sarapp.internal"
+_FETCH_TIMEOUT_SECONDS = 60.0
+
+
+class FormJobError(ValueError):
+    """Raised for job requests that cannot be queued."""
+
+
+class FormJobQueueFull(FormJobError):
+    """Raised when `MAX_QUEUED_JOBS` jobs are already waiting."""
+
+
+class FormJobCancelled(Exception):
+    """Raised inside a running job once it has been deleted."""
+
+
+class FormJobsRepository(BaseRepository):
+    collection_name = IncidentCollections.FORM_JOBS
+    soft_deletes = False
+
+
+def _repo(incident_id: str) -> FormJobsRepository:
+    return FormJobsRepository(get_incident_db(incident_id))
+
+
+def _fs(incident_id: str) -> gridfs.GridFS:
+    return gridfs.GridFS(get_incident_db(incident_id), collection=_GRIDFS_COLLECTION)
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _fill_processes() -> int:
+    try:
+        return max(1, int(os.environ.get(_PROCESSES_ENV_VAR, "1")))
+    except ValueError:
+        return 1
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_queued = 0
+# Jobs deleted while running; their progress callback stops the fill.
+_cancelled: set[str] = set()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_RUNNING_JOBS, thread_name_prefix="sarapp-form-jobs")
+        return _executor
+
+
+def public_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(doc)
+    out.pop("_id", None)
+    return out
+
+
+def submit(
+    incident_id: str,
+    forms: Sequence[Dict[str, Any]],
+    *,
+    app: Any,
+    form_set_id: Optional[str] = None,
+    op_number: Optional[int] = None,
+    merge: bool = True,
+    title: str = "",
+    requested_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Queue a job filling `forms` (`{"form_id", "title", "extra_data"}`
+    dicts, in output order) and return its document.
+
+    `app` is the FastAPI application the job reads incident data from;
+    `op_number` is the operational period the forms describe (default: the
+    current one).
+    """
+    global _queued
+    if not forms:
+        raise FormJobError("A form job needs at least one form")
+    if len(forms) > MAX_FORMS_PER_JOB:
+        raise FormJobError(f"A form job is limited to {MAX_FORMS_PER_JOB} forms")
+    with _lock:
+        if _queued >= MAX_QUEUED_JOBS:
+            raise FormJobQueueFull("Too many form jobs are waiting; try again shortly")
+        _queued += 1
+
+    job_id = uuid.uuid4().hex
+    try:
+        doc = _repo(incident_id).insert_one({
+            "_id": job_id,
+            "job_id": job_id,
+            "incident_id": incident_id,
+            "status": STATUS_QUEUED,
+            "title": title,
+            "form_set_id": form_set_id,
+            "op_number": op_number,
+            "merge": bool(merge),
+            "forms": [{"form_id": f["form_id"], "title": f.get("title") or f["form_id"]} for f in forms],
+            "total": len(forms),
+            "done": 0,
+            "current": None,
+            "results": [],
+            "outputs": [],
+            "error": None,
+            "requested_by": requested_by,
+            "started_at": None,
+            "finished_at": None,
+        })
+        _get_executor().submit(_run, incident_id, job_id, [dict(f) for f in forms], app)
+    except Exception:
+        with _lock:
+            _queued -= 1
+        raise
+    return doc
+
+
+def get_job(incident_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+    return _repo(incident_id).find_one({"_id": job_id})
+
+
+def list_jobs(incident_id: str) -> List[Dict[str, Any]]:
+    return _repo(incident_id).find_many({}, sort=[("created_at", -1)])
+
+
+def delete_job(incident_id: str, job_id: str) -> bool:
+    """Remove a job and its outputs. A queued job is cancelled before it
+    starts; a running one stops after the form it is filling and stores
+    nothing."""
+    repo = _repo(incident_id)
+    doc = repo.find_one({"_id": job_id})
+    if doc is None:
+        return False
+    if doc.get("status") == STATUS_RUNNING:
+        with _lock:
+            _cancelled.add(job_id)
+    _delete_outputs(incident_id, doc.get("outputs") or [])
+    repo.delete_one(job_id)
+    return True
+
+
+def open_output(incident_id: str, job_id: str, index: int) -> tuple[Dict[str, Any], Any]:
+    """Return `(output entry, GridOut)` for output `index` of a job."""
+    doc = get_job(incident_id, job_id)
+    if doc is None:
+        raise KeyError("Form job not found")
+    outputs = doc.get("outputs") or []
+    if not 0 <= index < len(outputs):
+        raise KeyError("Form job output not found")
+    entry = outputs[index]
+    return entry, _fs(incident_id).get(ObjectId(entry["gridfs_file_id"]))
+
+
+def _delete_outputs(incident_id: str, outputs: Sequence[Dict[str, Any]]) -> None:
+    fs = _fs(incident_id)
+    for entry in outputs:
+        try:
+            fs.delete(ObjectId(entry["gridfs_file_id"]))
+        except Exception:
+            logger.debug("Form job output %s already gone", entry.get("gridfs_file_id"))
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+class _InProcessClient:
+    """Synchronous GETs against an ASGI app through `httpx.ASGITransport`.
+
+    The transport is async-only, so requests run on a private event loop
+    thread; `get` may be called from any number of threads at once.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="sarapp-in-process-fetch", daemon=True)
+        self._thread.start()
+        self._client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url=_INTERNAL_BASE_URL,
+            timeout=_FETCH_TIMEOUT_SECONDS,
+        )
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        future = asyncio.run_coroutine_threadsafe(self._client.get(path, params=params), self._loop)
+        return future.result(timeout=_FETCH_TIMEOUT_SECONDS)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop.close()
+
+
+def in_process_fetch(app: Any) -> tuple[Callable[..., Any], Any]:
+    """`fetch(path, **params)` reading from `app` without a socket; returns
+    `(fetch, client)` so the caller can close the client."""
+    client = _InProcessClient(app)
+
+    def fetch(path: str, **params: Any) -> Any:
+        query = {k: v for k, v in params.items() if v is not None}
+        try:
+            response = client.get(path, params=query or None)
+        except Exception:
+            return None
+        if response.status_code >= 400 or not response.content:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    return fetch, client
+
+
+def _store(incident_id: str, job_id: str, path: Path, filename: str, form_id: Optional[str]) -> Dict[str, Any]:
+    data = path.read_bytes()
+    file_id = _fs(incident_id).put(
+        data,
+        filename=filename,
+        content_type="application/pdf",
+        metadata={"incident_id": incident_id, "job_id": job_id, "form_id": form_id},
+    )
+    return {"filename": filename, "form_id": form_id, "size_bytes": len(data), "gridfs_file_id": str(file_id)}
+
+
+def _safe_filename(text: str, fallback: str) -> str:
+    cleaned = "".join(ch if ch.isalnum() or ch in "-_ ." else "_" for ch in text).strip(" .")
+    return cleaned or fallback
+
+
+def _result_doc(result: Any) -> Dict[str, Any]:
+    return {
+        "form_id": result.form_id,
+        "title": result.title,
+        "ok": result.ok,
+        "error": result.error,
+        "warnings": list(result.warnings)[:50],
+    }
+
+
+def _run(incident_id: str, job_id: str, forms: List[Dict[str, Any]], app: Any) -> None:
+    global _queued
+    with _lock:
+        _queued -= 1
+    repo = _repo(incident_id)
+    doc = repo.find_one({"_id": job_id})
+    if doc is None or doc.get("status") != STATUS_QUEUED:
+        return
+    repo.update_one(job_id, {"status": STATUS_RUNNING, "started_at": _utcnow()})
+
+    from modules.forms_creator.batch import FormJob, generate_batch, merge_results
+    from modules.forms_creator.pdf_filler import render_cache
+
+    jobs = [
+        FormJob(form_id=f["form_id"], title=f.get("title") or f["form_id"], extra_data=f.get("extra_data") or None)
+        for f in forms
+    ]
+
+    def progress(done: int, total: int, result: Any) -> None:
+        if job_id in _cancelled:
+            raise FormJobCancelled(job_id)
+        repo.apply_update(job_id, {
+            "$set": {"done": done, "total": total, "current": result.title},
+            "$push": {"results": _result_doc(result)},
+        })
+
+    fetch, client = in_process_fetch(app)
+    try:
+        with tempfile.TemporaryDirectory(prefix="sarapp_form_job_") as tmp:
+            parts_dir = Path(tmp) / "parts"
+            results = generate_batch(
+                jobs, parts_dir, incident_id, doc.get("form_set_id"), op_number=doc.get("op_number"),
+                max_workers=_fill_processes(), processes=True, progress=progress, fetch=fetch,
+                cache=render_cache.default_cache(),
+            )
+            if repo.find_one({"_id": job_id}) is None:
+                return  # deleted while running
+            outputs: List[Dict[str, Any]] = []
+            ok = [r for r in results if r.ok]
+            if ok and doc.get("merge", True):
+                name = _safe_filename(doc.get("title") or "", "forms")
+                merged = merge_results(results, Path(tmp) / "merged.pdf")
+                outputs.append(_store(incident_id, job_id, merged, f"{name}.pdf", None))
+            else:
+                for index, result in enumerate(ok):
+                    filename = f"{index + 1:03d}_{_safe_filename(result.title, result.form_id)}.pdf"
+                    outputs.append(_store(incident_id, job_id, result.path, filename, result.form_id))
+        status = STATUS_COMPLETED if ok else STATUS_FAILED
+        if not repo.update_one(job_id, {
+            "status": status,
+            "outputs": outputs,
+            "current": None,
+            "error": None if ok else "No form could be filled",
+            "finished_at": _utcnow(),
+        }):
+            _delete_outputs(incident_id, outputs)
+    except FormJobCancelled:
+        logger.info("Form job %s cancelled", job_id)
+    except Exception as exc:
+        logger.exception("Form job %s failed", job_id)
+        repo.update_one(job_id, {"status": STATUS_FAILED, "error": str(exc), "current": None, "finished_at": _utcnow()})
+    finally:
+        client.close()
+        with _lock:
+            _cancelled.discard(job_id)
+
+
+def shutdown(wait: bool = True) -> None:
+    """Stop the worker threads (tests; server shutdown)."""
+    global _executor, _queued
+    with _lock:
+        executor, _executor = _executor, None
+        _queued = 0
+    if executor is not None:
+        executor.shutdown(wait=wait)
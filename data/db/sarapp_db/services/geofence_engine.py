@@ -0,0 +1,406 @@
+"""
+Streaming geofence and proximity alerts for live team positions.
+
+`mobile_location.submit_location` writes each accepted fix onto the team's
+document and then hands it to `process_fix` here. Every incident gets one
+in-memory `IncidentGeofenceIndex`: hazard zones, exclusion areas and
+assignment areas from the `spatial_features` collection, projected once into
+a local UTM zone and held in a shapely STRtree. Evaluating a fix is one
+point projection plus one tree query, which keeps it well under a
+millisecond, so it can run inline on the ingest path.
+
+The index is loaded from Mongo on the first fix for an incident and then
+kept current from the same change feed the WebSocket clients receive (see
+`sarapp_db.api.ws_hub.add_change_listener`) — creating, editing, archiving
+or deleting a feature, task-area link or task updates the index without
+re-reading the collection. STRtrees are immutable, so edits mark the tree
+stale and the next fix rebuilds it from the already-projected geometries.
+
+Per-team state (which zones the team is inside or near, and whether it is
+inside its own assignment) is kept between fixes, so a notification fires
+once per boundary crossing rather than once per ping:
+
+    hazard_entered      inside a hazard zone it was not inside last fix
+    hazard_proximity    within the proximity radius of a hazard zone
+    exclusion_entered   inside a no-entry / closure area
+    assignment_left     was inside its current task's area, now outside
+
+Notifications go out through `notification_service.emit_notification` on a
+single background worker so the Mongo write and push fan-out never delay the
+mobile client's request.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from sarapp_db.mongo.collection_names import IncidentCollections
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import geometry_engine, notification_service
+
+logger = logging.getLogger(__name__)
+
+HAZARD = "hazard"
+EXCLUSION = "exclusion"
+ASSIGNMENT = "assignment"
+
+_ZONE_KIND_BY_FEATURE_TYPE = {
+    "hazard_zone": HAZARD,
+    "no_entry_zone": EXCLUSION,
+    "closure_area": EXCLUSION,
+    "task_area": ASSIGNMENT,
+    "assignment_area": ASSIGNMENT,
+    "search_segment": ASSIGNMENT,
+}
+
+DEFAULT_HAZARD_PROXIMITY_M = 100.0
+
+_EVENT_PRESENTATION = {
+    # event_type: (title suffix, severity, category)
+    "hazard_entered": ("entered hazard zone", "priority", "safety"),
+    "hazard_proximity": ("approaching hazard zone", "routine", "safety"),
+    "exclusion_entered": ("entered exclusion area", "priority", "safety"),
+    "assignment_left": ("left assigned area", "routine", "operations"),
+}
+
+
+@dataclass(frozen=True)
+class GeofenceZone:
+    zone_id: str  # spatial feature `_id`
+    feature_id: Optional[int]  # spatial feature `int_id`
+    kind: str
+    label: str
+    geometry: Any  # shapely geometry in the index's local UTM meters
+    task_keys: frozenset = frozenset()  # owning task, for assignment areas
+
+
+@dataclass(frozen=True)
+class GeofenceEvent:
+    event_type: str
+    team_id: Any
+    zone: GeofenceZone
+    distance_m: float = 0.0
+
+
+@dataclass
+class _TeamState:
+    task_keys: frozenset = frozenset()
+    inside: frozenset = frozenset()
+    near: frozenset = frozenset()
+    in_assignment: bool = False
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    zones: tuple
+    tree: Optional[STRtree]
+    assignment_keys: tuple  # per zone: owner task keys plus linked task keys
+
+
+@dataclass
+class _Link:
+    feature_id: Any
+    task_key: str
+
+
+class IncidentGeofenceIndex:
+    """Spatial index and per-team crossing state for one incident."""
+
+    def __init__(
+        self,
+        projection: geometry_engine.LocalProjection,
+        *,
+        proximity_m: float = DEFAULT_HAZARD_PROXIMITY_M,
+    ) -> None:
+        self.projection = projection
+        self.proximity_m = float(proximity_m)
+        self._zones: Dict[str, GeofenceZone] = {}
+        self._links: Dict[str, _Link] = {}
+        self._task_aliases: Dict[str, frozenset] = {}
+        self._teams: Dict[Any, _TeamState] = {}
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+
+    # -- Incremental maintenance ---------------------------------------------
+
+    def upsert_feature(self, doc: Dict[str, Any]) -> None:
+        """Add, replace or drop one spatial feature document."""
+        zone_id = str(doc.get("_id"))
+        kind = _ZONE_KIND_BY_FEATURE_TYPE.get(str(doc.get("feature_type") or ""))
+        if (
+            kind is None
+            or doc.get("deleted") is True
+            or doc.get("is_archived") is True
+            or not doc.get("geometry_wkt")
+        ):
+            self.remove_feature(zone_id)
+            return
+        try:
+            lonlat = geometry_engine.from_wkt([doc["geometry_wkt"]])
+        except geometry_engine.GeometryEngineError:
+            logger.warning("Skipping geofence feature %s: invalid WKT", zone_id)
+            self.remove_feature(zone_id)
+            return
+        geometry = geometry_engine.to_local(lonlat, self.projection)[0]
+        shapely.prepare(geometry)
+        task_keys: frozenset = frozenset()
+        if doc.get("source_record_type") == "task" and doc.get("source_record_id"):
+            task_keys = frozenset({str(doc["source_record_id"])})
+        zone = GeofenceZone(
+            zone_id=zone_id,
+            feature_id=doc.get("int_id"),
+            kind=kind,
+            label=str(doc.get("label") or ""),
+            geometry=geometry,
+            task_keys=task_keys,
+        )
+        with self._lock:
+            self._zones[zone_id] = zone
+            self._snapshot = None
+
+    def remove_feature(self, zone_id: str) -> None:
+        with self._lock:
+            if self._zones.pop(str(zone_id), None) is not None:
+                self._snapshot = None
+
+    def upsert_link(self, doc: Dict[str, Any]) -> None:
+        link_id = str(doc.get("_id"))
+        if doc.get("deleted") is True or doc.get("linked_record_type") != "task":
+            self.remove_link(link_id)
+            return
+        with self._lock:
+            self._links[link_id] = _Link(doc.get("feature_id"), str(doc.get("linked_record_id") or ""))
+            self._snapshot = None
+
+    def remove_link(self, link_id: str) -> None:
+        with self._lock:
+            if self._links.pop(str(link_id), None) is not None:
+                self._snapshot = None
+
+    def upsert_task(self, doc: Dict[str, Any]) -> None:
+        """Remember that a task's `int_id` and `task_id` name the same task,
+        since teams and features reference tasks by either."""
+        keys = frozenset(str(k) for k in (doc.get("int_id"), doc.get("task_id")) if k not in (None, ""))
+        with self._lock:
+            for key in keys:
+                self._task_aliases[key] = keys
+
+    def _build_snapshot(self) -> _Snapshot:
+        zones = tuple(self._zones.values())
+        linked: Dict[Any, set] = {}
+        for link in self._links.values():
+            linked.setdefault(link.feature_id, set()).add(link.task_key)
+        assignment_keys = tuple(
+            zone.task_keys | frozenset(linked.get(zone.feature_id, ())) if zone.kind == ASSIGNMENT else frozenset()
+            for zone in zones
+        )
+        tree = STRtree([zone.geometry for zone in zones]) if zones else None
+        return _Snapshot(zones=zones, tree=tree, assignment_keys=assignment_keys)
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._build_snapshot()
+                snapshot = self._snapshot
+        return snapshot
+
+    # -- Evaluation -----------------------------------------------------------
+
+    def task_keys(self, task_ref: Any) -> frozenset:
+        if task_ref in (None, ""):
+            return frozenset()
+        key = str(task_ref)
+        return self._task_aliases.get(key, frozenset({key}))
+
+    def evaluate(self, team_id: Any, lon: float, lat: float, task_ref: Any = None) -> List[GeofenceEvent]:
+        """Classify one fix and return the crossings since the team's last fix."""
+        snapshot = self._current()
+        x, y = self.projection.forward(np.array([[lon, lat]], dtype=float))[0]
+        point = shapely.Point(x, y)
+        team_keys = self.task_keys(task_ref)
+
+        inside: set = set()
+        near: set = set()
+        in_assignment = False
+        if snapshot.tree is not None:
+            for idx in snapshot.tree.query(point, predicate="dwithin", distance=self.proximity_m):
+                zone = snapshot.zones[idx]
+                if zone.geometry.covers(point):
+                    inside.add(idx)
+                    if zone.kind == ASSIGNMENT and team_keys & snapshot.assignment_keys[idx]:
+                        in_assignment = True
+                elif zone.kind == HAZARD:
+                    near.add(idx)
+
+        inside_ids = frozenset(snapshot.zones[i].zone_id for i in inside)
+        near_ids = frozenset(snapshot.zones[i].zone_id for i in near)
+        with self._lock:
+            previous = self._teams.get(team_id) or _TeamState()
+            self._teams[team_id] = _TeamState(
+                task_keys=team_keys, inside=inside_ids, near=near_ids, in_assignment=in_assignment
+            )
+
+        events: List[GeofenceEvent] = []
+        for idx in inside:
+            zone = snapshot.zones[idx]
+            if zone.zone_id in previous.inside:
+                continue
+            if zone.kind == HAZARD:
+                events.append(GeofenceEvent("hazard_entered", team_id, zone))
+            elif zone.kind == EXCLUSION:
+                events.append(GeofenceEvent("exclusion_entered", team_id, zone))
+        for idx in near:
+            zone = snapshot.zones[idx]
+            if zone.zone_id in previous.near or zone.zone_id in previous.inside:
+                continue
+            events.append(
+                GeofenceEvent("hazard_proximity", team_id, zone, float(zone.geometry.distance(point)))
+            )
+        if previous.in_assignment and not in_assignment and previous.task_keys == team_keys:
+            left = next(
+                (
+                    zone
+                    for zone, keys in zip(snapshot.zones, snapshot.assignment_keys)
+                    if zone.kind == ASSIGNMENT and team_keys & keys
+                ),
+                None,
+            )
+            if left is not None:
+                events.append(
+                    GeofenceEvent("assignment_left", team_id, left, float(left.geometry.distance(point)))
+                )
+        return events
+
+    def forget_team(self, team_id: Any) -> None:
+        with self._lock:
+            self._teams.pop(team_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Per-incident registry
+# ---------------------------------------------------------------------------
+
+_indexes: Dict[str, IncidentGeofenceIndex] = {}
+_indexes_lock = threading.Lock()
+_notify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sarapp-geofence-notify")
+
+
+def _load_index(incident_id: str, lon: float, lat: float) -> IncidentGeofenceIndex:
+    db = get_incident_db(incident_id)
+    features = list(
+        db[IncidentCollections.SPATIAL_FEATURES].find(
+            {
+                "feature_type": {"$in": list(_ZONE_KIND_BY_FEATURE_TYPE)},
+                "deleted": {"$ne": True},
+                "is_archived": {"$ne": True},
+            }
+        )
+    )
+    geometries = shapely.from_wkt(
+        np.asarray([f.get("geometry_wkt") or None for f in features], dtype=object), on_invalid="ignore"
+    )
+    geometries = geometries[~shapely.is_missing(geometries) & ~shapely.is_empty(geometries)]
+    if geometries.size:
+        projection = geometry_engine.projection_for(geometries)
+    else:
+        projection = geometry_engine.projection_for_lonlat(lon, lat)
+    index = IncidentGeofenceIndex(projection)
+    for doc in features:
+        index.upsert_feature(doc)
+    for doc in db[IncidentCollections.SPATIAL_FEATURE_LINKS].find(
+        {"linked_record_type": "task", "deleted": {"$ne": True}}
+    ):
+        index.upsert_link(doc)
+    for doc in db[IncidentCollections.OPERATIONS_TASKS].find({}, {"int_id": 1, "task_id": 1}):
+        index.upsert_task(doc)
+    return index
+
+
+def get_index(incident_id: str, *, lon: float = 0.0, lat: float = 0.0) -> IncidentGeofenceIndex:
+    """Return the incident's index, loading it on first use. `lon`/`lat`
+    pick the UTM zone only when the incident has no geofence features yet."""
+    index = _indexes.get(incident_id)
+    if index is not None:
+        return index
+    with _indexes_lock:
+        index = _indexes.get(incident_id)
+        if index is None:
+            from sarapp_db.api.ws_hub import add_change_listener
+
+            add_change_listener(_on_change)
+            index = _load_index(incident_id, lon, lat)
+            _indexes[incident_id] = index
+    return index
+
+
+def reset() -> None:
+    """Drop every loaded index (tests, incident close)."""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def _on_change(incident_id: str, collection: str, op: str, doc_id: str, doc: Optional[Dict[str, Any]]) -> None:
+    index = _indexes.get(incident_id)
+    if index is None:
+        return
+    if collection == IncidentCollections.SPATIAL_FEATURES:
+        if op == "deleted" or doc is None:
+            index.remove_feature(doc_id)
+        else:
+            index.upsert_feature(doc)
+    elif collection == IncidentCollections.SPATIAL_FEATURE_LINKS:
+        if op == "deleted" or doc is None:
+            index.remove_link(doc_id)
+        else:
+            index.upsert_link(doc)
+    elif collection == IncidentCollections.OPERATIONS_TASKS and doc is not None:
+        index.upsert_task(doc)
+
+
+def _emit(incident_id: str, team_name: str, event: GeofenceEvent) -> None:
+    suffix, severity, category = _EVENT_PRESENTATION[event.event_type]
+    zone_label = event.zone.label or f"feature {event.zone.feature_id}"
+    message = f"{team_name} {suffix}: {zone_label}."
+    if event.distance_m:
+        message = f"{team_name} {suffix}: {zone_label} ({event.distance_m:.0f} m)."
+    try:
+        notification_service.emit_notification(
+            incident_id,
+            title=f"{team_name} {suffix}",
+            message=message,
+            source_type=f"geofence_{event.event_type}",
+            source_id=str(event.zone.feature_id if event.zone.feature_id is not None else event.zone.zone_id),
+            source_label=event.zone.label or None,
+            severity=severity,
+            category=category,
+            audience_team_id=event.team_id if isinstance(event.team_id, int) else None,
+        )
+    except Exception:
+        logger.exception("Failed to emit geofence notification for team %s", event.team_id)
+
+
+def process_fix(incident_id: str, team_doc: Dict[str, Any], lat: float, lon: float) -> List[GeofenceEvent]:
+    """Evaluate one accepted location fix and queue notifications for any
+    crossings. Returns the events (notifications are sent asynchronously)."""
+    index = get_index(incident_id, lon=float(lon), lat=float(lat))
+    team_id = team_doc.get("int_id")
+    events = index.evaluate(team_id, float(lon), float(lat), team_doc.get("current_task_id"))
+    team_name = str(team_doc.get("name") or f"Team {team_id}")
+    for event in events:
+        _notify_executor.submit(_emit, incident_id, team_name, event)
+    return events
+
+
+def drain_notifications() -> None:
+    """Block until every queued geofence notification has been emitted."""
+    _notify_executor.submit(lambda: None).result()
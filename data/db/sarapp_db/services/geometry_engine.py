@@ -0,0 +1,304 @@
+"""
+Batch geometry engine for server-side spatial analysis.
+
+The desktop's `modules/gis/services/geometry_service.py` buffers one WKT
+geometry at a time for the interactive map dialog. This module is the
+server-side counterpart for bulk work: every operation takes a whole array
+of geometries and runs through shapely 2's vectorized ufuncs (GEOS loops in
+C, no per-geometry Python), so answering "which teams are outside their
+assigned segment" for a few hundred teams against a few hundred polygons
+costs milliseconds rather than seconds.
+
+Distance-based operations (buffer, area, length) run in one local UTM zone
+chosen from the batch's overall extent, then reproject back to WGS84. The
+UTM math mirrors `utils/coordinates.py` (same Snyder/NGA series) but runs
+over NumPy arrays instead of one coordinate at a time.
+
+Coordinates follow WKT order throughout: (lon, lat).
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+_A = 6378137.0  # WGS84 semi-major axis (m)
+_F = 1 / 298.257223563  # WGS84 flattening
+_K0 = 0.9996  # UTM scale factor
+_E2 = _F * (2 - _F)
+_E4 = _E2 * _E2
+_E6 = _E2 * _E4
+_EP2 = _E2 / (1 - _E2)
+_E1 = (1 - math.sqrt(1 - _E2)) / (1 + math.sqrt(1 - _E2))
+
+_FALSE_EASTING = 500000.0
+_FALSE_NORTHING_SOUTH = 10000000.0
+
+_WKT_PRECISION = 7
+_BUFFER_QUAD_SEGS = 16
+
+DistanceLike = Union[float, Sequence[float], np.ndarray]
+
+
+class GeometryEngineError(ValueError):
+    """Raised when a batch geometry operation cannot be completed."""
+
+
+# ---------------------------------------------------------------------------
+# Local UTM projection
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class LocalProjection:
+    """One UTM zone used for a whole batch so metric results stay comparable."""
+
+    zone_number: int
+    northern: bool
+
+    @property
+    def hemisphere(self) -> str:
+        return "N" if self.northern else "S"
+
+    @property
+    def _lon_origin(self) -> float:
+        return math.radians((self.zone_number - 1) * 6 - 180 + 3)
+
+    def forward(self, lonlat: np.ndarray) -> np.ndarray:
+        """(N, 2) lon/lat degrees -> (N, 2) easting/northing meters."""
+        lonlat = np.asarray(lonlat, dtype=float)
+        lat = np.radians(lonlat[:, 1])
+        lon = np.radians(lonlat[:, 0])
+
+        sin_lat = np.sin(lat)
+        cos_lat = np.cos(lat)
+        tan_lat = np.tan(lat)
+        n = _A / np.sqrt(1 - _E2 * sin_lat**2)
+        t = tan_lat**2
+        c = _EP2 * cos_lat**2
+        a = cos_lat * (lon - self._lon_origin)
+
+        m = _A * (
+            (1 - _E2 / 4 - 3 * _E4 / 64 - 5 * _E6 / 256) * lat
+            - (3 * _E2 / 8 + 3 * _E4 / 32 + 45 * _E6 / 1024) * np.sin(2 * lat)
+            + (15 * _E4 / 256 + 45 * _E6 / 1024) * np.sin(4 * lat)
+            - (35 * _E6 / 3072) * np.sin(6 * lat)
+        )
+
+        easting = (
+            _K0
+            * n
+            * (
+                a
+                + (1 - t + c) * a**3 / 6
+                + (5 - 18 * t + t**2 + 72 * c - 58 * _EP2) * a**5 / 120
+            )
+            + _FALSE_EASTING
+        )
+        northing = _K0 * (
+            m
+            + n
+            * tan_lat
+            * (
+                a**2 / 2
+                + (5 - t + 9 * c + 4 * c**2) * a**4 / 24
+                + (61 - 58 * t + t**2 + 600 * c - 330 * _EP2) * a**6 / 720
+            )
+        )
+        if not self.northern:
+            northing = northing + _FALSE_NORTHING_SOUTH
+        return np.column_stack((easting, northing))
+
+    def inverse(self, xy: np.ndarray) -> np.ndarray:
+        """(N, 2) easting/northing meters -> (N, 2) lon/lat degrees."""
+        xy = np.asarray(xy, dtype=float)
+        x = xy[:, 0] - _FALSE_EASTING
+        y = xy[:, 1] if self.northern else xy[:, 1] - _FALSE_NORTHING_SOUTH
+
+        mu = (y / _K0) / (_A * (1 - _E2 / 4 - 3 * _E4 / 64 - 5 * _E6 / 256))
+        phi1 = (
+            mu
+            + (3 * _E1 / 2 - 27 * _E1**3 / 32) * np.sin(2 * mu)
+            + (21 * _E1**2 / 16 - 55 * _E1**4 / 32) * np.sin(4 * mu)
+            + (151 * _E1**3 / 96) * np.sin(6 * mu)
+        )
+
+        sin_phi = np.sin(phi1)
+        cos_phi = np.cos(phi1)
+        tan_phi = np.tan(phi1)
+        n1 = _A / np.sqrt(1 - _E2 * sin_phi**2)
+        t1 = tan_phi**2
+        c1 = _EP2 * cos_phi**2
+        r1 = _A * (1 - _E2) / (1 - _E2 * sin_phi**2) ** 1.5
+        d = x / (n1 * _K0)
+
+        lat = phi1 - (n1 * tan_phi / r1) * (
+            d**2 / 2
+            - (5 + 3 * t1 + 10 * c1 - 4 * c1**2 - 9 * _EP2) * d**4 / 24
+            + (61 + 90 * t1 + 298 * c1 + 45 * t1**2 - 252 * _EP2 - 3 * c1**2) * d**6 / 720
+        )
+        lon = (
+            d
+            - (1 + 2 * t1 + c1) * d**3 / 6
+            + (5 - 2 * c1 + 28 * t1 - 3 * c1**2 + 8 * _EP2 + 24 * t1**2) * d**5 / 120
+        ) / cos_phi
+        return np.column_stack((np.degrees(lon) + math.degrees(self._lon_origin), np.degrees(lat)))
+
+
+def projection_for_lonlat(lon: float, lat: float) -> LocalProjection:
+    """UTM zone containing the given reference point."""
+    if not (-80.0 <= lat <= 84.0):
+        raise GeometryEngineError("Latitude out of UTM range (-80 to 84)")
+    zone = int((lon + 180) / 6) + 1
+    return LocalProjection(zone_number=max(1, min(zone, 60)), northern=lat >= 0)
+
+
+def projection_for(geometries: np.ndarray) -> LocalProjection:
+    """UTM zone at the center of the batch's combined bounds."""
+    geometries = _as_geometry_array(geometries)
+    if geometries.size == 0:
+        raise GeometryEngineError("No geometries supplied.")
+    min_lon, min_lat, max_lon, max_lat = shapely.total_bounds(geometries)
+    if np.isnan(min_lon):
+        raise GeometryEngineError("Geometries have no coordinates.")
+    return projection_for_lonlat((min_lon + max_lon) / 2, (min_lat + max_lat) / 2)
+
+
+# ---------------------------------------------------------------------------
+# Parsing / serialization
+# ---------------------------------------------------------------------------
+
+def _as_geometry_array(geometries) -> np.ndarray:
+    if isinstance(geometries, np.ndarray):
+        return geometries
+    return np.asarray(list(geometries), dtype=object)
+
+
+def from_wkt(wkts: Iterable[str]) -> np.ndarray:
+    """Parse many WKT strings at once into a shapely geometry array."""
+    values = np.asarray([str(w or "") for w in wkts], dtype=object)
+    try:
+        geometries = shapely.from_wkt(values, on_invalid="raise")
+    except shapely.errors.GEOSException as exc:
+        raise GeometryEngineError(f"Invalid WKT: {exc}") from exc
+    if geometries.size and shapely.is_missing(geometries).any():
+        raise GeometryEngineError("Empty WKT string in batch.")
+    return geometries
+
+
+def try_from_wkt(wkts: Iterable[str]) -> np.ndarray:
+    """Like :func:`from_wkt`, but blank or malformed entries come back as
+    None instead of failing the whole batch."""
+    values = np.asarray([str(w or "") or None for w in wkts], dtype=object)
+    return shapely.from_wkt(values, on_invalid="ignore")
+
+
+def to_wkt(geometries: np.ndarray) -> list[str]:
+    return [
+        str(text)
+        for text in shapely.to_wkt(geometries, rounding_precision=_WKT_PRECISION, trim=True)
+    ]
+
+
+def to_local(geometries: np.ndarray, projection: LocalProjection) -> np.ndarray:
+    """Reproject lon/lat geometries into the projection's UTM meters."""
+    return shapely.transform(geometries, projection.forward)
+
+
+def to_lonlat(geometries: np.ndarray, projection: LocalProjection) -> np.ndarray:
+    return shapely.transform(geometries, projection.inverse)
+
+
+def points(lonlat: np.ndarray) -> np.ndarray:
+    """(N, 2) lon/lat array -> shapely Point array."""
+    lonlat = np.asarray(lonlat, dtype=float).reshape(-1, 2)
+    return shapely.points(lonlat)
+
+
+# ---------------------------------------------------------------------------
+# Operations
+# ---------------------------------------------------------------------------
+
+def buffer(
+    geometries: np.ndarray,
+    distance_m: DistanceLike,
+    *,
+    dissolve: bool = False,
+    projection: Optional[LocalProjection] = None,
+) -> np.ndarray:
+    """Buffer every geometry by `distance_m` meters (scalar or per-geometry).
+
+    With `dissolve`, overlapping results are merged into a single geometry
+    (returned as a one-element array).
+    """
+    distances = np.asarray(distance_m, dtype=float)
+    if (distances <= 0).any():
+        raise GeometryEngineError("Buffer distance must be positive.")
+    projection = projection or projection_for(geometries)
+    local = to_local(geometries, projection)
+    buffered = shapely.buffer(local, distances, quad_segs=_BUFFER_QUAD_SEGS)
+    if dissolve:
+        buffered = np.asarray([shapely.union_all(buffered)], dtype=object)
+    return to_lonlat(buffered, projection)
+
+
+def dissolve(geometries: np.ndarray) -> shapely.Geometry:
+    """Union all geometries into one (dissolving shared boundaries)."""
+    geometries = _as_geometry_array(geometries)
+    if geometries.size == 0:
+        raise GeometryEngineError("No geometries supplied.")
+    return shapely.union_all(geometries)
+
+
+def measure(
+    geometries: np.ndarray, *, projection: Optional[LocalProjection] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return (area_m2, length_m) arrays; length is the perimeter for polygons."""
+    projection = projection or projection_for(geometries)
+    local = to_local(geometries, projection)
+    return shapely.area(local), shapely.length(local)
+
+
+def locate_points(point_lonlat: np.ndarray, polygons: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """All (point_index, polygon_index) pairs where the polygon covers the point.
+
+    Uses an STRtree over the polygons so the cost grows with the number of
+    candidate hits, not points x polygons.
+    """
+    polygons = _as_geometry_array(polygons)
+    pts = points(point_lonlat)
+    if pts.size == 0 or polygons.size == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    tree = STRtree(polygons)
+    point_idx, polygon_idx = tree.query(pts, predicate="covered_by")
+    return point_idx, polygon_idx
+
+
+def covered_by_assigned(
+    point_lonlat: np.ndarray,
+    polygons: np.ndarray,
+    pair_point_idx: np.ndarray,
+    pair_polygon_idx: np.ndarray,
+) -> np.ndarray:
+    """Per point: is it covered by at least one of the polygons paired with it?
+
+    Each pair k says polygon `pair_polygon_idx[k]` is an assigned area of
+    point `pair_point_idx[k]`. Points with no pairs come back False; callers
+    decide whether "unassigned" counts as outside.
+    """
+    polygons = _as_geometry_array(polygons)
+    pts = points(point_lonlat)
+    covered = np.zeros(len(pts), dtype=bool)
+    pair_point_idx = np.asarray(pair_point_idx, dtype=np.intp)
+    pair_polygon_idx = np.asarray(pair_polygon_idx, dtype=np.intp)
+    if pair_point_idx.size == 0:
+        return covered
+    shapely.prepare(polygons)
+    hits = shapely.covers(polygons[pair_polygon_idx], pts[pair_point_idx])
+    np.logical_or.at(covered, pair_point_idx, hits)
+    return covered
@@ -0,0 +1,395 @@
+"""
+Server-side PNG heatmap tiles (standard web-mercator z/x/y scheme).
+
+Dense overlays — clue and sighting points, team/aircraft tracks, the
+probability-of-area grid — are rendered here into 256 px tiles instead of
+being shipped to Leaflet as thousands of markers or cells. The map only ever
+loads the tiles in view, so cost stays flat at any zoom.
+
+Point layers are rendered by histogramming the points that fall in (or just
+around) the tile into a pixel grid with `np.bincount`, blurring with three
+separable box passes (a cheap Gaussian), and mapping intensity through a
+fixed color ramp. Intensity is scaled against a single point's peak rather
+than the tile's own maximum, so adjacent tiles join without seams.
+
+The probability layer samples the grid's normalized POA at tile pixels
+(reprojected into the grid's UTM zone) and scales against the grid maximum.
+
+Rendered tiles sit in a byte-bounded LRU cache. Each (incident, layer) has a
+generation number that the incident change feed bumps (see `_on_change`), so
+an edit to a clue or a grid update invalidates only that layer's tiles.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from sarapp_db.api import ws_hub
+from sarapp_db.mongo.collection_names import IncidentCollections
+from sarapp_db.mongo.database_manager import get_incident_db
+from sarapp_db.services import geometry_engine
+
+TILE_SIZE = 256
+MAX_ZOOM = 22
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+LAYER_CLUES = "clues"
+LAYER_TRACKS = "tracks"
+LAYER_PROBABILITY = "probability"
+
+# Spatial feature types feeding each point layer.
+POINT_LAYER_FEATURE_TYPES: Dict[str, Tuple[str, ...]] = {
+    LAYER_CLUES: ("clue", "sighting", "evidence_location"),
+    LAYER_TRACKS: ("team_track", "aircraft_track"),
+}
+
+# Which layers a change to a collection invalidates.
+_COLLECTION_LAYERS: Dict[str, Tuple[str, ...]] = {
+    IncidentCollections.SPATIAL_FEATURES: (LAYER_CLUES, LAYER_TRACKS),
+    IncidentCollections.SEARCH_PROBABILITY_GRID: (LAYER_PROBABILITY,),
+}
+
+_KERNEL_RADIUS_PX = 12
+_TRACK_SAMPLE_SPACING_M = 5.0
+_MAX_TRACK_SAMPLES = 2_000_000
+_PROBABILITY_SAMPLE = 64  # sample POA on a 64x64 grid, upscale to 256
+
+
+class TileError(ValueError):
+    """Raised for tile coordinates or layers that cannot be rendered."""
+
+
+# ---------------------------------------------------------------------------
+# Tile math
+# ---------------------------------------------------------------------------
+
+def validate_tile(z: int, x: int, y: int) -> None:
+    if not 0 <= z <= MAX_ZOOM:
+        raise TileError(f"Zoom must be between 0 and {MAX_ZOOM}")
+    n = 1 << z
+    if not (0 <= x < n and 0 <= y < n):
+        raise TileError(f"Tile {z}/{x}/{y} is out of range")
+
+
+def lonlat_to_mercator(lonlat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized web-mercator (0..1, y down) for an (N, 2) lon/lat array."""
+    lon = lonlat[:, 0]
+    lat = np.clip(lonlat[:, 1], -85.05112878, 85.05112878)
+    mx = (lon + 180.0) / 360.0
+    my = (1.0 - np.arcsinh(np.tan(np.radians(lat))) / math.pi) / 2.0
+    return mx, my
+
+
+def mercator_to_lonlat(mx: np.ndarray, my: np.ndarray) -> np.ndarray:
+    lon = mx * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1.0 - 2.0 * my))))
+    return np.column_stack((lon.ravel(), lat.ravel()))
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def _ramp() -> np.ndarray:
+    """256-entry RGBA ramp: transparent -> blue -> cyan -> yellow -> red."""
+    stops = np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+    colors = np.array(
+        [
+            [0, 0, 255, 0],
+            [0, 80, 255, 140],
+            [0, 220, 220, 180],
+            [255, 230, 0, 210],
+            [230, 20, 20, 235],
+        ],
+        dtype=float,
+    )
+    t = np.linspace(0.0, 1.0, 256)
+    return np.stack([np.interp(t, stops, colors[:, c]) for c in range(4)], axis=1).astype(np.uint8)
+
+
+_RAMP = _ramp()
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Minimal RGBA PNG encoder (no filtering) — zlib does the work."""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def _chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + _chunk(b"IEND", b"")
+    )
+
+
+@lru_cache(maxsize=1)
+def empty_tile() -> bytes:
+    return encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+
+
+def _box_blur(image: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    width = 2 * radius + 1
+    pad = [(0, 0)] * image.ndim
+    pad[axis] = (radius + 1, radius)
+    summed = np.cumsum(np.pad(image, pad), axis=axis)
+    upper = [slice(None)] * image.ndim
+    lower = [slice(None)] * image.ndim
+    upper[axis] = slice(width, None)
+    lower[axis] = slice(None, -width)
+    return (summed[tuple(upper)] - summed[tuple(lower)]) / width
+
+
+def _blur(image: np.ndarray, radius: int) -> np.ndarray:
+    box = max(1, radius // 2)
+    for _ in range(3):
+        image = _box_blur(_box_blur(image, box, 0), box, 1)
+    return image
+
+
+@lru_cache(maxsize=8)
+def _single_point_peak(radius: int) -> float:
+    size = 4 * radius + 1
+    delta = np.zeros((size, size))
+    delta[size // 2, size // 2] = 1.0
+    return float(_blur(delta, radius).max())
+
+
+def render_points(mx: np.ndarray, my: np.ndarray, z: int, x: int, y: int,
+                  radius_px: int = _KERNEL_RADIUS_PX) -> bytes:
+    """Density heatmap tile for points in normalized mercator coordinates."""
+    scale = float(1 << z) * TILE_SIZE
+    margin = 3 * radius_px
+    px = mx * scale - x * TILE_SIZE
+    py = my * scale - y * TILE_SIZE
+    inside = (px >= -margin) & (px < TILE_SIZE + margin) & (py >= -margin) & (py < TILE_SIZE + margin)
+    if not inside.any():
+        return empty_tile()
+    side = TILE_SIZE + 2 * margin
+    ix = (px[inside] + margin).astype(np.intp)
+    iy = (py[inside] + margin).astype(np.intp)
+    counts = np.bincount(iy * side + ix, minlength=side * side).reshape(side, side).astype(float)
+    density = _blur(counts, radius_px)[margin:margin + TILE_SIZE, margin:margin + TILE_SIZE]
+    # A lone point peaks around the middle of the ramp; overlaps saturate.
+    intensity = 1.0 - np.exp(-0.7 * density / _single_point_peak(radius_px))
+    return encode_png(_RAMP[(intensity * 255.0).astype(np.uint8)])
+
+
+def render_probability(grid: Any, z: int, x: int, y: int) -> bytes:
+    """POA tile for a `probability_grid.ProbabilityGrid`."""
+    west, south, east, north = grid.bounds_lonlat()
+    n = float(1 << z)
+    tile_west = x / n * 360.0 - 180.0
+    tile_east = (x + 1) / n * 360.0 - 180.0
+    tile_north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    tile_south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    if tile_east < west or tile_west > east or tile_north < south or tile_south > north:
+        return empty_tile()
+
+    steps = (np.arange(_PROBABILITY_SAMPLE) + 0.5) / _PROBABILITY_SAMPLE
+    mx, my = np.meshgrid((x + steps) / n, (y + steps) / n)
+    local = grid.projection.forward(mercator_to_lonlat(mx, my))
+    rows, cols = grid.shape
+    col = np.floor((local[:, 0] - grid.origin_x) / grid.cell_size_m).astype(np.intp)
+    row = np.floor((local[:, 1] - grid.origin_y) / grid.cell_size_m).astype(np.intp)
+    on_grid = (col >= 0) & (col < cols) & (row >= 0) & (row < rows)
+    if not on_grid.any():
+        return empty_tile()
+    values = np.zeros(col.shape, dtype=float)
+    values[on_grid] = grid.values[row[on_grid], col[on_grid]]
+    peak = float(grid.values.max())
+    intensity = np.sqrt(values / peak) if peak > 0 else values
+    index = (intensity.reshape(_PROBABILITY_SAMPLE, _PROBABILITY_SAMPLE) * 255.0).astype(np.uint8)
+    repeat = TILE_SIZE // _PROBABILITY_SAMPLE
+    index = np.repeat(np.repeat(index, repeat, axis=0), repeat, axis=1)
+    return encode_png(_RAMP[index])
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def feature_points(docs: list[dict], layer: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized mercator points for a point layer's feature documents.
+
+    Clue layers use each feature's point (polygon centroids otherwise);
+    track layers sample every line at a fixed ground spacing so density
+    reflects distance covered, not vertex count.
+    """
+    wkts = [d.get("geometry_wkt") or "" for d in docs if (d.get("geometry_wkt") or "").strip()]
+    if not wkts:
+        return np.empty(0), np.empty(0)
+    try:
+        geometries = geometry_engine.from_wkt(wkts)
+    except geometry_engine.GeometryEngineError:
+        geometries = np.array(
+            [g for g in (shapely.from_wkt(w, on_invalid="ignore") for w in wkts) if g is not None],
+            dtype=object,
+        )
+    geometries = geometries[~shapely.is_empty(geometries)]
+    if geometries.size == 0:
+        return np.empty(0), np.empty(0)
+    if layer == LAYER_TRACKS:
+        projection = geometry_engine.projection_for(geometries)
+        local = shapely.segmentize(geometry_engine.to_local(geometries, projection), _TRACK_SAMPLE_SPACING_M)
+        coords = shapely.get_coordinates(local)[:_MAX_TRACK_SAMPLES]
+        lonlat = projection.inverse(coords) if coords.size else coords
+    else:
+        lonlat = shapely.get_coordinates(shapely.point_on_surface(geometries))
+    if lonlat.size == 0:
+        return np.empty(0), np.empty(0)
+    return lonlat_to_mercator(lonlat)
+
+
+def _load_feature_points(incident_id: str, layer: str) -> Tuple[np.ndarray, np.ndarray]:
+    col = get_incident_db(incident_id)[IncidentCollections.SPATIAL_FEATURES]
+    docs = list(col.find(
+        {
+            "feature_type": {"$in": list(POINT_LAYER_FEATURE_TYPES[layer])},
+            "deleted": {"$ne": True},
+            "is_archived": {"$ne": True},
+        },
+        {"geometry_wkt": 1},
+    ))
+    return feature_points(docs, layer)
+
+
+# ---------------------------------------------------------------------------
+# Cache and invalidation
+# ---------------------------------------------------------------------------
+
+class TileCache:
+    """Byte-bounded LRU of encoded tiles."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._tiles: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._tiles.get(key)
+            if data is not None:
+                self._tiles.move_to_end(key)
+            return data
+
+    def put(self, key: tuple, data: bytes) -> None:
+        with self._lock:
+            previous = self._tiles.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._tiles[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._tiles:
+                _key, evicted = self._tiles.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def drop(self, incident_id: str, layer: str) -> None:
+        with self._lock:
+            for key in [k for k in self._tiles if k[0] == incident_id and k[1] == layer]:
+                self._bytes -= len(self._tiles.pop(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tiles.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._tiles)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+cache = TileCache()
+_generations: Dict[Tuple[str, str], int] = {}
+_sources: Dict[Tuple[str, str], Tuple[int, np.ndarray, np.ndarray]] = {}
+_lock = threading.Lock()
+_listening = False
+
+
+def generation(incident_id: str, layer: str) -> int:
+    return _generations.get((incident_id, layer), 0)
+
+
+def invalidate(incident_id: str, layer: str) -> None:
+    with _lock:
+        _generations[(incident_id, layer)] = generation(incident_id, layer) + 1
+        _sources.pop((incident_id, layer), None)
+    cache.drop(incident_id, layer)
+
+
+def _on_change(incident_id: str, collection: str, op: str, doc_id: str, doc: Optional[dict]) -> None:
+    for layer in _COLLECTION_LAYERS.get(collection, ()):
+        if layer in POINT_LAYER_FEATURE_TYPES and doc is not None:
+            if doc.get("feature_type") not in POINT_LAYER_FEATURE_TYPES[layer]:
+                continue
+        invalidate(incident_id, layer)
+
+
+def _ensure_listening() -> None:
+    global _listening
+    if not _listening:
+        with _lock:
+            if not _listening:
+                ws_hub.add_change_listener(_on_change)
+                _listening = True
+
+
+def reset() -> None:
+    """Drop all cached tiles and sources (tests)."""
+    with _lock:
+        _generations.clear()
+        _sources.clear()
+    cache.clear()
+
+
+def point_tile(incident_id: str, layer: str, z: int, x: int, y: int) -> bytes:
+    """Cached heatmap tile for a point layer (`clues` or `tracks`)."""
+    if layer not in POINT_LAYER_FEATURE_TYPES:
+        raise TileError(f"Unknown heatmap layer: {layer}")
+    validate_tile(z, x, y)
+    _ensure_listening()
+    gen = generation(incident_id, layer)
+    key = (incident_id, layer, gen, z, x, y)
+    data = cache.get(key)
+    if data is not None:
+        return data
+    source = _sources.get((incident_id, layer))
+    if source is None or source[0] != gen:
+        mx, my = _load_feature_points(incident_id, layer)
+        with _lock:
+            _sources[(incident_id, layer)] = (gen, mx, my)
+    else:
+        _gen, mx, my = source
+    data = render_points(mx, my, z, x, y)
+    cache.put(key, data)
+    return data
+
+
+def probability_tile(incident_id: str, grid: Any, revision: int, z: int, x: int, y: int) -> bytes:
+    """Cached POA tile; `revision` is the stored grid's revision."""
+    validate_tile(z, x, y)
+    _ensure_listening()
+    key = (incident_id, LAYER_PROBABILITY, revision, z, x, y)
+    data = cache.get(key)
+    if data is None:
+        data = render_probability(grid, z, x, y)
+        cache.put(key, data)
+    return data
@@ -0,0 +1,355 @@
+"""
+Request latency histograms and live gauges for the API server.
+
+The traffic log the server console shows (`create_app(request_log_fn=...)`)
+is the last thousand raw requests; it cannot say whether a slow board is
+slow in Mongo, in the tunnel or on the client. This module keeps:
+
+- one latency histogram per route template (`GET /api/incidents/{incident_id}/tasks`,
+  never the concrete path, so the series stay bounded) with response status
+  classes, request/response bytes and the Mongo time spent inside those
+  requests;
+- one histogram per Mongo command (`find`, `update`, ...), fed by
+  `MONGO_LISTENER`, which `mongo_client.get_client` installs;
+- the requests in flight, and gauges polled at scrape time from registered
+  sources (`add_gauge_source`): the WebSocket hub's connections and queued
+  sends, and the cloud tunnel client's frame queue when one runs.
+
+Buckets are fixed and logarithmic (1-2.5-5 per decade, 1 ms to 30 s), so
+histograms are cheap to update and can be summed across scrapes.
+`render_prometheus()` is served at `GET /api/diagnostics/metrics`; the
+server console reads `metrics` in-process for its performance charts.
+
+Mongo time is attributed to a request through a context variable the
+middleware sets, which FastAPI carries into the worker threads sync
+handlers run on.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0,
+    10.0, 30.0,
+)
+
+UNMATCHED_ROUTE = "(unmatched)"
+
+GaugeSource = Callable[[], Dict[str, float]]
+
+
+def quantile_from_counts(counts: List[int], q: float) -> Optional[float]:
+    """Estimate the `q` quantile (0..1) from per-bucket counts, the last
+    being the overflow bucket. Interpolates linearly within a bucket."""
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = q * total
+    seen = 0
+    for index, count in enumerate(counts):
+        if count and seen + count >= rank:
+            if index >= len(BUCKETS):
+                return BUCKETS[-1]
+            lower = BUCKETS[index - 1] if index else 0.0
+            return lower + (BUCKETS[index] - lower) * ((rank - seen) / count)
+        seen += count
+    return BUCKETS[-1]
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """The route a handled request matched, its path parameters put back as
+    `{name}`: `/api/incidents/{incident_id}/tasks`."""
+    if "endpoint" not in scope:
+        return UNMATCHED_ROUTE
+    names = {str(value): name for name, value in (scope.get("path_params") or {}).items()}
+    segments = str(scope.get("path") or "").split("/")
+    return "/".join(f"{{{names[segment]}}}" if segment in names else segment for segment in segments)
+
+
+class LatencyHistogram:
+    """Counts of observations per bucket (plus overflow) and their sum."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> Optional[float]:
+        return quantile_from_counts(self.counts, q)
+
+
+class RouteStats:
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.statuses: Dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.latency.count,
+            "sum_seconds": self.latency.total,
+            "counts": list(self.latency.counts),
+            "p50": self.latency.quantile(0.5),
+            "p95": self.latency.quantile(0.95),
+            "p99": self.latency.quantile(0.99),
+            "statuses": dict(self.statuses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "mongo_seconds": self.mongo_seconds,
+            "mongo_commands": self.mongo_commands,
+        }
+
+
+class _MongoUsage:
+    __slots__ = ("seconds", "commands")
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.commands = 0
+
+
+_current_usage: contextvars.ContextVar[Optional[_MongoUsage]] = contextvars.ContextVar(
+    "sarapp_request_mongo_usage", default=None
+)
+
+
+class RequestMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.mongo: Dict[str, LatencyHistogram] = {}
+        self.mongo_failures = 0
+        self.in_flight = 0
+        self._gauge_sources: Dict[str, GaugeSource] = {}
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def request_started(self) -> _MongoUsage:
+        """Count a request in flight and start attributing Mongo time to it
+        (in the caller's context)."""
+        with self._lock:
+            self.in_flight += 1
+        usage = _MongoUsage()
+        _current_usage.set(usage)
+        return usage
+
+    def request_finished(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        usage: _MongoUsage,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ) -> None:
+        status_class = f"{status // 100}xx"
+        with self._lock:
+            self.in_flight -= 1
+            stats = self.routes.get((method, route))
+            if stats is None:
+                stats = self.routes[(method, route)] = RouteStats()
+            stats.latency.observe(seconds)
+            stats.statuses[status_class] = stats.statuses.get(status_class, 0) + 1
+            stats.bytes_in += bytes_in
+            stats.bytes_out += bytes_out
+            stats.mongo_seconds += usage.seconds
+            stats.mongo_commands += usage.commands
+
+    def add_bytes_out(self, method: str, route: str, size: int) -> None:
+        """Response bytes counted after `request_finished` (streamed bodies)."""
+        with self._lock:
+            stats = self.routes.get((method, route))
+            if stats is not None:
+                stats.bytes_out += size
+
+    # -- Mongo --------------------------------------------------------------
+
+    def mongo_command(self, command: str, seconds: float, failed: bool = False) -> None:
+        usage = _current_usage.get()
+        if usage is not None:
+            usage.seconds += seconds
+            usage.commands += 1
+        with self._lock:
+            histogram = self.mongo.get(command)
+            if histogram is None:
+                histogram = self.mongo[command] = LatencyHistogram()
+            histogram.observe(seconds)
+            if failed:
+                self.mongo_failures += 1
+
+    # -- Gauges -------------------------------------------------------------
+
+    def add_gauge_source(self, name: str, source: GaugeSource) -> None:
+        """Poll `source()` for `{gauge: value}` at every scrape, exposed as
+        `sarapp_<name>_<gauge>`. Re-adding a name replaces its source."""
+        with self._lock:
+            self._gauge_sources[name] = source
+
+    def remove_gauge_source(self, name: str) -> None:
+        with self._lock:
+            self._gauge_sources.pop(name, None)
+
+    def gauges(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            sources = dict(self._gauge_sources)
+        values: Dict[str, Dict[str, float]] = {}
+        for name, source in sources.items():
+            try:
+                values[name] = dict(source())
+            except Exception:
+                logger.exception("Metrics gauge source %r failed", name)
+        return values
+
+    # -- Export -------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routes = {f"{method} {route}": stats.snapshot() for (method, route), stats in self.routes.items()}
+            mongo = {
+                command: {"count": h.count, "sum_seconds": h.total, "counts": list(h.counts)}
+                for command, h in self.mongo.items()
+            }
+            in_flight = self.in_flight
+            mongo_failures = self.mongo_failures
+        return {
+            "in_flight": in_flight,
+            "routes": routes,
+            "mongo": mongo,
+            "mongo_failures": mongo_failures,
+            "gauges": self.gauges(),
+        }
+
+    def overall_counts(self) -> List[int]:
+        """Bucket counts summed over every route."""
+        with self._lock:
+            totals = [0] * (len(BUCKETS) + 1)
+            for stats in self.routes.values():
+                for index, count in enumerate(stats.latency.counts):
+                    totals[index] += count
+            return totals
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+            self.mongo.clear()
+            self.mongo_failures = 0
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, histogram: LatencyHistogram) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(BUCKETS, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.total}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def render_prometheus(registry: Optional[RequestMetrics] = None) -> str:
+    """The Prometheus text exposition (format 0.0.4) of `registry`."""
+    registry = registry or metrics
+    gauges = registry.gauges()
+    lines: List[str] = []
+    with registry._lock:
+        routes = sorted(registry.routes.items())
+        lines += [
+            "# HELP sarapp_http_request_duration_seconds API request latency to the response start.",
+            "# TYPE sarapp_http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in routes:
+            lines += _histogram_lines(
+                "sarapp_http_request_duration_seconds", f'method="{method}",route="{_label(route)}"', stats.latency
+            )
+        lines += ["# TYPE sarapp_http_responses_total counter"]
+        for (method, route), stats in routes:
+            for status_class, count in sorted(stats.statuses.items()):
+                lines.append(
+                    f'sarapp_http_responses_total{{method="{method}",route="{_label(route)}",status="{status_class}"}} {count}'
+                )
+        for metric, attribute, help_text in (
+            ("sarapp_http_request_bytes_total", "bytes_in", "Request body bytes received."),
+            ("sarapp_http_response_bytes_total", "bytes_out", "Response body bytes sent."),
+            ("sarapp_http_mongo_seconds_total", "mongo_seconds", "Mongo command time inside requests."),
+            ("sarapp_http_mongo_commands_total", "mongo_commands", "Mongo commands issued by requests."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+            for (method, route), stats in routes:
+                lines.append(f'{metric}{{method="{method}",route="{_label(route)}"}} {getattr(stats, attribute)}')
+        lines += [
+            "# HELP sarapp_http_requests_in_flight API requests being handled.",
+            "# TYPE sarapp_http_requests_in_flight gauge",
+            f"sarapp_http_requests_in_flight {registry.in_flight}",
+            "# HELP sarapp_mongo_command_duration_seconds Mongo command latency.",
+            "# TYPE sarapp_mongo_command_duration_seconds histogram",
+        ]
+        for command, histogram in sorted(registry.mongo.items()):
+            lines += _histogram_lines("sarapp_mongo_command_duration_seconds", f'command="{_label(command)}"', histogram)
+        lines += [
+            "# TYPE sarapp_mongo_command_failures_total counter",
+            f"sarapp_mongo_command_failures_total {registry.mongo_failures}",
+        ]
+    for source, values in sorted(gauges.items()):
+        for gauge, value in sorted(values.items()):
+            metric = f"sarapp_{source}_{gauge}"
+            kind = "counter" if gauge.endswith("_total") else "gauge"
+            lines += [f"# TYPE {metric} {kind}", f"{metric} {float(value):g}"]
+    return "\n".join(lines) + "\n"
+
+
+class _MongoCommandListener(monitoring.CommandListener):
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        metrics.mongo_command(event.command_name, event.duration_micros / 1_000_000)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        metrics.mongo_command(event.command_name, event.duration_micros / 1_000_000, failed=True)
+
+
+MONGO_LISTENER = _MongoCommandListener()
+
+metrics = RequestMetrics()
+
+
+def _hub_gauges() -> Dict[str, float]:
+    from sarapp_db.api.ws_hub import hub
+
+    return hub.stats()
+
+
+metrics.add_gauge_source("ws_hub", _hub_gauges)
+
+
+def reset() -> None:
+    """Drop recorded histograms and counters (tests)."""
+    metrics.reset()
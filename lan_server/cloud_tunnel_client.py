@@ -14,7 +14,6 @@ full tunnel frame protocol.
 from __future__ import annotations
 
 import asyncio
-import base64
 import json
 import logging
 import os
@@ -22,12 +21,32 @@ import random
 import ssl
 import string
 import threading
-from typing import Any
+import weakref
+from typing import Any, Callable
 from urllib.parse import urlparse
 
 import httpx
 import websockets
 
+from lan_server.tunnel_frames import (
+    LANE_BULK,
+    LANE_CRITICAL,
+    LANE_INTERACTIVE,
+    LANES,
+    STREAM_CHUNK_BYTES,
+    STREAM_FEATURE,
+    SUPPORTED_PROTOCOLS,
+    FrameError,
+    JsonCodec,
+    LaneScheduler,
+    SendWindow,
+    StreamAborted,
+    StreamReceiver,
+    codec_for,
+    lane_for,
+    lane_limits,
+)
+
 logger = logging.getLogger(__name__)
 
 _ROUTER_URL_ENV_VAR = "SARAPP_CLOUD_ROUTER_URL"
@@ -149,6 +168,7 @@ class CloudTunnelClient:
         cloud_router_url: str | None = None,
         token: str | None = None,
         connect_code: str | None = None,
+        catalog_version_fn: Callable[[], Any] | None = None,
     ) -> None:
         self.local_port = local_port
         self.server_id = server_id
@@ -156,12 +176,36 @@ class CloudTunnelClient:
         self.cloud_router_url = cloud_router_url
         self.token = token
         self.connect_code = connect_code or generate_connect_code()
+        # Reported to the router (with every pong, and pushed through
+        # ``notify_catalog_version``) so it knows when its cached master
+        # catalog responses are stale.
+        self.catalog_version_fn = catalog_version_fn
 
         self._thread: threading.Thread | None = None
         self._loop: asyncio.AbstractEventLoop | None = None
         self._stop_event: asyncio.Event | None = None
+        self._tunnel: Any = None
         self._ws_channels: dict[str, Any] = {}
-        self._frame_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_FRAMES)
+        # Replaced by the protocol the router picks at registration.
+        self._codec: Any = JsonCodec()
+        self._streaming = False
+        # Chunked bodies in flight, keyed by request_id: request bodies being
+        # received, and responses being sent.
+        self._request_streams: dict[str, StreamReceiver] = {}
+        self._response_windows: dict[str, SendWindow] = {}
+        self._frame_semaphores = self._new_frame_semaphores()
+        # One per tunnel connection: frames for a dropped tunnel must not
+        # be written to its replacement.
+        self._schedulers: weakref.WeakKeyDictionary[Any, LaneScheduler] = weakref.WeakKeyDictionary()
+        # Reported through ``stats`` (the API server's metrics gauges).
+        self._frames_waiting = 0
+        self._frames_running = 0
+        self._bytes_received = 0
+        self._bytes_sent = 0
+
+    @staticmethod
+    def _new_frame_semaphores() -> dict[str, asyncio.Semaphore]:
+        return {lane: asyncio.Semaphore(limit) for lane, limit in lane_limits(_MAX_CONCURRENT_FRAMES).items()}
 
     @property
     def enabled(self) -> bool:
@@ -266,6 +310,8 @@ class CloudTunnelClient:
                         "server_id": self.server_id,
                         "server_name": self.server_name,
                         "token": self.token or "",
+                        "protocols": list(SUPPORTED_PROTOCOLS),
+                        "features": [STREAM_FEATURE],
                     }
                 )
             )
@@ -273,14 +319,35 @@ class CloudTunnelClient:
             ack = json.loads(ack_raw)
             if ack.get("type") != "registered":
                 raise RuntimeError(f"cloud router rejected registration: {ack}")
-            logger.info("Cloud tunnel registered under connect code %s", self.connect_code)
+            # A router predating the binary protocol acks without one.
+            self._codec = codec_for(ack.get("protocol", JsonCodec.protocol))
+            self._streaming = STREAM_FEATURE in (ack.get("features") or [])
+            logger.info(
+                "Cloud tunnel registered under connect code %s (protocol %d)",
+                self.connect_code,
+                self._codec.protocol,
+            )
 
             self._ws_channels = {}
+            self._tunnel = tunnel
             try:
                 await self._pump(tunnel)
             finally:
+                self._tunnel = None
+                scheduler = self._schedulers.pop(tunnel, None)
+                if scheduler is not None:
+                    scheduler.close()
+                self._abort_streams()
                 await self._close_all_channels()
 
+    def _abort_streams(self) -> None:
+        streams, self._request_streams = self._request_streams, {}
+        for stream in streams.values():
+            stream.fail(StreamAborted("Cloud tunnel disconnected"))
+        windows, self._response_windows = self._response_windows, {}
+        for window in windows.values():
+            window.cancel()
+
     async def _close_all_channels(self) -> None:
         channels, self._ws_channels = self._ws_channels, {}
         for local_ws in channels.values():
@@ -290,62 +357,177 @@ class CloudTunnelClient:
                 pass
 
     async def _pump(self, tunnel: Any) -> None:
-        self._frame_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_FRAMES)
+        self._frame_semaphores = self._new_frame_semaphores()
         async for raw in tunnel:
+            self._bytes_received += len(raw)
             try:
-                frame = json.loads(raw)
-            except (json.JSONDecodeError, TypeError):
+                frame = self._codec.decode(raw)
+            except FrameError:
                 continue
             frame_type = frame.get("type")
             if frame_type == "request":
-                self._spawn_bounded(self._handle_request(tunnel, frame))
+                lane = lane_for(frame.get("method", "GET"), frame.get("path", "/"))
+                self._spawn_bounded(self._handle_request(tunnel, frame), lane)
+            elif frame_type == "request_start":
+                request_id = frame.get("request_id")
+                stream = StreamReceiver(
+                    lambda credit, request_id=request_id: self._send(
+                        tunnel, {"type": "window", "request_id": request_id, "credit": credit}, LANE_CRITICAL
+                    )
+                )
+                self._request_streams[request_id] = stream
+                self._spawn_bounded(self._handle_request(tunnel, frame, stream), LANE_BULK)
+            elif frame_type in ("request_chunk", "request_end", "window", "cancel"):
+                # Handled inline: chunks must stay in order, and a window
+                # grant must not queue behind the requests waiting for it.
+                self._dispatch_stream_frame(tunnel, frame)
             elif frame_type == "ws_open":
-                self._spawn_bounded(self._handle_ws_open(tunnel, frame))
+                self._spawn_bounded(self._handle_ws_open(tunnel, frame), LANE_INTERACTIVE)
             elif frame_type == "ws_message":
-                self._spawn_bounded(self._handle_ws_message(frame))
+                self._spawn_bounded(self._handle_ws_message(frame), LANE_INTERACTIVE)
             elif frame_type == "ws_close":
-                self._spawn_bounded(self._handle_ws_close(frame))
+                self._spawn_bounded(self._handle_ws_close(frame), LANE_INTERACTIVE)
             elif frame_type == "ping":
                 asyncio.create_task(self._send_pong(tunnel, frame.get("ts")))
             else:
                 logger.warning("Ignoring unrecognized tunnel frame type: %r", frame_type)
 
+    async def _send(self, tunnel: Any, frame: dict[str, Any], lane: str) -> None:
+        """Write ``frame`` to ``tunnel`` once the lane scheduler gets to it."""
+        scheduler = self._schedulers.get(tunnel)
+        if scheduler is None:
+            scheduler = self._schedulers[tunnel] = LaneScheduler(tunnel.send)
+        wire = self._codec.encode(frame)
+        self._bytes_sent += len(wire)
+        await scheduler.send(wire, lane)
+
+    def stats(self) -> dict[str, float]:
+        """Tunnel gauges for ``sarapp_db.services.request_metrics``: frames
+        queued for and holding a concurrency slot, open channels and streams,
+        and bytes over the tunnel, and frames waiting to be written per
+        priority lane. Read from any thread."""
+        tunnel = self._tunnel
+        scheduler = self._schedulers.get(tunnel) if tunnel is not None else None
+        queued = scheduler.queued() if scheduler is not None else {}
+        return {
+            "registered": 1 if self._tunnel is not None else 0,
+            "frames_waiting": self._frames_waiting,
+            "frames_running": self._frames_running,
+            "ws_channels": len(self._ws_channels),
+            "request_streams": len(self._request_streams),
+            "response_streams": len(self._response_windows),
+            "received_bytes_total": self._bytes_received,
+            "sent_bytes_total": self._bytes_sent,
+            **{f"send_queue_{lane}": queued.get(lane, 0) for lane in LANES},
+        }
+
+    def notify_catalog_version(self, version: Any) -> None:
+        """Tell the router the master catalogs changed. Safe from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self._send_catalog_version(version)))
+
+    async def _send_catalog_version(self, version: Any) -> None:
+        tunnel = self._tunnel
+        if tunnel is None:
+            return  # the next registration's pongs carry it
+        try:
+            await self._send(tunnel, {"type": "cache_version", "version": version}, LANE_CRITICAL)
+        except Exception:  # noqa: BLE001 - tunnel may be tearing down; pongs repeat it
+            pass
+
     async def _send_pong(self, tunnel: Any, ts: Any) -> None:
+        frame: dict[str, Any] = {"type": "pong", "ts": ts}
+        if self.catalog_version_fn is not None:
+            frame["catalog_version"] = self.catalog_version_fn()
+        try:
+            await self._send(tunnel, frame, LANE_CRITICAL)
+        except Exception:  # noqa: BLE001 - tunnel may be tearing down; nothing to do
+            pass
+
+    def _dispatch_stream_frame(self, tunnel: Any, frame: dict[str, Any]) -> None:
+        request_id = frame.get("request_id")
+        frame_type = frame.get("type")
+        if frame_type == "window":
+            window = self._response_windows.get(request_id)
+            if window is not None:
+                window.grant(frame.get("credit", 0))
+            return
+        if frame_type == "cancel":
+            window = self._response_windows.pop(request_id, None)
+            if window is not None:
+                window.cancel()
+            stream = self._request_streams.pop(request_id, None)
+            if stream is not None:
+                stream.fail(StreamAborted("Request cancelled by the cloud router"))
+            return
+        stream = self._request_streams.get(request_id)
+        if stream is None:
+            return
+        if frame_type == "request_end":
+            del self._request_streams[request_id]
+            stream.finish()
+            return
+        try:
+            stream.feed(frame.get("seq"), frame.get("body") or b"")
+        except StreamAborted as exc:
+            del self._request_streams[request_id]
+            stream.fail(exc)
+            asyncio.create_task(self._send_cancel(tunnel, request_id))
+
+    async def _send_cancel(self, tunnel: Any, request_id: Any) -> None:
         try:
-            await tunnel.send(json.dumps({"type": "pong", "ts": ts}))
+            await self._send(tunnel, {"type": "cancel", "request_id": request_id}, LANE_CRITICAL)
         except Exception:  # noqa: BLE001 - tunnel may be tearing down; nothing to do
             pass
 
-    def _spawn_bounded(self, coro: Any) -> None:
+    def _spawn_bounded(self, coro: Any, lane: str) -> None:
+        """Run ``coro`` under ``lane``'s share of the concurrency cap."""
+
         async def _run_bounded() -> None:
-            async with self._frame_semaphore:
+            semaphore = self._frame_semaphores[lane]
+            self._frames_waiting += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self._frames_waiting -= 1
+            self._frames_running += 1
+            try:
                 await coro
+            finally:
+                self._frames_running -= 1
+                semaphore.release()
 
         asyncio.create_task(_run_bounded())
 
-    async def _handle_request(self, tunnel: Any, frame: dict[str, Any]) -> None:
+    async def _handle_request(
+        self, tunnel: Any, frame: dict[str, Any], body_stream: StreamReceiver | None = None
+    ) -> None:
+        """Run one tunneled request against the local app. ``body_stream``
+        carries the body of a ``request_start``; otherwise it is in the frame."""
         request_id = frame.get("request_id")
         method = frame.get("method", "GET")
         path = frame.get("path", "/")
+        lane = lane_for(method, path, streamed=body_stream is not None)
         query = frame.get("query") or ""
         headers = _filtered_headers(frame.get("headers") or {})
-        body_b64 = frame.get("body")
-        body = base64.b64decode(body_b64) if body_b64 else b""
+        body = frame.get("body") or b""
 
-        if len(body) > _MAX_REQUEST_BODY_BYTES:
+        if body_stream is None and len(body) > _MAX_REQUEST_BODY_BYTES:
             logger.warning(
                 "Rejecting oversized request body (%d bytes) for %s %s", len(body), method, path
             )
-            await tunnel.send(
-                json.dumps(
-                    {
-                        "type": "response",
-                        "request_id": request_id,
-                        "status": 413,
-                        "headers": {},
-                        "body": base64.b64encode(b"Request body too large").decode("ascii"),
-                    }
-                )
+            await self._send(
+                tunnel,
+                {
+                    "type": "response",
+                    "request_id": request_id,
+                    "status": 413,
+                    "headers": {},
+                    "body": b"Request body too large",
+                },
+                lane,
             )
             return
 
@@ -353,6 +535,17 @@ class CloudTunnelClient:
         if query:
             url = f"{url}?{query}"
 
+        content = body if body_stream is None else body_stream.chunks(_REQUEST_TIMEOUT_SECONDS)
+        if self._streaming:
+            try:
+                await self._relay_response(tunnel, request_id, method, url, headers, content, lane)
+            finally:
+                if body_stream is not None and not body_stream.done:
+                    # Answered (or failed) without reading the whole upload.
+                    self._request_streams.pop(request_id, None)
+                    await self._send_cancel(tunnel, request_id)
+            return
+
         try:
             async with httpx.AsyncClient(timeout=_REQUEST_TIMEOUT_SECONDS) as client:
                 response = await client.request(method, url, headers=headers, content=body)
@@ -368,7 +561,7 @@ class CloudTunnelClient:
                     "request_id": request_id,
                     "status": 413,
                     "headers": {},
-                    "body": base64.b64encode(b"Response body too large").decode("ascii"),
+                    "body": b"Response body too large",
                 }
             else:
                 response_frame = {
@@ -376,7 +569,7 @@ class CloudTunnelClient:
                     "request_id": request_id,
                     "status": response.status_code,
                     "headers": dict(response.headers),
-                    "body": base64.b64encode(response.content).decode("ascii"),
+                    "body": response.content,
                 }
         except Exception as exc:  # noqa: BLE001 - report as a proxy error, don't crash the tunnel
             logger.warning("Loopback request failed for %s %s: %s", method, path, exc)
@@ -385,9 +578,90 @@ class CloudTunnelClient:
                 "request_id": request_id,
                 "status": 502,
                 "headers": {},
-                "body": base64.b64encode(str(exc).encode("utf-8")).decode("ascii"),
+                "body": str(exc).encode("utf-8"),
             }
-        await tunnel.send(json.dumps(response_frame))
+        await self._send(tunnel, response_frame, lane)
+
+    async def _relay_response(
+        self,
+        tunnel: Any,
+        request_id: Any,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        content: Any,
+        lane: str,
+    ) -> None:
+        """Send the local response back, streaming any body larger than one
+        chunk as it is read instead of buffering it (no size cap). A small
+        body goes back on the request's ``lane``; a streamed one on the bulk
+        lane."""
+        started = False
+        window = SendWindow()
+        try:
+            async with httpx.AsyncClient(timeout=_REQUEST_TIMEOUT_SECONDS) as client:
+                async with client.stream(method, url, headers=headers, content=content) as response:
+                    length = response.headers.get("content-length")
+                    if length is not None and length.isdigit() and int(length) <= STREAM_CHUNK_BYTES:
+                        await self._send(
+                            tunnel,
+                            {
+                                "type": "response",
+                                "request_id": request_id,
+                                "status": response.status_code,
+                                "headers": dict(response.headers),
+                                "body": await response.aread(),
+                            },
+                            lane,
+                        )
+                        return
+                    self._response_windows[request_id] = window
+                    await self._send(
+                        tunnel,
+                        {
+                            "type": "response_start",
+                            "request_id": request_id,
+                            "status": response.status_code,
+                            "headers": dict(response.headers),
+                        },
+                        LANE_BULK,
+                    )
+                    started = True
+                    seq = 0
+                    async for chunk in response.aiter_bytes(STREAM_CHUNK_BYTES):
+                        await window.acquire(len(chunk), timeout=_REQUEST_TIMEOUT_SECONDS)
+                        await self._send(
+                            tunnel,
+                            {"type": "response_chunk", "request_id": request_id, "seq": seq, "body": chunk},
+                            LANE_BULK,
+                        )
+                        seq += 1
+                    await self._send(tunnel, {"type": "response_end", "request_id": request_id}, LANE_BULK)
+        except StreamAborted as exc:
+            logger.info("Streamed response for %s %s stopped: %s", method, url, exc)
+            if not window.cancelled:
+                await self._send_cancel(tunnel, request_id)
+        except Exception as exc:  # noqa: BLE001 - report as a proxy error, don't crash the tunnel
+            logger.warning("Loopback request failed for %s %s: %s", method, url, exc)
+            if started:
+                await self._send_cancel(tunnel, request_id)
+            else:
+                try:
+                    await self._send(
+                        tunnel,
+                        {
+                            "type": "response",
+                            "request_id": request_id,
+                            "status": 502,
+                            "headers": {},
+                            "body": str(exc).encode("utf-8"),
+                        },
+                        lane,
+                    )
+                except Exception:  # noqa: BLE001
+                    pass
+        finally:
+            self._response_windows.pop(request_id, None)
 
     async def _handle_ws_open(self, tunnel: Any, frame: dict[str, Any]) -> None:
         channel_id = frame.get("channel_id")
@@ -397,7 +671,7 @@ class CloudTunnelClient:
             local_ws = await websockets.connect(url)
         except Exception as exc:  # noqa: BLE001
             logger.warning("Failed to open local websocket for channel %s: %s", channel_id, exc)
-            await tunnel.send(json.dumps({"type": "ws_close", "channel_id": channel_id}))
+            await self._send(tunnel, {"type": "ws_close", "channel_id": channel_id}, LANE_INTERACTIVE)
             return
         self._ws_channels[channel_id] = local_ws
         asyncio.create_task(self._pump_local_channel(tunnel, channel_id, local_ws))
@@ -405,23 +679,16 @@ class CloudTunnelClient:
     async def _pump_local_channel(self, tunnel: Any, channel_id: str, local_ws: Any) -> None:
         try:
             async for message in local_ws:
-                is_binary = isinstance(message, (bytes, bytearray))
-                await tunnel.send(
-                    json.dumps(
-                        {
-                            "type": "ws_message",
-                            "channel_id": channel_id,
-                            "binary": is_binary,
-                            "data": base64.b64encode(message).decode("ascii") if is_binary else message,
-                        }
-                    )
+                # bytes go out as a binary message, str as text.
+                await self._send(
+                    tunnel, {"type": "ws_message", "channel_id": channel_id, "data": message}, LANE_INTERACTIVE
                 )
         except Exception:  # noqa: BLE001 - normal on disconnect
             pass
         finally:
             self._ws_channels.pop(channel_id, None)
             try:
-                await tunnel.send(json.dumps({"type": "ws_close", "channel_id": channel_id}))
+                await self._send(tunnel, {"type": "ws_close", "channel_id": channel_id}, LANE_INTERACTIVE)
             except Exception:  # noqa: BLE001
                 pass
 
@@ -430,12 +697,8 @@ class CloudTunnelClient:
         local_ws = self._ws_channels.get(channel_id)
         if local_ws is None:
             return
-        data = frame.get("data", "")
         try:
-            if frame.get("binary"):
-                await local_ws.send(base64.b64decode(data))
-            else:
-                await local_ws.send(data)
+            await local_ws.send(frame.get("data", ""))
         except Exception as exc:  # noqa: BLE001
             logger.warning("Failed to forward ws message on channel %s: %s", channel_id, exc)
 
@@ -38,6 +38,7 @@ from PySide6.QtWidgets import (
 
 from lan_server.cloud_tunnel_client import generate_connect_code
 from lan_server.networking.server_info import SARAPP_VERSION
+from sarapp_db.services import request_metrics
 
 from .controller import (
     ConsoleServerState,
@@ -47,6 +48,7 @@ from .controller import (
     fetch_health,
 )
 from .log_model import ConsoleLogBuffer, QtLogHandler
+from .performance_view import PerformanceView
 from .settings import ServerConsoleSettings, ServerConsoleSettingsStore
 
 
@@ -97,6 +99,12 @@ class ServerConsoleWindow(QMainWindow):
         self.traffic_timer.timeout.connect(self._poll_traffic)
         self.traffic_timer.start()
 
+        # Sample the latency histograms for the performance chart.
+        self.performance_timer = QTimer(self)
+        self.performance_timer.setInterval(2000)
+        self.performance_timer.timeout.connect(self.performance_view.refresh)
+        self.performance_timer.start()
+
     def _build_ui(self) -> None:
         self.tabs = QTabWidget(self)
         # Each tab stacks several group boxes vertically; scroll it instead
@@ -104,6 +112,8 @@ class ServerConsoleWindow(QMainWindow):
         self.tabs.addTab(self._scrolled(self._build_monitoring_tab()), "Server Monitoring")
         self.tabs.addTab(self._scrolled(self._build_settings_tab()), "Settings")
         self.tabs.addTab(self._build_traffic_tab(), "API Monitor")
+        self.performance_view = PerformanceView(request_metrics.metrics, self)
+        self.tabs.addTab(self.performance_view, "Performance")
         self.setCentralWidget(self.tabs)
 
     def _scrolled(self, widget: QWidget) -> QScrollArea:
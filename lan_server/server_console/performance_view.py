@@ -0,0 +1,135 @@
+"""Live request latency view for the console's Performance tab.
+
+Reads the API server's in-process metrics registry
+(``sarapp_db.services.request_metrics``) on the UI thread's timer: the
+p50/p95/p99 of the requests finished since the previous refresh, charted
+over the last ten minutes, and a per-route table of the totals so far.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+
+import pyqtgraph as pg
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QFormLayout,
+    QGroupBox,
+    QHeaderView,
+    QLabel,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from sarapp_db.services.request_metrics import RequestMetrics, quantile_from_counts
+
+HISTORY_SECONDS = 600.0
+
+_SERIES = (("p50", 0.5, "#1f7a52"), ("p95", 0.95, "#c98a3a"), ("p99", 0.99, "#c1440e"))
+
+_ROUTE_COLUMNS = ["Route", "Requests", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Mongo ms/req", "5xx", "KB out"]
+
+
+def _ms(seconds: float | None) -> str:
+    return "" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+class PerformanceView(QWidget):
+    def __init__(self, registry: RequestMetrics, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self.registry = registry
+        self._started = time.monotonic()
+        self._last_counts: list[int] | None = None
+        self._history: deque[tuple[float, dict[str, float]]] = deque()
+
+        layout = QVBoxLayout(self)
+
+        gauges_box = QGroupBox("Now")
+        gauges = QFormLayout(gauges_box)
+        self.in_flight_label = QLabel("0")
+        self.hub_label = QLabel("")
+        self.tunnel_label = QLabel("Not running")
+        gauges.addRow("Requests in flight", self.in_flight_label)
+        gauges.addRow("Incident feed", self.hub_label)
+        gauges.addRow("Cloud tunnel", self.tunnel_label)
+        layout.addWidget(gauges_box)
+
+        self.plot = pg.PlotWidget()
+        self.plot.setLabel("left", "Latency", units="ms")
+        self.plot.setLabel("bottom", "Seconds ago")
+        self.plot.showGrid(x=True, y=True, alpha=0.2)
+        self.plot.addLegend()
+        self._curves = {
+            name: self.plot.plot(name=name, pen=pg.mkPen(color, width=2)) for name, _q, color in _SERIES
+        }
+        layout.addWidget(self.plot, 1)
+
+        self.route_table = QTableWidget(0, len(_ROUTE_COLUMNS))
+        self.route_table.setHorizontalHeaderLabels(_ROUTE_COLUMNS)
+        self.route_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.route_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        header = self.route_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.route_table, 1)
+
+    def refresh(self) -> None:
+        now = time.monotonic()
+        counts = self.registry.overall_counts()
+        if self._last_counts is not None:
+            interval = [current - previous for current, previous in zip(counts, self._last_counts)]
+            sample = {name: quantile_from_counts(interval, q) for name, q, _color in _SERIES}
+            # An idle interval has no latency to plot; leave a gap rather than a zero.
+            if sample["p50"] is not None:
+                self._history.append((now, sample))
+        self._last_counts = counts
+        while self._history and now - self._history[0][0] > HISTORY_SECONDS:
+            self._history.popleft()
+
+        ages = [now - at for at, _sample in self._history]
+        for name, _q, _color in _SERIES:
+            self._curves[name].setData(ages, [sample[name] * 1000 for _at, sample in self._history])
+
+        snapshot = self.registry.snapshot()
+        self._show_gauges(snapshot)
+        self._show_routes(snapshot["routes"])
+
+    def _show_gauges(self, snapshot: dict) -> None:
+        self.in_flight_label.setText(str(snapshot["in_flight"]))
+        hub = snapshot["gauges"].get("ws_hub", {})
+        self.hub_label.setText(
+            f"{hub.get('connections', 0):g} clients, {hub.get('pending_sends', 0):g} sends queued"
+        )
+        tunnel = snapshot["gauges"].get("tunnel")
+        if tunnel is None:
+            self.tunnel_label.setText("Not running")
+        else:
+            self.tunnel_label.setText(
+                f"{'registered' if tunnel.get('registered') else 'connecting'}; "
+                f"{tunnel.get('frames_running', 0):g} frames running, {tunnel.get('frames_waiting', 0):g} waiting, "
+                f"{tunnel.get('ws_channels', 0):g} channels; "
+                f"{tunnel.get('send_queue_critical', 0):g}/{tunnel.get('send_queue_interactive', 0):g}/"
+                f"{tunnel.get('send_queue_bulk', 0):g} critical/interactive/bulk frames queued to send"
+            )
+
+    def _show_routes(self, routes: dict) -> None:
+        # Slowest first: those are the ones worth a look.
+        rows = sorted(routes.items(), key=lambda item: item[1]["p95"] or 0.0, reverse=True)
+        self.route_table.setRowCount(len(rows))
+        for row, (route, stats) in enumerate(rows):
+            mongo_per_request = stats["mongo_seconds"] / stats["count"] if stats["count"] else None
+            values = [
+                route,
+                str(stats["count"]),
+                _ms(stats["p50"]),
+                _ms(stats["p95"]),
+                _ms(stats["p99"]),
+                _ms(mongo_per_request),
+                str(stats["statuses"].get("5xx", 0)),
+                f"{stats['bytes_out'] / 1024:.1f}",
+            ]
+            for column, value in enumerate(values):
+                self.route_table.setItem(row, column, QTableWidgetItem(value))
@@ -39,6 +39,7 @@ from lan_server.networking.server_info import (
     utc_now,
 )
 from sarapp_db.api.app import create_app
+from sarapp_db.services import catalog_versions, request_metrics
 
 
 def _default_server_id() -> str:
@@ -85,6 +86,7 @@ class SARAppServerManager:
             cloud_router_url=cloud_router_url or get_cloud_router_url(),
             token=get_cloud_router_token(),
             connect_code=connect_code or get_connect_code(),
+            catalog_version_fn=catalog_versions.current,
         )
 
     def start(self) -> None:
@@ -135,6 +137,9 @@ class SARAppServerManager:
             self._broadcaster.start()
 
         self._tunnel_client.local_port = self.port
+        catalog_versions.add_listener(self._tunnel_client.notify_catalog_version)
+        if self._tunnel_client.enabled:
+            request_metrics.metrics.add_gauge_source("tunnel", self._tunnel_client.stats)
         self._tunnel_client.start()
 
         self._notification_trigger_loop.start()
@@ -145,6 +150,8 @@ class SARAppServerManager:
         self.server_info.status = ServerStatus.STOPPING
         self._broadcaster.stop()
         self._notification_trigger_loop.stop()
+        catalog_versions.remove_listener(self._tunnel_client.notify_catalog_version)
+        request_metrics.metrics.remove_gauge_source("tunnel")
         self._tunnel_client.stop()
         if self._server is not None:
             self._server.should_exit = True
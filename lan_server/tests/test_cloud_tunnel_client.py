@@ -15,6 +15,14 @@ import ssl
 import pytest
 
 from lan_server.cloud_tunnel_client import CloudTunnelClient
+from lan_server.tunnel_frames import (
+    LANE_BULK,
+    LANE_CRITICAL,
+    LANE_INTERACTIVE,
+    STREAM_CHUNK_BYTES,
+    STREAM_WINDOW_BYTES,
+    BinaryCodec,
+)
 
 
 class _FakeTunnel:
@@ -50,6 +58,21 @@ def test_pump_replies_to_ping_with_pong() -> None:
     asyncio.run(_run())
 
 
+def test_pong_reports_catalog_version() -> None:
+    async def _run() -> None:
+        client = _make_client(catalog_version_fn=lambda: 42)
+        tunnel = _FakeTunnel([{"type": "ping", "ts": 1.0}])
+        await client._pump(tunnel)
+        await asyncio.sleep(0)
+        assert {"type": "pong", "ts": 1.0, "catalog_version": 42} in tunnel.sent
+
+        client._tunnel = tunnel
+        await client._send_catalog_version(43)
+        assert tunnel.sent[-1] == {"type": "cache_version", "version": 43}
+
+    asyncio.run(_run())
+
+
 def test_pump_ignores_unknown_frame_type_without_raising(caplog) -> None:
     async def _run() -> None:
         client = _make_client()
@@ -67,14 +90,13 @@ def test_handle_request_rejects_oversized_body(monkeypatch) -> None:
     async def _run() -> None:
         client = _make_client()
         tunnel = _FakeTunnel([])
-        oversized_body = base64.b64encode(b"way too big").decode("ascii")
         frame = {
             "request_id": "r1",
             "method": "POST",
             "path": "/api/upload",
             "query": "",
             "headers": {},
-            "body": oversized_body,
+            "body": b"way too big",
         }
         await client._handle_request(tunnel, frame)
         assert len(tunnel.sent) == 1
@@ -118,7 +140,7 @@ def test_handle_request_rejects_oversized_response(monkeypatch) -> None:
             "path": "/api/download",
             "query": "",
             "headers": {},
-            "body": "",
+            "body": b"",
         }
         await client._handle_request(tunnel, frame)
         assert len(tunnel.sent) == 1
@@ -128,10 +150,129 @@ def test_handle_request_rejects_oversized_response(monkeypatch) -> None:
     asyncio.run(_run())
 
 
+def test_binary_protocol_frames_carry_raw_bodies(monkeypatch) -> None:
+    import lan_server.cloud_tunnel_client as tunnel_module
+
+    codec = BinaryCodec()
+    seen: list[bytes] = []
+
+    class _FakeResponse:
+        status_code = 200
+        headers: dict = {}
+        content = b"\x89PNG raw"
+
+    class _FakeAsyncClient:
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        async def __aenter__(self) -> "_FakeAsyncClient":
+            return self
+
+        async def __aexit__(self, *args) -> None:
+            return None
+
+        async def request(self, *args, content=b"", **kwargs) -> _FakeResponse:
+            seen.append(content)
+            return _FakeResponse()
+
+    class _BinaryTunnel(_FakeTunnel):
+        async def _aiter(self):
+            for frame in self._frames:
+                yield codec.encode(frame)
+
+        async def send(self, raw: bytes) -> None:
+            self.sent.append(codec.decode(raw))
+
+    monkeypatch.setattr(tunnel_module.httpx, "AsyncClient", _FakeAsyncClient)
+
+    async def _run() -> None:
+        client = _make_client()
+        client._codec = codec
+        request_id = "0123456789abcdef0123456789abcdef"
+        tunnel = _BinaryTunnel(
+            [{"type": "request", "request_id": request_id, "method": "POST", "path": "/api/upload", "body": b"\x00\xff"}]
+        )
+        await client._pump(tunnel)
+        await asyncio.sleep(0.05)
+        assert seen == [b"\x00\xff"]
+        assert tunnel.sent == [
+            {"type": "response", "request_id": request_id, "status": 200, "headers": {}, "body": b"\x89PNG raw"}
+        ]
+
+    asyncio.run(_run())
+
+
+def test_streamed_response_waits_for_router_window(monkeypatch) -> None:
+    import lan_server.cloud_tunnel_client as tunnel_module
+
+    chunks = [bytes([n]) * STREAM_CHUNK_BYTES for n in range(6)]
+    uploaded: list[bytes] = []
+
+    class _FakeStreamResponse:
+        status_code = 200
+        headers: dict = {"content-type": "application/pdf"}
+
+        async def aiter_bytes(self, chunk_size):
+            for chunk in chunks:
+                yield chunk
+
+    class _FakeStream:
+        def __init__(self, content) -> None:
+            self._content = content
+
+        async def __aenter__(self) -> _FakeStreamResponse:
+            async for piece in self._content:
+                uploaded.append(piece)
+            return _FakeStreamResponse()
+
+        async def __aexit__(self, *args) -> None:
+            return None
+
+    class _FakeAsyncClient:
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        async def __aenter__(self) -> "_FakeAsyncClient":
+            return self
+
+        async def __aexit__(self, *args) -> None:
+            return None
+
+        def stream(self, method, url, *, headers, content) -> _FakeStream:
+            return _FakeStream(content)
+
+    monkeypatch.setattr(tunnel_module.httpx, "AsyncClient", _FakeAsyncClient)
+
+    async def _run() -> None:
+        client = _make_client()
+        client._streaming = True
+        request_id = "r-stream"
+        tunnel = _FakeTunnel(
+            [
+                {"type": "request_start", "request_id": request_id, "method": "POST", "path": "/api/x"},
+                {"type": "request_chunk", "request_id": request_id, "seq": 0, "body": base64.b64encode(b"up").decode()},
+                {"type": "request_end", "request_id": request_id},
+            ]
+        )
+        await client._pump(tunnel)
+        await asyncio.sleep(0.05)
+        assert uploaded == [b"up"]
+        types = [frame["type"] for frame in tunnel.sent]
+        assert types == ["response_start"] + ["response_chunk"] * (STREAM_WINDOW_BYTES // STREAM_CHUNK_BYTES)
+
+        client._dispatch_stream_frame(tunnel, {"type": "window", "request_id": request_id, "credit": STREAM_WINDOW_BYTES})
+        await asyncio.sleep(0.05)
+        assert [frame["type"] for frame in tunnel.sent[len(types):]] == ["response_chunk", "response_chunk", "response_end"]
+        assert [frame["seq"] for frame in tunnel.sent if frame["type"] == "response_chunk"] == list(range(6))
+        assert base64.b64decode(tunnel.sent[-2]["body"]) == chunks[-1]
+
+    asyncio.run(_run())
+
+
 def test_spawn_bounded_limits_concurrency() -> None:
     async def _run() -> None:
         client = _make_client()
-        client._frame_semaphore = asyncio.Semaphore(2)
+        client._frame_semaphores[LANE_INTERACTIVE] = asyncio.Semaphore(2)
         running = 0
         max_running = 0
         started = asyncio.Event()
@@ -145,13 +286,69 @@ def test_spawn_bounded_limits_concurrency() -> None:
             running -= 1
 
         for _ in range(5):
-            client._spawn_bounded(_task())
+            client._spawn_bounded(_task(), LANE_INTERACTIVE)
         await asyncio.sleep(0.2)
         assert max_running <= 2
 
     asyncio.run(_run())
 
 
+def test_critical_frames_do_not_wait_for_a_saturated_bulk_lane() -> None:
+    async def _run() -> None:
+        client = _make_client()
+        client._frame_semaphores[LANE_BULK] = asyncio.Semaphore(1)
+        release = asyncio.Event()
+        ran: list[str] = []
+
+        async def _download() -> None:
+            await release.wait()
+            ran.append("bulk")
+
+        async def _location() -> None:
+            ran.append("critical")
+
+        for _ in range(3):
+            client._spawn_bounded(_download(), LANE_BULK)
+        client._spawn_bounded(_location(), LANE_CRITICAL)
+        await asyncio.sleep(0.01)
+        assert ran == ["critical"]
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert ran == ["critical", "bulk", "bulk", "bulk"]
+
+    asyncio.run(_run())
+
+
+def test_stats_report_frame_queue_and_tunnel_bytes() -> None:
+    async def _run() -> None:
+        client = _make_client()
+        client._frame_semaphores[LANE_INTERACTIVE] = asyncio.Semaphore(1)
+        release = asyncio.Event()
+
+        async def _task() -> None:
+            await release.wait()
+
+        for _ in range(3):
+            client._spawn_bounded(_task(), LANE_INTERACTIVE)
+        await asyncio.sleep(0)
+        stats = client.stats()
+        assert (stats["frames_running"], stats["frames_waiting"]) == (1, 2)
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert (client.stats()["frames_running"], client.stats()["frames_waiting"]) == (0, 0)
+
+        tunnel = _FakeTunnel([{"type": "ping", "ts": 1.0}])
+        await client._pump(tunnel)
+        await asyncio.sleep(0)
+        stats = client.stats()
+        assert stats["received_bytes_total"] == len(json.dumps({"type": "ping", "ts": 1.0}))
+        assert stats["sent_bytes_total"] > 0
+
+    asyncio.run(_run())
+
+
 def test_auth_rejected_close_code_constant_matches_router_policy_violation() -> None:
     import lan_server.cloud_tunnel_client as tunnel_module
 
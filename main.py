@@ -24,7 +24,7 @@ from PySide6.QtWidgets import (
     QFileDialog,
 )
 from PySide6.QtGui import QAction, QActionGroup, QKeySequence, QPalette, QColor
-from PySide6.QtCore import Qt, QUrl, QSettings, QTimer, QObject, QEvent
+from PySide6.QtCore import Qt, QUrl, QSettings, QObject, QEvent
 from PySide6QtAds import (
     CDockManager,
     CDockWidget,
@@ -3550,7 +3550,8 @@ class MainWindow(QMainWindow):
             app = QApplication.instance()
             manager = app.property("sarapp_connection_manager") if app else None
             if manager is not None:
-                manager.add_listener(self._on_connection_snapshot)
+                from utils.connection_relay import gui_relay
+                gui_relay(manager).add_listener(self._on_connection_snapshot)
                 self._on_connection_snapshot(manager.snapshot)
             else:
                 self.connection_status_label.setText("Connection: —")
@@ -3558,7 +3559,7 @@ class MainWindow(QMainWindow):
             self.connection_status_label.setText("Connection: —")
 
     def _on_connection_snapshot(self, snapshot) -> None:
-        """Update the connection status label from a ConnectionSnapshot (any thread)."""
+        """Update the connection status label from a ConnectionSnapshot."""
         try:
             from core.networking.server_info import ConnectionState
             _STATE_LABELS = {
@@ -3575,9 +3576,7 @@ class MainWindow(QMainWindow):
                 detail = f" — {server.server_name} ({server.host}:{server.port})"
             else:
                 detail = f" — {snapshot.message}" if snapshot.message else ""
-            text = f"Connection: {state_text}{detail}"
-            # Qt widgets must be updated on the main thread.
-            QTimer.singleShot(0, lambda: self.connection_status_label.setText(text))
+            self.connection_status_label.setText(f"Connection: {state_text}{detail}")
         except Exception:
             pass
 
@@ -3632,7 +3631,8 @@ class MainWindow(QMainWindow):
             app = QApplication.instance()
             manager = app.property("sarapp_connection_manager") if app else None
             if manager is not None:
-                manager.add_listener(bar.on_connection_snapshot)
+                from utils.connection_relay import gui_relay
+                gui_relay(manager).add_listener(bar.on_connection_snapshot)
                 bar.on_connection_snapshot(manager.snapshot)
         except Exception:
             pass
@@ -3970,6 +3970,11 @@ def _initialize_connectivity(app: QApplication, *, prompt_on_failure: bool = Tru
     # did not start it or if an external server was reused).
     app.aboutToQuit.connect(local_controller.stop)
 
+    # Watch the active path from here on: fail over between LAN and cloud,
+    # move to a faster path when one appears, and reconnect after a drop.
+    manager.start_health_monitor()
+    app.aboutToQuit.connect(manager.stop_health_monitor)
+
     app.setProperty("sarapp_connection_manager", manager)
     logger.info("SARApp connectivity startup state: %s", manager.snapshot.state.value)
     return manager
@@ -3991,6 +3996,12 @@ def _activate_debug_bypass(app: QApplication) -> object | None:
 # ===== Part 6: Application Entrypoint =======================================
 if __name__ == "__main__":
     import argparse
+    import multiprocessing
+
+    # In the frozen (PyInstaller) build a spawned worker process re-runs
+    # this executable; freeze_support() turns it into the worker instead of
+    # a second SARApp. A no-op everywhere else.
+    multiprocessing.freeze_support()
 
     # Must happen before QApplication is constructed: Qt docs require
     # AA_ShareOpenGLContexts to be set explicitly (it is NOT on by default)
@@ -4022,6 +4033,12 @@ if __name__ == "__main__":
             incident_cache_loader.shutdown()
         except Exception:
             pass
+        try:
+            from utils.api_executor import api_executor
+
+            api_executor.shutdown()
+        except Exception:
+            pass
         try:
             sid = AppState.get_active_api_session_id()
             if sid is not None:
@@ -4052,13 +4069,14 @@ if __name__ == "__main__":
         from utils.api_client import api_client as _api_client_pre
         from core.networking import ConnectionState as _ConnectionState_pre
         from core.networking.server_info import DEFAULT_SERVER_PORT as _DEFAULT_SERVER_PORT_pre
+        from utils.connection_relay import gui_relay as _gui_relay_pre
         if _connection_manager is not None:
             def _on_pre_connection_changed(snapshot) -> None:
                 if snapshot.state in {_ConnectionState_pre.CONNECTED_LAN, _ConnectionState_pre.CONNECTED_CLOUD}:
                     _api_client_pre.configure(snapshot.server.base_url)
                 elif snapshot.state == _ConnectionState_pre.OFFLINE:
                     _api_client_pre.configure(f"http://localhost:{_DEFAULT_SERVER_PORT_pre}")
-            _connection_manager.add_listener(_on_pre_connection_changed)
+            _gui_relay_pre(_connection_manager).add_listener(_on_pre_connection_changed)
             _on_pre_connection_changed(_connection_manager.snapshot)
 
         from modules.login_dialog import LoginDialog
@@ -4109,6 +4127,7 @@ if __name__ == "__main__":
     elif _connection_manager is not None:
         from core.networking import ConnectionState as _ConnectionState
         from core.networking.server_info import DEFAULT_SERVER_PORT as _DEFAULT_SERVER_PORT
+        from utils.connection_relay import gui_relay as _gui_relay
 
         def _on_connection_changed(snapshot) -> None:
             if snapshot.state in {_ConnectionState.CONNECTED_LAN, _ConnectionState.CONNECTED_CLOUD}:
@@ -4116,7 +4135,7 @@ if __name__ == "__main__":
             elif snapshot.state == _ConnectionState.OFFLINE:
                 _api_client.configure(f"http://localhost:{_DEFAULT_SERVER_PORT}")
 
-        _connection_manager.add_listener(_on_connection_changed)
+        _gui_relay(_connection_manager).add_listener(_on_connection_changed)
         _on_connection_changed(_connection_manager.snapshot)
 
     # Initialize theme manager/bridge at app level as well
@@ -17,7 +17,7 @@ channel data for the rest of its TTL.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
 from utils.catalog_cache import catalog_cache
 
@@ -25,13 +25,14 @@ _CATALOG_NAME = "radio_channels"
 _CATALOG_PATH = "/api/comms/master-channels"
 
 
-def get_master_channels_by_id(*, ttl_seconds: int = 300) -> Dict[int, Dict[str, Any]]:
+def get_master_channels_by_id(*, ttl_seconds: int = 300) -> Dict[int, Mapping[str, Any]]:
     """Return ``{master_channel_id: mapped_master_channel_dict}``, memoized
     via CatalogCache. The `/master-channels` endpoint already returns
     server-mapped dicts (see `_map_master_channel`), so no client-side
-    remapping is needed here — just index by id."""
-    channels = catalog_cache.get(_CATALOG_NAME, _CATALOG_PATH, ttl_seconds=ttl_seconds) or []
-    result: Dict[int, Dict[str, Any]] = {}
+    remapping is needed here — just index by id. The channels are the
+    cache's read-only views; copy one with `dict(...)` before editing it."""
+    channels = catalog_cache.view(_CATALOG_NAME, _CATALOG_PATH, ttl_seconds=ttl_seconds) or ()
+    result: Dict[int, Mapping[str, Any]] = {}
     for ch in channels:
         cid = ch.get("id")
         if cid is not None:
@@ -52,10 +53,10 @@ def _channel_int_id(channel_id: Any) -> Optional[int]:
         return None
 
 
-def map_incident_channel(doc: Dict[str, Any], master_by_id: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+def map_incident_channel(doc: Dict[str, Any], master_by_id: Mapping[int, Mapping[str, Any]]) -> Dict[str, Any]:
     """Mirror communications.py's `_map_incident_channel` server-side join."""
     master_id = doc.get("master_id")
-    master: Dict[str, Any] = {}
+    master: Mapping[str, Any] = {}
     if master_id is not None:
         try:
             master = master_by_id.get(int(master_id)) or {}
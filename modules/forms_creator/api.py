@@ -10,6 +10,7 @@ from .session import FormSession
 from .export import export_form
 from .templating import resolve_template as legacy_resolve
 from .render import render_form as legacy_render
+from .pdf_filler import render_cache
 from utils.profile_manager import profile_manager
 
 
@@ -68,7 +69,7 @@ def export_form_unified(
             sess = FormSession(instance_id=str(uuid.uuid4()), template_uid=tpl_uid, values=dict(values or {}))
             out = Path(out_path)
             out.parent.mkdir(parents=True, exist_ok=True)
-            export_form(sess, dict(context or {}), reg, out)
+            export_form(sess, dict(context or {}), reg, out, cache=render_cache.default_cache())
             return ExportResult(path=out, engine="v2", template_uid=tpl_uid)
     except Exception:
         pass
@@ -0,0 +1,346 @@
+"""Batch form generation — many forms from one data context snapshot.
+
+``engine.generate`` is the right call for one form. A package (an IAP for an
+operational period, a stack of 204s) repeats the same work per form if it is
+called in a loop: each call builds its own context and fills its template
+serially. ``generate_batch`` instead:
+
+1. resolves every form's template and mapping up front;
+2. prefetches the union of the sections those mappings read into one
+   plain-dict snapshot (``FormDataContext.lazy`` + ``required_sections``),
+   for the requested operational period;
+3. fills the forms concurrently against that snapshot;
+4. optionally merges the filled parts into one PDF, in job order, with an
+   outline entry (bookmark) per form.
+
+With a ``cache`` (``pdf_filler.render_cache``), forms whose resolved values
+are unchanged since an earlier batch are copied from it instead of filled.
+
+A desktop caller that runs the batch on a worker thread builds the
+GUI-thread sections first (``FormDataContext.caller_thread_sections``) and
+passes them as ``sections``; they go into the snapshot as they are.
+
+Forms are filled on threads by default. pypdf's filling is pure Python and
+CPU bound, so packet-sized callers (the server's form job runner, the IAP
+exporter) pass ``processes=True`` for a ``ProcessPoolExecutor`` instead.
+Its workers are spawned, never forked, so starting them from a thread of a
+running Qt application is safe; ``main.py`` calls ``freeze_support()`` so a
+worker spawned by the frozen build does not start another SARApp. Workers
+receive the snapshot once through the pool initializer, so a job only
+carries its own ``extra_data``.
+``progress`` is called on the calling thread as each form finishes, in
+completion order; if it raises, forms not yet started are dropped and the
+exception propagates.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+from pypdf import PdfWriter
+
+from .pdf_filler.pdf_filler import PDFFiller
+from .pdf_filler.render_cache import RenderCache
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class FormJob:
+    """One form to fill. ``extra_data`` overrides snapshot sections for this
+    form only (e.g. ``{"team": {...}}`` for one of several 204s)."""
+
+    form_id: str
+    title: str = ""
+    extra_data: dict[str, Any] | None = None
+
+
+@dataclass
+class FormResult:
+    form_id: str
+    title: str
+    path: Path | None = None
+    warnings: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None and self.error is None
+
+
+ProgressCallback = Callable[[int, int, FormResult], None]
+
+
+# ---------------------------------------------------------------------------
+# Worker side (runs in the pool processes)
+# ---------------------------------------------------------------------------
+
+_worker_snapshot: dict[str, Any] = {}
+
+
+def _init_worker(snapshot: dict[str, Any]) -> None:
+    global _worker_snapshot
+    _worker_snapshot = snapshot
+
+
+def _fill_job(
+    template_pdf: str,
+    mapping_json: str,
+    extra_data: dict[str, Any] | None,
+    form_row_groups: list[dict] | None,
+    output_pdf: str,
+    cache: RenderCache | None = None,
+) -> list[str]:
+    data = {**_worker_snapshot, **extra_data} if extra_data else _worker_snapshot
+    filler = PDFFiller(mapping_json)
+    return filler.fill(data, template_pdf, output_pdf, strict=False, form_row_groups=form_row_groups, cache=cache)
+
+
+# ---------------------------------------------------------------------------
+# Caller side
+# ---------------------------------------------------------------------------
+
+def catalog_form_id(form_id: str, catalog_ids: Iterable[str] | None = None) -> str:
+    """Map a form ID from elsewhere (an IAP package) onto the forms catalog.
+
+    ``"ICS-215A"`` becomes ``"ics_215a"``; trailing qualifiers are dropped
+    until a catalog ID matches, so ``"ICS-204-DIV-A"`` maps to ``"ics_204"``.
+    """
+    if catalog_ids is None:
+        from .form_set_registry import FormSetRegistry
+
+        catalog_ids = [entry.id for entry in FormSetRegistry().list_catalog()]
+    known = set(catalog_ids)
+    candidate = re.sub(r"[^a-z0-9]+", "_", form_id.strip().lower()).strip("_")
+    probe = candidate
+    while probe:
+        if probe in known:
+            return probe
+        if "_" not in probe:
+            break
+        probe = probe.rsplit("_", 1)[0]
+    return candidate
+
+
+def build_snapshot(
+    mappings: Sequence[tuple[dict[str, Any], list[dict] | None]],
+    incident_id: str | None = None,
+    *,
+    op_number: int | None = None,
+    fetch: Callable[..., Any] | None = None,
+    sections: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Prefetch every section the given ``(mapping, form_row_groups)`` pairs
+    read and return them as a plain, picklable dict. ``op_number`` selects
+    the operational period (default: the current one); ``fetch`` replaces
+    the API client (see ``FormDataContext``); ``sections`` are already built
+    and are used instead of their loaders."""
+    from .context import FormDataContext, required_sections
+
+    needed: set[str] = set()
+    for mapping, form_row_groups in mappings:
+        needed |= required_sections(mapping, form_row_groups)
+    ctx = FormDataContext(fetch).lazy(incident_id, op_number=op_number)
+    ctx.update(sections or {})
+    ctx.prefetch(needed)
+    return {key: ctx[key] for key in sorted(needed) if key in ctx}
+
+
+def generate_batch(
+    jobs: Sequence[FormJob],
+    output_dir: str | Path,
+    incident_id: str | None = None,
+    form_set_id: str | None = None,
+    *,
+    context: dict[str, Any] | None = None,
+    sections: dict[str, Any] | None = None,
+    op_number: int | None = None,
+    max_workers: int | None = None,
+    processes: bool = False,
+    progress: ProgressCallback | None = None,
+    fetch: Callable[..., Any] | None = None,
+    cache: RenderCache | None = None,
+) -> list[FormResult]:
+    """Fill ``jobs`` into ``output_dir`` and return one result per job, in job order.
+
+    Forms without a template or mapping in the set's fallback chain come back
+    with ``error`` set instead of raising, so one missing form never sinks a
+    package. Pass ``context`` to reuse an existing snapshot; otherwise one is
+    built for exactly the sections these forms read, for operational period
+    ``op_number``, through ``fetch`` when given. ``sections`` holds sections
+    the caller has already built; they override both. ``processes`` fills in
+    spawned worker processes instead of threads (see the module docstring);
+    ``cache`` must then be picklable.
+    """
+    from .form_set_registry import FormSetRegistry
+    from .resolver import FormNotAvailableError, FormResolver
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    registry = FormSetRegistry()
+    resolver = FormResolver(registry)
+
+    results = [FormResult(form_id=job.form_id, title=job.title or job.form_id) for job in jobs]
+    resolved: list[tuple[int, Path, PDFFiller, list[dict] | None]] = []
+    for index, job in enumerate(jobs):
+        try:
+            template_pdf, mapping_json = resolver.resolve(job.form_id, form_set_id)
+        except FormNotAvailableError as exc:
+            results[index].error = str(exc)
+            continue
+        definition = registry.get_form_definition(job.form_id)
+        resolved.append((index, template_pdf, PDFFiller(mapping_json), definition.row_groups if definition else None))
+
+    if context is None:
+        context = build_snapshot(
+            [(filler.mapping, rgs) for _i, _t, filler, rgs in resolved], incident_id,
+            op_number=op_number, fetch=fetch, sections=sections,
+        )
+    elif sections:
+        context = {**context, **sections}
+
+    total = len(jobs)
+    done = 0
+    for result in results:
+        if result.error is not None:
+            done += 1
+            if progress:
+                progress(done, total, result)
+
+    def _finish(index: int, output_pdf: Path, warnings: list[str] | None, exc: BaseException | None) -> None:
+        nonlocal done
+        result = results[index]
+        if exc is not None:
+            result.error = str(exc)
+            log.warning("Form %s failed: %s", result.form_id, exc)
+        else:
+            result.path = output_pdf
+            result.warnings = list(warnings or [])
+        done += 1
+        if progress:
+            progress(done, total, result)
+
+    tasks = [
+        (index, template_pdf, filler, rgs, output_dir / f"{index:03d}_{jobs[index].form_id}.pdf")
+        for index, template_pdf, filler, rgs in resolved
+    ]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        # Not worth a pool: fill in-process against the same snapshot.
+        for index, template_pdf, filler, rgs, output_pdf in tasks:
+            extra = jobs[index].extra_data
+            data = {**context, **extra} if extra else context
+            try:
+                warnings = filler.fill(
+                    data, template_pdf, output_pdf, strict=False, form_row_groups=rgs, cache=cache,
+                )
+            except Exception as exc:
+                _finish(index, output_pdf, None, exc)
+            else:
+                _finish(index, output_pdf, warnings, None)
+        return results
+
+    pool: Executor
+    if processes:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # Never fork: the caller's process may already run threads.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(context,),
+        )
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sarapp-form-fill")
+    with pool:
+        if processes:
+            futures = {
+                pool.submit(
+                    _fill_job, str(template_pdf), str(filler.mapping_path), jobs[index].extra_data, rgs,
+                    str(output_pdf), cache,
+                ): (index, output_pdf)
+                for index, template_pdf, filler, rgs, output_pdf in tasks
+            }
+        else:
+            futures = {
+                pool.submit(
+                    filler.fill,
+                    {**context, **jobs[index].extra_data} if jobs[index].extra_data else context,
+                    template_pdf, output_pdf, strict=False, form_row_groups=rgs, cache=cache,
+                ): (index, output_pdf)
+                for index, template_pdf, filler, rgs, output_pdf in tasks
+            }
+        try:
+            for future in as_completed(futures):
+                index, output_pdf = futures[future]
+                exc = future.exception()
+                _finish(index, output_pdf, None if exc else future.result(), exc)
+        except BaseException:
+            # ``progress`` raised to abandon the batch: drop what has not started.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+def merge_results(results: Sequence[FormResult], output_pdf: str | Path) -> Path:
+    """Concatenate the successful ``results`` into ``output_pdf`` with one
+    bookmark per form. Field names get a per-form suffix so repeated forms
+    (several 204s) keep their own values in the merged AcroForm."""
+    output_pdf = Path(output_pdf)
+    output_pdf.parent.mkdir(parents=True, exist_ok=True)
+    writer = PdfWriter()
+    for index, result in enumerate(results):
+        if not result.ok:
+            continue
+        first_page = len(writer.pages)
+        PDFFiller._append_cloned_continuation(result.path.read_bytes(), writer, f"_f{index}")
+        if len(writer.pages) > first_page:
+            writer.add_outline_item(result.title, first_page)
+    if len(writer.pages):
+        writer.set_need_appearances_writer(True)
+    with output_pdf.open("wb") as handle:
+        writer.write(handle)
+    return output_pdf
+
+
+def generate_package(
+    jobs: Sequence[FormJob],
+    output_pdf: str | Path,
+    incident_id: str | None = None,
+    form_set_id: str | None = None,
+    *,
+    context: dict[str, Any] | None = None,
+    sections: dict[str, Any] | None = None,
+    op_number: int | None = None,
+    max_workers: int | None = None,
+    processes: bool = False,
+    progress: ProgressCallback | None = None,
+    fetch: Callable[..., Any] | None = None,
+    cache: RenderCache | None = None,
+) -> tuple[Path, list[FormResult]]:
+    """``generate_batch`` into a scratch directory, then ``merge_results``
+    into ``output_pdf``. The per-form parts are removed afterwards."""
+    output_pdf = Path(output_pdf)
+    output_pdf.parent.mkdir(parents=True, exist_ok=True)
+    parts_dir = Path(tempfile.mkdtemp(prefix=f".{output_pdf.stem}_parts_", dir=output_pdf.parent))
+    try:
+        results = generate_batch(
+            jobs, parts_dir, incident_id, form_set_id,
+            context=context, sections=sections, op_number=op_number, max_workers=max_workers,
+            processes=processes,
+            progress=progress, fetch=fetch, cache=cache,
+        )
+        merge_results(results, output_pdf)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    for result in results:
+        result.path = output_pdf if result.ok else None
+    return output_pdf, results
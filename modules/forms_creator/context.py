@@ -1,9 +1,28 @@
-"""Build a nested data dict for PDF form filling from the SARApp API."""
+"""Build a nested data dict for PDF form filling from the SARApp API.
+
+The context is a mapping of top-level sections (``incident``, ``channels``,
+``ics_215a_rows`` ...), each backed by one ``_build_*`` method and its own API
+calls. ``FormDataContext.lazy()`` returns a ``LazyFormData`` that builds a
+section the first time a mapping path touches it; ``required_sections()``
+reads a mapping's ``source`` paths and ``row_groups`` so the engine can
+prefetch exactly those sections concurrently instead of building all of them.
+``build()`` still returns the complete dict for callers that want everything.
+
+Against a server that has it, ``prefetch()`` first asks
+``/api/incidents/{id}/forms/context?sections=...`` for the sections it wants:
+the server runs these same builders next to the data and caches them, so a
+remote workstation gets a form's whole context in one request. Sections the
+server leaves out (``prepared_by``, ``weather``, or an older server without
+the endpoint) are built here as before.
+"""
 
 from __future__ import annotations
 
+import copy
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 from modules.intel.weather.services.summary import build_weather_form_payload
 from utils import incident_context
@@ -91,6 +110,181 @@ def _coerce_service_level(row: dict[str, Any]) -> int:
     return 0
 
 
+# Sections are independent API reads, so a handful of threads covers a full
+# IAP context; more only queues on the client's connection pool.
+_PREFETCH_WORKERS = 8
+
+# Sections whose builders create Qt objects (the weather manager owns a
+# QTimer) must be built on the caller's thread, never in the prefetch pool.
+_CALLER_THREAD_SECTIONS = frozenset({"weather"})
+# Sections that describe this workstation rather than the incident; never
+# requested from the server.
+_LOCAL_SECTIONS = _CALLER_THREAD_SECTIONS | {"prepared_by"}
+
+
+def _source_paths(source: Any) -> Iterator[str]:
+    """Yield every key path a mapping ``source`` descriptor can read."""
+    if isinstance(source, str):
+        yield source
+    elif isinstance(source, list):
+        for item in source:
+            yield from _source_paths(item)
+    elif isinstance(source, dict):
+        if "key" in source:
+            yield str(source["key"])
+        for path in source.get("first_of") or []:
+            yield str(path)
+        for item in source.get("join") or []:
+            yield from _source_paths(item)
+
+
+def required_sections(
+    mapping: dict[str, Any],
+    form_row_groups: list[dict] | None = None,
+) -> set[str]:
+    """Return the top-level context sections a mapping reads.
+
+    Covers field ``source`` descriptors, row group data keys (``data_key``, or
+    ``ref`` for mapper-driven column groups, or the ``entries`` default), the
+    header field key paths, and the catalog ``form_row_groups`` a ``ref`` can
+    point at. Paths are only cut at the first segment, so anything nested
+    under a section is fetched with it.
+    """
+    paths: list[str] = []
+    for field in mapping.get("fields") or []:
+        if isinstance(field, dict):
+            paths.extend(_source_paths(field.get("source")))
+
+    refs: set[str] = set()
+    for rg in mapping.get("row_groups") or []:
+        if not isinstance(rg, dict):
+            continue
+        if rg.get("ref"):
+            refs.add(str(rg["ref"]))
+        data_key = rg.get("data_key") or rg.get("ref") or "entries"
+        paths.append(str(data_key))
+        for header_key in ("page1_header_fields", "continuation_header_fields"):
+            for source in (rg.get(header_key) or {}).values():
+                if isinstance(source, dict) and source.get("key"):
+                    paths.append(str(source["key"]))
+
+    for form_rg in form_row_groups or []:
+        if form_rg.get("id") in refs and form_rg.get("data_key"):
+            paths.append(str(form_rg["data_key"]))
+
+    return {path.split(".", 1)[0] for path in paths if path}
+
+
+class LazyFormData(dict):
+    """A form data context that builds each section on first access.
+
+    Subclasses ``dict`` so ``PDFFiller._lookup_path`` and ``data.get(...)``
+    work unchanged. Known sections report as present before they are built;
+    reading one runs its loader exactly once, even when several threads ask
+    for it at the same time. Values assigned directly (``update(extra_data)``)
+    win over loaders, which then never run. Sections whose names start with
+    ``_`` are internal intermediates and are hidden from iteration.
+    """
+
+    def __init__(
+        self,
+        loaders: dict[str, Callable[["LazyFormData"], Any]],
+        remote: Callable[[list[str]], dict[str, Any]] | None = None,
+    ) -> None:
+        super().__init__()
+        self._loaders = loaders
+        self._remote = remote
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def __missing__(self, key: str) -> Any:
+        if key not in self._loaders:
+            raise KeyError(key)
+        return self._resolve(key)
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._loaders
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def _resolve(self, key: str) -> Any:
+        with self._lock:
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = self._loaders[key](self)
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            # An explicit assignment made while the loader ran still wins.
+            value = self.setdefault(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def prefetch(self, keys: Iterable[str] | None = None, max_workers: int = _PREFETCH_WORKERS) -> "LazyFormData":
+        """Build ``keys`` (default: every section) concurrently and return self.
+
+        Unknown keys are ignored, as are keys that already hold a value.
+        With a ``remote`` assembler, sections it returns are taken as built
+        and only the rest run their loaders here.
+        """
+        wanted = self._loaders if keys is None else keys
+        pending = [k for k in wanted if k in self._loaders and not dict.__contains__(self, k)]
+        if self._remote is not None:
+            remote = [k for k in pending if not k.startswith("_") and k not in _LOCAL_SECTIONS]
+            if remote:
+                for key, value in self._remote(remote).items():
+                    if key in remote:
+                        with self._lock:
+                            self.setdefault(key, value)
+                pending = [k for k in pending if not dict.__contains__(self, k)]
+        pooled = [k for k in pending if k not in _CALLER_THREAD_SECTIONS]
+        if len(pooled) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pooled))) as pool:
+                for future in [pool.submit(self._resolve, k) for k in pooled]:
+                    future.result()
+        else:
+            for key in pooled:
+                self._resolve(key)
+        for key in pending:
+            if key in _CALLER_THREAD_SECTIONS:
+                self._resolve(key)
+        return self
+
+    def resolve_all(self) -> dict[str, Any]:
+        """Build every section and return a plain dict snapshot."""
+        self.prefetch()
+        return {k: dict.__getitem__(self, k) for k in self.keys()}
+
+    def keys(self) -> list[str]:  # type: ignore[override]
+        names = [k for k in self._loaders if not k.startswith("_")]
+        names.extend(k for k in dict.keys(self) if k not in self._loaders)
+        return names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self) -> list[tuple[str, Any]]:  # type: ignore[override]
+        return [(k, self[k]) for k in self.keys()]
+
+    def values(self) -> list[Any]:  # type: ignore[override]
+        return [self[k] for k in self.keys()]
+
+
 class FormDataContext:
     """Assemble a nested dict from the active incident and master API."""
 
@@ -143,90 +337,174 @@ class FormDataContext:
         "Cost Unit Leader":                      "cost_unit_leader",
     }
 
-    def build(self, incident_id: str | None = None) -> dict[str, Any]:
+    def __init__(self, fetch: Callable[..., Any] | None = None, server_assembly: bool | None = None) -> None:
+        """``fetch(path, **params)`` replaces the API client for every read.
+
+        The server's form export jobs pass one that dispatches into the
+        FastAPI app in-process; ``None`` uses the module-level ``_get``.
+        ``server_assembly`` lets ``prefetch()`` ask the server's
+        ``forms/context`` endpoint for sections first; it defaults to on
+        only for the API client, since an injected fetcher is already next
+        to the data (and the endpoint itself builds through one).
+        """
+        self._fetch = fetch
+        self._server_assembly = fetch is None if server_assembly is None else server_assembly
+        self._responses: dict[tuple, Future] = {}
+        self._responses_lock = threading.Lock()
+
+    def build(self, incident_id: str | None = None, op_number: int | None = None) -> dict[str, Any]:
         """Return the full data context dict for the given incident."""
+        return self.lazy(incident_id, op_number).resolve_all()
+
+    def lazy(self, incident_id: str | None = None, op_number: int | None = None) -> LazyFormData:
+        """Return a context that builds sections on demand.
+
+        Pair with ``required_sections(mapping)`` and ``prefetch()`` to fetch
+        only what one form needs. API responses are shared between sections
+        of the same context (several sections read ``/org/assignments`` or
+        master personnel), so each endpoint is hit at most once.
+        ``op_number`` picks the operational period the per-OP sections
+        describe; ``None`` means the incident's current (latest) one.
+        """
         inc_id = incident_id or incident_context.get_active_incident_id()
+        with self._responses_lock:
+            self._responses = {}
+        remote = self._assembler(inc_id, op_number) if self._server_assembly and inc_id else None
+        return LazyFormData(self._section_loaders(inc_id, op_number), remote)
+
+    def caller_thread_sections(
+        self, incident_id: str | None = None, op_number: int | None = None
+    ) -> dict[str, Any]:
+        """Build the sections that must be built on the GUI thread (weather)
+        and return them as a plain dict. Call this before handing a snapshot
+        build to a worker thread and pass the result along as ``sections``
+        (``modules.forms_creator.batch.generate_batch``)."""
+        ctx = self.lazy(incident_id, op_number)
+        return {key: ctx[key] for key in sorted(_CALLER_THREAD_SECTIONS)}
+
+    def _assembler(self, inc_id: str, op_number: int | None) -> Callable[[list[str]], dict[str, Any]]:
+        params: dict[str, Any] = {} if op_number is None else {"op": op_number}
+
+        def assemble(sections: list[str]) -> dict[str, Any]:
+            response = (self._fetch or _get)(
+                f"/api/incidents/{inc_id}/forms/context", sections=",".join(sections), **params,
+            )
+            if not isinstance(response, dict) or not isinstance(response.get("sections"), dict):
+                return {}
+            return response["sections"]
+
+        return assemble
+
+    def _get(self, path: str, **params) -> Any:
+        """``_get`` memoized per context, single-flight across prefetch threads.
+
+        Every caller gets its own deep copy: builders adjust the rows they
+        read, and the same response feeds several sections.
+        """
+        key = (path, tuple(sorted(params.items())))
+        with self._responses_lock:
+            future = self._responses.get(key)
+            owner = future is None
+            if owner:
+                future = self._responses[key] = Future()
+        if owner:
+            try:
+                future.set_result((self._fetch or _get)(path, **params))
+            except BaseException as exc:
+                future.set_exception(exc)
+        return copy.deepcopy(future.result())
+
+    def _section_loaders(
+        self, inc_id: str | None, op_number: int | None = None,
+    ) -> dict[str, Callable[[LazyFormData], Any]]:
+        def organization(d: LazyFormData) -> dict[str, Any]:
+            org = self._build_organization(inc_id)
+            air_ops = self._build_air_ops_branch(inc_id)
+            if air_ops["director_name"]:
+                # A branch explicitly flagged is_air_ops takes priority over the
+                # legacy single-named-position lookup ("Air Operations Branch
+                # Director" title) above, so either path populates the same
+                # organization.air_operations_branch_director.name binding.
+                org["air_operations_branch_director"] = {
+                    "name": air_ops["director_name"], "person_record": None, "title": "Air Operations Branch Director",
+                }
+            return org
 
-        data: dict[str, Any] = {}
-
-        data["incident"]        = self._build_incident(inc_id)
-        data["op_period"]       = self._build_op_period(inc_id)
-        current_op             = self._current_op_number(data["op_period"])
-        data["organization"]    = self._build_organization(inc_id)
-        air_ops = self._build_air_ops_branch(inc_id)
-        if air_ops["director_name"]:
-            # A branch explicitly flagged is_air_ops takes priority over the
-            # legacy single-named-position lookup ("Air Operations Branch
-            # Director" title) above, so either path populates the same
-            # organization.air_operations_branch_director.name binding.
-            data["organization"]["air_operations_branch_director"] = {
-                "name": air_ops["director_name"], "person_record": None, "title": "Air Operations Branch Director",
-            }
-        data["prepared_by"]     = self._build_prepared_by()
-
-        data["channels"]        = self._build_channels(inc_id)
-        data["channels_notes"]  = ""
-        data["teams"]           = self._build_teams(inc_id)
-        data["tasks"]           = self._build_tasks(inc_id)
-        data["objectives"]      = self._build_objectives(inc_id)
-        data["vehicles"]        = self._build_incident_vehicles(inc_id)
-        liaison_data            = self._build_liaison_data(inc_id)
-        data["liaison_agencies"] = liaison_data["liaison_agencies"]
-        data["liaison_contacts"] = liaison_data["liaison_contacts"]
-        data["agency_contacts"] = liaison_data["agency_contacts"]
-        data["liaison_interactions"] = liaison_data["liaison_interactions"]
-        data["liaison_feedback"] = liaison_data["liaison_feedback"]
-        data["liaison_agency_requests"] = liaison_data["liaison_agency_requests"]
-        data["liaison_resource_offers"] = liaison_data["liaison_resource_offers"]
-        data["liaison_followup_actions"] = liaison_data["liaison_followup_actions"]
-        data["liaison_restrictions"] = liaison_data["liaison_restrictions"]
-        data["liaison_agreements"] = liaison_data["liaison_agreements"]
-        data["narrative"]       = self._build_narrative(inc_id)
-        data["meetings"]        = self._build_meetings(inc_id)
-        data["subject"]         = {"name": "", "sex": "", "dob": "", "race": "", "lkp_place": "", "lkp_time": ""}
-        data["debrief"]         = self._empty_debrief_shape()
-
-        data["aircraft"]        = self._build_aircraft()
-        data["personnel"]       = self._build_personnel()
-        data["master_vehicles"] = self._build_master_vehicles()
-        data["equipment"]       = self._build_equipment()
-        data["hospitals"]       = self._build_hospitals()
-        data["ems_agencies"]    = self._build_ems_agencies()
-        data["ics_206_aid_stations"] = self._build_ics_206_aid_stations(inc_id, current_op)
-        data["ics_206_ambulance_services"] = self._build_ics_206_ambulance_services(inc_id, current_op)
-        data["ics_206_hospitals"] = self._build_ics_206_hospitals(inc_id, current_op)
-        data["ics_206_air_ambulance"] = self._build_ics_206_air_ambulance(inc_id, current_op)
-        data["ics_206_medical_comms"] = self._build_ics_206_medical_comms(inc_id, current_op)
-        data["ics_206_procedures"] = self._build_ics_206_procedures(inc_id, current_op)
-        data["ics_206_signatures"] = self._build_ics_206_signatures(inc_id, current_op)
-        data["comms_resources"] = self._build_comms_resources()
-        data["resource_types"]  = self._build_resource_types()
-
-        data["message"]         = {}
-
-        data["comm_log"]        = self._build_comm_log(inc_id)
-        data["hazards"]         = self._build_hazards(inc_id)
-        data["safety_reports"]  = self._build_safety_reports(inc_id)
-        data["hazard_zones"]    = self._build_hazard_zones(inc_id)
-        data["cap_orm_summaries"] = self._build_cap_orm_summaries(inc_id)
-        data["cap_orm_form"]    = self._build_cap_orm_form(inc_id, current_op)
-        data["cap_orm_hazards"] = self._build_cap_orm_hazards(inc_id, current_op)
-        data["cap_orm_audit"]   = self._build_cap_orm_audit(inc_id, current_op)
-        data["ics_208"]         = self._build_ics_208(inc_id, current_op)
-        data["ics_215a_rows"]   = self._build_ics_215a_rows(inc_id, current_op)
-        data["iwi_reports"]     = self._build_iwi_reports(inc_id)
-        data["hazard_types"]    = self._build_hazard_types()
-        data["safety_analysis_templates"] = self._build_safety_analysis_templates()
-        data["weather"]         = self._build_weather(inc_id)
-        data["facilities"]      = self._build_facilities(inc_id)
-
-        data["uc_commanders"]              = self._build_uc_commanders(inc_id)
-        data["org_branches"]               = self._build_org_branches(inc_id)   # each entry carries branch director + div slots
-        data["org_agency_reps"]            = liaison_data["agency_contacts"]
-        data["team_members"]               = []
-        data["planning_tech_specialists"]  = self._build_planning_tech_specialists(inc_id)
-
-        return data
+        def liaison(key: str) -> Callable[[LazyFormData], Any]:
+            return lambda d: d["_liaison"][key]
+
+        def per_op(builder: Callable[[str | None, int | None], Any]) -> Callable[[LazyFormData], Any]:
+            return lambda d: builder(inc_id, d["_op_number"])
+
+        return {
+            "incident":        lambda d: self._build_incident(inc_id),
+            "op_period":       lambda d: self._build_op_period(inc_id, op_number),
+            "_op_number":      lambda d: self._current_op_number(d["op_period"]),
+            "organization":    organization,
+            "prepared_by":     lambda d: self._build_prepared_by(),
+
+            "channels":        lambda d: self._build_channels(inc_id),
+            "channels_notes":  lambda d: "",
+            "teams":           lambda d: self._build_teams(inc_id),
+            "tasks":           lambda d: self._build_tasks(inc_id),
+            "objectives":      lambda d: self._build_objectives(inc_id),
+            "vehicles":        lambda d: self._build_incident_vehicles(inc_id),
+            "_liaison":        lambda d: self._build_liaison_data(inc_id),
+            "liaison_agencies": liaison("liaison_agencies"),
+            "liaison_contacts": liaison("liaison_contacts"),
+            "agency_contacts": liaison("agency_contacts"),
+            "liaison_interactions": liaison("liaison_interactions"),
+            "liaison_feedback": liaison("liaison_feedback"),
+            "liaison_agency_requests": liaison("liaison_agency_requests"),
+            "liaison_resource_offers": liaison("liaison_resource_offers"),
+            "liaison_followup_actions": liaison("liaison_followup_actions"),
+            "liaison_restrictions": liaison("liaison_restrictions"),
+            "liaison_agreements": liaison("liaison_agreements"),
+            "narrative":       lambda d: self._build_narrative(inc_id),
+            "meetings":        lambda d: self._build_meetings(inc_id),
+            "subject":         lambda d: {"name": "", "sex": "", "dob": "", "race": "", "lkp_place": "", "lkp_time": ""},
+            "debrief":         lambda d: self._empty_debrief_shape(),
+
+            "aircraft":        lambda d: self._build_aircraft(),
+            "personnel":       lambda d: self._build_personnel(),
+            "master_vehicles": lambda d: self._build_master_vehicles(),
+            "equipment":       lambda d: self._build_equipment(),
+            "hospitals":       lambda d: self._build_hospitals(),
+            "ems_agencies":    lambda d: self._build_ems_agencies(),
+            "ics_206_aid_stations": per_op(self._build_ics_206_aid_stations),
+            "ics_206_ambulance_services": per_op(self._build_ics_206_ambulance_services),
+            "ics_206_hospitals": per_op(self._build_ics_206_hospitals),
+            "ics_206_air_ambulance": per_op(self._build_ics_206_air_ambulance),
+            "ics_206_medical_comms": per_op(self._build_ics_206_medical_comms),
+            "ics_206_procedures": per_op(self._build_ics_206_procedures),
+            "ics_206_signatures": per_op(self._build_ics_206_signatures),
+            "comms_resources": lambda d: self._build_comms_resources(),
+            "resource_types":  lambda d: self._build_resource_types(),
+
+            "message":         lambda d: {},
+
+            "comm_log":        lambda d: self._build_comm_log(inc_id),
+            "hazards":         lambda d: self._build_hazards(inc_id),
+            "safety_reports":  lambda d: self._build_safety_reports(inc_id),
+            "hazard_zones":    lambda d: self._build_hazard_zones(inc_id),
+            "cap_orm_summaries": lambda d: self._build_cap_orm_summaries(inc_id),
+            "cap_orm_form":    per_op(self._build_cap_orm_form),
+            "cap_orm_hazards": per_op(self._build_cap_orm_hazards),
+            "cap_orm_audit":   per_op(self._build_cap_orm_audit),
+            "ics_208":         per_op(self._build_ics_208),
+            "ics_215a_rows":   per_op(self._build_ics_215a_rows),
+            "iwi_reports":     lambda d: self._build_iwi_reports(inc_id),
+            "hazard_types":    lambda d: self._build_hazard_types(),
+            "safety_analysis_templates": lambda d: self._build_safety_analysis_templates(),
+            "weather":         lambda d: self._build_weather(inc_id),
+            "facilities":      lambda d: self._build_facilities(inc_id),
+
+            "uc_commanders":   lambda d: self._build_uc_commanders(inc_id),
+            "org_branches":    lambda d: self._build_org_branches(inc_id),   # each entry carries branch director + div slots
+            "org_agency_reps": liaison("agency_contacts"),
+            "team_members":    lambda d: [],
+            "planning_tech_specialists": lambda d: self._build_planning_tech_specialists(inc_id),
+        }
 
     @staticmethod
     def _current_op_number(op_period: dict[str, Any]) -> int | None:
@@ -269,13 +547,13 @@ class FormDataContext:
         if not inc_id:
             return empty
         try:
-            doc = _get(f"/api/incidents/{inc_id}")
+            doc = self._get(f"/api/incidents/{inc_id}")
             if doc:
                 icp_facility_id = str(doc.get("icp_facility_id") or "")
                 icp_facility_name = ""
                 if icp_facility_id:
                     try:
-                        facility = _get(f"/api/incidents/{inc_id}/facilities/{icp_facility_id}") or {}
+                        facility = self._get(f"/api/incidents/{inc_id}/facilities/{icp_facility_id}") or {}
                         icp_facility_name = str(facility.get("name") or "")
                     except Exception:
                         icp_facility_name = ""
@@ -298,15 +576,20 @@ class FormDataContext:
     # Operational period
     # ------------------------------------------------------------------
 
-    def _build_op_period(self, inc_id: str | None) -> dict[str, Any]:
+    def _build_op_period(self, inc_id: str | None, op_number: int | None = None) -> dict[str, Any]:
         empty = {
-            "number": "", "start": "", "end": "",
+            "number": "" if op_number is None else op_number, "start": "", "end": "",
             "start_date": "", "start_time": "", "end_date": "", "end_time": "",
         }
         if not inc_id:
             return empty
         try:
-            periods = _get(f"/api/incidents/{inc_id}/planning/operational-periods") or []
+            periods = self._get(f"/api/incidents/{inc_id}/planning/operational-periods") or []
+            if op_number is not None:
+                periods = [
+                    p for p in periods
+                    if str(p.get("op_number") or p.get("number") or "") == str(op_number)
+                ]
             if periods:
                 row = periods[-1]
                 start = row.get("start_time") or row.get("op_start") or ""
@@ -338,11 +621,11 @@ class FormDataContext:
                 # never exists on an assignment record, so this never matched
                 # anything - every organization.<role>.name path always
                 # resolved empty regardless of real data.)
-                positions = _get(f"/api/incidents/{inc_id}/org/positions") or []
+                positions = self._get(f"/api/incidents/{inc_id}/org/positions") or []
                 title_by_position_id = {
                     p.get("position_id"): p.get("title") or "" for p in positions
                 }
-                assignments = _get(f"/api/incidents/{inc_id}/org/assignments") or []
+                assignments = self._get(f"/api/incidents/{inc_id}/org/assignments") or []
                 seen: set[str] = set()
                 for row in assignments:
                     title = title_by_position_id.get(row.get("position_id"), "")
@@ -371,7 +654,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            positions = _get(f"/api/incidents/{inc_id}/org/positions") or []
+            positions = self._get(f"/api/incidents/{inc_id}/org/positions") or []
             ic_position_ids = {
                 p.get("position_id")
                 for p in positions
@@ -379,7 +662,7 @@ class FormDataContext:
             }
             if not ic_position_ids:
                 return []
-            assignments = _get(f"/api/incidents/{inc_id}/org/assignments") or []
+            assignments = self._get(f"/api/incidents/{inc_id}/org/assignments") or []
             personnel_by_id = self._personnel_by_id()
             result: list[dict[str, Any]] = []
             for row in assignments:
@@ -398,7 +681,7 @@ class FormDataContext:
 
     def _personnel_by_id(self) -> dict[int, dict[str, Any]]:
         try:
-            rows = [self._normalize_person_row(r) for r in (_get("/api/master/personnel") or [])]
+            rows = [self._normalize_person_row(r) for r in (self._get("/api/master/personnel") or [])]
             return {int(r["person_record"]): r for r in rows if r.get("person_record") is not None}
         except Exception:
             return {}
@@ -411,11 +694,11 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            units = _get(
+            units = self._get(
                 f"/api/incidents/{inc_id}/org/units",
                 classifications="branch,division,group",
             ) or []
-            assignments = _get(f"/api/incidents/{inc_id}/org/assignments") or []
+            assignments = self._get(f"/api/incidents/{inc_id}/org/assignments") or []
             assign_by_position: dict[int, list[dict[str, Any]]] = {}
             for row in assignments:
                 assign_by_position.setdefault(row.get("position_id"), []).append(row)
@@ -483,13 +766,13 @@ class FormDataContext:
         if not inc_id:
             return empty
         try:
-            units = _get(f"/api/incidents/{inc_id}/org/units", classifications="branch") or []
+            units = self._get(f"/api/incidents/{inc_id}/org/units", classifications="branch") or []
             air_ops_units = [u for u in units if u.get("is_air_ops")]
             if not air_ops_units:
                 return empty
             branch_pid = air_ops_units[0].get("position_id")
 
-            assignments = _get(f"/api/incidents/{inc_id}/org/assignments") or []
+            assignments = self._get(f"/api/incidents/{inc_id}/org/assignments") or []
             director_name = deputy_name = ""
             for row in assignments:
                 if row.get("position_id") != branch_pid:
@@ -510,14 +793,14 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            positions = _get(f"/api/incidents/{inc_id}/org/positions") or []
+            positions = self._get(f"/api/incidents/{inc_id}/org/positions") or []
             specialists = [
                 p for p in positions
                 if "technical specialist" in (p.get("title") or "").lower()
             ]
             specialists.sort(key=lambda p: (p.get("sort_order") or 0, p.get("position_id") or 0))
 
-            assignments = _get(f"/api/incidents/{inc_id}/org/assignments") or []
+            assignments = self._get(f"/api/incidents/{inc_id}/org/assignments") or []
             assign_by_position: dict[int, list[dict[str, Any]]] = {}
             for row in assignments:
                 assign_by_position.setdefault(row.get("position_id"), []).append(row)
@@ -545,7 +828,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/channels-plan") or []
+            rows = self._get(f"/api/incidents/{inc_id}/channels-plan") or []
             return [
                 {
                     "id": r.get("id") or "",
@@ -589,13 +872,13 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            streams = _get(f"/api/incidents/{inc_id}/ics214/streams") or []
+            streams = self._get(f"/api/incidents/{inc_id}/ics214/streams") or []
             entries: list[dict[str, Any]] = []
             for stream in streams:
                 stream_id = stream.get("id")
                 if not stream_id:
                     continue
-                detail = _get(f"/api/incidents/{inc_id}/ics214/streams/{stream_id}") or {}
+                detail = self._get(f"/api/incidents/{inc_id}/ics214/streams/{stream_id}") or {}
                 stream_name = detail.get("name") or stream.get("name") or ""
                 stream_entries = detail.get("entries") or []
                 for entry in stream_entries:
@@ -646,7 +929,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            return _get(f"/api/incidents/{inc_id}/teams") or []
+            return self._get(f"/api/incidents/{inc_id}/teams") or []
         except Exception:
             return []
 
@@ -658,7 +941,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/tasks") or []
+            rows = self._get(f"/api/incidents/{inc_id}/tasks") or []
             for r in rows:
                 created = r.get("created_at") or ""
                 r.setdefault("task_date", _fmt_date(created))
@@ -672,7 +955,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/facilities") or []
+            rows = self._get(f"/api/incidents/{inc_id}/facilities") or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -704,7 +987,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get("/api/objectives", incident_id=inc_id) or []
+            rows = self._get("/api/objectives", incident_id=inc_id) or []
             return [
                 {
                     "id": r.get("_id") or r.get("id") or "",
@@ -731,7 +1014,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            return _get(f"/api/incidents/{inc_id}/resources") or []
+            return self._get(f"/api/incidents/{inc_id}/resources") or []
         except Exception:
             return []
 
@@ -755,7 +1038,7 @@ class FormDataContext:
         if not inc_id:
             return empty
         try:
-            agencies = _get(f"/api/incidents/{inc_id}/liaison/agencies") or []
+            agencies = self._get(f"/api/incidents/{inc_id}/liaison/agencies") or []
             agency_names = {
                 agency.get("int_id"): agency.get("name") or agency.get("agency") or ""
                 for agency in agencies
@@ -767,19 +1050,19 @@ class FormDataContext:
                 "liaison_agencies": [self._normalize_liaison_agency(row) for row in agencies],
                 "liaison_interactions": [
                     self._normalize_liaison_interaction(row, agency_names)
-                    for row in (_get(f"/api/incidents/{inc_id}/liaison/interactions") or [])
+                    for row in (self._get(f"/api/incidents/{inc_id}/liaison/interactions") or [])
                 ],
                 "liaison_feedback": [
                     self._normalize_liaison_feedback(row, agency_names)
-                    for row in (_get(f"/api/incidents/{inc_id}/liaison/feedback") or [])
+                    for row in (self._get(f"/api/incidents/{inc_id}/liaison/feedback") or [])
                 ],
                 "liaison_agency_requests": [
                     self._normalize_liaison_agency_request(row, agency_names)
-                    for row in (_get(f"/api/incidents/{inc_id}/liaison/agency-requests") or [])
+                    for row in (self._get(f"/api/incidents/{inc_id}/liaison/agency-requests") or [])
                 ],
                 "liaison_resource_offers": [
                     self._normalize_liaison_resource_offer(row, agency_names)
-                    for row in (_get(f"/api/incidents/{inc_id}/liaison/resource-offers") or [])
+                    for row in (self._get(f"/api/incidents/{inc_id}/liaison/resource-offers") or [])
                 ],
             }
 
@@ -790,7 +1073,7 @@ class FormDataContext:
             agreements: list[dict[str, Any]] = []
 
             for agency_id, agency_name in agency_names.items():
-                detail = _get(f"/api/incidents/{inc_id}/liaison/agencies/{agency_id}/detail") or {}
+                detail = self._get(f"/api/incidents/{inc_id}/liaison/agencies/{agency_id}/detail") or {}
                 for row in detail.get("contacts") or []:
                     contact = self._normalize_liaison_contact(row, agency_name)
                     contacts.append(contact)
@@ -1003,7 +1286,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            return _get(f"/api/incidents/{inc_id}/meetings") or []
+            return self._get(f"/api/incidents/{inc_id}/meetings") or []
         except Exception:
             return []
 
@@ -1011,7 +1294,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            snapshot = _get(f"/api/incidents/{inc_id}/snapshot", collections="hazards") or {}
+            snapshot = self._get(f"/api/incidents/{inc_id}/snapshot", collections="hazards") or {}
             rows = ((snapshot.get("collections") or {}).get("hazards")) or []
             return [
                 {
@@ -1041,7 +1324,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/safety/reports") or []
+            rows = self._get(f"/api/incidents/{inc_id}/safety/reports") or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1065,7 +1348,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/gis/features/by-type/hazard_zone") or []
+            rows = self._get(f"/api/incidents/{inc_id}/gis/features/by-type/hazard_zone") or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1125,7 +1408,7 @@ class FormDataContext:
         if not inc_id or op_number is None:
             return empty
         try:
-            row = _get(f"/api/incidents/{inc_id}/safety/orm/form", op=op_number) or {}
+            row = self._get(f"/api/incidents/{inc_id}/safety/orm/form", op=op_number) or {}
             if not row:
                 return empty
             return {
@@ -1148,7 +1431,7 @@ class FormDataContext:
         if not inc_id or op_number is None:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/safety/orm/hazards", op=op_number) or []
+            rows = self._get(f"/api/incidents/{inc_id}/safety/orm/hazards", op=op_number) or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1182,7 +1465,7 @@ class FormDataContext:
         if not inc_id or op_number is None:
             return empty
         try:
-            row = _get(f"/api/incidents/{inc_id}/safety/ics208", op=op_number) or {}
+            row = self._get(f"/api/incidents/{inc_id}/safety/ics208", op=op_number) or {}
             if not row:
                 return empty
             return {
@@ -1205,9 +1488,20 @@ class FormDataContext:
 
     def _build_weather(self, inc_id: str | None) -> dict[str, Any]:
         empty = {"conditions": "", "summary": "", "alerts": "", "current": {}, "forecast": {}}
-        if not inc_id:
+        # The weather manager is the desktop's own poller; a context reading
+        # through another fetcher (server-side jobs) has none to ask.
+        if not inc_id or self._fetch is not None:
             return empty
         try:
+            from PySide6.QtCore import QCoreApplication, QThread
+
+            # The manager owns a QTimer and is cached per incident, so creating
+            # it on a worker thread would leave it bound to a thread that is
+            # about to exit. Off the GUI thread, pass the section in instead
+            # (``caller_thread_sections``).
+            app = QCoreApplication.instance()
+            if app is not None and QThread.currentThread() is not app.thread():
+                return empty
             from modules.intel.weather.services.weather_manager import get_weather_manager
 
             return build_weather_form_payload(get_weather_manager(inc_id))
@@ -1218,7 +1512,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/safety/iwi") or []
+            rows = self._get(f"/api/incidents/{inc_id}/safety/iwi") or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1271,7 +1565,7 @@ class FormDataContext:
             params: dict[str, Any] = {}
             if op_number is not None:
                 params["op_period_id"] = op_number
-            work_assignments = _get(
+            work_assignments = self._get(
                 f"/api/incidents/{inc_id}/planning/work-assignments",
                 **params,
             ) or []
@@ -1320,7 +1614,7 @@ class FormDataContext:
 
     def _build_hazard_types(self) -> list[dict[str, Any]]:
         try:
-            rows = _get("/api/hazard-types") or []
+            rows = self._get("/api/hazard-types") or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1358,7 +1652,7 @@ class FormDataContext:
 
     def _build_safety_analysis_templates(self) -> list[dict[str, Any]]:
         try:
-            rows = _get("/api/master/safety-templates") or []
+            rows = self._get("/api/master/safety-templates") or []
             return [
                 {
                     "template_id": row.get("template_id") or "",
@@ -1414,7 +1708,7 @@ class FormDataContext:
         if not inc_id:
             return result
         try:
-            doc = _get(f"/api/incidents/{inc_id}/operations/debriefs/{debrief_id}") or {}
+            doc = self._get(f"/api/incidents/{inc_id}/operations/debriefs/{debrief_id}") or {}
         except Exception:
             doc = {}
         if not doc:
@@ -1469,7 +1763,7 @@ class FormDataContext:
 
     def _build_aircraft(self) -> list[dict[str, Any]]:
         try:
-            return _get("/api/master/aircraft") or []
+            return self._get("/api/master/aircraft") or []
         except Exception:
             return []
 
@@ -1479,7 +1773,7 @@ class FormDataContext:
 
     def _build_personnel(self) -> list[dict[str, Any]]:
         try:
-            return [self._normalize_person_row(r) for r in (_get("/api/master/personnel") or [])]
+            return [self._normalize_person_row(r) for r in (self._get("/api/master/personnel") or [])]
         except Exception:
             return []
 
@@ -1489,7 +1783,7 @@ class FormDataContext:
 
     def _build_master_vehicles(self) -> list[dict[str, Any]]:
         try:
-            return _get("/api/master/vehicles") or []
+            return self._get("/api/master/vehicles") or []
         except Exception:
             return []
 
@@ -1499,7 +1793,7 @@ class FormDataContext:
 
     def _build_equipment(self) -> list[dict[str, Any]]:
         try:
-            return _get("/api/master/equipment") or []
+            return self._get("/api/master/equipment") or []
         except Exception:
             return []
 
@@ -1572,14 +1866,14 @@ class FormDataContext:
 
     def _build_hospitals(self) -> list[dict[str, Any]]:
         try:
-            rows = _get("/api/master/hospitals") or []
+            rows = self._get("/api/master/hospitals") or []
             return [self._normalize_hospital_row(row) for row in rows]
         except Exception:
             return []
 
     def _build_ems_agencies(self) -> list[dict[str, Any]]:
         try:
-            rows = _get("/api/master/ems-agencies") or []
+            rows = self._get("/api/master/ems-agencies") or []
             return [self._normalize_ems_agency_row(row) for row in rows]
         except Exception:
             return []
@@ -1588,7 +1882,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/medical/ics206/aid-stations", op=op_number) or []
+            rows = self._get(f"/api/incidents/{inc_id}/medical/ics206/aid-stations", op=op_number) or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1612,7 +1906,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/medical/ics206/ambulance-services", op=op_number) or []
+            rows = self._get(f"/api/incidents/{inc_id}/medical/ics206/ambulance-services", op=op_number) or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1634,7 +1928,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/medical/ics206/hospitals", op=op_number) or []
+            rows = self._get(f"/api/incidents/{inc_id}/medical/ics206/hospitals", op=op_number) or []
             return [self._normalize_hospital_row(row) for row in rows]
         except Exception:
             return []
@@ -1643,7 +1937,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/medical/ics206/air-ambulance", op=op_number) or []
+            rows = self._get(f"/api/incidents/{inc_id}/medical/ics206/air-ambulance", op=op_number) or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1663,7 +1957,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/medical/ics206/comms", op=op_number) or []
+            rows = self._get(f"/api/incidents/{inc_id}/medical/ics206/comms", op=op_number) or []
             return [
                 {
                     "id": row.get("id") or "",
@@ -1684,7 +1978,7 @@ class FormDataContext:
         if not inc_id:
             return empty
         try:
-            row = _get(f"/api/incidents/{inc_id}/medical/ics206/procedures", op=op_number) or {}
+            row = self._get(f"/api/incidents/{inc_id}/medical/ics206/procedures", op=op_number) or {}
             if not row:
                 return empty
             return {
@@ -1703,7 +1997,7 @@ class FormDataContext:
         if not inc_id:
             return empty
         try:
-            row = _get(f"/api/incidents/{inc_id}/medical/ics206/signatures", op=op_number) or {}
+            row = self._get(f"/api/incidents/{inc_id}/medical/ics206/signatures", op=op_number) or {}
             if not row:
                 return empty
             return {
@@ -1723,7 +2017,7 @@ class FormDataContext:
 
     def _build_comms_resources(self) -> list[dict[str, Any]]:
         try:
-            return _get("/api/comms/channels") or []
+            return self._get("/api/comms/channels") or []
         except Exception:
             return []
 
@@ -1735,7 +2029,7 @@ class FormDataContext:
         if not inc_id:
             return []
         try:
-            rows = _get(f"/api/incidents/{inc_id}/comms-log") or []
+            rows = self._get(f"/api/incidents/{inc_id}/comms-log") or []
             return [
                 {
                     "id": r.get("id") or "",
@@ -1776,7 +2070,7 @@ class FormDataContext:
 
     def _build_resource_types(self) -> list[dict[str, Any]]:
         try:
-            return _get("/api/resource-types") or []
+            return self._get("/api/resource-types") or []
         except Exception:
             return []
 
@@ -4,8 +4,10 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from .form_set_registry import FormSetRegistry
 from .resolver import FormResolver
-from .context import FormDataContext
+from .context import FormDataContext, required_sections
+from .pdf_filler import render_cache
 from .pdf_filler.pdf_filler import PDFFiller
 
 
@@ -15,6 +17,7 @@ def generate(
     incident_id: str | None = None,
     form_set_id: str | None = None,
     extra_data: dict | None = None,
+    use_cache: bool = True,
 ) -> Path:
     """Fill *form_id* with incident data and write the result to *output_path*.
 
@@ -32,6 +35,10 @@ def generate(
     extra_data:
         Optional dict merged into the data context at the top level.  Use this
         to supply runtime values such as ``message`` fields for ICS 213.
+    use_cache:
+        Consult the render cache (``pdf_filler.render_cache.default_cache``)
+        first: when the template, mapping and resolved values match an
+        earlier fill, its PDF is copied instead of filled again.
 
     Returns
     -------
@@ -41,15 +48,26 @@ def generate(
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    resolver = FormResolver()
+    registry = FormSetRegistry()
+    resolver = FormResolver(registry)
     template_pdf, mapping_json = resolver.resolve(form_id, form_set_id)
 
-    ctx = FormDataContext().build(incident_id)
+    filler = PDFFiller(mapping_json)
+    definition = registry.get_form_definition(form_id)
+    form_row_groups = definition.row_groups if definition else None
+
+    # Only the sections the mapping reads are fetched, concurrently; anything
+    # reached some other way still builds on first access. extra_data goes in
+    # first so the sections it supplies are never fetched at all.
+    ctx = FormDataContext().lazy(incident_id)
     if extra_data:
         ctx.update(extra_data)
+    ctx.prefetch(required_sections(filler.mapping, form_row_groups))
 
-    filler = PDFFiller(mapping_json)
-    warnings = filler.fill(ctx, template_pdf, output_path, strict=False)
+    cache = render_cache.default_cache() if use_cache else None
+    warnings = filler.fill(
+        ctx, template_pdf, output_path, strict=False, form_row_groups=form_row_groups, cache=cache,
+    )
 
     if warnings:
         import logging
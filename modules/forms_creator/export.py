@@ -75,7 +75,21 @@ def render_html(template: Dict[str, Any], values: Dict[str, Any], out_path: Path
 
 # ----------------------------------------------------------------- main api
 
-def export_form(session: FormSession, context: Dict[str, Any], registry, out_path: Path) -> Path:
+def _render_cache_key(template: Dict[str, Any], renderer: str, values: Dict[str, Any]) -> str:
+    from .pdf_filler.render_cache import render_key
+
+    fingerprint = template.get("pdf_fingerprint")
+    if not fingerprint and template.get("pdf_source"):
+        pdf_path = Path(template.get("_profile_dir", ".")) / template["pdf_source"]
+        fingerprint = sha256_of_file(pdf_path) if pdf_path.exists() else ""
+    definition = {k: v for k, v in template.items() if not str(k).startswith("_")}
+    mapping_hash = "sha256:" + hashlib.sha256(
+        json.dumps(definition, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return render_key([fingerprint or ""], mapping_hash, {"renderer": renderer, "values": values})
+
+
+def export_form(session: FormSession, context: Dict[str, Any], registry, out_path: Path, cache=None) -> Path:
     """Export ``session`` deterministically using ``registry``.
 
     Parameters
@@ -91,6 +105,10 @@ def export_form(session: FormSession, context: Dict[str, Any], registry, out_pat
     out_path:
         Destination path for the exported file.  The function returns this path
         for convenience.
+    cache:
+        Optional ``pdf_filler.render_cache.RenderCache``.  It is consulted
+        with the template fingerprint, the template definition and the
+        resolved values before rendering, and fed the output after a miss.
     """
 
     template = registry.get(session.template_uid)
@@ -113,13 +131,21 @@ def export_form(session: FormSession, context: Dict[str, Any], registry, out_pat
         resolved.update(session.values)
 
     renderer = template.get("renderer", "pdf")
-    if renderer == "pdf":
-        return render_pdf(template, resolved, out_path)
-    if renderer == "print":
-        return render_print_document(template, resolved, out_path)
-    if renderer == "html":
-        return render_html(template, resolved, out_path)
-    raise ValueError(f"Unknown renderer: {renderer}")
+    renderers = {"pdf": render_pdf, "print": render_print_document, "html": render_html}
+    if renderer not in renderers:
+        raise ValueError(f"Unknown renderer: {renderer}")
+
+    key = _render_cache_key(template, renderer, resolved) if cache is not None else None
+    if key is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            out_path.write_bytes(hit.data)
+            return out_path
+
+    renderers[renderer](template, resolved, out_path)
+    if key is not None:
+        cache.put(key, out_path.read_bytes())
+    return out_path
 
 
 __all__ = [
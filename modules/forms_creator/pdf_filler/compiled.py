@@ -0,0 +1,381 @@
+"""Compile mapping ``source`` descriptors and row groups into closures.
+
+``PDFFiller`` used to interpret each ``source`` dict and split each dotted
+path for every field and every row. The functions here do that work once per
+mapping revision and return plain callables:
+
+- ``compile_path("incident.name")`` pre-splits the path and pre-parses
+  numeric segments; the returned getter walks dicts/lists exactly like
+  ``PDFFiller._lookup_path`` always has.
+- ``compile_source(descriptor)`` returns ``resolve(data)`` with the source's
+  ``key``/``first_of``/``join``/``literal``/``default`` branches, checkbox
+  values and transform already bound. Malformed descriptors compile to a
+  resolver that raises the same error ``_resolve_value`` raised, so the
+  filler still reports them per field.
+- ``compile_row_fields`` and ``compile_col_patterns`` turn row group field
+  definitions into range-checked name builders, so a 200-row continuation
+  table fills in a tight loop.
+
+``CompiledMapping`` bundles the per-field plan and the compiled row groups;
+it is stored on the cached mapping (see ``template_cache.ParsedMapping``).
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable
+
+Resolver = Callable[[Any], Any]
+
+_UNBOUNDED = 1 << 30
+
+
+# ---------------------------------------------------------------------------
+# Paths
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=8192)
+def compile_path(path: str) -> Resolver:
+    steps = tuple((segment, int(segment) if segment.isdigit() else None) for segment in path.split("."))
+
+    def lookup(data: Any) -> Any:
+        current = data
+        for segment, index in steps:
+            if isinstance(current, list):
+                if index is None or index >= len(current):
+                    return None
+                current = current[index]
+            elif isinstance(current, dict):
+                if segment not in current:
+                    return None
+                current = current[segment]
+            else:
+                return None
+        return current
+
+    return lookup
+
+
+# ---------------------------------------------------------------------------
+# Transforms and checkboxes
+# ---------------------------------------------------------------------------
+
+def _iso(text: str) -> str:
+    return text[:-1] + "+00:00" if text.endswith("Z") else text
+
+
+def _upper(value: Any) -> Any:
+    return str(value).upper()
+
+
+def _lower(value: Any) -> Any:
+    return str(value).lower()
+
+
+def _date_short(value: Any) -> Any:
+    text = str(value).strip()
+    if not text:
+        return ""
+    return datetime.fromisoformat(_iso(text)).strftime("%m/%d/%Y")
+
+
+def _time_short(value: Any) -> Any:
+    text = str(value).strip()
+    if not text:
+        return ""
+    try:
+        return datetime.fromisoformat(_iso(text)).strftime("%H%M")
+    except Exception:
+        digits = "".join(ch for ch in text if ch.isdigit())
+        if len(digits) == 3:
+            digits = "0" + digits
+        if len(digits) == 4:
+            return digits
+        return text
+
+
+def _datetime_short(value: Any) -> Any:
+    text = str(value).strip()
+    if not text:
+        return ""
+    return datetime.fromisoformat(_iso(text)).strftime("%m/%d/%Y %H:%M")
+
+
+TRANSFORMS: dict[str, Callable[[Any], Any]] = {
+    "upper": _upper,
+    "lower": _lower,
+    "date_short": _date_short,
+    "time_short": _time_short,
+    "datetime_short": _datetime_short,
+}
+
+
+def transform_fn(transform: str) -> Callable[[Any], Any]:
+    fn = TRANSFORMS.get(transform)
+    if fn is not None:
+        return fn
+
+    def unsupported(value: Any) -> Any:
+        raise ValueError(f"Unsupported transform '{transform}'")
+
+    return unsupported
+
+
+_FALSY_TEXT = frozenset({"", "0", "false", "no", "off", "none"})
+
+
+def checkbox_fn(source: dict[str, Any]) -> Callable[[Any], str]:
+    true_value = str(source.get("checked_value", "/Yes"))
+    false_value = str(source.get("unchecked_value", "/Off"))
+
+    def checkbox(value: Any) -> str:
+        if isinstance(value, str):
+            truthy = value.strip().lower() not in _FALSY_TEXT
+        else:
+            truthy = bool(value)
+        return true_value if truthy else false_value
+
+    return checkbox
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+def _raising(exc: Exception) -> Resolver:
+    def resolve(data: Any) -> Any:
+        raise exc
+
+    return resolve
+
+
+def _constant(value: Any) -> Resolver:
+    return lambda data: value
+
+
+def compile_source(source: Any) -> Resolver:
+    """Return ``resolve(data)`` equivalent to ``PDFFiller._resolve_value(data, source)``."""
+    if source is None:
+        return _constant(None)
+    if isinstance(source, str):
+        return compile_path(source)
+    if isinstance(source, (int, float, bool)):
+        return _constant(source)
+    if isinstance(source, list):
+        items = [compile_source(item) for item in source]
+        return lambda data: [item(data) for item in items]
+    if not isinstance(source, dict):
+        return _raising(TypeError(f"Unsupported source descriptor: {source!r}"))
+
+    if "literal" in source:
+        return _constant(source["literal"])
+
+    if "first_of" in source:
+        getters = [compile_path(str(path)) for path in source["first_of"]]
+        default = source.get("default")
+
+        def first_of(data: Any) -> Any:
+            for getter in getters:
+                value = getter(data)
+                if value not in (None, ""):
+                    return value
+            return default
+
+        return first_of
+
+    if "join" in source:
+        separator = str(source.get("separator", " "))
+        parts = [compile_source(item) for item in source.get("join", [])]
+        default = source.get("default")
+
+        def join(data: Any) -> Any:
+            joined = separator.join(
+                str(value) for value in (part(data) for part in parts) if value not in (None, "")
+            )
+            return joined if joined else default
+
+        return join
+
+    if "key" in source:
+        getter = compile_path(str(source["key"]))
+        default = source.get("default")
+        checkbox = checkbox_fn(source) if source.get("checkbox") else None
+        transform = source.get("transform")
+        apply = transform_fn(str(transform)) if transform else None
+
+        def key(data: Any) -> Any:
+            value = getter(data)
+            if value in (None, ""):
+                value = default
+            if value is None:
+                return None
+            if checkbox is not None:
+                return checkbox(value)
+            if apply is not None:
+                return apply(value)
+            return value
+
+        return key
+
+    if "default" in source:
+        return _constant(source["default"])
+
+    return _raising(ValueError(f"Unrecognized source mapping: {source!r}"))
+
+
+# ---------------------------------------------------------------------------
+# Row groups
+# ---------------------------------------------------------------------------
+
+def _name_builder(pattern: str, placeholder: re.Pattern[str] | None = None) -> Callable[[int], str]:
+    pieces = placeholder.split(pattern) if placeholder else pattern.split("{n}")
+    if len(pieces) == 1:
+        return lambda n: pattern
+    return lambda n: str(n).join(pieces)
+
+
+def _constant_name(name: str) -> Callable[[int], str]:
+    return lambda n: name
+
+
+def compile_row_fields(
+    fdefs: list[dict[str, Any]],
+    col_map: dict[str, dict],
+) -> list[tuple[int, int, Callable[[int], str], bool]]:
+    """``(first_row, last_row, name_of(n), is_timestamp)`` per text row field.
+
+    Mirrors ``PDFFiller._row_in_range``, ``_resolve_field_name`` and
+    ``_resolve_column``; definitions that can never produce a name are dropped.
+    """
+    plans = []
+    for fdef in fdefs:
+        explicit_row = fdef.get("row")
+        if explicit_row is not None:
+            first = last = int(explicit_row)
+        else:
+            from_row, to_row = fdef.get("from_row"), fdef.get("to_row")
+            first = int(from_row) if from_row is not None else -_UNBOUNDED
+            last = int(to_row) if to_row is not None else _UNBOUNDED
+        explicit = fdef.get("pdf_field")
+        if explicit:
+            name_of = _constant_name(str(explicit))
+        else:
+            pattern = fdef.get("pdf_field_pattern", "")
+            if not pattern:
+                continue
+            name_of = _name_builder(pattern)
+        col_id = fdef.get("column")
+        if col_id and col_map:
+            role = col_map.get(col_id, {}).get("role", "")
+        else:
+            role = fdef.get("role", "")
+        plans.append((first, last, name_of, role == "timestamp"))
+    return plans
+
+
+def emit_rows(
+    plans: list[tuple[int, int, Callable[[int], str], bool]],
+    rows: list[tuple[str, str]],
+    out: dict[str, Any],
+    suffix: str = "",
+) -> None:
+    """Write ``rows`` (``(timestamp, text)`` per 1-based row) through ``plans``."""
+    for n, (ts, txt) in enumerate(rows, start=1):
+        for first, last, name_of, is_timestamp in plans:
+            if first <= n <= last:
+                name = name_of(n)
+                if name:
+                    out[name + suffix] = ts if is_timestamp else txt
+
+
+_N_PLACEHOLDER = re.compile(r"\{n\}", re.IGNORECASE)
+
+
+class CompiledColPatterns:
+    """A mapper-driven ``col_patterns``/``row_fields`` row group, compiled."""
+
+    def __init__(self, rg: dict[str, Any]) -> None:
+        self.data_key: str = rg.get("data_key", rg.get("ref", ""))
+        self.label = rg.get("ref", self.data_key)
+        self.rows = compile_path(self.data_key) if self.data_key else None
+        rows_per_page: list[int] = rg.get("rows_per_page", [1])
+        self.max_rows: int = rows_per_page[0] if rows_per_page else 1
+        self.row_offset: int = rg.get("row_offset", 0)
+        checkboxes = set(rg.get("col_checkboxes", []))
+        self.columns = [
+            (_name_builder(pattern, _N_PLACEHOLDER), compile_path(col_id) if col_id else _constant(None), col_id in checkboxes)
+            for col_id, pattern in (rg.get("col_patterns") or {}).items()
+            if pattern
+        ]
+        self.row_fields: dict[int, list[tuple[str, Resolver, Callable[[Any], str] | None]]] = {}
+        for fdef in rg.get("row_fields", []):
+            field_name = str(fdef.get("pdf_field") or "")
+            if not field_name:
+                continue
+            source_key = str(fdef.get("source_key") or "")
+            self.row_fields.setdefault(int(fdef.get("row", 0)), []).append((
+                field_name,
+                compile_path(source_key) if source_key else _constant(None),
+                checkbox_fn(fdef) if fdef.get("checkbox") else None,
+            ))
+
+    def fill(self, data: Any, field_values: dict[str, Any], warnings: list[str]) -> list[str]:
+        rows = self.rows(data) if self.rows else []
+        if rows is None:
+            rows = []
+        if not isinstance(rows, list):
+            warnings.append(f"row_group '{self.label}' expected list data at '{self.data_key}'")
+            return warnings
+        for row_idx, row in enumerate(rows[self.row_offset:self.row_offset + self.max_rows]):
+            if not isinstance(row, dict):
+                warnings.append(f"row_group '{self.label}' skipped non-object row {row_idx + 1}")
+                continue
+            n = self.row_offset + row_idx + 1
+            for name_of, getter, is_checkbox in self.columns:
+                value = getter(row)
+                if is_checkbox:
+                    field_values[name_of(n)] = "X" if value else ""
+                else:
+                    field_values[name_of(n)] = "" if value is None else str(value)
+            for field_name, getter, checkbox in self.row_fields.get(n, ()):
+                value = getter(row)
+                if checkbox is not None:
+                    field_values[field_name] = checkbox(value)
+                else:
+                    field_values[field_name] = "" if value is None else str(value)
+        return warnings
+
+
+class CompiledMapping:
+    """Everything ``PDFFiller.fill`` needs from one mapping revision."""
+
+    def __init__(self, mapping: dict[str, Any]) -> None:
+        self.fields: list[tuple[str, Resolver, Any, str | None]] = []
+        for field in mapping.get("fields", []):
+            if not isinstance(field, dict):
+                self.fields.append(("", _constant(None), None, "Skipped invalid mapping entry that is not an object"))
+                continue
+            pdf_field = field.get("pdf_field") or field.get("field") or field.get("name")
+            if not pdf_field:
+                self.fields.append(("", _constant(None), None, "Skipped mapping entry missing a pdf_field"))
+                continue
+            self.fields.append((pdf_field, compile_source(field.get("source")), field.get("default"), None))
+        self._col_patterns: dict[int, CompiledColPatterns] = {}
+        self._row_fields: dict[tuple, list] = {}
+
+    def col_patterns(self, rg: dict[str, Any]) -> CompiledColPatterns:
+        compiled = self._col_patterns.get(id(rg))
+        if compiled is None:
+            compiled = self._col_patterns[id(rg)] = CompiledColPatterns(rg)
+        return compiled
+
+    def row_fields(self, fdefs: list[dict[str, Any]], col_map: dict[str, dict]) -> list:
+        # Keyed by the field list's identity (it lives in the cached mapping)
+        # and by the column roles, which come from the form catalog per fill.
+        key = (id(fdefs), tuple(sorted((cid, str(c.get("role", ""))) for cid, c in col_map.items())))
+        plans = self._row_fields.get(key)
+        if plans is None:
+            plans = self._row_fields[key] = compile_row_fields(fdefs, col_map)
+        return plans
@@ -2,16 +2,19 @@
 
 from __future__ import annotations
 
+import copy
 import io
 import json
 import textwrap
-from datetime import datetime
+import time
 from pathlib import Path
 from typing import Any
 
-from pypdf import PdfReader, PdfWriter
+from pypdf import PageObject, PdfReader, PdfWriter
 from pypdf.constants import FieldDictionaryAttributes
-from pypdf.generic import DictionaryObject, TextStringObject
+from pypdf.generic import ArrayObject, DictionaryObject, NameObject, StreamObject, TextStringObject
+
+from . import compiled, render_cache, template_cache
 
 
 _PATCH_APPLIED = False
@@ -40,10 +43,15 @@ class PDFFiller:
     """Fill PDF AcroForm templates from incident data using JSON mappings."""
 
     def __init__(self, mapping_path: str | Path) -> None:
-        """Load and validate a JSON mapping configuration."""
+        """Load and validate a JSON mapping configuration.
+
+        The decoded mapping comes from the process-wide template cache and is
+        shared with every other filler on the same file revision; treat
+        ``self.mapping`` as read-only.
+        """
         self.mapping_path = Path(mapping_path)
-        with self.mapping_path.open("r", encoding="utf-8") as handle:
-            self.mapping = json.load(handle)
+        self._parsed_mapping = template_cache.get_mapping(self.mapping_path)
+        self.mapping = self._parsed_mapping.data
         self.fields = self.mapping.get("fields", [])
         if not isinstance(self.fields, list):
             raise ValueError("Mapping config must contain a 'fields' list")
@@ -56,6 +64,8 @@ class PDFFiller:
         output_pdf: str | Path,
         strict: bool = False,
         form_row_groups: list[dict] | None = None,
+        cache: render_cache.RenderCache | None = None,
+        timings: dict[str, float] | None = None,
     ) -> list[str]:
         """Fill ``input_pdf`` with resolved values and write the result to ``output_pdf``.
 
@@ -67,31 +77,43 @@ class PDFFiller:
         definition supplies the data source and wrap behavior; the mapping supplies
         the field name patterns.  Mappings without a ``ref`` continue to work
         as before (all config inline).
+
+        With a ``cache`` (see ``render_cache``), the regular field values are
+        resolved first and, together with the row data the row groups read,
+        looked up by content; a hit writes the stored PDF and returns the
+        warnings of the fill that produced it.
+
+        ``timings``, when given, accumulates wall-clock seconds per phase:
+        ``resolve`` (regular fields and the cache key), ``clone`` (copying
+        the template), ``row_groups``, ``write`` (setting field values) and
+        ``serialize`` (writing the PDF, or copying a cache hit).
         """
+        lap_started = time.perf_counter()
+
+        def lap(phase: str) -> None:
+            nonlocal lap_started
+            if timings is not None:
+                now = time.perf_counter()
+                timings[phase] = timings.get(phase, 0.0) + now - lap_started
+                lap_started = now
+
         input_path = Path(input_pdf)
         output_path = Path(output_pdf)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        reader = PdfReader(str(input_path))
-        writer = PdfWriter()
-        writer.clone_document_from_reader(reader)
+        template = template_cache.get_template(input_path)
         warnings: list[str] = []
         field_values: dict[str, Any] = {}
-        available_fields = set((reader.get_fields() or {}).keys())
+        available_fields = template.field_names
 
         # --- Regular fields --------------------------------------------------
-        for field in self.fields:
-            if not isinstance(field, dict):
-                warnings.append("Skipped invalid mapping entry that is not an object")
-                continue
-
-            pdf_field = field.get("pdf_field") or field.get("field") or field.get("name")
-            if not pdf_field:
-                warnings.append("Skipped mapping entry missing a pdf_field")
+        for pdf_field, resolve, default_value, plan_warning in self._compiled().fields:
+            if plan_warning:
+                warnings.append(plan_warning)
                 continue
 
             try:
-                value = self._resolve_value(data, field.get("source"))
+                value = resolve(data)
             except Exception as exc:
                 message = f"Failed to resolve '{pdf_field}': {exc}"
                 if strict:
@@ -99,10 +121,8 @@ class PDFFiller:
                 warnings.append(message)
                 continue
 
-            if value in (None, ""):
-                default_value = field.get("default")
-                if default_value is not None:
-                    value = default_value
+            if value in (None, "") and default_value is not None:
+                value = default_value
 
             if value is None:
                 message = f"No value resolved for '{pdf_field}'"
@@ -119,6 +139,22 @@ class PDFFiller:
 
             field_values[pdf_field] = value
 
+        cache_key: str | None = None
+        if cache is not None:
+            cache_key = self._render_key(template, data, field_values, form_row_groups or [])
+            hit = cache.get(cache_key)
+            if hit is not None:
+                lap("resolve")
+                output_path.write_bytes(hit.data)
+                lap("serialize")
+                return hit.warnings
+        lap("resolve")
+
+        writer = PdfWriter()
+        with template.lock:
+            writer.clone_document_from_reader(template.reader)
+        lap("clone")
+
         # --- Row groups ------------------------------------------------------
         row_groups = self.mapping.get("row_groups", [])
         mapping_dir = self.mapping_path.parent
@@ -139,18 +175,109 @@ class PDFFiller:
                 template_path=input_path,
             )
             warnings.extend(rg_warnings)
+        lap("row_groups")
 
         # --- Write all fields in one pass (page 1 + continuation) -----------
         all_field_values = {**field_values, **continuation_field_values}
         if all_field_values:
             writer.set_need_appearances_writer(True)
-            writer.update_page_form_field_values(list(writer.pages), all_field_values, auto_regenerate=True)
+            self._update_field_values(writer, all_field_values)
+        lap("write")
 
-        with output_path.open("wb") as handle:
-            writer.write(handle)
+        if cache is None or cache_key is None:
+            with output_path.open("wb") as handle:
+                writer.write(handle)
+            lap("serialize")
+            return warnings
 
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        output_path.write_bytes(buffer.getvalue())
+        cache.put(cache_key, buffer.getvalue(), warnings)
+        lap("serialize")
         return warnings
 
+    def _render_key(
+        self,
+        template: template_cache.ParsedTemplate,
+        data: dict[str, Any],
+        field_values: dict[str, Any],
+        form_row_groups: list[dict],
+    ) -> str:
+        """The ``render_cache`` key of a fill: template and continuation
+        template fingerprints, the mapping hash, the catalog row groups, the
+        resolved regular field values and each row group's inputs."""
+        fingerprints = [template.fingerprint]
+        row_inputs: list[Any] = []
+        program = self._compiled()
+        for rg in self.mapping.get("row_groups", []):
+            if rg.get("col_patterns") or rg.get("row_fields"):
+                rows = program.col_patterns(rg).rows
+                row_inputs.append(rows(data) if rows else None)
+                continue
+            ref = rg.get("ref")
+            form_rg = next((r for r in form_row_groups if r.get("id") == ref), {}) if ref else {}
+            data_key = form_rg.get("data_key") or rg.get("data_key", "entries")
+            headers = {
+                name: self._lookup_path(data, source["key"])
+                for group in ("page1_header_fields", "continuation_header_fields")
+                for name, source in (rg.get(group) or {}).items()
+                if isinstance(source, dict) and source.get("key")
+            }
+            row_inputs.append({"rows": data.get(data_key), "headers": headers})
+            cont_rel = rg.get("continuation_template")
+            if cont_rel and rg.get("continuation_page") is None:
+                cont_path = self.mapping_path.parent / cont_rel
+                if cont_path.exists():
+                    fingerprints.append(template_cache.get_template(cont_path).fingerprint)
+        return render_cache.render_key(
+            fingerprints,
+            self._parsed_mapping.fingerprint,
+            {"fields": field_values, "form_row_groups": form_row_groups, "row_groups": row_inputs},
+        )
+
+    def _compiled(self) -> compiled.CompiledMapping:
+        """The mapping compiled into resolvers (see ``compiled``).
+
+        Built once per mapping revision and kept on the cached mapping, so
+        every filler and every fill of the same file reuses it.
+        """
+        parsed = self._parsed_mapping
+        if parsed.compiled is None:
+            parsed.compiled = compiled.CompiledMapping(self.mapping)
+        return parsed.compiled
+
+    @staticmethod
+    def _update_field_values(writer: PdfWriter, values: dict[str, Any]) -> None:
+        """Write ``values`` page by page, handing each page only its own fields.
+
+        ``update_page_form_field_values`` compares every widget on a page with
+        every value it is given, so one call with all values for a 200-row
+        ICS-214 spends most of the fill in that comparison. The widget names
+        on each page are collected first (with the same qualified-name and
+        ``/T`` match pypdf uses) and each page gets only the values it can use.
+        """
+        for page in writer.pages:
+            annots = page.get("/Annots")
+            if not annots:
+                continue
+            names: set[str] = set()
+            for annot_ref in annots:
+                annot = annot_ref.get_object()
+                if annot.get("/Subtype", "") != "/Widget":
+                    continue
+                if "/FT" in annot and "/T" in annot:
+                    parent = annot
+                else:
+                    parent = annot.get("/Parent", DictionaryObject()).get_object()
+                names.add(writer._get_qualified_field_name(parent=parent))
+                t_val = parent.get("/T")
+                if t_val is not None:
+                    names.add(str(t_val))
+            page_values = {name: value for name, value in values.items() if name in names}
+            if page_values:
+                writer.update_page_form_field_values(page, page_values, auto_regenerate=None)
+
     # ------------------------------------------------------------------
     # Row group helpers
     # ------------------------------------------------------------------
@@ -248,19 +375,10 @@ class PDFFiller:
                 page0_field_values[raw_field_name] = str(value)
 
         # --- Page 1 rows (into shared field_values dict) ---
+        program = self._compiled()
         page1_rows = display_rows[:p1_capacity]
-        fields_p1: list[dict[str, Any]] = rg.get("fields", [])
-        for row_idx_0, (ts, txt) in enumerate(page1_rows):
-            n = row_idx_0 + 1  # 1-based within page
-            for fdef in fields_p1:
-                if not self._row_in_range(n, fdef):
-                    continue
-                field_name = self._resolve_field_name(fdef, n)
-                if not field_name:
-                    continue
-                role, src_key = self._resolve_column(fdef, col_map)
-                value = ts if role == "timestamp" else txt
-                page0_field_values[field_name] = value
+        fields_p1 = program.row_fields(rg.get("fields", []), col_map)
+        compiled.emit_rows(fields_p1, page1_rows, page0_field_values)
 
         # --- Overflow rows need continuation pages ---
         overflow_rows = display_rows[p1_capacity:]
@@ -282,8 +400,8 @@ class PDFFiller:
             if template_path is None or not template_path.exists():
                 warnings.append("overflow_mode='repeat' requires template_path to be set")
                 return warnings
-            repeat_reader = PdfReader(str(template_path))
-            repeat_fields: list[dict[str, Any]] = rg.get("fields", [])
+            repeat_template = template_cache.get_template(template_path)
+            repeat_fields = program.row_fields(rg.get("fields", []), col_map)
             repeat_header_fields: dict[str, Any] = rg.get("continuation_header_fields", {})
             page_num = 2
             offset = 0
@@ -291,22 +409,16 @@ class PDFFiller:
                 block = overflow_rows[offset: offset + cont_capacity]
                 offset += cont_capacity
                 suffix = f"_p{page_num}"
-                self._append_cloned_continuation(repeat_reader, writer, suffix)
+                # The template's own pages are still unfilled in ``writer``
+                # (values are written after every row group), so copy them.
+                if not self._duplicate_writer_pages(writer, 0, repeat_template.page_count, suffix):
+                    self._append_cloned_continuation(repeat_template.data, writer, suffix)
                 for raw_field_name, source_desc in repeat_header_fields.items():
                     value = self._resolve_computed(source_desc, page_number=page_num,
                                                    total_pages=total_pages, data=data)
                     if value is not None:
                         cont_field_values[raw_field_name + suffix] = str(value)
-                for row_idx_0, (ts, txt) in enumerate(block):
-                    n = row_idx_0 + 1
-                    for fdef in repeat_fields:
-                        if not self._row_in_range(n, fdef):
-                            continue
-                        base_name = self._resolve_field_name(fdef, n)
-                        if not base_name:
-                            continue
-                        role, _ = self._resolve_column(fdef, col_map)
-                        cont_field_values[base_name + suffix] = ts if role == "timestamp" else txt
+                compiled.emit_rows(repeat_fields, block, cont_field_values, suffix)
                 page_num += 1
             return warnings
 
@@ -334,24 +446,24 @@ class PDFFiller:
                 warnings.append(f"Continuation template not found: {cont_template_path}")
                 return warnings
 
-        def _make_cont_reader() -> PdfReader | None:
-            if cont_page_idx is not None:
-                main_reader = PdfReader(str(template_path))
-                if cont_page_idx >= len(main_reader.pages):
-                    warnings.append(
-                        f"continuation_page {cont_page_idx + 1} out of range "
-                        f"(template has {len(main_reader.pages)} pages)"
-                    )
-                    return None
-                buf = io.BytesIO()
-                pw = PdfWriter()
-                pw.add_page(main_reader.pages[cont_page_idx])
-                pw.write(buf)
-                buf.seek(0)
-                return PdfReader(buf)
-            return PdfReader(str(cont_template_path))
-
-        cont_fields: list[dict[str, Any]] = rg.get("continuation_fields", [])
+        # The continuation reader comes from the template cache, parsed once
+        # per process rather than once per overflow page.
+        if cont_page_idx is not None:
+            cont_template = template_cache.get_template(template_path)
+            cont_reader = cont_template.single_page_reader(cont_page_idx)
+            cont_bytes = cont_template.single_page_bytes(cont_page_idx)
+            if cont_reader is None:
+                warnings.append(
+                    f"continuation_page {cont_page_idx + 1} out of range "
+                    f"(template has {cont_template.page_count} pages)"
+                )
+                return warnings
+        else:
+            cont_template = template_cache.get_template(cont_template_path)
+            cont_reader = cont_template.reader
+            cont_bytes = cont_template.data
+
+        cont_fields = program.row_fields(rg.get("continuation_fields", []), col_map)
         cont_header_fields: dict[str, Any] = rg.get("continuation_header_fields", {})
 
         # Process overflow in blocks of cont_capacity per continuation page
@@ -361,18 +473,18 @@ class PDFFiller:
             block = overflow_rows[offset: offset + cont_capacity]
             offset += cont_capacity
 
-            cont_reader = _make_cont_reader()
-            if cont_reader is None:
-                return warnings
-
             if page_num == 2:
                 # Append the continuation page as-is (first overflow page)
-                writer.append(cont_reader)
+                first_cont_page = len(writer.pages)
+                with cont_template.lock:
+                    writer.append(cont_reader)
+                cont_page_count = len(writer.pages) - first_cont_page
                 cont_suffix = ""
             else:
                 # Clone the continuation page, renaming fields with _p{page_num}
                 cont_suffix = f"_p{page_num}"
-                self._append_cloned_continuation(cont_reader, writer, cont_suffix)
+                if not self._duplicate_writer_pages(writer, first_cont_page, cont_page_count, cont_suffix):
+                    self._append_cloned_continuation(cont_bytes, writer, cont_suffix)
 
             # Fill header fields
             for raw_field_name, source_desc in cont_header_fields.items():
@@ -383,16 +495,7 @@ class PDFFiller:
                     cont_field_values[field_name] = str(value)
 
             # Fill activity rows
-            for row_idx_0, (ts, txt) in enumerate(block):
-                n = row_idx_0 + 1  # 1-based within this continuation page
-                for fdef in cont_fields:
-                    if not self._row_in_range(n, fdef):
-                        continue
-                    base_name = self._resolve_field_name(fdef, n)
-                    if not base_name:
-                        continue
-                    role, _ = self._resolve_column(fdef, col_map)
-                    cont_field_values[base_name + cont_suffix] = ts if role == "timestamp" else txt
+            compiled.emit_rows(cont_fields, block, cont_field_values, cont_suffix)
 
             page_num += 1
 
@@ -406,56 +509,7 @@ class PDFFiller:
         warnings: list[str],
     ) -> list[str]:
         """Fill fixed PDF rows from an array source."""
-        import re as _re
-
-        data_key: str = rg.get("data_key", rg.get("ref", ""))
-        col_patterns: dict[str, str] = rg.get("col_patterns", {})
-        row_fields: list[dict[str, Any]] = rg.get("row_fields", [])
-        col_checkboxes: set[str] = set(rg.get("col_checkboxes", []))
-        rows_per_page: list[int] = rg.get("rows_per_page", [1])
-        max_rows: int = rows_per_page[0] if rows_per_page else 1
-        row_offset: int = rg.get("row_offset", 0)
-
-        rows = self._lookup_path(data, data_key) if data_key else []
-        if rows is None:
-            rows = []
-        if not isinstance(rows, list):
-            warnings.append(f"row_group '{rg.get('ref', data_key)}' expected list data at '{data_key}'")
-            return warnings
-
-        def row_value(row: dict[str, Any], source_key: str) -> Any:
-            if not source_key:
-                return None
-            return self._lookup_path(row, source_key)
-
-        for row_idx, row in enumerate(rows[row_offset:row_offset + max_rows]):
-            if not isinstance(row, dict):
-                warnings.append(f"row_group '{rg.get('ref', data_key)}' skipped non-object row {row_idx + 1}")
-                continue
-            n = row_offset + row_idx + 1  # 1-based, accounting for offset
-            for col_id, pattern in col_patterns.items():
-                if not pattern:
-                    continue
-                field_name = _re.sub(r"\{n\}", str(n), pattern, flags=_re.IGNORECASE)
-                value = row_value(row, col_id)
-                if col_id in col_checkboxes:
-                    field_values[field_name] = "X" if value else ""
-                else:
-                    field_values[field_name] = "" if value is None else str(value)
-            for fdef in row_fields:
-                if int(fdef.get("row", 0)) != n:
-                    continue
-                field_name = str(fdef.get("pdf_field") or "")
-                if not field_name:
-                    continue
-                source_key = str(fdef.get("source_key") or "")
-                value = row_value(row, source_key)
-                if fdef.get("checkbox"):
-                    field_values[field_name] = self._checkbox_value(value, fdef)
-                else:
-                    field_values[field_name] = "" if value is None else str(value)
-
-        return warnings
+        return self._compiled().col_patterns(rg).fill(data, field_values, warnings)
 
     @staticmethod
     def _resolve_column(fdef: dict[str, Any], col_map: dict[str, dict]) -> tuple[str, str]:
@@ -540,20 +594,28 @@ class PDFFiller:
 
     @staticmethod
     def _append_cloned_continuation(
-        reader: PdfReader,
+        source: PdfReader | bytes,
         writer: PdfWriter,
         suffix: str,
     ) -> None:
-        """Append reader's pages to writer, renaming widget annotation /T values
-        by appending ``suffix`` to avoid AcroForm field name collisions."""
-        # Write reader to an in-memory buffer, then reload so we have an
-        # independent copy whose annotations we can mutate safely.
-        buf = io.BytesIO()
-        tmp_writer = PdfWriter()
-        tmp_writer.clone_document_from_reader(reader)
-        tmp_writer.write(buf)
-        buf.seek(0)
-        cloned_reader = PdfReader(buf)
+        """Append the source PDF's pages to writer, renaming widget annotation
+        /T values by appending ``suffix`` to avoid AcroForm field name collisions.
+
+        ``source`` is either a reader or the raw bytes of a PDF; bytes are
+        parsed straight into an independent copy, which skips re-serializing
+        the reader for every appended page.
+        """
+        if isinstance(source, (bytes, bytearray)):
+            cloned_reader = PdfReader(io.BytesIO(source))
+        else:
+            # Write reader to an in-memory buffer, then reload so we have an
+            # independent copy whose annotations we can mutate safely.
+            buf = io.BytesIO()
+            tmp_writer = PdfWriter()
+            tmp_writer.clone_document_from_reader(source)
+            tmp_writer.write(buf)
+            buf.seek(0)
+            cloned_reader = PdfReader(buf)
 
         # Rename every widget annotation /T on every page
         for page in cloned_reader.pages:
@@ -568,10 +630,71 @@ class PDFFiller:
                 if t_val is None:
                     continue
                 new_name = str(t_val) + suffix
-                annot["/T"] = TextStringObject(new_name)
+                annot[NameObject("/T")] = TextStringObject(new_name)
 
         writer.append(cloned_reader)
 
+    @staticmethod
+    def _duplicate_writer_pages(writer: PdfWriter, first: int, count: int, suffix: str) -> bool:
+        """Append copies of ``writer.pages[first:first + count]`` with every
+        widget /T suffixed, reusing the pages' content and resources.
+
+        Much cheaper than ``_append_cloned_continuation`` for the third and
+        later continuation pages: nothing is reparsed or merged, only page,
+        annotation and appearance-stream dictionaries are copied. Widgets get
+        their own ``/AP /N`` stream, since pypdf overwrites that object in
+        place when it regenerates a filled field's appearance.
+
+        Returns False without touching ``writer`` when the pages hold
+        hierarchical fields (widgets with ``/Parent``) or the document has no
+        AcroForm; the caller then falls back to ``_append_cloned_continuation``.
+        """
+        acro_form = writer._root_object.get("/AcroForm")
+        if acro_form is None or "/Fields" not in acro_form.get_object():
+            return False
+        sources = list(writer.pages[first:first + count])
+        if len(sources) != count:
+            return False
+        for page in sources:
+            for annot_ref in page.get("/Annots") or []:
+                annot = annot_ref.get_object()
+                if annot.get("/Subtype", "") == "/Widget" and ("/Parent" in annot or "/T" not in annot):
+                    return False
+
+        fields = acro_form.get_object()["/Fields"]
+        for source in sources:
+            # ``add_page`` returns a page already in this writer unchanged, so
+            # hand it a fresh dictionary that shares the content and resources.
+            blank = PageObject(writer)
+            blank.update({key: value for key, value in source.items() if key not in ("/Annots", "/Parent")})
+            page = writer.add_page(blank)
+            annots = source.get("/Annots")
+            if not annots:
+                continue
+            new_annots = ArrayObject()
+            for annot_ref in annots:
+                annot = annot_ref.get_object()
+                dup = DictionaryObject({key: value for key, value in annot.items() if key != "/AP"})
+                dup[NameObject("/P")] = page.indirect_reference
+                appearance = annot.get("/AP")
+                if appearance is not None:
+                    dup_ap = DictionaryObject(appearance.get_object())
+                    normal = dup_ap.get("/N")
+                    if normal is not None and isinstance(normal.get_object(), StreamObject):
+                        stream = copy.copy(normal.get_object())
+                        stream.indirect_reference = None
+                        dup_ap[NameObject("/N")] = writer._add_object(stream)
+                    dup[NameObject("/AP")] = dup_ap
+                is_widget = annot.get("/Subtype", "") == "/Widget"
+                if is_widget:
+                    dup[NameObject("/T")] = TextStringObject(str(annot["/T"]) + suffix)
+                dup_ref = writer._add_object(dup)
+                new_annots.append(dup_ref)
+                if is_widget:
+                    fields.append(dup_ref)
+            page[NameObject("/Annots")] = new_annots
+        return True
+
     # ------------------------------------------------------------------
     # Preview / introspection
     # ------------------------------------------------------------------
@@ -601,9 +724,10 @@ class PDFFiller:
     def inspect_pdf_fields(pdf_path: str | Path) -> list[dict[str, Any]]:
         """Return metadata for all fillable fields discovered in a PDF template."""
         _apply_pypdf_patch()
-        reader = PdfReader(str(pdf_path))
-        fields = reader.get_fields() or {}
-        page_numbers = PDFFiller._field_page_numbers(reader)
+        template = template_cache.get_template(pdf_path)
+        with template.lock:
+            fields = template.reader.get_fields() or {}
+        page_numbers = template.page_numbers
         results: list[dict[str, Any]] = []
 
         for name, field in fields.items():
@@ -651,56 +775,7 @@ class PDFFiller:
 
     def _resolve_value(self, data: dict[str, Any], source: Any) -> Any:
         """Resolve a mapping source descriptor against the supplied incident data."""
-        if source is None:
-            return None
-        if isinstance(source, str):
-            return self._lookup_path(data, source)
-        if isinstance(source, (int, float, bool)):
-            return source
-        if isinstance(source, list):
-            return [self._resolve_value(data, item) for item in source]
-        if not isinstance(source, dict):
-            raise TypeError(f"Unsupported source descriptor: {source!r}")
-
-        if "literal" in source:
-            return source["literal"]
-
-        if "first_of" in source:
-            for path in source["first_of"]:
-                value = self._lookup_path(data, str(path))
-                if value not in (None, ""):
-                    return value
-            return source.get("default")
-
-        if "join" in source:
-            separator = str(source.get("separator", " "))
-            parts = []
-            for item in source.get("join", []):
-                resolved = self._resolve_value(data, item)
-                if resolved not in (None, ""):
-                    parts.append(str(resolved))
-            joined = separator.join(parts)
-            if joined:
-                return joined
-            return source.get("default")
-
-        if "key" in source:
-            value = self._lookup_path(data, str(source["key"]))
-            if value in (None, ""):
-                value = source.get("default")
-            if value is None:
-                return None
-            if source.get("checkbox"):
-                return self._checkbox_value(value, source)
-            transform = source.get("transform")
-            if transform:
-                value = self._apply_transform(value, str(transform))
-            return value
-
-        if "default" in source:
-            return source["default"]
-
-        raise ValueError(f"Unrecognized source mapping: {source!r}")
+        return compiled.compile_source(source)(data)
 
     @staticmethod
     def _source_to_text(source: Any) -> str:
@@ -715,79 +790,17 @@ class PDFFiller:
 
     @staticmethod
     def _lookup_path(data: Any, path: str) -> Any:
-        current = data
-        for segment in path.split("."):
-            if isinstance(current, list):
-                if not segment.isdigit():
-                    return None
-                index = int(segment)
-                if index >= len(current):
-                    return None
-                current = current[index]
-                continue
-            if isinstance(current, dict):
-                if segment not in current:
-                    return None
-                current = current[segment]
-                continue
-            return None
-        return current
+        return compiled.compile_path(path)(data)
 
     @staticmethod
     def _apply_transform(value: Any, transform: str) -> Any:
         if value is None:
             return None
-        if transform == "upper":
-            return str(value).upper()
-        if transform == "lower":
-            return str(value).lower()
-
-        if transform == "date_short":
-            text = str(value).strip()
-            if not text:
-                return ""
-            if text.endswith("Z"):
-                text = text[:-1] + "+00:00"
-            parsed = datetime.fromisoformat(text)
-            return parsed.strftime("%m/%d/%Y")
-        if transform == "time_short":
-            text = str(value).strip()
-            if not text:
-                return ""
-            iso = text
-            if iso.endswith("Z"):
-                iso = iso[:-1] + "+00:00"
-            try:
-                dt = datetime.fromisoformat(iso)
-                return dt.strftime("%H%M")
-            except Exception:
-                digits = ''.join(ch for ch in text if ch.isdigit())
-                if len(digits) == 3:
-                    digits = "0" + digits
-                if len(digits) == 4:
-                    return digits
-                return text
-        if transform == "datetime_short":
-            text = str(value).strip()
-            if not text:
-                return ""
-            if text.endswith("Z"):
-                text = text[:-1] + "+00:00"
-            dt = datetime.fromisoformat(text)
-            return dt.strftime("%m/%d/%Y %H:%M")
-        raise ValueError(f"Unsupported transform '{transform}'")
-
+        return compiled.transform_fn(transform)(value)
 
     @staticmethod
     def _checkbox_value(value: Any, source: dict[str, Any]) -> str:
-        true_value = str(source.get("checked_value", "/Yes"))
-        false_value = str(source.get("unchecked_value", "/Off"))
-        if isinstance(value, str):
-            normalized = value.strip().lower()
-            truthy = normalized not in {"", "0", "false", "no", "off", "none"}
-        else:
-            truthy = bool(value)
-        return true_value if truthy else false_value
+        return compiled.checkbox_fn(source)(value)
 
     @staticmethod
     def _field_page_numbers(reader: PdfReader) -> dict[str, int]:
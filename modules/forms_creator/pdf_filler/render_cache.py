@@ -0,0 +1,226 @@
+"""Content-addressed cache of generated form PDFs.
+
+Printing the same ICS-205 twice, or re-exporting an IAP where only one form
+changed, used to fill and serialize every PDF again. A filled PDF is fully
+determined by three things, and entries here are keyed by a SHA-256 over all
+of them:
+
+- the template fingerprint (``ParsedTemplate.fingerprint``, plus those of any
+  continuation templates a row group appends);
+- the mapping hash (``ParsedMapping.fingerprint``, plus the catalog row group
+  definitions passed to the fill);
+- a hash of the resolved inputs: every regular field value after
+  resolution, defaults and transforms, and the row data and header values
+  each row group reads.
+
+``render_key`` builds the key; ``PDFFiller.fill(cache=...)`` consults the
+cache before touching the template and stores the serialized PDF (with the
+fill's warnings) after a miss. Because the key covers the resolved values
+rather than the whole incident snapshot, an unrelated edit (a new log entry
+when printing a 202) still hits.
+
+``DiskRenderCache`` keeps one ``<key>.pdf`` and a ``<key>.json`` sidecar per
+entry and evicts least-recently-used entries (by file mtime, refreshed on
+every hit) once the directory holds more than ``max_bytes``. The process-wide
+instance from ``default_cache()`` lives in ``data/cache/forms``; set
+``SARAPP_FORM_RENDER_CACHE_DIR`` to move it or ``SARAPP_FORM_RENDER_CACHE_MB``
+to resize it (``0`` disables it).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Protocol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_DIR_ENV_VAR = "SARAPP_FORM_RENDER_CACHE_DIR"
+_SIZE_ENV_VAR = "SARAPP_FORM_RENDER_CACHE_MB"
+_DEFAULT_DIR = Path("data/cache/forms")
+
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def render_key(template_fingerprints: Iterable[str], mapping_fingerprint: str, inputs: Any) -> str:
+    """SHA-256 hex key over the template fingerprints, the mapping hash and
+    the resolved ``inputs`` (any JSON-serializable structure)."""
+    h = hashlib.sha256()
+    for fingerprint in template_fingerprints:
+        h.update(b"T")
+        h.update(str(fingerprint).encode("utf-8"))
+    h.update(b"M")
+    h.update(str(mapping_fingerprint).encode("utf-8"))
+    h.update(b"V")
+    h.update(hashlib.sha256(_canonical(inputs)).digest())
+    return h.hexdigest()
+
+
+@dataclass
+class CachedRender:
+    data: bytes
+    warnings: list[str] = field(default_factory=list)
+
+
+class RenderCache(Protocol):
+    """Protocol describing a render cache backend."""
+
+    def get(self, key: str) -> CachedRender | None:
+        """The entry stored under ``key``, or ``None`` on a miss."""
+        ...
+
+    def put(self, key: str, data: bytes, warnings: list[str] | None = None) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class DiskRenderCache:
+    """Size-bounded LRU render cache in a directory."""
+
+    def __init__(self, directory: str | Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: int | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Shipped to batch pool workers; each process keeps its own counters.
+        return {"directory": self.directory, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["directory"], state["max_bytes"])
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.pdf", self.directory / f"{key}.json"
+
+    def get(self, key: str) -> CachedRender | None:
+        pdf_path, meta_path = self._paths(key)
+        try:
+            data = pdf_path.read_bytes()
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            os.utime(pdf_path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if meta.get("size") != len(data):
+            # A torn write from another process; treat as a miss.
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedRender(data=data, warnings=list(meta.get("warnings") or []))
+
+    def put(self, key: str, data: bytes, warnings: list[str] | None = None) -> None:
+        if len(data) > self.max_bytes:
+            return
+        pdf_path, meta_path = self._paths(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            existing = pdf_path.stat().st_size if pdf_path.exists() else 0
+            # Write under unique names and rename, so readers never see a
+            # partial file and concurrent writers of the same key are harmless.
+            tmp = uuid.uuid4().hex
+            tmp_pdf = self.directory / f".{tmp}.pdf"
+            tmp_meta = self.directory / f".{tmp}.json"
+            tmp_pdf.write_bytes(data)
+            tmp_meta.write_text(json.dumps({"size": len(data), "warnings": list(warnings or [])}), encoding="utf-8")
+            os.replace(tmp_meta, meta_path)
+            os.replace(tmp_pdf, pdf_path)
+        except OSError as exc:
+            logger.debug("Render cache write failed for %s: %s", key, exc)
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - existing
+            over = self._current_size() > self.max_bytes
+        if over:
+            self.evict()
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _path, size, _mtime in self._entries())
+        return self._size
+
+    def _entries(self) -> list[tuple[Path, int, float]]:
+        entries = []
+        try:
+            for path in self.directory.glob("*.pdf"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        except OSError:
+            pass
+        return entries
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits ``max_bytes``."""
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _path, size, _mtime in entries)
+            for path, size, _mtime in entries:
+                if total <= self.max_bytes:
+                    break
+                for victim in (path, path.with_suffix(".json")):
+                    try:
+                        victim.unlink()
+                    except OSError:
+                        pass
+                total -= size
+            self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for pattern in ("*.pdf", "*.json"):
+                for path in self.directory.glob(pattern):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries()),
+                "bytes": self._current_size(),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_default: DiskRenderCache | None = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> DiskRenderCache | None:
+    """The process-wide disk cache, or ``None`` when disabled by environment."""
+    global _default
+    try:
+        max_mb = float(os.environ.get(_SIZE_ENV_VAR, DEFAULT_MAX_BYTES / (1024 * 1024)))
+    except ValueError:
+        max_mb = DEFAULT_MAX_BYTES / (1024 * 1024)
+    if max_mb <= 0:
+        return None
+    directory = Path(os.environ.get(_DIR_ENV_VAR) or _DEFAULT_DIR)
+    max_bytes = int(max_mb * 1024 * 1024)
+    with _default_lock:
+        if _default is None or _default.directory != directory or _default.max_bytes != max_bytes:
+            _default = DiskRenderCache(directory, max_bytes)
+        return _default
@@ -0,0 +1,208 @@
+"""Process-wide cache of parsed PDF templates and mapping files.
+
+``PDFFiller.fill`` used to open the template with ``PdfReader``, rediscover
+its fields and reopen continuation templates on every call; ``PDFFiller``
+also re-read its JSON mapping on construction. For a stack of 60 ICS-204s
+that is 60 parses of the same file. Entries here are parsed once and shared:
+
+- ``get_template(path)`` returns a ``ParsedTemplate``: the ``PdfReader`` (so
+  pypdf's resolved-object cache is reused by every clone), the field name
+  set, the ``_field_page_numbers`` index, the page count and the raw bytes
+  (continuation cloning parses an independent copy from them). Single pages
+  extracted for ``continuation_page`` row groups are cached on the entry.
+- ``get_mapping(path)`` returns a ``ParsedMapping``: the decoded JSON, a
+  SHA-256 of the file bytes (the mapping half of a ``render_cache`` key) and
+  a slot for the compiled resolver program built from it.
+
+Lookups are keyed by resolved path, ``st_mtime_ns`` and size, so editing a
+template or mapping in the mapper invalidates it on the next fill without
+hashing the file. On a miss the file is fingerprinted with
+``export.sha256_of_file`` and identical content already parsed under another
+path (a form set that copies its fallback's template) shares the parse.
+Both caches are LRU-bounded.
+
+A ``PdfReader`` is not safe for concurrent reads, so callers that clone or
+append from ``ParsedTemplate.reader`` hold ``ParsedTemplate.lock``. Cached
+objects are shared: treat them as read-only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Generic, TypeVar
+
+from pypdf import PdfReader, PdfWriter
+
+_MAX_TEMPLATES = 32
+_MAX_MAPPINGS = 128
+
+T = TypeVar("T")
+
+
+def _file_key(path: Path) -> tuple[str, int, int]:
+    resolved = path.resolve()
+    stat = resolved.stat()
+    return str(resolved), stat.st_mtime_ns, stat.st_size
+
+
+def _fingerprint(path: Path) -> str:
+    from modules.forms_creator.export import sha256_of_file
+
+    return sha256_of_file(path)
+
+
+@dataclass
+class ParsedTemplate:
+    path: Path
+    fingerprint: str
+    reader: PdfReader
+    field_names: frozenset[str]
+    page_numbers: dict[str, int]
+    page_count: int
+    data: bytes = field(default=b"", repr=False)
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    _single_pages: dict[int, tuple[bytes, PdfReader]] = field(default_factory=dict, repr=False)
+
+    def _single_page(self, page_index: int) -> tuple[bytes, PdfReader] | None:
+        if not 0 <= page_index < self.page_count:
+            return None
+        with self.lock:
+            entry = self._single_pages.get(page_index)
+            if entry is None:
+                buf = io.BytesIO()
+                writer = PdfWriter()
+                writer.add_page(self.reader.pages[page_index])
+                writer.write(buf)
+                data = buf.getvalue()
+                entry = self._single_pages[page_index] = (data, PdfReader(io.BytesIO(data)))
+            return entry
+
+    def single_page_reader(self, page_index: int) -> PdfReader | None:
+        """A reader holding only page ``page_index`` (0-based), built once."""
+        entry = self._single_page(page_index)
+        return entry[1] if entry else None
+
+    def single_page_bytes(self, page_index: int) -> bytes | None:
+        """The serialized single-page PDF behind ``single_page_reader``."""
+        entry = self._single_page(page_index)
+        return entry[0] if entry else None
+
+
+@dataclass
+class ParsedMapping:
+    path: Path
+    data: dict[str, Any]
+    fingerprint: str = ""
+    # Built lazily by PDFFiller from ``data``; shared by every filler that
+    # uses this mapping revision.
+    compiled: Any = None
+
+
+class _LRU(Generic[T]):
+    """Keyed LRU of parsed entries with a secondary content-fingerprint index."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, int, int], T] = OrderedDict()
+        self._by_fingerprint: dict[str, T] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, load: Callable[[Path, str], T], fingerprint_of: Callable[[T], str] | None) -> T:
+        key = _file_key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        fingerprint = _fingerprint(path) if fingerprint_of else ""
+        with self._lock:
+            entry = self._by_fingerprint.get(fingerprint) if fingerprint else None
+        if entry is None:
+            entry = load(path, fingerprint)
+            self.misses += 1
+        else:
+            self.hits += 1
+        with self._lock:
+            # Another thread may have loaded the same key meanwhile; keep one.
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            if fingerprint:
+                self._by_fingerprint[fingerprint] = entry
+            while len(self._entries) > self.max_entries:
+                _old_key, evicted = self._entries.popitem(last=False)
+                if fingerprint_of and not any(e is evicted for e in self._entries.values()):
+                    self._by_fingerprint.pop(fingerprint_of(evicted), None)
+            return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_fingerprint.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _load_template(path: Path, fingerprint: str) -> ParsedTemplate:
+    # Read the bytes up front so the reader never holds the file open and a
+    # later edit of the file cannot change what this entry parses.
+    data = path.read_bytes()
+    reader = PdfReader(io.BytesIO(data))
+    from .pdf_filler import PDFFiller
+
+    return ParsedTemplate(
+        path=path,
+        fingerprint=fingerprint,
+        reader=reader,
+        field_names=frozenset((reader.get_fields() or {}).keys()),
+        page_numbers=PDFFiller._field_page_numbers(reader),
+        page_count=len(reader.pages),
+        data=data,
+    )
+
+
+def _load_mapping(path: Path, _fingerprint: str) -> ParsedMapping:
+    raw = path.read_bytes()
+    return ParsedMapping(
+        path=path,
+        data=json.loads(raw.decode("utf-8")),
+        fingerprint="sha256:" + hashlib.sha256(raw).hexdigest(),
+    )
+
+
+_templates: _LRU[ParsedTemplate] = _LRU(_MAX_TEMPLATES)
+_mappings: _LRU[ParsedMapping] = _LRU(_MAX_MAPPINGS)
+
+
+def get_template(path: str | Path) -> ParsedTemplate:
+    return _templates.get(Path(path), _load_template, lambda entry: entry.fingerprint)
+
+
+def get_mapping(path: str | Path) -> ParsedMapping:
+    return _mappings.get(Path(path), _load_mapping, None)
+
+
+def stats() -> dict[str, int]:
+    return {
+        "templates": len(_templates),
+        "template_hits": _templates.hits,
+        "template_misses": _templates.misses,
+        "mappings": len(_mappings),
+        "mapping_hits": _mappings.hits,
+        "mapping_misses": _mappings.misses,
+    }
+
+
+def clear() -> None:
+    _templates.clear()
+    _mappings.clear()
@@ -1,11 +1,87 @@
-"""PDF export utilities for the form creator module."""
+"""PDF export utilities for the form creator module.
+
+Page backgrounds are decoded once into a process-wide, byte-bounded
+``QImage`` cache (keyed by path, mtime and size), and each template's fields
+are compiled once into per-page draw plans with their fonts and alignment
+flags resolved, so repeated exports of one template only paint. Both caches
+are thread safe; ``QImage``, ``QPdfWriter`` and ``QPainter`` on a paint
+device other than a widget are all safe off the GUI thread.
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Any
 
+_BACKGROUND_CACHE_MAX_BYTES = 256 * 1024 * 1024
+_MAX_PLANS = 64
+
+_TEXT_TYPES = {"text", "multiline", "date", "time", "dropdown"}
+_PLACEHOLDERS = {"signature": "Signature", "image": "Image", "table": "Table rows"}
+
+
+class _BackgroundCache:
+    """LRU of decoded page backgrounds bounded by total image bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._images: OrderedDict[tuple[str, int, int], Any] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, load: Callable[[str], Any]) -> Any:
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return image
+        image = load(str(path))
+        if image.isNull():
+            return image
+        with self._lock:
+            self.misses += 1
+            if key not in self._images:
+                self._images[key] = image
+                self._bytes += image.sizeInBytes()
+            while self._bytes > self.max_bytes and len(self._images) > 1:
+                _key, evicted = self._images.popitem(last=False)
+                self._bytes -= evicted.sizeInBytes()
+            return self._images.get(key, image)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+
+_backgrounds = _BackgroundCache(_BACKGROUND_CACHE_MAX_BYTES)
+
+
+@dataclass(frozen=True)
+class _FieldPlan:
+    """One field with everything that does not depend on the value resolved."""
+
+    field_id: Any
+    kind: str  # "text", "checkbox", "radio" or "placeholder"
+    rect: Any
+    default_value: Any
+    font: Any = None
+    flags: Any = None
+    label: str = ""
+
 
 class PDFExporter:
     """Render form instances to PDF using QPainter."""
@@ -13,6 +89,9 @@ class PDFExporter:
     def __init__(self, *, base_data_dir: Path | str = Path("data")) -> None:
         self.base_data_dir = Path(base_data_dir)
         self._qt = None
+        self._plans: OrderedDict[str, dict[int, list[_FieldPlan]]] = OrderedDict()
+        self._fonts: dict[tuple[str, int], Any] = {}
+        self._plan_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     def export_instance(self, template: dict[str, Any], values: dict[int, Any], out_path: Path) -> Path:
@@ -26,14 +105,12 @@ class PDFExporter:
         writer = qt.QPdfWriter(str(out_path))
         writer.setResolution(300)
 
+        plan = self._plan_for(template)
         painter = qt.QPainter(writer)
         try:
             for index in range(template.get("page_count", 1)):
                 page_number = index + 1
-                background = self._page_background(template, page_number)
-                image = qt.QImage(str(background))
-                if image.isNull():
-                    raise FileNotFoundError(f"Background image missing: {background}")
+                image = self._load_background(template, page_number)
 
                 if index == 0:
                     page_size = qt.QPageSize(qt.QSizeF(image.width(), image.height()), qt.QPageSize.Unit.Point)
@@ -45,12 +122,23 @@ class PDFExporter:
                     writer.newPage()
 
                 painter.drawImage(qt.QRectF(0, 0, image.width(), image.height()), image)
-                self._paint_fields(painter, template.get("fields", []), values, page_number)
+                self._paint_plan(painter, plan.get(page_number, ()), values)
         finally:
             painter.end()
 
         return out_path
 
+    def _load_background(self, template: dict[str, Any], page_number: int):
+        qt = self._require_qt()
+        background = self._page_background(template, page_number)
+        try:
+            image = _backgrounds.get(background, qt.QImage)
+        except OSError:
+            image = None
+        if image is None or image.isNull():
+            raise FileNotFoundError(f"Background image missing: {background}")
+        return image
+
     # ------------------------------------------------------------------
     def _page_background(self, template: dict[str, Any], page_number: int) -> Path:
         base = Path(template.get("background_path", ""))
@@ -59,50 +147,63 @@ class PDFExporter:
         file_name = f"background_page_{page_number:03d}.png"
         return base / file_name
 
-    def _paint_fields(
-        self,
-        painter,
-        fields: list[dict[str, Any]],
-        values: dict[int, Any],
-        page_number: int,
-    ) -> None:
+    def _plan_for(self, template: dict[str, Any]) -> dict[int, list[_FieldPlan]]:
+        """Per-page draw plans for ``template``'s fields, compiled once per
+        distinct field list."""
+
+        fields = template.get("fields", [])
+        key = hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        with self._plan_lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+            plan = self._compile_fields(fields)
+            self._plans[key] = plan
+            while len(self._plans) > _MAX_PLANS:
+                self._plans.popitem(last=False)
+            return plan
+
+    def _compile_fields(self, fields: list[dict[str, Any]]) -> dict[int, list[_FieldPlan]]:
         qt = self._require_qt()
+        plan: dict[int, list[_FieldPlan]] = {}
         for field in fields:
-            if int(field.get("page", 1)) != page_number:
-                continue
             rect = qt.QRectF(
                 float(field.get("x", 0)),
                 float(field.get("y", 0)),
                 float(field.get("width", 0)),
                 float(field.get("height", 0)),
             )
-            value = values.get(field.get("id"))
-            if value is None:
-                value = field.get("default_value")
             field_type = field.get("type", "text")
-            if field_type in {"text", "multiline", "date", "time", "dropdown"}:
-                self._draw_text_field(painter, field, rect, value)
-            elif field_type in {"checkbox", "radio"}:
-                self._draw_checkbox(painter, field, rect, value, is_radio=field_type == "radio")
-            elif field_type == "signature":
-                self._draw_placeholder(painter, rect, "Signature")
-            elif field_type == "image":
-                self._draw_placeholder(painter, rect, "Image")
-            elif field_type == "table":
-                self._draw_placeholder(painter, rect, "Table rows")
+            common = dict(field_id=field.get("id"), rect=rect, default_value=field.get("default_value"))
+            if field_type in {"checkbox", "radio"}:
+                entry = _FieldPlan(kind=field_type, **common)
+            elif field_type in _PLACEHOLDERS:
+                entry = _FieldPlan(kind="placeholder", label=_PLACEHOLDERS[field_type], **common)
             else:
-                self._draw_text_field(painter, field, rect, value)
+                entry = _FieldPlan(
+                    kind="text",
+                    font=self._font(field.get("font_family") or "", int(field.get("font_size", 10))),
+                    flags=self._text_flags(field),
+                    **common,
+                )
+            plan.setdefault(int(field.get("page", 1)), []).append(entry)
+        return plan
 
-    def _draw_text_field(self, painter, field: dict[str, Any], rect, value: Any) -> None:
-        qt = self._require_qt()
-        font = qt.QFont()
-        if field.get("font_family"):
-            font.setFamily(field["font_family"])
-        font.setPointSize(int(field.get("font_size", 10)))
-        painter.save()
-        painter.setFont(font)
-        painter.setPen(qt.QColor(0, 0, 0))
+    def _font(self, family: str, size: int):
+        # Fields share a handful of styles; one QFont per (family, size).
+        font = self._fonts.get((family, size))
+        if font is None:
+            qt = self._require_qt()
+            font = qt.QFont()
+            if family:
+                font.setFamily(family)
+            font.setPointSize(size)
+            self._fonts[(family, size)] = font
+        return font
 
+    def _text_flags(self, field: dict[str, Any]):
+        qt = self._require_qt()
         alignment = field.get("align", "left")
         flags = qt.Qt.AlignmentFlag.AlignLeft | qt.Qt.AlignmentFlag.AlignVCenter
         if alignment == "center":
@@ -111,9 +212,27 @@ class PDFExporter:
             flags = qt.Qt.AlignmentFlag.AlignRight | qt.Qt.AlignmentFlag.AlignVCenter
         if field.get("type") == "multiline":
             flags = flags | qt.Qt.TextFlag.TextWordWrap
+        return flags
 
-        text = "" if value is None else str(value)
-        painter.drawText(rect, flags, text)
+    def _paint_plan(self, painter, plan: Sequence[_FieldPlan], values: dict[int, Any]) -> None:
+        qt = self._require_qt()
+        black = qt.QColor(0, 0, 0)
+        current_font = None
+        painter.save()
+        painter.setPen(black)
+        for entry in plan:
+            value = values.get(entry.field_id)
+            if value is None:
+                value = entry.default_value
+            if entry.kind == "text":
+                if entry.font is not current_font:
+                    painter.setFont(entry.font)
+                    current_font = entry.font
+                painter.drawText(entry.rect, entry.flags, "" if value is None else str(value))
+            elif entry.kind in {"checkbox", "radio"}:
+                self._draw_checkbox(painter, {}, entry.rect, value, is_radio=entry.kind == "radio")
+            else:
+                self._draw_placeholder(painter, entry.rect, entry.label)
         painter.restore()
 
     def _draw_checkbox(self, painter, field: dict[str, Any], rect, value: Any, *, is_radio: bool = False) -> None:
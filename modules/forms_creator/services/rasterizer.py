@@ -1,13 +1,35 @@
-"""PDF to PNG rasterisation helpers."""
+"""PDF to PNG rasterisation helpers.
+
+``Rasterizer.rasterize_pdf`` renders every page of a PDF (template import
+keeps those PNGs as the template background). The mapper canvas instead asks
+for what it shows: ``render_page`` and ``render_tile`` render one page, or one
+``TILE_SIZE`` square of it, at one of ``ZOOM_LEVELS_DPI``. Both go through a
+``RasterCache`` on disk keyed by the PDF's SHA-256, page, DPI and tile, so
+reopening a template (or the same template under another form set) renders
+nothing. ``page_sizes`` reads the page geometry without rendering anything.
+"""
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Protocol
+from typing import Callable, Protocol
 
 
 DEFAULT_DPI = 200
+TILE_SIZE = 512
+# Levels the canvas picks from as the zoom changes; DEFAULT_DPI is scene scale.
+ZOOM_LEVELS_DPI = (50, 100, 200, 400)
+DEFAULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+_CACHE_DIR = Path("data/cache/rasters")
+
+logger = logging.getLogger(__name__)
 
 
 class RasterizerError(RuntimeError):
@@ -21,6 +43,151 @@ class RasterizeEngine(Protocol):
         ...
 
 
+Clip = tuple[int, int, int, int]
+
+
+class PageEngine(Protocol):
+    """Protocol describing a backend that renders single pages or regions."""
+
+    def page_sizes(self, pdf_path: Path) -> list[tuple[float, float]]:
+        """Page sizes in points, in page order."""
+        ...
+
+    def render(self, pdf_path: Path, page_index: int, dpi: int, clip: Clip | None, output_path: Path) -> Path:
+        """Render page ``page_index`` at ``dpi`` to a PNG at ``output_path``.
+
+        ``clip`` is ``(x, y, width, height)`` in pixels of the full page
+        image at ``dpi``; only that region is rendered.
+        """
+        ...
+
+    def release_thread(self) -> None:
+        """Close anything the calling thread holds open; called as a worker
+        thread that rendered through this engine ends."""
+        ...
+
+
+class RasterCache:
+    """Persistent PNG cache keyed by PDF content hash, page, DPI and tile.
+
+    Entries live under ``<directory>/<sha256>/``. Least-recently-used files
+    (by mtime, refreshed on every hit) are removed once the cache holds more
+    than ``max_bytes``.
+    """
+
+    def __init__(self, directory: Path = _CACHE_DIR, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hashes: dict[tuple[str, int, int], str] = {}
+        self._size: int | None = None
+
+    def pdf_hash(self, pdf_path: Path) -> str:
+        """SHA-256 of ``pdf_path``, memoised by path, mtime and size."""
+
+        stat = pdf_path.stat()
+        key = (str(pdf_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            h = hashlib.sha256()
+            with pdf_path.open("rb") as handle:
+                for chunk in iter(lambda: handle.read(65536), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def path_for(self, pdf_path: Path, page_index: int, dpi: int, tile: tuple[int, int] | None = None) -> Path:
+        name = f"p{page_index + 1:03d}_{dpi}dpi"
+        if tile is not None:
+            name += f"_{tile[0]}_{tile[1]}"
+        return self.directory / self.pdf_hash(pdf_path) / f"{name}.png"
+
+    def lookup(self, path: Path) -> Path | None:
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, path: Path, render: Callable[[Path], object]) -> Path:
+        """Render into a temporary file next to ``path`` and move it in place."""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{uuid.uuid4().hex}.png")
+        try:
+            render(tmp)
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        size = path.stat().st_size
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self.directory.glob("*/*.png"))
+            else:
+                self._size += size - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        """Remove least-recently-used PNGs until the cache fits ``max_bytes``."""
+
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*/*.png"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            entries.sort()
+            total = sum(size for _mtime, size, _path in entries)
+            for _mtime, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+            self._size = total
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._size = 0
+
+
+_default_cache: RasterCache | None = None
+
+
+def default_cache() -> RasterCache:
+    """The process-wide raster cache under ``data/cache/rasters``."""
+
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = RasterCache()
+    return _default_cache
+
+
+def tile_grid(size_pt: tuple[float, float], dpi: int) -> tuple[int, int, int, int]:
+    """``(width_px, height_px, columns, rows)`` of a page rendered at ``dpi``."""
+
+    scale = dpi / 72.0
+    width = max(1, int(round(size_pt[0] * scale)))
+    height = max(1, int(round(size_pt[1] * scale)))
+    return width, height, -(-width // TILE_SIZE), -(-height // TILE_SIZE)
+
+
 @dataclass(slots=True)
 class Rasterizer:
     """Dependency injectable PDF rasteriser.
@@ -34,12 +201,30 @@ class Rasterizer:
 
     engine: RasterizeEngine | None = None
     dpi: int = DEFAULT_DPI
+    page_engine: PageEngine | None = None
+    cache: RasterCache | None = None
+    _page_sizes: dict[tuple[str, int], list[tuple[float, float]]] = field(default_factory=dict, repr=False)
 
     def rasterize_pdf(self, pdf_path: Path, output_dir: Path) -> list[Path]:
-        """Convert ``pdf_path`` into PNG images under ``output_dir``."""
+        """Convert ``pdf_path`` into PNG images under ``output_dir``.
+
+        Without an injected ``engine`` the pages come from the raster cache
+        (rendering only the ones it does not hold) and are copied out.
+        """
 
         engine = self.engine
         debug_messages: list[str] = []
+        if engine is None and self._page_engine_or_none() is not None:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            page_count = len(self.page_sizes(pdf_path))
+            if page_count <= 0:
+                raise RasterizerError(f"PDF has no pages: {pdf_path}")
+            output_paths = []
+            for index in range(page_count):
+                output_path = output_dir / f"background_page_{index + 1:03d}.png"
+                shutil.copyfile(self.render_page(pdf_path, index), output_path)
+                output_paths.append(output_path)
+            return output_paths
         if engine is None:
             engine, debug_messages = _autodetect_engine(self.dpi)
             if engine is not None:
@@ -47,19 +232,107 @@ class Rasterizer:
                 self.engine = engine
 
         if engine is None:
-            hints = "\n".join(f" - {msg}" for msg in debug_messages)
-            hint_block = f"\n{hints}\n" if hints else "\n"
-            raise RasterizerError(
-                "No PDF rasterisation backend is available." +
-                hint_block +
-                "Install the QtPdf components for PySide6 or `pypdfium2` and "
-                "restart the Form Creator, or inject a custom engine via "
-                "Rasterizer(engine=...).",
-            )
+            raise _no_backend_error(debug_messages)
 
         output_dir.mkdir(parents=True, exist_ok=True)
         return engine(pdf_path, output_dir)
 
+    # ------------------------------------------------------------------
+    def _page_engine_or_none(self) -> PageEngine | None:
+        if self.page_engine is None:
+            self.page_engine, _debug = _autodetect_page_engine()
+        return self.page_engine
+
+    def _require_page_engine(self) -> PageEngine:
+        engine = self.page_engine
+        if engine is None:
+            engine, debug_messages = _autodetect_page_engine()
+            if engine is None:
+                raise _no_backend_error(debug_messages)
+            self.page_engine = engine
+        return engine
+
+    def _cache(self) -> RasterCache:
+        if self.cache is None:
+            self.cache = default_cache()
+        return self.cache
+
+    def page_sizes(self, pdf_path: Path) -> list[tuple[float, float]]:
+        """Page sizes of ``pdf_path`` in points, without rendering."""
+
+        stat = pdf_path.stat()
+        key = (str(pdf_path.resolve()), stat.st_mtime_ns)
+        sizes = self._page_sizes.get(key)
+        if sizes is None:
+            sizes = self._page_sizes[key] = list(self._require_page_engine().page_sizes(pdf_path))
+        return sizes
+
+    def render_page(self, pdf_path: Path, page_index: int, dpi: int | None = None) -> Path:
+        """PNG of one whole page at ``dpi`` (default ``self.dpi``), cached."""
+
+        dpi = dpi or self.dpi
+        cache = self._cache()
+        path = cache.path_for(pdf_path, page_index, dpi)
+        hit = cache.lookup(path)
+        if hit is not None:
+            return hit
+        engine = self._require_page_engine()
+        return cache.store(path, lambda out: engine.render(pdf_path, page_index, dpi, None, out))
+
+    def render_tile(self, pdf_path: Path, page_index: int, dpi: int, column: int, row: int) -> Path:
+        """PNG of tile ``(column, row)`` of a page at ``dpi``, cached.
+
+        Tiles are ``TILE_SIZE`` pixels square except along the right and
+        bottom edges; ``tile_grid`` gives the grid for a page.
+        """
+
+        cache = self._cache()
+        path = cache.path_for(pdf_path, page_index, dpi, (column, row))
+        hit = cache.lookup(path)
+        if hit is not None:
+            return hit
+        sizes = self.page_sizes(pdf_path)
+        if not 0 <= page_index < len(sizes):
+            raise RasterizerError(f"Page {page_index + 1} out of range for {pdf_path.name}")
+        width, height, columns, rows = tile_grid(sizes[page_index], dpi)
+        if not (0 <= column < columns and 0 <= row < rows):
+            raise RasterizerError(f"Tile {column},{row} out of range for page {page_index + 1}")
+        x, y = column * TILE_SIZE, row * TILE_SIZE
+        clip = (x, y, min(TILE_SIZE, width - x), min(TILE_SIZE, height - y))
+        engine = self._require_page_engine()
+        return cache.store(path, lambda out: engine.render(pdf_path, page_index, dpi, clip, out))
+
+    def release_thread(self) -> None:
+        """Let the page engine close what the calling thread opened."""
+
+        if self.page_engine is not None:
+            self.page_engine.release_thread()
+
+
+def _no_backend_error(debug_messages: list[str]) -> RasterizerError:
+    hints = "\n".join(f" - {msg}" for msg in debug_messages)
+    hint_block = f"\n{hints}\n" if hints else "\n"
+    return RasterizerError(
+        "No PDF rasterisation backend is available." +
+        hint_block +
+        "Install the QtPdf components for PySide6 or `pypdfium2` and "
+        "restart the Form Creator, or inject a custom engine via "
+        "Rasterizer(engine=...).",
+    )
+
+
+def _autodetect_page_engine() -> tuple[PageEngine | None, list[str]]:
+    """Try to locate a usable single-page rendering backend."""
+
+    debug_messages: list[str] = []
+    for builder in (_build_qtpdf_page_engine, _build_pypdfium2_page_engine):
+        engine, debug = builder()
+        if engine is not None:
+            return engine, debug_messages
+        if debug:
+            debug_messages.append(debug)
+    return None, debug_messages
+
 
 def _autodetect_engine(dpi: int) -> tuple[RasterizeEngine | None, list[str]]:
     """Try to locate a usable PDF rasterisation backend."""
@@ -174,3 +447,123 @@ def _build_pypdfium2_engine(dpi: int) -> tuple[RasterizeEngine | None, str | Non
         return output_paths
 
     return engine, None
+
+
+def _build_qtpdf_page_engine() -> tuple[PageEngine | None, str | None]:
+    """Return a QtPdf-backed page engine if available."""
+
+    try:  # pragma: no cover - optional dependency import
+        from PySide6.QtCore import QRect, QSize
+        from PySide6.QtGui import QImage
+        from PySide6.QtPdf import QPdfDocument, QPdfDocumentRenderOptions
+    except Exception as exc:  # pragma: no cover - QtPdf missing
+        return None, f"QtPdf unavailable: {exc}"
+
+    class _QtPdfPageEngine:
+        def __init__(self) -> None:
+            # QPdfDocument is a QObject: keep one per thread (the canvas reads
+            # sizes on the GUI thread while the tile loader renders on its own).
+            self._local = threading.local()
+
+        def _document(self, pdf_path: Path) -> QPdfDocument:
+            documents = getattr(self._local, "documents", None)
+            if documents is None:
+                documents = self._local.documents = {}
+            stat = pdf_path.stat()
+            key = (str(pdf_path.resolve()), stat.st_mtime_ns)
+            document = documents.get(key)
+            if document is None:
+                for stale in [k for k in documents if k[0] == key[0]]:
+                    documents.pop(stale).close()
+                document = QPdfDocument()
+                error = document.load(str(pdf_path))
+                if error != QPdfDocument.Error.None_:
+                    document.close()
+                    raise RasterizerError(f"QtPdf failed to load {pdf_path.name}: {error.name}")
+                documents[key] = document
+            return document
+
+        def release_thread(self) -> None:
+            documents = getattr(self._local, "documents", None) or {}
+            for document in documents.values():
+                document.close()
+            documents.clear()
+
+        def page_sizes(self, pdf_path: Path) -> list[tuple[float, float]]:
+            document = self._document(pdf_path)
+            sizes = []
+            for index in range(document.pageCount()):
+                size = document.pagePointSize(index)
+                sizes.append((size.width(), size.height()))
+            return sizes
+
+        def render(self, pdf_path: Path, page_index: int, dpi: int, clip: Clip | None, output_path: Path) -> Path:
+            document = self._document(pdf_path)
+            size_pt = document.pagePointSize(page_index)
+            width, height, _columns, _rows = tile_grid((size_pt.width(), size_pt.height()), dpi)
+            options = QPdfDocumentRenderOptions()
+            options.setRenderFlags(QPdfDocumentRenderOptions.RenderFlag.OptimizedForLcd)
+            if clip is None:
+                image_size = QSize(width, height)
+            else:
+                options.setScaledSize(QSize(width, height))
+                options.setScaledClipRect(QRect(*clip))
+                image_size = QSize(clip[2], clip[3])
+            image: QImage = document.render(page_index, image_size, options)
+            if image.isNull():
+                raise RasterizerError(f"QtPdf could not render page {page_index + 1} of {pdf_path.name}")
+            image = image.convertToFormat(QImage.Format_RGBA8888)
+            if not image.save(str(output_path), "PNG"):
+                raise RasterizerError(f"Failed to save rasterised page {page_index + 1} for {pdf_path.name}")
+            return output_path
+
+    return _QtPdfPageEngine(), None
+
+
+def _build_pypdfium2_page_engine() -> tuple[PageEngine | None, str | None]:
+    """Return a pypdfium2-backed page engine if available."""
+
+    try:  # pragma: no cover - optional dependency import
+        import pypdfium2 as pdfium
+    except Exception as exc:  # pragma: no cover - dependency missing
+        return None, f"pypdfium2 unavailable: {exc}"
+
+    class _PdfiumPageEngine:
+        def __init__(self) -> None:
+            # pdfium is not thread safe.
+            self._lock = threading.Lock()
+
+        def page_sizes(self, pdf_path: Path) -> list[tuple[float, float]]:
+            with self._lock:
+                document = pdfium.PdfDocument(str(pdf_path))
+                try:
+                    return [tuple(document.get_page_size(index)) for index in range(len(document))]
+                finally:
+                    document.close()
+
+        def render(self, pdf_path: Path, page_index: int, dpi: int, clip: Clip | None, output_path: Path) -> Path:
+            scale = dpi / 72.0
+            with self._lock:
+                document = pdfium.PdfDocument(str(pdf_path))
+                try:
+                    page = document[page_index]
+                    crop = (0.0, 0.0, 0.0, 0.0)
+                    if clip is not None:
+                        width_pt, height_pt = page.get_size()
+                        x, y, w, h = clip
+                        # pdfium crops points off (left, bottom, right, top).
+                        crop = (
+                            x / scale,
+                            max(0.0, height_pt - (y + h) / scale),
+                            max(0.0, width_pt - (x + w) / scale),
+                            y / scale,
+                        )
+                    page.render(scale=scale, crop=crop).to_pil().save(output_path, format="PNG")
+                finally:
+                    document.close()
+            return output_path
+
+        def release_thread(self) -> None:
+            pass  # documents are closed after every call
+
+    return _PdfiumPageEngine(), None
@@ -233,13 +233,7 @@ class FormService:
         if instance_row is None:
             raise ValueError(f"Instance {instance_id} not found for incident {incident_id}")
 
-        value_map: dict[int, Any] = {}
-        for field_key, vdoc in (instance_row.get("values") or {}).items():
-            try:
-                key = int(field_key)
-            except (TypeError, ValueError):
-                continue
-            value_map[key] = _deserialise_value(vdoc.get("value"))
+        value_map = self._instance_values(instance_row)
 
         template_data = self._load_template_version(
             instance_row["template_id"], instance_row["template_version_id"]
@@ -250,6 +244,17 @@ class FormService:
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
+    @staticmethod
+    def _instance_values(instance_row: dict[str, Any]) -> dict[int, Any]:
+        value_map: dict[int, Any] = {}
+        for field_key, vdoc in (instance_row.get("values") or {}).items():
+            try:
+                key = int(field_key)
+            except (TypeError, ValueError):
+                continue
+            value_map[key] = _deserialise_value(vdoc.get("value"))
+        return value_map
+
     def _flatten_template(self, doc: dict[str, Any], *, version_override: dict[str, Any] | None = None) -> dict[str, Any]:
         version = version_override or doc.get("current_version") or {}
         layout = version.get("layout") or {}
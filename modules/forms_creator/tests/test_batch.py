@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pypdf import PdfReader
+
+from modules.forms_creator import batch
+from modules.forms_creator.batch import FormJob, generate_batch, generate_package
+
+
+_CONTEXT = {
+    "incident": {"name": "Lost Hiker", "number": "24-001"},
+    "op_period": {"start_date": "06/01/2024", "end_date": "06/02/2024", "start_time": "0700", "end_time": "1900"},
+    "organization": {"incident_commander": {"name": "Pat Smith"}, "operations_section_chief": {"name": "Lee Ops"}},
+    "prepared_by": {"name": "Sam Plans", "position": "PSC", "date_time": ""},
+}
+
+
+def _field_values(path) -> dict[str, str]:
+    fields = PdfReader(str(path)).get_fields() or {}
+    return {name: str(field.get("/V") or "") for name, field in fields.items()}
+
+
+def test_batch_reports_missing_forms_without_failing(tmp_path):
+    seen = []
+    results = generate_batch(
+        [FormJob("ics_202", "Objectives"), FormJob("cover", "Cover")],
+        tmp_path,
+        context=_CONTEXT,
+        max_workers=1,
+        progress=lambda done, total, result: seen.append((done, total, result.form_id)),
+    )
+
+    assert results[0].ok and results[0].path.exists()
+    assert results[1].error and not results[1].ok
+    assert sorted(seen) == [(1, 2, "cover"), (2, 2, "ics_202")]
+
+
+def test_package_merges_in_order_with_bookmarks_and_separate_fields(tmp_path):
+    jobs = [
+        FormJob("ics_202", "Incident Objectives"),
+        FormJob("ics_204", "Assignment List - Div A", {"incident": {"name": "Division A"}}),
+        FormJob("ics_204", "Assignment List - Div B", {"incident": {"name": "Division B"}}),
+    ]
+    progress = []
+
+    output, results = generate_package(
+        jobs, tmp_path / "iap.pdf", context=_CONTEXT, max_workers=2,
+        progress=lambda done, total, result: progress.append(done),
+    )
+
+    reader = PdfReader(str(output))
+    assert [item.title for item in reader.outline] == [job.title for job in jobs]
+    assert sorted(progress) == [1, 2, 3]
+    assert all(result.ok for result in results)
+    values = _field_values(output)
+    assert values["1 Incident Name_5_f0"] == "Lost Hiker"
+    assert values["1 Incident Name_7_f1"] == "Division A"
+    assert values["1 Incident Name_7_f2"] == "Division B"
+    assert not list(tmp_path.glob(".iap_parts_*"))
+
+
+def test_snapshot_holds_only_sections_the_forms_read(monkeypatch):
+    monkeypatch.setattr("modules.forms_creator.context._get", lambda path, **params: [])
+    mapping = {"fields": [{"pdf_field": "a", "source": "incident.name"}, {"pdf_field": "b", "source": "channels.0.name"}]}
+
+    snapshot = batch.build_snapshot([(mapping, None)], "INC-1")
+
+    assert set(snapshot) == {"incident", "channels"}
+    assert type(snapshot) is dict
+
+
+def test_snapshot_takes_sections_built_by_the_caller(monkeypatch):
+    paths = []
+    monkeypatch.setattr("modules.forms_creator.context._get", lambda path, **params: paths.append(path) or [])
+    mapping = {"fields": [{"pdf_field": "a", "source": "weather.conditions"}, {"pdf_field": "b", "source": "channels.0.name"}]}
+
+    snapshot = batch.build_snapshot([(mapping, None)], "INC-1", sections={"weather": {"conditions": "Clear"}})
+
+    assert snapshot["weather"] == {"conditions": "Clear"}
+    assert "channels" in snapshot
+    assert not any("weather" in path for path in paths)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+
+from modules.forms_creator.form_set_registry import FormSetRegistry
+from modules.forms_creator.pdf_filler import compiled
+from modules.forms_creator.pdf_filler.pdf_filler import PDFFiller
+
+_SETS = Path(__file__).resolve().parents[3] / "forms" / "sets" / "fema"
+
+_DATA = {
+    "incident": {"name": "Lost Hiker", "number": "", "flag": "no"},
+    "op_period": {"start": "2026-10-18T14:05:00Z"},
+    "teams": [{"name": "Alpha"}, {"name": "Bravo"}],
+}
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("incident.name", "Lost Hiker"),
+        ("teams.1.name", "Bravo"),
+        ("teams.x.name", None),
+        ("incident.name.first", None),
+        (7, 7),
+        (["incident.name", "teams.0.name"], ["Lost Hiker", "Alpha"]),
+        ({"literal": "ICS"}, "ICS"),
+        ({"first_of": ["incident.number", "incident.name"]}, "Lost Hiker"),
+        ({"first_of": ["incident.number"], "default": "-"}, "-"),
+        ({"join": ["teams.0.name", "incident.number", {"literal": "B"}], "separator": "/"}, "Alpha/B"),
+        ({"key": "incident.number", "default": "n/a", "transform": "upper"}, "N/A"),
+        ({"key": "op_period.start", "transform": "date_short"}, "10/18/2026"),
+        ({"key": "op_period.start", "transform": "time_short"}, "1405"),
+        ({"key": "incident.flag", "checkbox": True}, "/Off"),
+        ({"key": "incident.name", "checkbox": True, "checked_value": "X"}, "X"),
+        ({"default": 3}, 3),
+    ],
+)
+def test_compiled_source_matches_descriptor_semantics(source, expected):
+    assert compiled.compile_source(source)(_DATA) == expected
+
+
+def test_malformed_sources_raise_when_resolved():
+    unknown = compiled.compile_source({"key": "incident.name", "transform": "title"})
+    with pytest.raises(ValueError, match="Unsupported transform"):
+        unknown(_DATA)
+    with pytest.raises(ValueError, match="Unrecognized source"):
+        compiled.compile_source({"path": "incident.name"})(_DATA)
+
+
+def test_row_plans_follow_ranges_and_column_roles():
+    fdefs = [
+        {"from_row": 1, "to_row": 2, "pdf_field_pattern": "Time{n}", "column": "ts"},
+        {"from_row": 2, "pdf_field_pattern": "Text{n}", "column": "text"},
+        {"row": 3, "pdf_field": "Last", "role": "timestamp"},
+    ]
+    col_map = {"ts": {"id": "ts", "role": "timestamp"}, "text": {"id": "text"}}
+    out: dict[str, str] = {}
+    compiled.emit_rows(compiled.compile_row_fields(fdefs, col_map), [("t1", "a"), ("t2", "b"), ("t3", "c")], out, "_p2")
+
+    assert out == {"Time1_p2": "t1", "Time2_p2": "t2", "Text2_p2": "b", "Text3_p2": "c", "Last_p2": "t3"}
+
+
+def test_col_patterns_group_fills_rows_case_insensitively(tmp_path):
+    mapping = tmp_path / "mapping.json"
+    mapping.write_text(json.dumps({"fields": []}))
+    rg = {
+        "data_key": "teams",
+        "rows_per_page": [5],
+        "col_patterns": {"name": "Name{N}", "lead": "Lead{n}"},
+        "col_checkboxes": ["lead"],
+    }
+    values: dict[str, str] = {}
+    warnings = PDFFiller(mapping)._fill_col_patterns_group(rg, {"teams": [{"name": "A", "lead": 1}, "bad"]}, values, [])
+
+    assert values == {"Name1": "A", "Lead1": "X"}
+    assert warnings == ["row_group 'teams' skipped non-object row 2"]
+
+
+def test_long_activity_log_gets_independent_continuation_pages(tmp_path):
+    form_dir = _SETS / "ics_214"
+    entries = [{"timestamp_display": f"{n:04d}", "text": f"Entry {n}"} for n in range(200)]
+    output = tmp_path / "214.pdf"
+
+    PDFFiller(form_dir / "mapping.json").fill(
+        {"entries": entries, "incident": {"name": "Lost Hiker"}},
+        form_dir / "template.pdf",
+        output,
+        form_row_groups=FormSetRegistry().get_form_definition("ics_214").row_groups,
+    )
+
+    reader = PdfReader(str(output))
+    template_pages = len(PdfReader(str(form_dir / "template.pdf")).pages)
+    # 24 rows on page 1, then 36 per continuation page.
+    assert len(reader.pages) == template_pages + 5
+    fields = reader.get_fields() or {}
+    assert fields["DateTimeRow1_2"]["/V"] == "0024"
+    assert fields["Notable ActivitiesRow1_2"]["/V"] == "Entry 24"
+    assert fields["Notable ActivitiesRow1_2_p3"]["/V"] == "Entry 60"
+    assert fields["Notable ActivitiesRow1_2_p6"]["/V"] == "Entry 168"
+    annotations = [ref.idnum for page in reader.pages for ref in page.get("/Annots", [])]
+    assert len(annotations) == len(set(annotations))
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import os
+import threading
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from modules.forms_creator.context import FormDataContext, LazyFormData, required_sections
+from modules.forms_creator.pdf_filler.pdf_filler import PDFFiller
+
+
+def _recording_get(monkeypatch):
+    calls: list[str] = []
+    lock = threading.Lock()
+
+    def fake_get(path: str, **params):
+        with lock:
+            calls.append(path)
+        if path == "/api/incidents/INC-1":
+            return {"name": "Lost Hiker", "number": "24-001"}
+        if path.endswith("/org/positions"):
+            return [{"position_id": 1, "title": "Incident Commander"}]
+        if path.endswith("/org/assignments"):
+            return [{"position_id": 1, "display_name": "Pat Smith", "person_record": 7}]
+        return []
+
+    monkeypatch.setattr("modules.forms_creator.context._get", fake_get)
+    return calls
+
+
+def test_required_sections_reads_sources_and_row_groups():
+    mapping = {
+        "fields": [
+            {"pdf_field": "a", "source": "incident.name"},
+            {"pdf_field": "b", "source": {"key": "op_period.start_date", "transform": "date_short"}},
+            {"pdf_field": "c", "source": {"first_of": ["prepared_by.name", "organization.incident_commander.name"]}},
+            {"pdf_field": "d", "source": {"join": [{"key": "message.to"}, {"literal": "-"}], "separator": " "}},
+            {"pdf_field": "e", "source": {"literal": "x"}},
+        ],
+        "row_groups": [
+            {"data_key": "channels", "col_patterns": {"name": "Name{n}"}},
+            {"ref": "comm_log_rows", "fields": [], "page1_header_fields": {"Page": {"key": "incident.number"}}},
+        ],
+    }
+    form_row_groups = [{"id": "comm_log_rows", "data_key": "comm_log"}]
+
+    assert required_sections(mapping, form_row_groups) == {
+        "incident", "op_period", "prepared_by", "organization", "message",
+        "channels", "comm_log_rows", "comm_log",
+    }
+
+
+def test_lazy_context_fetches_only_accessed_sections(monkeypatch):
+    calls = _recording_get(monkeypatch)
+
+    ctx = FormDataContext().lazy("INC-1")
+    assert isinstance(ctx, dict)
+    assert "channels" in ctx
+    assert calls == []
+
+    assert PDFFiller._lookup_path(ctx, "incident.name") == "Lost Hiker"
+    assert calls == ["/api/incidents/INC-1"]
+    assert ctx.get("subject")["name"] == ""
+    assert calls == ["/api/incidents/INC-1"]
+
+
+def test_prefetch_shares_responses_between_sections(monkeypatch):
+    calls = _recording_get(monkeypatch)
+
+    ctx = FormDataContext().lazy("INC-1").prefetch(["organization", "uc_commanders", "org_branches"])
+
+    assert ctx["organization"]["incident_commander"]["name"] == "Pat Smith"
+    assert ctx["uc_commanders"] == [{"agency": "", "name": "Pat Smith"}]
+    assert calls.count("/api/incidents/INC-1/org/assignments") == 1
+    assert calls.count("/api/incidents/INC-1/org/positions") == 1
+    assert "/api/master/aircraft" not in calls
+
+
+def test_extra_data_overrides_sections_without_fetching(monkeypatch):
+    calls = _recording_get(monkeypatch)
+
+    ctx = FormDataContext().lazy("INC-1")
+    ctx.update({"incident": {"name": "Override"}, "custom": 1})
+    ctx.prefetch(["incident"])
+
+    assert calls == []
+    assert ctx["incident"]["name"] == "Override"
+    assert "custom" in ctx.keys()
+
+
+def test_loader_runs_once_under_concurrent_access():
+    runs: list[int] = []
+    gate = threading.Event()
+
+    def slow(d: LazyFormData) -> int:
+        runs.append(1)
+        gate.wait(1)
+        return 42
+
+    ctx = LazyFormData({"value": slow})
+    results: list[int] = []
+    threads = [threading.Thread(target=lambda: results.append(ctx["value"])) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42, 42, 42, 42]
+    assert runs == [1]
+
+
+def test_build_still_returns_complete_plain_dict(monkeypatch):
+    _recording_get(monkeypatch)
+    monkeypatch.setattr(FormDataContext, "_build_weather", lambda self, inc_id: {"conditions": ""})
+
+    data = FormDataContext().build("INC-1")
+
+    assert type(data) is dict
+    assert data["incident"]["name"] == "Lost Hiker"
+    assert data["org_agency_reps"] == data["agency_contacts"]
+    assert "_op_number" not in data and "_liaison" not in data
+
+
+def test_prefetch_takes_server_assembled_sections(monkeypatch):
+    calls: list[tuple[str, dict]] = []
+
+    def fake_get(path: str, **params):
+        calls.append((path, params))
+        if path == "/api/incidents/INC-1/forms/context":
+            return {"sections": {"incident": {"name": "From Server"}, "channels": [{"name": "TAC 1"}]},
+                    "unavailable": ["op_period"]}
+        if path.endswith("/planning/operational-periods"):
+            return [{"op_number": 2}]
+        return []
+
+    monkeypatch.setattr("modules.forms_creator.context._get", fake_get)
+    ctx = FormDataContext().lazy("INC-1").prefetch(["incident", "channels", "op_period", "prepared_by"])
+
+    assert calls[0] == ("/api/incidents/INC-1/forms/context", {"sections": "incident,channels,op_period"})
+    assert ctx["incident"]["name"] == "From Server"
+    assert ctx["channels"] == [{"name": "TAC 1"}]
+    assert ctx["op_period"]["number"] == 2
+    assert [path for path, _params in calls[1:]] == ["/api/incidents/INC-1/planning/operational-periods"]
+
+
+def test_injected_fetch_builds_locally_and_old_servers_fall_back(monkeypatch):
+    paths: list[str] = []
+    FormDataContext(lambda path, **params: paths.append(path) or []).lazy("INC-1").prefetch(["channels"])
+    assert paths == ["/api/incidents/INC-1/channels-plan"]
+
+    paths.clear()
+    monkeypatch.setattr("modules.forms_creator.context._get", lambda path, **params: paths.append(path) or None)
+    ctx = FormDataContext().lazy("INC-1").prefetch(["channels"])
+    assert paths == ["/api/incidents/INC-1/forms/context", "/api/incidents/INC-1/channels-plan"]
+    assert ctx["channels"] == []
+
+
+def test_op_period_is_the_requested_one_not_the_latest(monkeypatch):
+    periods = [
+        {"op_number": 1, "start_time": "2024-05-01T08:00:00", "end_time": "2024-05-01T20:00:00"},
+        {"op_number": 2, "start_time": "2024-05-01T20:00:00", "end_time": "2024-05-02T08:00:00"},
+    ]
+    monkeypatch.setattr(
+        "modules.forms_creator.context._get",
+        lambda path, **params: periods if path.endswith("/operational-periods") else [],
+    )
+
+    assert FormDataContext().lazy("INC-1")["op_period"]["number"] == 2
+    earlier = FormDataContext().lazy("INC-1", op_number=1)
+    assert earlier["op_period"]["number"] == 1
+    assert earlier["op_period"]["end"] == "2024-05-01T20:00:00"
+    assert earlier["_op_number"] == 1
+    assert FormDataContext().lazy("INC-1", op_number=5)["op_period"]["number"] == 5
+
+
+def test_sections_do_not_see_each_others_edits_to_shared_responses(monkeypatch):
+    rows = [{"id": 1, "name": "Search A", "created_at": "2024-05-01T08:00:00"}]
+    monkeypatch.setattr("modules.forms_creator.context._get", lambda path, **params: rows)
+
+    context = FormDataContext()
+    context.lazy("INC-1")
+    first = context._get("/api/incidents/INC-1/tasks")
+    first[0]["task_date"] = "edited"
+
+    assert "task_date" not in context._get("/api/incidents/INC-1/tasks")[0]
+    assert "task_date" not in rows[0]
+
+
+def test_weather_is_only_built_on_the_gui_thread(monkeypatch):
+    QApplication.instance() or QApplication([])
+    managers: list[str] = []
+    monkeypatch.setattr(
+        "modules.intel.weather.services.weather_manager.get_weather_manager",
+        lambda inc_id: managers.append(inc_id) or object(),
+    )
+    monkeypatch.setattr("modules.forms_creator.context.build_weather_form_payload", lambda manager: {"conditions": "Clear"})
+
+    from_worker: list[dict] = []
+    worker = threading.Thread(target=lambda: from_worker.append(FormDataContext().lazy("INC-1")["weather"]))
+    worker.start()
+    worker.join()
+
+    assert from_worker[0]["conditions"] == ""
+    assert managers == []
+    assert FormDataContext().caller_thread_sections("INC-1") == {"weather": {"conditions": "Clear"}}
+    assert managers == ["INC-1"]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+from pypdf import PdfReader
+
+from modules.forms_creator.services import exporter as exporter_module
+from modules.forms_creator.services.exporter import PDFExporter
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def template(tmp_path) -> dict:
+    backgrounds = tmp_path / "bg"
+    backgrounds.mkdir()
+    for page in (1, 2):
+        image = QImage(612, 792, QImage.Format.Format_RGB32)
+        image.fill(0xFFFFFFFF)
+        image.save(str(backgrounds / f"background_page_{page:03d}.png"))
+    exporter_module._backgrounds.clear()
+    return {
+        "page_count": 2,
+        "background_path": str(backgrounds),
+        "fields": [
+            {"id": 1, "page": 1, "type": "text", "x": 40, "y": 40, "width": 300, "height": 24, "font_size": 12},
+            {"id": 2, "page": 1, "type": "checkbox", "x": 40, "y": 80, "width": 12, "height": 12},
+            {"id": 3, "page": 2, "type": "multiline", "x": 40, "y": 40, "width": 300, "height": 200,
+             "align": "center", "default_value": "No notes"},
+            {"id": 4, "page": 2, "type": "signature", "x": 40, "y": 300, "width": 200, "height": 40},
+        ],
+    }
+
+
+def _text(path: Path) -> list[str]:
+    return [" ".join(page.extract_text().split()) for page in PdfReader(str(path)).pages]
+
+
+def test_export_instance_paints_values_and_defaults(qapp, tmp_path, template):
+    out = PDFExporter().export_instance(template, {1: "Team Alpha", 2: True}, tmp_path / "one.pdf")
+
+    page1, page2 = _text(out)
+    assert "Team Alpha" in page1
+    assert "No notes" in page2 and "Signature" in page2
+
+
+def test_repeated_exports_decode_backgrounds_once(qapp, tmp_path, template):
+    exporter = PDFExporter()
+
+    for n in range(3):
+        page1, page2 = _text(exporter.export_instance(template, {1: f"Team {n}", 3: f"Notes {n}"}, tmp_path / f"{n}.pdf"))
+        assert f"Team {n}" in page1 and f"Notes {n}" in page2
+
+    assert exporter_module._backgrounds.misses == 2
+    assert len(exporter._plans) == 1
+
+
+def test_missing_background_page_raises(qapp, tmp_path, template):
+    template["page_count"] = 3  # no background for page 3
+    with pytest.raises(FileNotFoundError):
+        PDFExporter().export_instance(template, {}, tmp_path / "a.pdf")
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+
+from modules.forms_creator.services.rasterizer import RasterCache, Rasterizer, tile_grid
+from modules.forms_creator.ui.RasterItems import PageRasterItem, RasterTileLoader
+
+_LETTER = (612.0, 792.0)
+
+
+class _FakePageEngine:
+    """Writes a solid PNG of the requested size and records every call."""
+
+    def __init__(self, pages: int = 3) -> None:
+        self.pages = pages
+        self.calls: list[tuple[int, int, tuple | None]] = []
+        self.released = 0
+
+    def page_sizes(self, pdf_path: Path) -> list[tuple[float, float]]:
+        return [_LETTER] * self.pages
+
+    def render(self, pdf_path, page_index, dpi, clip, output_path):
+        self.calls.append((page_index, dpi, clip))
+        width, height, _c, _r = tile_grid(_LETTER, dpi)
+        size = (clip[2], clip[3]) if clip else (width, height)
+        image = QImage(size[0], size[1], QImage.Format.Format_RGBA8888)
+        image.fill(0xFFFFFFFF)
+        image.save(str(output_path), "PNG")
+        return output_path
+
+    def release_thread(self) -> None:
+        self.released += 1
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+@pytest.fixture
+def pdf(tmp_path) -> Path:
+    path = tmp_path / "template.pdf"
+    path.write_bytes(b"%PDF-1.4 fake")
+    return path
+
+
+def test_pages_are_cached_by_content_page_and_dpi(qapp, tmp_path, pdf):
+    engine = _FakePageEngine()
+    cache = RasterCache(tmp_path / "cache")
+
+    first = Rasterizer(page_engine=engine, cache=cache).render_page(pdf, 0)
+    again = Rasterizer(page_engine=engine, cache=cache).render_page(pdf, 0)
+    Rasterizer(page_engine=engine, cache=cache).render_page(pdf, 0, dpi=100)
+    assert again == first and engine.calls == [(0, 200, None), (0, 100, None)]
+
+    pdf.write_bytes(b"%PDF-1.4 edited")
+    stat = pdf.stat()
+    os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    edited = Rasterizer(page_engine=engine, cache=cache).render_page(pdf, 0)
+    assert edited != first and len(engine.calls) == 3
+
+
+def test_tiles_clip_the_page_grid(qapp, tmp_path, pdf):
+    engine = _FakePageEngine()
+    rasterizer = Rasterizer(page_engine=engine, cache=RasterCache(tmp_path / "cache"))
+
+    assert tile_grid(_LETTER, 200) == (1700, 2200, 4, 5)
+    tile = rasterizer.render_tile(pdf, 1, 200, 3, 4)
+
+    assert engine.calls == [(1, 200, (1536, 2048, 164, 152))]
+    assert QImage(str(tile)).size().width() == 164
+
+
+def test_cache_evicts_least_recently_used_pages(qapp, tmp_path, pdf):
+    engine = _FakePageEngine()
+    probe = Rasterizer(page_engine=engine, cache=RasterCache(tmp_path / "probe")).render_page(pdf, 0, dpi=50)
+    cache = RasterCache(tmp_path / "cache", max_bytes=int(probe.stat().st_size * 2.5))
+    rasterizer = Rasterizer(page_engine=engine, cache=cache)
+
+    paths = [rasterizer.render_page(pdf, index, dpi=50) for index in range(3)]
+
+    assert not paths[0].exists() and paths[1].exists() and paths[2].exists()
+
+
+def test_overwriting_an_entry_counts_its_size_once(qapp, tmp_path, pdf):
+    cache = RasterCache(tmp_path / "cache")
+    rasterizer = Rasterizer(page_engine=_FakePageEngine(), cache=cache)
+    first = rasterizer.render_page(pdf, 0, dpi=50)
+    second = rasterizer.render_page(pdf, 1, dpi=50)
+
+    cache.store(first, lambda out: out.write_bytes(first.read_bytes()))
+
+    assert cache._size == first.stat().st_size + second.stat().st_size
+
+
+def test_rasterize_pdf_copies_cached_pages(qapp, tmp_path, pdf):
+    engine = _FakePageEngine(pages=2)
+    rasterizer = Rasterizer(page_engine=engine, cache=RasterCache(tmp_path / "cache"))
+
+    for out in ("a", "b"):
+        pages = rasterizer.rasterize_pdf(pdf, tmp_path / out)
+        assert [p.name for p in pages] == ["background_page_001.png", "background_page_002.png"]
+    assert len(engine.calls) == 2
+
+
+def test_loader_renders_visible_tiles_before_neighbours(qapp, tmp_path, pdf):
+    engine = _FakePageEngine()
+    loader = RasterTileLoader(Rasterizer(page_engine=engine, cache=RasterCache(tmp_path / "cache")), pdf)
+    delivered: list[tuple] = []
+    loader.tileReady.connect(lambda key, image: delivered.append(key))
+
+    loader.prefetch_around(1, 50)
+    loader.request((1, 50, 0, 0))
+    loader.start()
+    deadline = time.monotonic() + 10
+    while len(delivered) < 5 and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+    loader.stop()
+
+    # Page 2's visible tile first, then both tiles of pages 3 and 1 at 50 DPI.
+    assert delivered[0] == (1, 50, 0, 0)
+    assert sorted(delivered[1:]) == [(0, 50, 0, 0), (0, 50, 0, 1), (2, 50, 0, 0), (2, 50, 0, 1)]
+
+
+def test_loader_releases_the_engine_when_its_thread_ends(qapp, tmp_path, pdf):
+    engine = _FakePageEngine()
+    loader = RasterTileLoader(Rasterizer(page_engine=engine, cache=RasterCache(tmp_path / "cache")), pdf)
+    loader.start()
+    loader.stop()
+
+    assert engine.released == 1
+
+
+def test_evicted_neighbour_is_prefetched_again(qapp, tmp_path, pdf):
+    loader = RasterTileLoader(Rasterizer(page_engine=_FakePageEngine(), cache=RasterCache(tmp_path / "cache")), pdf)
+    item = PageRasterItem(loader, 0, _LETTER)
+    item.MAX_TILES = 2
+    tile = QImage(8, 8, QImage.Format.Format_RGBA8888)
+
+    loader.prefetch_around(1, 50)
+    item.tile_ready(50, 0, 0, tile)
+    item.tile_ready(50, 0, 1, tile)
+    item.tile_ready(100, 0, 0, tile)
+    assert (0, 50) in loader._prefetched  # one 50 DPI tile still held
+
+    item.tile_ready(100, 0, 1, tile)
+    assert (0, 50) not in loader._prefetched and (2, 50) in loader._prefetched
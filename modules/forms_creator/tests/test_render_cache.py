@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+
+from modules.forms_creator.export import export_form
+from modules.forms_creator.form_set_registry import FormSetRegistry
+from modules.forms_creator.pdf_filler import render_cache, template_cache
+from modules.forms_creator.pdf_filler.pdf_filler import PDFFiller
+from modules.forms_creator.session import FormSession
+
+_SETS = Path(__file__).resolve().parents[3] / "forms" / "sets" / "fema"
+_NAME_FIELD = "1 Incident Name_5"
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    template_cache.clear()
+    yield
+    template_cache.clear()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return render_cache.DiskRenderCache(tmp_path / "cache")
+
+
+def _mapping(tmp_path: Path, source: str = "incident.name") -> Path:
+    path = tmp_path / "mapping.json"
+    path.write_text(json.dumps({"fields": [
+        {"pdf_field": _NAME_FIELD, "source": source},
+        {"pdf_field": "Not A Field", "source": {"literal": "x"}},
+    ]}))
+    return path
+
+
+def _fill(mapping: Path, data: dict, out: Path, cache) -> list[str]:
+    return PDFFiller(mapping).fill(data, _SETS / "ics_202" / "template.pdf", out, cache=cache)
+
+
+def test_repeat_fill_is_served_from_the_cache(tmp_path, cache):
+    mapping = _mapping(tmp_path)
+    data = {"incident": {"name": "Lost Hiker"}, "log": ["unrelated"]}
+    first = _fill(mapping, data, tmp_path / "a.pdf", cache)
+    second = _fill(mapping, {**data, "log": ["changed"]}, tmp_path / "b.pdf", cache)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second == first == ["PDF field 'Not A Field' not found in template"]
+    assert (tmp_path / "b.pdf").read_bytes() == (tmp_path / "a.pdf").read_bytes()
+    assert (PdfReader(str(tmp_path / "b.pdf")).get_fields() or {})[_NAME_FIELD]["/V"] == "Lost Hiker"
+
+
+def test_resolved_value_or_mapping_change_misses(tmp_path, cache):
+    mapping = _mapping(tmp_path)
+    _fill(mapping, {"incident": {"name": "One"}}, tmp_path / "a.pdf", cache)
+    _fill(mapping, {"incident": {"name": "Two"}}, tmp_path / "b.pdf", cache)
+
+    mapping.write_text(mapping.read_text().replace('"x"', '"y"'))
+    stat = mapping.stat()
+    os.utime(mapping, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    _fill(mapping, {"incident": {"name": "Two"}}, tmp_path / "c.pdf", cache)
+
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert (PdfReader(str(tmp_path / "b.pdf")).get_fields() or {})[_NAME_FIELD]["/V"] == "Two"
+
+
+def test_row_group_data_is_part_of_the_key(tmp_path, cache):
+    form_dir = _SETS / "ics_214"
+    row_groups = FormSetRegistry().get_form_definition("ics_214").row_groups
+    filler = PDFFiller(form_dir / "mapping.json")
+
+    def fill(entries: list[dict], name: str) -> None:
+        filler.fill({"entries": entries}, form_dir / "template.pdf", tmp_path / name,
+                    form_row_groups=row_groups, cache=cache)
+
+    entries = [{"timestamp_display": f"{n:04d}", "text": f"Entry {n}"} for n in range(30)]
+    fill(entries, "a.pdf")
+    fill(entries + [{"timestamp_display": "0030", "text": "Entry 30"}], "b.pdf")
+    fill(entries, "c.pdf")
+
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert (tmp_path / "c.pdf").read_bytes() == (tmp_path / "a.pdf").read_bytes()
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = render_cache.DiskRenderCache(tmp_path, max_bytes=350)
+    for index, key in enumerate("abc"):
+        cache.put(key, bytes(100))
+        os.utime(tmp_path / f"{key}.pdf", (index, index))
+    cache.get("a")  # refreshes "a"
+    cache.put("d", bytes(100))
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.stats()["bytes"] == 300
+    assert not (tmp_path / "b.json").exists()
+
+
+def test_export_form_consults_the_cache(tmp_path, cache, monkeypatch):
+    template = {"renderer": "print", "fields": []}
+
+    class Registry:
+        def get(self, uid):
+            return template
+
+    calls: list[dict] = []
+    monkeypatch.setattr(
+        "modules.forms_creator.export.render_print_document",
+        lambda tpl, values, out: calls.append(values) or out.write_text(json.dumps(values)),
+    )
+    session = FormSession(instance_id="1", template_uid="p:f@1", values={"name": "Alpha"})
+    for name in ("a.txt", "b.txt"):
+        export_form(session, {}, Registry(), tmp_path / name, cache=cache)
+
+    assert len(calls) == 1
+    assert (tmp_path / "b.txt").read_text() == json.dumps({"name": "Alpha"})
+
+
+def test_fill_reports_phase_timings(tmp_path, cache):
+    mapping = _mapping(tmp_path)
+    timings: dict[str, float] = {}
+    PDFFiller(mapping).fill({"incident": {"name": "One"}}, _SETS / "ics_202" / "template.pdf",
+                            tmp_path / "a.pdf", timings=timings)
+    assert set(timings) == {"resolve", "clone", "row_groups", "write", "serialize"}
+    assert all(seconds >= 0 for seconds in timings.values())
+
+    hit: dict[str, float] = {}
+    for name in ("b.pdf", "c.pdf"):
+        hit.clear()
+        PDFFiller(mapping).fill({"incident": {"name": "One"}}, _SETS / "ics_202" / "template.pdf",
+                                tmp_path / name, cache=cache, timings=hit)
+    assert set(hit) == {"resolve", "serialize"}
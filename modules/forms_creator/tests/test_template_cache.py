@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from pypdf import PdfReader
+
+from modules.forms_creator.pdf_filler import template_cache
+from modules.forms_creator.pdf_filler.pdf_filler import PDFFiller
+
+_SET = Path(__file__).resolve().parents[3] / "forms" / "sets" / "fema" / "ics_202"
+_NAME_FIELD = "1 Incident Name_5"
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    template_cache.clear()
+    yield
+    template_cache.clear()
+
+
+def _mapping(tmp_path: Path, name: str = "mapping.json", **extra) -> Path:
+    path = tmp_path / name
+    path.write_text(json.dumps({"fields": [{"pdf_field": _NAME_FIELD, "source": "incident.name"}], **extra}))
+    return path
+
+
+def _value(pdf: Path, field: str = _NAME_FIELD) -> str:
+    return str((PdfReader(str(pdf)).get_fields() or {})[field].get("/V") or "")
+
+
+def test_repeated_fills_parse_the_template_once(tmp_path):
+    mapping = _mapping(tmp_path)
+    for index in range(5):
+        PDFFiller(mapping).fill({"incident": {"name": f"Incident {index}"}}, _SET / "template.pdf", tmp_path / f"{index}.pdf")
+
+    stats = template_cache.stats()
+    assert stats["template_misses"] == 1 and stats["template_hits"] == 4
+    assert stats["mapping_misses"] == 1
+    # Outputs stay independent even though they were cloned from one reader.
+    assert [_value(tmp_path / f"{i}.pdf") for i in range(5)] == [f"Incident {i}" for i in range(5)]
+
+
+def test_edited_mapping_is_reloaded(tmp_path):
+    mapping = _mapping(tmp_path)
+    assert PDFFiller(mapping).fields[0]["source"] == "incident.name"
+
+    mapping.write_text(json.dumps({"fields": [{"pdf_field": _NAME_FIELD, "source": "incident.number"}]}))
+    stat = mapping.stat()
+    os.utime(mapping, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert PDFFiller(mapping).fields[0]["source"] == "incident.number"
+
+
+def test_identical_template_at_another_path_shares_the_parse(tmp_path):
+    copy = tmp_path / "template.pdf"
+    shutil.copy(_SET / "template.pdf", copy)
+
+    first = template_cache.get_template(_SET / "template.pdf")
+    second = template_cache.get_template(copy)
+
+    assert second is first
+    assert first.fingerprint.startswith("sha256:")
+    assert _NAME_FIELD in first.field_names and first.page_numbers[_NAME_FIELD] == 1
+
+
+def test_repeat_overflow_reuses_cached_template(tmp_path):
+    mapping = _mapping(tmp_path, row_groups=[{
+        "data_key": "entries",
+        "overflow_mode": "repeat",
+        "rows_per_page": [1, 1],
+        "fields": [{"pdf_field_pattern": "3 Objectives", "role": "text"}],
+    }])
+    data = {"incident": {"name": "Repeat"}, "entries": [{"text": "one"}, {"text": "two"}, {"text": "three"}]}
+
+    for run in range(2):
+        out = tmp_path / f"repeat{run}.pdf"
+        PDFFiller(mapping).fill(data, _SET / "template.pdf", out)
+        assert len(PdfReader(str(out)).pages) == 3 * template_cache.get_template(_SET / "template.pdf").page_count
+        assert _value(out, "3 Objectives_p3") == "three"
+
+    assert template_cache.stats()["template_misses"] == 1
+
+
+def test_cache_is_lru_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(template_cache._mappings, "max_entries", 2)
+    paths = [_mapping(tmp_path, f"m{i}.json") for i in range(3)]
+    for path in paths:
+        template_cache.get_mapping(path)
+    template_cache.get_mapping(paths[0])
+
+    assert template_cache.stats()["mappings"] == 2
+    assert template_cache.stats()["mapping_misses"] == 4
@@ -11,7 +11,7 @@ from pathlib import Path
 from typing import Any
 
 from PySide6.QtCore import Qt, QRectF, QTimer
-from PySide6.QtGui import QColor, QPen, QPainter, QPixmap
+from PySide6.QtGui import QColor, QPen, QPainter
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QAbstractItemView,
@@ -22,7 +22,6 @@ from PySide6.QtWidgets import (
     QFileDialog,
     QFormLayout,
     QFrame,
-    QGraphicsPixmapItem,
     QGraphicsRectItem,
     QGraphicsScene,
     QGroupBox,
@@ -51,6 +50,7 @@ from modules.forms_creator.form_set_registry import FormSetRegistry
 from modules.forms_creator.services.pdf_fields import PDFFormFieldExtractor, DetectedPDFField
 from modules.forms_creator.services.rasterizer import Rasterizer, RasterizerError
 from .CanvasView import CanvasView
+from .RasterItems import PageRasterItem, RasterTileLoader
 
 _BINDING_CATALOG_PATH = Path(__file__).resolve().parents[3] / "forms" / "binding_catalog.json"
 
@@ -346,6 +346,10 @@ class MapperWindow(QMainWindow):
         self._fields: list[DetectedPDFField]        = []
         self._field_items: dict[str, MapperFieldItem] = {}
         self._page_heights: list[float]             = []
+        self._page_sizes: list[tuple[float, float]] = []
+        self._page_items: dict[int, PageRasterItem] = {}
+        self._rasterizer                            = Rasterizer()
+        self._tile_loader: RasterTileLoader | None  = None
         self._current_field: str | None             = None
         self._loading_binding                       = False
         self._group_map: dict[str, dict]            = {}
@@ -1358,18 +1362,22 @@ class MapperWindow(QMainWindow):
             pass
 
     def _load_pdf(self) -> None:
+        # Only page sizes are read here; page backgrounds are rendered tile by
+        # tile on the loader thread as the canvas shows them.
+        self._stop_tile_loader()
         if not self._template_pdf.exists():
             self._scene.clear()
             self._scene.addText("No template.pdf found.")
             return
         try:
-            self._page_images = Rasterizer().rasterize_pdf(
-                self._template_pdf, self._form_dir / ".raster"
-            )
+            self._page_sizes = self._rasterizer.page_sizes(self._template_pdf)
         except RasterizerError as exc:
             self._scene.clear()
             self._scene.addText(f"Could not rasterize PDF:\n{exc}")
             return
+        self._tile_loader = RasterTileLoader(self._rasterizer, self._template_pdf, self)
+        self._tile_loader.tileReady.connect(self._on_tile_ready)
+        self._tile_loader.start()
         try:
             self._fields = PDFFormFieldExtractor().extract(self._template_pdf)
         except Exception:
@@ -1380,21 +1388,21 @@ class MapperWindow(QMainWindow):
     def _rebuild_canvas(self) -> None:
         self._scene.clear()
         self._field_items.clear()
+        self._page_items.clear()
         self._page_heights = []
         y_offset = 0.0
         page_pixmaps: list[tuple[float, float]] = []
 
-        for page_path in self._page_images:
-            px = QPixmap(str(page_path))
-            if px.isNull():
-                continue
-            pi = QGraphicsPixmapItem(px)
+        for index, size_pt in enumerate(self._page_sizes):
+            pi = PageRasterItem(self._tile_loader, index, size_pt)
             pi.setPos(0, y_offset)
             pi.setZValue(0)
             self._scene.addItem(pi)
-            self._page_heights.append(float(px.height()))
-            page_pixmaps.append((float(px.width()), float(px.height())))
-            y_offset += px.height() + 10
+            self._page_items[index] = pi
+            rect = pi.boundingRect()
+            self._page_heights.append(rect.height())
+            page_pixmaps.append((rect.width(), rect.height()))
+            y_offset += rect.height() + 10
 
         for field in self._fields:
             p = field.page_index
@@ -1422,6 +1430,18 @@ class MapperWindow(QMainWindow):
         from PySide6.QtCore import QTimer
         QTimer.singleShot(0, self._zoom_fit)
 
+    def _on_tile_ready(self, key: tuple[int, int, int, int], image) -> None:
+        page_index, dpi, column, row = key
+        item = self._page_items.get(page_index)
+        if item is not None:
+            item.tile_ready(dpi, column, row, image)
+
+    def _stop_tile_loader(self) -> None:
+        if self._tile_loader is not None:
+            self._tile_loader.tileReady.disconnect(self._on_tile_ready)
+            self._tile_loader.stop()
+            self._tile_loader = None
+
     def _populate_field_list(self) -> None:
         self._field_list.clear()
         for field in self._fields:
@@ -2117,4 +2137,5 @@ class MapperWindow(QMainWindow):
         if self._save_timer.isActive():
             self._save_timer.stop()
             self._write_mapping()
+        self._stop_tile_loader()
         event.accept()
@@ -0,0 +1,209 @@
+"""Tiled, on-demand page backgrounds for the mapper canvas.
+
+``PageRasterItem`` stands in for a page's background pixmap. It paints only
+the tiles under the exposed rect, at the ``ZOOM_LEVELS_DPI`` level that
+matches the view's zoom, and asks a ``RasterTileLoader`` for any it lacks;
+coarser tiles already in memory are drawn underneath until the sharp ones
+arrive. The loader renders tiles on its own thread through
+``Rasterizer.render_tile`` (so through the persistent raster cache), visible
+tiles first, then the pages either side of the one being looked at.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PySide6.QtCore import QRectF, QThread, Qt, Signal
+from PySide6.QtGui import QImage, QPainter, QPixmap
+from PySide6.QtWidgets import QGraphicsItem
+
+from modules.forms_creator.services.rasterizer import (
+    DEFAULT_DPI,
+    TILE_SIZE,
+    ZOOM_LEVELS_DPI,
+    Rasterizer,
+    tile_grid,
+)
+
+logger = logging.getLogger(__name__)
+
+TileKey = tuple[int, int, int, int]  # page index, dpi, column, row
+
+
+class RasterTileLoader(QThread):
+    """Renders requested tiles of one PDF, highest priority first."""
+
+    tileReady = Signal(object, QImage)  # TileKey, image
+
+    VISIBLE = 0
+    ADJACENT = 1
+
+    def __init__(self, rasterizer: Rasterizer, pdf_path: Path, parent=None) -> None:
+        super().__init__(parent)
+        self._rasterizer = rasterizer
+        self._pdf_path = pdf_path
+        self._cond = threading.Condition()
+        self._heap: list[tuple[int, int, TileKey]] = []
+        self._pending: dict[TileKey, int] = {}
+        self._order = itertools.count()
+        self._prefetched: set[tuple[int, int]] = set()
+        self._stopping = False
+
+    def request(self, key: TileKey, priority: int = VISIBLE) -> None:
+        with self._cond:
+            queued = self._pending.get(key)
+            if queued is not None and queued <= priority:
+                return
+            self._pending[key] = priority
+            heapq.heappush(self._heap, (priority, next(self._order), key))
+            self._cond.notify()
+
+    def prefetch_around(self, page_index: int, dpi: int) -> None:
+        """Queue every tile of the pages either side of ``page_index``."""
+
+        sizes = self._rasterizer.page_sizes(self._pdf_path)
+        for neighbour in (page_index + 1, page_index - 1):
+            if not 0 <= neighbour < len(sizes) or (neighbour, dpi) in self._prefetched:
+                continue
+            self._prefetched.add((neighbour, dpi))
+            _width, _height, columns, rows = tile_grid(sizes[neighbour], dpi)
+            for row in range(rows):
+                for column in range(columns):
+                    self.request((neighbour, dpi, column, row), self.ADJACENT)
+
+    def forget_prefetch(self, page_index: int, dpi: int) -> None:
+        """Let ``prefetch_around`` queue ``page_index`` at ``dpi`` again, once
+        its item no longer holds any of those tiles."""
+
+        self._prefetched.discard((page_index, dpi))
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._heap.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+        self.wait()
+
+    def run(self) -> None:  # noqa: D401 - QThread API
+        try:
+            self._render_queued()
+        finally:
+            self._rasterizer.release_thread()
+
+    def _render_queued(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                priority, _order, key = heapq.heappop(self._heap)
+                if self._pending.get(key) != priority:
+                    continue  # re-queued at a higher priority
+                del self._pending[key]
+            page_index, dpi, column, row = key
+            try:
+                path = self._rasterizer.render_tile(self._pdf_path, page_index, dpi, column, row)
+            except Exception as exc:
+                logger.debug("Tile %s of %s failed: %s", key, self._pdf_path.name, exc)
+                continue
+            image = QImage(str(path))
+            if not image.isNull():
+                self.tileReady.emit(key, image)
+
+
+class PageRasterItem(QGraphicsItem):
+    """One page background, drawn from tiles at the zoom-appropriate DPI.
+
+    The item is sized at ``scene_dpi`` (the same scene units the full-page
+    200 DPI pixmaps used), so field overlays line up regardless of which
+    level is on screen.
+    """
+
+    MAX_TILES = 96
+
+    def __init__(
+        self,
+        loader: RasterTileLoader,
+        page_index: int,
+        size_pt: tuple[float, float],
+        scene_dpi: int = DEFAULT_DPI,
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self._loader = loader
+        self.page_index = page_index
+        self._size_pt = size_pt
+        self._scene_dpi = scene_dpi
+        width, height, _columns, _rows = tile_grid(size_pt, scene_dpi)
+        self._rect = QRectF(0, 0, width, height)
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption, True)
+
+    def boundingRect(self) -> QRectF:  # noqa: N802 - Qt API
+        return self._rect
+
+    def level_for_scale(self, scale: float) -> int:
+        """The smallest zoom level that is at least as sharp as the screen."""
+
+        wanted = self._scene_dpi * scale
+        for dpi in ZOOM_LEVELS_DPI:
+            if dpi >= wanted * 0.95:
+                return dpi
+        return ZOOM_LEVELS_DPI[-1]
+
+    def paint(self, painter: QPainter, option, widget=None) -> None:  # noqa: D401 - Qt API
+        painter.fillRect(self._rect, Qt.GlobalColor.white)
+        scale = painter.worldTransform().m11()
+        if widget is not None:
+            scale *= widget.devicePixelRatioF()
+        level = self.level_for_scale(scale)
+        exposed = option.exposedRect.intersected(self._rect)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, True)
+        # Coarser (or finer) tiles already in memory fill in underneath while
+        # the current level renders.
+        for dpi in sorted({key[0] for key in self._tiles} - {level}):
+            self._draw_level(painter, dpi, exposed, request=False)
+        self._draw_level(painter, level, exposed, request=True)
+        self._loader.prefetch_around(self.page_index, level)
+
+    def _draw_level(self, painter: QPainter, dpi: int, exposed: QRectF, request: bool) -> None:
+        factor = self._scene_dpi / dpi
+        tile_extent = TILE_SIZE * factor
+        _width, _height, columns, rows = tile_grid(self._size_pt, dpi)
+        first_column = max(0, int(exposed.left() // tile_extent))
+        last_column = min(columns - 1, int(exposed.right() // tile_extent))
+        first_row = max(0, int(exposed.top() // tile_extent))
+        last_row = min(rows - 1, int(exposed.bottom() // tile_extent))
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                pixmap = self._tiles.get((dpi, column, row))
+                if pixmap is None:
+                    if request:
+                        self._loader.request((self.page_index, dpi, column, row))
+                    continue
+                self._tiles.move_to_end((dpi, column, row))
+                target = QRectF(
+                    column * tile_extent, row * tile_extent,
+                    pixmap.width() * factor, pixmap.height() * factor,
+                )
+                painter.drawPixmap(target, pixmap, QRectF(pixmap.rect()))
+
+    def tile_ready(self, dpi: int, column: int, row: int, image: QImage) -> None:
+        self._tiles[(dpi, column, row)] = QPixmap.fromImage(image)
+        self._tiles.move_to_end((dpi, column, row))
+        while len(self._tiles) > self.MAX_TILES:
+            (evicted_dpi, _column, _row), _pixmap = self._tiles.popitem(last=False)
+            if not any(key[0] == evicted_dpi for key in self._tiles):
+                self._loader.forget_prefetch(self.page_index, evicted_dpi)
+        factor = self._scene_dpi / dpi
+        self.update(QRectF(
+            column * TILE_SIZE * factor, row * TILE_SIZE * factor,
+            image.width() * factor, image.height() * factor,
+        ))
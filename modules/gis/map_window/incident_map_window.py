@@ -23,7 +23,7 @@ from PySide6.QtWidgets import (
 
 from modules.gis.map_window.bottom_panel import BottomPanel
 from modules.gis.map_window.contextual_strip import ContextualStrip
-from modules.gis.map_window.map_canvas import MapCanvas
+from modules.gis.map_window.map_canvas import HEATMAP_OVERLAYS, MapCanvas
 from modules.gis.map_window.ribbon.home_tab import HomeTab
 from modules.gis.map_window.ribbon.incident_tab import IncidentTab
 from modules.gis.map_window.ribbon.ribbon_group import RibbonGroup
@@ -540,6 +540,9 @@ class IncidentMapWindow(QMainWindow):
 
     # -- Layers -----------------------------------------------------------
     def on_toggle_layer(self, layer_key: str, visible: bool) -> None:
+        if layer_key in HEATMAP_OVERLAYS:
+            self.map_canvas.set_heatmap_overlay(layer_key, visible)
+            return
         for feature in self._features_by_id.values():
             if feature.layer_key == layer_key and feature.id is not None:
                 if visible:
@@ -14,6 +14,7 @@ import json
 import logging
 from pathlib import Path
 from typing import Any
+from urllib.parse import quote
 
 from PySide6.QtCore import QObject, QSettings, QUrl, Signal, Slot
 from PySide6.QtWebChannel import QWebChannel
@@ -25,6 +26,7 @@ from modules.gis.map_window.tools.tool_controller import ToolController
 from modules.gis.models.geometry_types import GeometryType
 from modules.gis.models.spatial_feature import SpatialFeature
 from utils import incident_context
+from utils.api_client import api_client
 from utils.incident_cache import incident_cache
 
 logger = logging.getLogger(__name__)
@@ -60,6 +62,16 @@ _BASEMAPS: dict[str, dict[str, Any]] = {
     },
 }
 
+# Raster overlays rendered server-side as PNG heatmap tiles, keyed by layer
+# key: (tile path under /api/incidents/{incident_id}, collections whose
+# changes refresh the overlay).
+HEATMAP_OVERLAYS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "clue_heatmap": ("/gis/tiles/clues/{z}/{x}/{y}.png", ("spatial_features",)),
+    "track_density": ("/gis/tiles/tracks/{z}/{x}/{y}.png", ("spatial_features",)),
+    "search_probability": ("/search-probability/tiles/{z}/{x}/{y}.png", ("search_probability_grid",)),
+}
+_HEATMAP_OPACITY = 0.75
+
 TOOL_PAN = "pan"
 TOOL_SELECT = "select"
 TOOL_ZOOM_IN_BOX = "zoom_in_box"
@@ -102,6 +114,7 @@ def _map_html(center_lat: float, center_lon: float, zoom: int, basemap_key: str)
   var map = L.map('map', {{ zoomControl: true, rotate: false }}).setView([{center_lat}, {center_lon}], {zoom});
   var basemapLayer = null;
   var featureLayers = {{}};
+  var heatmapLayers = {{}};
   var currentTool = 'pan';
   var drawVertices = [];
   var drawPreviewLayer = null;
@@ -253,6 +266,21 @@ def _map_html(center_lat: float, center_lon: float, zoom: int, basemap_key: str)
     }});
   }}
 
+  function setHeatmapOverlay(key, url, opacity) {{
+    if (heatmapLayers[key]) {{
+      heatmapLayers[key].setUrl(url);
+      return;
+    }}
+    heatmapLayers[key] = L.tileLayer(url, {{ opacity: opacity, maxZoom: 22, zIndex: 10 }}).addTo(map);
+  }}
+
+  function removeHeatmapOverlay(key) {{
+    if (heatmapLayers[key]) {{
+      map.removeLayer(heatmapLayers[key]);
+      delete heatmapLayers[key];
+    }}
+  }}
+
   function zoomInMap() {{ map.zoomIn(); }}
   function zoomOutMap() {{ map.zoomOut(); }}
   function centerMap(lat, lon, zoom) {{
@@ -329,6 +357,12 @@ class MapCanvas(QWidget):
         self.tools = ToolController(default_tool=TOOL_PAN)
         self.tools.subscribe(self._on_tool_activated)
 
+        # Visible heatmap overlays -> cache-busting version appended to the
+        # tile URL; bumped when a relevant collection changes so Leaflet
+        # refetches (the server re-renders only tiles it invalidated).
+        self._heatmap_versions: dict[str, int] = {}
+        incident_cache.changed.connect(self._on_cache_changed)
+
         self._extent_stack: list[tuple[float, float, float, float]] = []
         self._extent_index = -1
         self._suppress_extent_capture = False
@@ -472,6 +506,35 @@ class MapCanvas(QWidget):
     def highlight_feature(self, feature_id: int | str) -> None:
         self._run_js(f"highlightFeature({json.dumps(str(feature_id))});")
 
+    # -- Heatmap overlays -------------------------------------------------
+    def set_heatmap_overlay(self, layer_key: str, visible: bool) -> None:
+        if layer_key not in HEATMAP_OVERLAYS:
+            return
+        if not visible:
+            self._heatmap_versions.pop(layer_key, None)
+            self._run_js(f"removeHeatmapOverlay({json.dumps(layer_key)});")
+            return
+        self._heatmap_versions.setdefault(layer_key, 0)
+        self._apply_heatmap_overlay(layer_key)
+
+    def _heatmap_url(self, layer_key: str) -> str:
+        path, _collections = HEATMAP_OVERLAYS[layer_key]
+        incident = quote(self._incident_id, safe="")
+        version = self._heatmap_versions.get(layer_key, 0)
+        return f"{api_client.base_url}/api/incidents/{incident}{path}?v={version}"
+
+    def _apply_heatmap_overlay(self, layer_key: str) -> None:
+        self._run_js(
+            f"setHeatmapOverlay({json.dumps(layer_key)}, {json.dumps(self._heatmap_url(layer_key))}, "
+            f"{_HEATMAP_OPACITY});"
+        )
+
+    def _on_cache_changed(self, collection: str, _op: str, _doc_id: str) -> None:
+        for layer_key in list(self._heatmap_versions):
+            if collection in HEATMAP_OVERLAYS[layer_key][1]:
+                self._heatmap_versions[layer_key] += 1
+                self._apply_heatmap_overlay(layer_key)
+
     # -- Persistence --------------------------------------------------------
     def _settings_prefix(self) -> str:
         return f"map_view/{self._incident_id}"
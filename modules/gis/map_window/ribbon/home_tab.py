@@ -109,7 +109,7 @@ class HomeTab(RibbonTabPage):
         for layer in self._layer_registry.list_layers():
             action = layers_menu.addAction(layer.name)
             action.setCheckable(True)
-            action.setChecked(True)
+            action.setChecked(layer.default_visible)
             action.toggled.connect(lambda checked, lk=layer.layer_key: self._window.on_toggle_layer(lk, checked))
         layers_menu.addSeparator()
         open_manager_action = layers_menu.addAction("Open Layer Manager…")
@@ -9,12 +9,18 @@ team's last-known position. This panel is meant as the permanent foundation
 later GIS-module phases extend (assignment-area drawing, spatial-feature
 layers), not a throwaway MVP widget.
 
-All data comes from IncidentCache, which already mirrors the `teams`
-collection live over the incident's WebSocket feed — no separate network
+All data comes from the incident's WebSocket feed — no separate network
 calls are made here, per incident_cache.py's own "panels should read from
-this cache" convention. The leader-preference logic that decides which
-device's ping wins is entirely server-side; this panel just displays
-whatever current_location_* fields land on each team's document.
+this cache" convention. Team documents from IncidentCache seed the markers
+and carry renames/removals; live movement arrives only as bare position
+deltas from utils/team_position_stream.py (the server no longer sends the
+whole team document per fix). Either way, only changes to a team's
+(name, lat, lon) reach the page, batched into one `applyPositions` call.
+Markers are reused and tweened between fixes, and teams sharing a quadtree
+cell at the current zoom collapse into one count marker. The
+leader-preference logic that decides which device's ping wins is entirely
+server-side; this panel just displays whatever current_location_* fields
+land on each team's document.
 
 Leaflet (vendored under assets/leaflet/, BSD-2-Clause) is loaded locally
 rather than from a CDN so the map still renders without outbound internet —
@@ -49,6 +55,7 @@ from PySide6.QtWidgets import (
 
 from utils import incident_context
 from utils.incident_cache import incident_cache
+from utils.team_position_stream import team_position_stream
 from utils.table_view_styles import apply_statusboard_table_behavior
 
 logger = logging.getLogger(__name__)
@@ -58,6 +65,8 @@ _DEFAULT_CENTER = (39.8283, -98.5795)  # continental US — used when the incide
 _DEFAULT_ZOOM = 5
 _DEFAULT_BASEMAP = "osm"
 _VIEW_SETTINGS = QSettings("SARApp", "GIS")
+# Marker deltas arriving within this window go to the page as one JS call.
+_DELTA_FLUSH_MS = 50
 _BASEMAPS: dict[str, dict[str, Any]] = {
     "osm": {
         "label": "OpenStreetMap",
@@ -109,6 +118,15 @@ def _map_html(center_lat: float, center_lon: float, zoom: int, basemap_key: str)
   .team-marker-label::before {{
     display: none;
   }}
+  .team-cluster {{
+    background: rgba(47, 128, 237, 0.85);
+    border: 2px solid #ffffff;
+    border-radius: 50%;
+    box-shadow: 0 1px 4px rgba(15, 23, 42, 0.35);
+    color: #ffffff;
+    font: 700 13px/30px Arial, sans-serif;
+    text-align: center;
+  }}
 </style>
 </head>
 <body>
@@ -120,7 +138,17 @@ def _map_html(center_lat: float, center_lon: float, zoom: int, basemap_key: str)
   var currentBasemapKey = {json.dumps(basemap_key)};
   var map = L.map('map').setView([{center_lat}, {center_lon}], {zoom});
   var basemapLayer = null;
-  var markers = {{}};
+  var teams = {{}};           // team id -> {{ marker, name, lat, lon, clusterCell }}
+  var clusterMarkers = {{}};  // quadtree cell -> cluster marker
+  var tweens = {{}};          // team id -> {{ from, to, start }}
+  var tweenFrame = null;
+  var clusterFrame = null;
+  var TWEEN_MS = 800;
+  // Teams are bucketed into quadtree cells two levels below the current
+  // tile level (64 px cells); a cell holding more than one team draws a
+  // single count marker. Past CLUSTER_MAX_ZOOM every team is shown.
+  var CLUSTER_CELL_LEVELS = 2;
+  var CLUSTER_MAX_ZOOM = 17;
   var mapBridge = null;
   new QWebChannel(qt.webChannelTransport, function(channel) {{
     mapBridge = channel.objects.mapBridge || null;
@@ -134,33 +162,187 @@ def _map_html(center_lat: float, center_lon: float, zoom: int, basemap_key: str)
     basemapLayer.addTo(map);
     currentBasemapKey = key in basemapConfigs ? key : 'osm';
   }}
-  function upsertMarker(teamId, name, lat, lon) {{
-    var key = String(teamId);
-    if (markers[key]) {{
-      markers[key].setLatLng([lat, lon]);
-    }} else {{
-      markers[key] = L.marker([lat, lon]).addTo(map);
-    }}
-    markers[key].bindPopup(name);
-    markers[key].bindTooltip(name, {{
+  function makeTeamMarker(key, name, lat, lon) {{
+    var marker = L.marker([lat, lon]);
+    marker.bindPopup(name);
+    marker.bindTooltip(name, {{
       permanent: true,
       direction: 'top',
       offset: [0, -10],
       opacity: 1,
       className: 'team-marker-label'
     }});
-    markers[key].off('click');
-    markers[key].on('click', function() {{
+    marker.on('click', function() {{
       if (mapBridge && mapBridge.selectTeam) {{
-        mapBridge.selectTeam(String(teamId));
+        mapBridge.selectTeam(key);
+      }}
+    }});
+    return marker;
+  }}
+  // Apply a batch of position deltas: [{{ id, name, lat, lon }}]. A null
+  // lat/lon removes the team. Existing markers are reused and moved with a
+  // short tween rather than being removed and re-added.
+  function applyPositions(deltas) {{
+    var now = performance.now();
+    deltas.forEach(function(d) {{
+      var key = String(d.id);
+      if (d.lat === null || d.lon === null) {{
+        removeMarker(key);
+        return;
+      }}
+      var team = teams[key];
+      if (!team) {{
+        var name = d.name || ('Team ' + key);
+        teams[key] = {{ marker: makeTeamMarker(key, name, d.lat, d.lon), name: name, lat: d.lat, lon: d.lon, clusterCell: null }};
+        return;
+      }}
+      if (d.name && d.name !== team.name) {{
+        team.name = d.name;
+        team.marker.setTooltipContent(d.name);
+        team.marker.setPopupContent(d.name);
+      }}
+      if (d.lat !== team.lat || d.lon !== team.lon) {{
+        team.lat = d.lat;
+        team.lon = d.lon;
+        if (team.clusterCell === null && map.hasLayer(team.marker)) {{
+          var from = team.marker.getLatLng();
+          tweens[key] = {{ from: [from.lat, from.lng], to: [d.lat, d.lon], start: now }};
+        }} else {{
+          team.marker.setLatLng([d.lat, d.lon]);
+        }}
+      }}
+    }});
+    scheduleTweens();
+    scheduleCluster();
+  }}
+  function scheduleTweens() {{
+    if (tweenFrame === null && Object.keys(tweens).length) {{
+      tweenFrame = requestAnimationFrame(stepTweens);
+    }}
+  }}
+  function stepTweens(now) {{
+    tweenFrame = null;
+    Object.keys(tweens).forEach(function(key) {{
+      var t = tweens[key];
+      var team = teams[key];
+      if (!team) {{
+        delete tweens[key];
+        return;
+      }}
+      var f = Math.min(1, Math.max(0, (now - t.start) / TWEEN_MS));
+      var e = f * (2 - f);
+      team.marker.setLatLng([t.from[0] + (t.to[0] - t.from[0]) * e, t.from[1] + (t.to[1] - t.from[1]) * e]);
+      if (f >= 1) {{
+        delete tweens[key];
       }}
     }});
+    scheduleTweens();
+  }}
+  function scheduleCluster() {{
+    if (clusterFrame === null) {{
+      clusterFrame = requestAnimationFrame(recluster);
+    }}
+  }}
+  function quadtreeCell(lat, lon, level) {{
+    var scale = Math.pow(2, level);
+    var s = Math.sin(Math.max(-85.0511, Math.min(85.0511, lat)) * Math.PI / 180);
+    var qx = Math.floor((lon + 180) / 360 * scale);
+    var qy = Math.floor((0.5 - Math.log((1 + s) / (1 - s)) / (4 * Math.PI)) * scale);
+    return level + '/' + qx + '/' + qy;
+  }}
+  function clusterIcon(count) {{
+    return L.divIcon({{
+      html: '<div>' + count + '</div>',
+      className: 'team-cluster',
+      iconSize: [34, 34]
+    }});
+  }}
+  function showTeam(key) {{
+    var team = teams[key];
+    team.clusterCell = null;
+    if (!map.hasLayer(team.marker)) {{
+      team.marker.setLatLng([team.lat, team.lon]);
+      team.marker.addTo(map);
+    }}
+  }}
+  function hideTeam(key, cell) {{
+    var team = teams[key];
+    team.clusterCell = cell;
+    delete tweens[key];
+    if (map.hasLayer(team.marker)) {{
+      map.removeLayer(team.marker);
+    }}
+    team.marker.setLatLng([team.lat, team.lon]);
+  }}
+  function recluster() {{
+    clusterFrame = null;
+    var zoom = map.getZoom();
+    var level = zoom + CLUSTER_CELL_LEVELS;
+    var cells = {{}};
+    Object.keys(teams).forEach(function(key) {{
+      var team = teams[key];
+      var cell = zoom >= CLUSTER_MAX_ZOOM ? key : quadtreeCell(team.lat, team.lon, level);
+      (cells[cell] = cells[cell] || []).push(key);
+    }});
+    var live = {{}};
+    Object.keys(cells).forEach(function(cell) {{
+      var keys = cells[cell];
+      if (keys.length === 1) {{
+        showTeam(keys[0]);
+        return;
+      }}
+      var lat = 0;
+      var lon = 0;
+      keys.forEach(function(key) {{
+        hideTeam(key, cell);
+        lat += teams[key].lat;
+        lon += teams[key].lon;
+      }});
+      lat /= keys.length;
+      lon /= keys.length;
+      live[cell] = true;
+      var cluster = clusterMarkers[cell];
+      if (!cluster) {{
+        cluster = L.marker([lat, lon], {{ icon: clusterIcon(keys.length) }}).addTo(map);
+        cluster.on('click', function() {{
+          var members = (cluster.teamKeys || []).filter(function(k) {{ return teams[k]; }});
+          var coords = members.map(function(k) {{ return [teams[k].lat, teams[k].lon]; }});
+          if (coords.length) {{
+            map.fitBounds(L.latLngBounds(coords), {{ padding: [40, 40], maxZoom: CLUSTER_MAX_ZOOM }});
+          }}
+        }});
+        cluster.teamCount = keys.length;
+        clusterMarkers[cell] = cluster;
+      }} else {{
+        cluster.setLatLng([lat, lon]);
+        if (cluster.teamCount !== keys.length) {{
+          cluster.setIcon(clusterIcon(keys.length));
+          cluster.teamCount = keys.length;
+        }}
+      }}
+      cluster.teamKeys = keys;
+    }});
+    Object.keys(clusterMarkers).forEach(function(cell) {{
+      if (!live[cell]) {{
+        map.removeLayer(clusterMarkers[cell]);
+        delete clusterMarkers[cell];
+      }}
+    }});
+  }}
+  map.on('zoomend', scheduleCluster);
+  function upsertMarker(teamId, name, lat, lon) {{
+    applyPositions([{{ id: teamId, name: name, lat: lat, lon: lon }}]);
   }}
   function removeMarker(teamId) {{
     var key = String(teamId);
-    if (markers[key]) {{
-      map.removeLayer(markers[key]);
-      delete markers[key];
+    var team = teams[key];
+    if (team) {{
+      if (map.hasLayer(team.marker)) {{
+        map.removeLayer(team.marker);
+      }}
+      delete teams[key];
+      delete tweens[key];
+      scheduleCluster();
     }}
   }}
   function zoomInMap() {{
@@ -178,8 +360,8 @@ def _map_html(center_lat: float, center_lon: float, zoom: int, basemap_key: str)
   }}
   function fitToMarkers() {{
     var coords = [];
-    Object.keys(markers).forEach(function(key) {{
-      coords.push(markers[key].getLatLng());
+    Object.keys(teams).forEach(function(key) {{
+      coords.push([teams[key].lat, teams[key].lon]);
     }});
     if (!coords.length) {{
       return false;
@@ -482,7 +664,14 @@ class TeamMapCanvas(QWidget):
         basemap_key: str = _DEFAULT_BASEMAP,
     ) -> None:
         super().__init__(parent)
-        self._known_located_teams: set[int] = set()
+        # Last (name, lat, lon) sent to the page per team; deltas that match
+        # it are dropped so unrelated team edits never touch the marker layer.
+        self._sent: dict[int, tuple[str, float, float]] = {}
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(_DELTA_FLUSH_MS)
+        self._flush_timer.timeout.connect(self._flush_deltas)
         self._ready = False
         self._basemap_key = basemap_key if basemap_key in _BASEMAPS else _DEFAULT_BASEMAP
 
@@ -520,6 +709,7 @@ class TeamMapCanvas(QWidget):
         self._view.setHtml(html, base_url)
 
         incident_cache.changed.connect(self._on_cache_changed)
+        team_position_stream.positionsUpdated.connect(self._on_positions)
         self.destroyed.connect(lambda _=None: self._disconnect())
 
     def _disconnect(self) -> None:
@@ -527,6 +717,10 @@ class TeamMapCanvas(QWidget):
             incident_cache.changed.disconnect(self._on_cache_changed)
         except Exception:
             pass
+        try:
+            team_position_stream.positionsUpdated.disconnect(self._on_positions)
+        except Exception:
+            pass
 
     @property
     def ready(self) -> bool:
@@ -539,6 +733,7 @@ class TeamMapCanvas(QWidget):
         self._ready = True
         for doc in incident_cache.get_all("teams"):
             self._apply_team_doc(doc)
+        self._flush_deltas()
         self.mapReady.emit()
 
     def _on_cache_changed(self, collection: str, op: str, doc_id: str) -> None:
@@ -554,20 +749,63 @@ class TeamMapCanvas(QWidget):
         if doc is not None:
             self._apply_team_doc(doc)
 
+    def _on_positions(self, deltas: list) -> None:
+        if not self._ready:
+            return
+        for delta in deltas:
+            try:
+                team_id = int(delta.get("team_id"))
+            except (TypeError, ValueError):
+                continue
+            previous = self._sent.get(team_id)
+            name = previous[0] if previous else self._team_name(team_id)
+            self._queue_delta(team_id, name, delta.get("lat"), delta.get("lon"))
+
     def _apply_team_doc(self, doc: dict[str, Any]) -> None:
         team_id = doc.get("int_id")
         if team_id is None:
             return
         lat = doc.get("current_location_lat")
         lon = doc.get("current_location_lon")
-        if lat is None or lon is None or doc.get("deleted"):
-            if team_id in self._known_located_teams:
-                self._known_located_teams.discard(team_id)
-                self._run_js(f"removeMarker({team_id});")
+        if doc.get("deleted"):
+            lat = lon = None
+        self._queue_delta(team_id, doc.get("name") or f"Team {team_id}", lat, lon)
+
+    def _team_name(self, team_id: int) -> str:
+        for doc in incident_cache.get_all("teams"):
+            if doc.get("int_id") == team_id:
+                return str(doc.get("name") or f"Team {team_id}")
+        return f"Team {team_id}"
+
+    def _queue_delta(self, team_id: int, name: str, lat: Any, lon: Any) -> None:
+        previous = self._sent.get(team_id)
+        if lat is None or lon is None:
+            if previous is None:
+                self._pending.pop(team_id, None)
+                return
+            self._sent.pop(team_id, None)
+            self._pending[team_id] = {"id": team_id, "lat": None, "lon": None}
+        else:
+            try:
+                current = (str(name), float(lat), float(lon))
+            except (TypeError, ValueError):
+                # The server relays positions as sent; skip one that is not a number.
+                logger.debug("Ignoring non-numeric position for team %s: %r, %r", team_id, lat, lon)
+                return
+            if current == previous:
+                return
+            self._sent[team_id] = current
+            self._pending[team_id] = {"id": team_id, "name": current[0], "lat": current[1], "lon": current[2]}
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_deltas(self) -> None:
+        self._flush_timer.stop()
+        if not self._pending or not self._ready:
             return
-        name = doc.get("name") or f"Team {team_id}"
-        self._known_located_teams.add(team_id)
-        self._run_js(f"upsertMarker({team_id}, {json.dumps(name)}, {lat}, {lon});")
+        batch = list(self._pending.values())
+        self._pending = {}
+        self._run_js(f"applyPositions({json.dumps(batch)});")
 
     def set_basemap(self, key: str, callback: Any | None = None) -> None:
         if not self._ready or key not in _BASEMAPS:
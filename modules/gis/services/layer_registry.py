@@ -28,14 +28,17 @@ def get_default_layer_registry() -> LayerRegistry:
         [
             LayerDefinition("teams", "Teams", "operations", "Current team positions", GeometryType.POINT, True, True, True, 10),
             LayerDefinition("tracks", "Tracks", "operations", "Movement tracks for teams and vehicles", GeometryType.LINE, True, True, True, 20),
+            LayerDefinition("track_density", "Track Density", "operations", "Heatmap of team and aircraft tracks", None, True, True, False, 25),
             LayerDefinition("tasks", "Tasks", "operations", "Task points, routes, and areas", None, True, True, True, 30),
             LayerDefinition("assignments", "Assignments", "operations", "Assignment and control areas", GeometryType.POLYGON, True, True, True, 40),
             LayerDefinition("clues", "Clues", "intel", "Clues and sightings", None, True, True, True, 50),
+            LayerDefinition("clue_heatmap", "Clue Heatmap", "intel", "Heatmap of clues, sightings and evidence", None, True, True, False, 55),
             LayerDefinition("subjects", "Subjects", "intel", "Subject planning and event locations", None, True, True, True, 60),
             LayerDefinition("hazards", "Hazards", "safety", "Hazards and closures", None, True, True, True, 70),
             LayerDefinition("comm_sites", "Communications Sites", "communications", "Radio and communications sites", None, True, True, True, 80),
             LayerDefinition("logistics_sites", "Logistics Sites", "logistics", "Logistics and support locations", None, True, True, True, 90),
             LayerDefinition("planning_overlays", "Planning Overlays", "planning", "Planning overlays and sketches", None, True, True, True, 100),
+            LayerDefinition("search_probability", "Probability of Area", "planning", "POA surface from the search probability grid", None, True, True, False, 105),
             LayerDefinition("imported_overlays", "Imported Overlays", "planning", "Imported external overlay references", None, True, True, True, 110),
         ]
     )
@@ -93,9 +93,9 @@ class UnitsOrganizationsRepository:
     # ---- Rank rows CRUD ------------------------------------------------------
     def list_ranks(self, rank_structure_id: int) -> list[dict[str, Any]]:
         try:
-            docs = catalog_cache.get(
+            docs = catalog_cache.view(
                 _CATALOG_RANKS, "/api/master/ranks", params={"structure_id": rank_structure_id}
-            ) or []
+            ) or ()
         except Exception:
             return []
         # Translate the API's storage field names back to the names the
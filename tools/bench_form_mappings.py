@@ -0,0 +1,132 @@
+"""Benchmark mapping resolution and table-heavy form fills.
+
+Times the compiled resolver over every shipped mapping in
+``modules/forms_creator/mappings`` (per-call ``_resolve_value`` against the
+cached ``CompiledMapping`` plan), then fills the ICS-214 activity log and the
+ICS-205 channel table from a form set with synthetic data. Run from the
+repository root:
+
+    python tools/bench_form_mappings.py --rows 200 --set fema
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT))
+
+from modules.forms_creator.context import _source_paths  # noqa: E402
+from modules.forms_creator.form_set_registry import FormSetRegistry  # noqa: E402
+from modules.forms_creator.pdf_filler.pdf_filler import PDFFiller  # noqa: E402
+
+_MAPPINGS_DIR = _ROOT / "modules" / "forms_creator" / "mappings"
+
+
+def _time(label: str, fn: Callable[[], object], repeat: int) -> None:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    print(f"{label:<44} median {statistics.median(samples):8.2f} ms   min {min(samples):8.2f} ms")
+
+
+def _synthetic_data(mapping: dict[str, Any]) -> dict[str, Any]:
+    """A data dict with a string at every path the mapping's fields read."""
+    data: dict[str, Any] = {}
+    for field in mapping.get("fields", []):
+        for path in _source_paths(field.get("source") if isinstance(field, dict) else None):
+            node = data
+            *parents, leaf = path.split(".")
+            for segment in parents:
+                child = node.setdefault(segment, {})
+                if not isinstance(child, dict):
+                    break
+                node = child
+            else:
+                node.setdefault(leaf, f"{leaf} value")
+    return data
+
+
+def _bench_resolvers(repeat: int) -> None:
+    for mapping_path in sorted(_MAPPINGS_DIR.glob("*.json")):
+        filler = PDFFiller(mapping_path)
+        data = _synthetic_data(filler.mapping)
+        sources = [f.get("source") for f in filler.fields if isinstance(f, dict)]
+        plan = filler._compiled().fields
+
+        def per_call() -> None:
+            for source in sources:
+                try:
+                    filler._resolve_value(data, source)
+                except Exception:
+                    pass
+
+        def compiled_plan() -> None:
+            for _name, resolve, _default, warning in plan:
+                if warning is None:
+                    try:
+                        resolve(data)
+                    except Exception:
+                        pass
+
+        name = mapping_path.name.removesuffix(".mapping.json")
+        _time(f"{name} resolve x100 (per call)", lambda: [per_call() for _ in range(100)], repeat)
+        _time(f"{name} resolve x100 (compiled)", lambda: [compiled_plan() for _ in range(100)], repeat)
+
+
+def _form_row_groups(form_id: str) -> list[dict] | None:
+    definition = FormSetRegistry().get_form_definition(form_id)
+    return definition.row_groups if definition else None
+
+
+def _bench_fill(form_set: str, form_id: str, data: dict[str, Any], out_dir: Path, repeat: int) -> None:
+    form_dir = _ROOT / "forms" / "sets" / form_set / form_id
+    if not (form_dir / "template.pdf").exists():
+        print(f"{form_set}/{form_id}: no template, skipped")
+        return
+    filler = PDFFiller(form_dir / "mapping.json")
+    data = {**_synthetic_data(filler.mapping), **data}
+    form_row_groups = _form_row_groups(form_id)
+    output = out_dir / f"{form_id}.pdf"
+
+    def fill() -> None:
+        filler.fill(data, form_dir / "template.pdf", output, form_row_groups=form_row_groups)
+
+    _time(f"{form_set}/{form_id} fill", fill, repeat)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--set", default="fema", dest="form_set")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    _bench_resolvers(args.repeat)
+
+    entries = [
+        {"timestamp_display": f"10/18 {n % 24:02d}{n % 60:02d}", "text": f"Entry {n}: " + "search progress " * (n % 7)}
+        for n in range(args.rows)
+    ]
+    channels = [
+        {"function": "Tactical", "channel_name": f"TAC {n}", "rx_freq": "155.1600", "tx_freq": "155.1600", "mode": "A"}
+        for n in range(args.rows)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        _bench_fill(args.form_set, "ics_214", {"entries": entries}, out_dir, args.repeat)
+        _bench_fill(args.form_set, "ics_205", {"channels": channels}, out_dir, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
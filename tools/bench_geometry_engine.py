@@ -0,0 +1,99 @@
+"""Benchmark the batch geometry engine on a synthetic large incident.
+
+Builds a grid of search segments around a reference point, scatters team
+positions across it, assigns each team one or more segments, then times the
+operations the GIS analysis endpoints run. Run from the repository root:
+
+    python tools/bench_geometry_engine.py --teams 200 --segments 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "data" / "db"))
+
+from sarapp_db.services import geometry_engine  # noqa: E402
+
+_REF_LON = -85.6
+_REF_LAT = 42.9
+_SEGMENT_SIZE_M = 400.0
+
+
+def _segment_wkts(count: int) -> list[str]:
+    projection = geometry_engine.projection_for_lonlat(_REF_LON, _REF_LAT)
+    origin = projection.forward(np.array([[_REF_LON, _REF_LAT]]))[0]
+    side = int(np.ceil(np.sqrt(count)))
+    rows = np.arange(count) // side
+    cols = np.arange(count) % side
+    x0 = origin[0] + cols * _SEGMENT_SIZE_M
+    y0 = origin[1] + rows * _SEGMENT_SIZE_M
+    corners = np.stack(
+        [
+            np.column_stack((x0, y0)),
+            np.column_stack((x0 + _SEGMENT_SIZE_M, y0)),
+            np.column_stack((x0 + _SEGMENT_SIZE_M, y0 + _SEGMENT_SIZE_M)),
+            np.column_stack((x0, y0 + _SEGMENT_SIZE_M)),
+            np.column_stack((x0, y0)),
+        ],
+        axis=1,
+    )
+    lonlat = projection.inverse(corners.reshape(-1, 2)).reshape(count, 5, 2)
+    return [
+        "POLYGON((" + ", ".join(f"{lon:.7f} {lat:.7f}" for lon, lat in ring) + "))"
+        for ring in lonlat
+    ]
+
+
+def _time(label: str, fn: Callable[[], object], repeat: int) -> None:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    print(f"{label:<38} median {statistics.median(samples):8.2f} ms   min {min(samples):8.2f} ms")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=200)
+    parser.add_argument("--segments", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(7)
+    segment_wkts = _segment_wkts(args.segments)
+    segments = geometry_engine.from_wkt(segment_wkts)
+    min_lon, min_lat, max_lon, max_lat = (float(v) for v in shapely.total_bounds(segments))
+    positions = np.column_stack(
+        (rng.uniform(min_lon, max_lon, args.teams), rng.uniform(min_lat, max_lat, args.teams))
+    )
+    pair_team = np.repeat(np.arange(args.teams), 2)
+    pair_segment = rng.integers(0, args.segments, size=pair_team.size)
+
+    print(f"{args.teams} teams, {args.segments} segments, {args.repeat} runs each")
+    _time("parse WKT", lambda: geometry_engine.from_wkt(segment_wkts), args.repeat)
+    _time(
+        "teams outside assigned segments",
+        lambda: geometry_engine.covered_by_assigned(positions, segments, pair_team, pair_segment),
+        args.repeat,
+    )
+    _time("locate teams in any segment", lambda: geometry_engine.locate_points(positions, segments), args.repeat)
+    _time("area + perimeter (local UTM)", lambda: geometry_engine.measure(segments), args.repeat)
+    _time("buffer 50 m", lambda: geometry_engine.buffer(segments, 50.0), args.repeat)
+    _time("buffer 50 m + dissolve", lambda: geometry_engine.buffer(segments, 50.0, dissolve=True), args.repeat)
+    _time("dissolve", lambda: geometry_engine.dissolve(segments), args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+"""Profile every form in every form set against a synthetic large incident.
+
+For each form set and each catalog form, resolves the form through the set's
+fallback chain (``FormResolver``), builds its data context from a synthetic
+incident (hundreds of rows per endpoint; see ``SyntheticIncident``) and fills
+it, recording per form:
+
+- where the form came from (the set itself or a fallback set);
+- timings for context build (``required_sections`` prefetch), value
+  resolution, template clone, row groups, field writes and serialization
+  (the phases ``PDFFiller.fill(timings=...)`` reports);
+- warnings, split into unresolved fields, resolution errors and mapping
+  fields missing from the template, and how many rows each catalog table
+  found in the context.
+
+The JSON report is meant to be kept per commit and compared: pass an
+earlier report as ``--baseline`` to flag forms that got slower by more than
+``--threshold`` or gained unresolved fields (the exit status is 1 when any
+did). Run from the repository root:
+
+    python tools/profile_form_sets.py --rows 300 --json profile.json --html profile.html
+    python tools/profile_form_sets.py --baseline profile.json --set fema
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from pypdf import PdfReader
+
+_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(_ROOT))
+
+from modules.forms_creator.context import FormDataContext, required_sections  # noqa: E402
+from modules.forms_creator.form_set_registry import FormSetRegistry  # noqa: E402
+from modules.forms_creator.pdf_filler.pdf_filler import PDFFiller  # noqa: E402
+from modules.forms_creator.resolver import FormNotAvailableError, FormResolver  # noqa: E402
+
+PHASES = ("context", "resolve", "clone", "row_groups", "write", "serialize")
+
+_INCIDENT_ID = "profile-incident"
+_START = datetime(2026, 10, 18, 6, 0, tzinfo=timezone.utc)
+_QUOTED = re.compile(r"'(.+?)'")
+# Endpoints that return one document rather than a list of rows.
+_DETAIL = re.compile(
+    r"/api/incidents/[^/]+$|/facilities/[^/]+$|/ics214/streams/[^/]+$|/detail$|/snapshot$"
+    r"|/safety/orm/form$|/safety/ics208$|/operations/debriefs/[^/]+$"
+)
+
+
+class _Row(dict):
+    """A synthetic API record: any key not set explicitly reads as a value.
+
+    Keys that look like timestamps read as ISO datetimes, ``entries`` as a
+    list of rows, ``collections`` as a mapping of lists and ``tags`` as an
+    empty list; everything else as ``"<key> <n>"``, so ids line up between
+    endpoints (row 3 of positions and row 3 of assignments share a
+    ``position_id``).
+    """
+
+    def __init__(self, index: int, rows: int) -> None:
+        super().__init__()
+        self._index = index
+        self._rows = rows
+
+    def _synthetic(self, key: str) -> Any:
+        if key == "entries":
+            return [_Row(n, self._rows) for n in range(self._rows)]
+        if key == "collections":
+            return {"hazards": [_Row(n, self._rows) for n in range(self._rows)]}
+        if key == "tags":
+            return []
+        if key.endswith(("_time", "_date", "_at", "_utc", "timestamp", "_start", "_end")):
+            return (_START + timedelta(minutes=7 * self._index)).isoformat()
+        if key.startswith("include_on"):
+            return True
+        return f"{key} {self._index}"
+
+    def __missing__(self, key: str) -> Any:
+        return self.setdefault(key, self._synthetic(key))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key]
+
+
+class SyntheticIncident:
+    """``fetch(path, **params)`` for ``FormDataContext`` over a large fake incident.
+
+    List endpoints return ``rows`` records; detail endpoints return one record
+    (whose ``entries`` list, for ICS-214 streams, is ``rows`` long). Every
+    call is counted per path.
+    """
+
+    def __init__(self, rows: int) -> None:
+        self.rows = rows
+        self.calls: dict[str, int] = {}
+
+    def __call__(self, path: str, **params: Any) -> Any:
+        self.calls[path] = self.calls.get(path, 0) + 1
+        if _DETAIL.search(path):
+            return _Row(0, self.rows)
+        return [_Row(n, self.rows) for n in range(self.rows)]
+
+
+def _warning_summary(warnings: list[str]) -> dict[str, list[str]]:
+    summary: dict[str, list[str]] = {"unresolved": [], "errors": [], "missing_in_template": [], "other": []}
+    for warning in warnings:
+        match = _QUOTED.search(warning)
+        name = match.group(1) if match else warning
+        if warning.startswith("No value resolved"):
+            summary["unresolved"].append(name)
+        elif warning.startswith("Failed to resolve"):
+            summary["errors"].append(warning)
+        elif warning.endswith("not found in template"):
+            summary["missing_in_template"].append(name)
+        else:
+            summary["other"].append(warning)
+    return summary
+
+
+def _profile_form(
+    registry: FormSetRegistry,
+    resolver: FormResolver,
+    set_id: str,
+    form_id: str,
+    rows: int,
+    repeat: int,
+    out_dir: Path,
+) -> dict[str, Any]:
+    record: dict[str, Any] = {"set": set_id, "form": form_id}
+    try:
+        template_pdf, mapping_json = resolver.resolve(form_id, set_id)
+    except FormNotAvailableError:
+        record["status"] = "unavailable"
+        return record
+    supplied_by = template_pdf.parent.parent
+    record["source_set"] = next(
+        (meta.id for meta in registry.list_sets() if meta.path.resolve() == supplied_by.resolve()), None
+    )
+    definition = registry.get_form_definition(form_id)
+    form_row_groups = definition.row_groups if definition else None
+
+    samples: list[dict[str, float]] = []
+    warnings: list[str] = []
+    output = out_dir / f"{set_id}_{form_id}.pdf"
+    try:
+        # The first (untimed) fill parses the template and mapping, as the
+        # app's template cache would already have done.
+        PDFFiller(mapping_json).fill({}, template_pdf, output)
+        for _ in range(max(1, repeat)):
+            timings: dict[str, float] = {}
+            started = time.perf_counter()
+            filler = PDFFiller(mapping_json)
+            fetch = SyntheticIncident(rows)
+            ctx = FormDataContext(fetch).lazy(_INCIDENT_ID)
+            ctx.prefetch(required_sections(filler.mapping, form_row_groups))
+            timings["context"] = time.perf_counter() - started
+            warnings = filler.fill(ctx, template_pdf, output, form_row_groups=form_row_groups, timings=timings)
+            timings["total"] = time.perf_counter() - started
+            samples.append(timings)
+    except Exception as exc:  # a broken form must not end the run
+        record["status"] = "error"
+        record["error"] = f"{type(exc).__name__}: {exc}"
+        return record
+
+    record["status"] = "ok"
+    record["endpoints"] = len(fetch.calls)
+    record["timings_ms"] = {
+        phase: round(statistics.median(s.get(phase, 0.0) for s in samples) * 1000.0, 3)
+        for phase in (*PHASES, "total")
+    }
+    record["pages"] = len(PdfReader(str(output)).pages)
+    record["warnings"] = _warning_summary(warnings)
+    # Rows each catalog table found in the context; None means nothing in the
+    # context supplies that data_key, so the table only fills from extra_data.
+    record["table_rows"] = {
+        rg["data_key"]: (len(rows) if isinstance(rows := ctx.get(rg["data_key"]), list) else None)
+        for rg in form_row_groups or []
+        if rg.get("data_key")
+    }
+    return record
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], threshold: float, min_ms: float) -> list[dict[str, Any]]:
+    """Annotate ``report`` forms with their baseline delta; return the regressions."""
+    previous = {(f["set"], f["form"]): f for f in baseline.get("forms", [])}
+    regressions = []
+    for form in report["forms"]:
+        before = previous.get((form["set"], form["form"]))
+        if before is None or form["status"] != "ok" or before.get("status") != "ok":
+            continue
+        total, was = form["timings_ms"]["total"], before["timings_ms"]["total"]
+        new_unresolved = sorted(set(form["warnings"]["unresolved"]) - set(before["warnings"]["unresolved"]))
+        form["baseline"] = {"total_ms": was, "delta_ms": round(total - was, 3), "new_unresolved": new_unresolved}
+        slower = total > was * (1.0 + threshold) and total - was >= min_ms
+        if slower or new_unresolved:
+            form["baseline"]["regressed"] = True
+            regressions.append(form)
+    return regressions
+
+
+def _html_report(report: dict[str, Any]) -> str:
+    def cell(value: Any, cls: str = "") -> str:
+        attr = f' class="{cls}"' if cls else ""
+        return f"<td{attr}>{html.escape(str(value))}</td>"
+
+    has_baseline = any("baseline" in form for form in report["forms"])
+    head = ["Set", "Form", "Source", "Status", *PHASES, "Total ms", "Unresolved", "Missing in PDF", "Table rows"]
+    if has_baseline:
+        head += ["Δ ms", "New unresolved"]
+    rows = []
+    for form in report["forms"]:
+        baseline = form.get("baseline") or {}
+        cls = ' class="regressed"' if baseline.get("regressed") else ""
+        cells = [cell(form["set"]), cell(form["form"]), cell(form.get("source_set") or ""), cell(form["status"])]
+        if form["status"] == "ok":
+            timings = form["timings_ms"]
+            cells += [cell(f"{timings[p]:.1f}", "num") for p in PHASES]
+            cells.append(cell(f"{timings['total']:.1f}", "num"))
+            warnings = form["warnings"]
+            cells.append(f'<td title="{html.escape(", ".join(warnings["unresolved"]))}">{len(warnings["unresolved"])}</td>')
+            cells.append(cell(len(warnings["missing_in_template"]), "num"))
+            cells.append(cell(", ".join(f"{key}: {'-' if n is None else n}" for key, n in form["table_rows"].items())))
+        else:
+            cells.append(f'<td colspan="{len(PHASES) + 4}">{html.escape(form.get("error", ""))}</td>')
+        if has_baseline:
+            cells.append(cell(baseline.get("delta_ms", ""), "num"))
+            cells.append(cell(", ".join(baseline.get("new_unresolved", []))))
+        rows.append(f"<tr{cls}>{''.join(cells)}</tr>")
+    meta = report["meta"]
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Form set profile</title><style>"
+        "body{font-family:sans-serif;font-size:13px}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:2px 6px}td.num{text-align:right}"
+        "tr.regressed{background:#fdd}</style></head><body>"
+        f"<h1>Form set profile</h1><p>Commit {html.escape(str(meta.get('commit')))}, "
+        f"{meta['rows']} rows per endpoint, median of {meta['repeat']}, {html.escape(meta['created'])}</p>"
+        f"<table><tr>{''.join(f'<th>{html.escape(h)}</th>' for h in head)}</tr>{''.join(rows)}</table>"
+        "</body></html>\n"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300, help="rows per list endpoint")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--set", action="append", dest="sets", help="profile only this set (repeatable)")
+    parser.add_argument("--form", action="append", dest="forms", help="profile only this form (repeatable)")
+    parser.add_argument("--json", type=Path, help="write the JSON report here")
+    parser.add_argument("--html", type=Path, help="write the HTML report here")
+    parser.add_argument("--baseline", type=Path, help="earlier JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown that counts as a regression")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    registry = FormSetRegistry()
+    resolver = FormResolver(registry)
+    sets = [meta.id for meta in registry.list_sets() if not args.sets or meta.id in args.sets]
+    forms = [entry.id for entry in registry.list_catalog() if not args.forms or entry.id in args.forms]
+
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for set_id in sets:
+            for form_id in forms:
+                record = _profile_form(registry, resolver, set_id, form_id, args.rows, args.repeat, Path(tmp))
+                records.append(record)
+                if record["status"] == "ok":
+                    timings = record["timings_ms"]
+                    print(
+                        f"{set_id + '/' + form_id:<32} {timings['total']:8.1f} ms  "
+                        + "  ".join(f"{p} {timings[p]:.1f}" for p in PHASES)
+                        + f"  unresolved {len(record['warnings']['unresolved'])}"
+                    )
+                elif record["status"] == "error":
+                    print(f"{set_id + '/' + form_id:<32} ERROR {record['error']}")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "rows": args.rows,
+            "repeat": args.repeat,
+        },
+        "forms": records,
+    }
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["meta"]["baseline_commit"] = baseline.get("meta", {}).get("commit")
+        regressions = compare(report, baseline, args.threshold, args.min_ms)
+        for form in regressions:
+            delta = form["baseline"]
+            print(
+                f"REGRESSION {form['set']}/{form['form']}: {delta['total_ms']:.1f} -> "
+                f"{form['timings_ms']['total']:.1f} ms"
+                + (f", new unresolved {', '.join(delta['new_unresolved'])}" if delta["new_unresolved"] else "")
+            )
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.html:
+        args.html.write_text(_html_report(report), encoding="utf-8")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
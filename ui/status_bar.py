@@ -93,10 +93,7 @@ class AppStatusBar(QtWidgets.QStatusBar):
     # Connection status — driven by ConnectionManager listener
 
     def on_connection_snapshot(self, snapshot) -> None:
-        """Called from any thread; schedules label update on the main thread."""
-        QtCore.QTimer.singleShot(0, lambda: self._apply_snapshot(snapshot))
-
-    def _apply_snapshot(self, snapshot) -> None:
+        """Called on the GUI thread via utils.connection_relay."""
         try:
             state_key = snapshot.state.name if hasattr(snapshot.state, "name") else str(snapshot.state)
             text, style = _CONNECTION_STYLES.get(state_key, ("● —", "color: #888888;"))
@@ -9,10 +9,18 @@ Usage:
 
     data = api_client.get("/api/objectives", params={"incident_id": "2025-FAIR"})
     api_client.post("/api/objectives", json={...})
+
+``api_client`` is synchronous: call it from worker threads, or for quick
+requests only on the GUI thread. Panels that load several things at once
+should go through ``utils.api_executor.api_executor`` instead, which runs
+``_AsyncAPIClient`` requests concurrently off the GUI thread and delivers
+results by signal.
 """
 
 from __future__ import annotations
 
+import asyncio
+import importlib.util
 import logging
 from pathlib import Path
 from typing import Any
@@ -24,6 +32,9 @@ logger = logging.getLogger(__name__)
 DEFAULT_BASE_URL = "http://localhost:8765"
 _DEFAULT_BASE_URL = DEFAULT_BASE_URL
 _TIMEOUT_SECONDS = 10
+# HTTP/2 needs the optional ``h2`` package (``httpx[http2]``); without it the
+# async client falls back to a pool of HTTP/1.1 connections.
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
 
 class APIError(Exception):
@@ -34,6 +45,28 @@ class APIError(Exception):
         self.status_code = status_code
 
 
+def _raise_for_status(resp: httpx.Response) -> None:
+    if resp.status_code >= 400:
+        try:
+            detail = resp.json().get("detail", resp.text)
+        except Exception:
+            detail = resp.text
+        raise APIError(str(detail), status_code=resp.status_code)
+
+
+def _json_body(resp: httpx.Response) -> Any:
+    _raise_for_status(resp)
+    if not resp.content:
+        return None
+    return resp.json()
+
+
+def _clean_params(params: dict[str, Any] | None) -> dict[str, Any] | None:
+    if not params:
+        return params
+    return {k: v for k, v in params.items() if v is not None}
+
+
 class _APIClient:
     """Thin HTTP client that routes all requests to the active SARApp server.
 
@@ -43,6 +76,8 @@ class _APIClient:
 
     def __init__(self) -> None:
         self._base_url: str = _DEFAULT_BASE_URL
+        # Set by configure_test_transport so the async client can follow.
+        self._asgi_app: Any | None = None
         self._client = self._make_client()
 
     def _make_client(self) -> httpx.Client:
@@ -60,6 +95,7 @@ class _APIClient:
         """Point the client at a specific server URL.  Called by the connection
         manager when a server is found or offline mode is entered."""
         self._base_url = base_url.rstrip("/")
+        self._asgi_app = None
         try:
             self._client.close()
         except Exception:
@@ -87,6 +123,7 @@ class _APIClient:
         except Exception:
             pass
         self._base_url = "http://testserver"
+        self._asgi_app = app
         self._client = TestClient(app, base_url=self._base_url)
 
     @property
@@ -136,20 +173,14 @@ class _APIClient:
     def get_bytes(self, path: str, *, params: dict[str, Any] | None = None) -> bytes:
         """GET a binary response body (e.g. a file download)."""
         url = self._build_url(path)
-        if params:
-            params = {k: v for k, v in params.items() if v is not None}
+        params = _clean_params(params)
         try:
             resp = self._request_with_retry("GET", url, json=None, params=params)
         except httpx.TransportError as exc:
             raise APIError(f"Server unreachable: {exc}") from exc
         except Exception as exc:
             raise APIError(f"Request failed: {exc}") from exc
-        if resp.status_code >= 400:
-            try:
-                detail = resp.json().get("detail", resp.text)
-            except Exception:
-                detail = resp.text
-            raise APIError(str(detail), status_code=resp.status_code)
+        _raise_for_status(resp)
         return resp.content
 
     # ------------------------------------------------------------------
@@ -177,8 +208,7 @@ class _APIClient:
 
     def _send(self, method: str, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> Any:
         url = self._build_url(path)
-        if params:
-            params = {k: v for k, v in params.items() if v is not None}
+        params = _clean_params(params)
         try:
             resp = self._request_with_retry(method, url, json=json, params=params)
         except httpx.TransportError as exc:
@@ -189,16 +219,107 @@ class _APIClient:
         return self._handle_response(resp)
 
     def _handle_response(self, resp: httpx.Response) -> Any:
-        if resp.status_code >= 400:
+        return _json_body(resp)
+
+
+class _AsyncAPIClient:
+    """Async companion of :class:`_APIClient` for concurrent requests.
+
+    Follows the sync client's server: every request goes to its current
+    ``base_url`` (or its in-process test app), rebuilding the pooled
+    ``httpx.AsyncClient`` when that changes. Over HTTPS (the cloud router)
+    requests are multiplexed on one HTTP/2 connection when ``h2`` is
+    installed; plain-HTTP LAN servers get a pool of HTTP/1.1 connections.
+
+    An ``httpx.AsyncClient`` belongs to the event loop it was first used
+    on, so use one instance per loop; ``utils.api_executor`` owns the one
+    the desktop UI shares. Raises :class:`APIError` like the sync client.
+    """
+
+    def __init__(self, source: _APIClient, *, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self._source = source
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._client_key: tuple[str, int] | None = None
+
+    @property
+    def base_url(self) -> str:
+        return self._source.base_url
+
+    def _current_client(self) -> httpx.AsyncClient:
+        app = self._source._asgi_app
+        key = (self._source.base_url, id(app))
+        if self._client is None or key != self._client_key:
+            previous = self._client
+            transport = self._transport
+            if transport is None and app is not None:
+                transport = httpx.ASGITransport(app=app)
+            self._client = httpx.AsyncClient(
+                base_url=self._source.base_url,
+                timeout=_TIMEOUT_SECONDS,
+                http2=_HTTP2_AVAILABLE,
+                transport=transport,
+                limits=httpx.Limits(
+                    max_keepalive_connections=10,
+                    max_connections=20,
+                    keepalive_expiry=None,
+                ),
+            )
+            self._client_key = key
+            if previous is not None:
+                # Requests already in flight on the old server finish (or time
+                # out) before its pool is closed.
+                loop = asyncio.get_running_loop()
+                loop.call_later(_TIMEOUT_SECONDS, lambda: loop.create_task(previous.aclose()))
+        return self._client
+
+    async def get(self, path: str, *, params: dict[str, Any] | None = None) -> Any:
+        return await self.request("GET", path, params=params)
+
+    async def post(self, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> Any:
+        return await self.request("POST", path, json=json, params=params)
+
+    async def put(self, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> Any:
+        return await self.request("PUT", path, json=json, params=params)
+
+    async def patch(self, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> Any:
+        return await self.request("PATCH", path, json=json, params=params)
+
+    async def delete(self, path: str, *, params: dict[str, Any] | None = None) -> Any:
+        return await self.request("DELETE", path, params=params)
+
+    async def get_bytes(self, path: str, *, params: dict[str, Any] | None = None) -> bytes:
+        resp = await self._send("GET", path, json=None, params=params)
+        _raise_for_status(resp)
+        return resp.content
+
+    async def request(
+        self, method: str, path: str, *, json: Any = None, params: dict[str, Any] | None = None
+    ) -> Any:
+        return _json_body(await self._send(method, path, json=json, params=params))
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_key = None
+
+    async def _send(
+        self, method: str, path: str, *, json: Any, params: dict[str, Any] | None
+    ) -> httpx.Response:
+        client = self._current_client()
+        url = ("" if path.startswith("/") else "/") + path
+        params = _clean_params(params) or None
+        try:
             try:
-                detail = resp.json().get("detail", resp.text)
-            except Exception:
-                detail = resp.text
-            raise APIError(str(detail), status_code=resp.status_code)
-
-        if not resp.content:
-            return None
-        return resp.json()
+                return await client.request(method, url, json=json, params=params)
+            except httpx.RemoteProtocolError:
+                # Stale pooled connection; see _APIClient._request_with_retry.
+                return await client.request(method, url, json=json, params=params)
+        except httpx.TransportError as exc:
+            raise APIError(f"Server unreachable: {exc}") from exc
+        except Exception as exc:
+            raise APIError(f"Request failed: {exc}") from exc
 
 
 # Module-level singleton — import and use directly.
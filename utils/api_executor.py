@@ -0,0 +1,186 @@
+"""Runs SARApp API requests off the GUI thread and delivers them by signal.
+
+``api_executor`` owns one asyncio event loop on a background thread and the
+``_AsyncAPIClient`` bound to it, so a panel can start all of its loads at
+once instead of making them one after another, or hand-rolling a QThread per
+request:
+
+    request = api_executor.get("/api/master/personnel")
+    request.completed.connect(self._on_personnel)
+    request.failed.connect(self._on_load_error)   # receives the APIError
+
+Every call returns an :class:`APIRequest` whose ``completed``/``failed``
+signals fire on the GUI thread. Identical GETs (same server, path and
+params) submitted while one is in flight share that request; each caller
+still gets its own copy of the result. ``run()`` takes a coroutine factory
+for anything more involved, e.g. ``asyncio.gather`` over several calls.
+
+``APIRequest.cancel()`` stops delivery (call it when the panel closes); a
+request nobody is waiting for any more is cancelled on the wire.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable
+
+from PySide6.QtCore import QObject, Signal
+
+from utils.api_client import APIError, _AsyncAPIClient, _clean_params, api_client
+
+logger = logging.getLogger(__name__)
+
+
+class APIRequest(QObject):
+    """Handle for one submitted request; connect before returning to the event loop."""
+
+    completed = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, executor: "APIExecutor") -> None:
+        super().__init__()
+        self._executor = executor
+        self._call: _Call | None = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        if not self.cancelled:
+            self.cancelled = True
+            self._executor._release(self)
+
+
+@dataclass(eq=False)
+class _Call:
+    key: Hashable | None
+    handles: list[APIRequest] = field(default_factory=list)
+    future: Future | None = None
+
+
+class APIExecutor(QObject):
+    # Internal: crosses from the loop thread to the GUI thread.
+    _finished = Signal(object, object, object)
+
+    def __init__(self, client: _AsyncAPIClient | None = None) -> None:
+        super().__init__()
+        self.client = client or _AsyncAPIClient(api_client)
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, _Call] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._finished.connect(self._deliver)
+
+    # ------------------------------------------------------------------
+    # Public request helpers
+    # ------------------------------------------------------------------
+
+    def get(self, path: str, *, params: dict[str, Any] | None = None) -> APIRequest:
+        params = _clean_params(params)
+        # repr() keeps the key hashable when a param value is a list.
+        key = ("GET", self.client.base_url, path, repr(sorted((params or {}).items())))
+        return self._submit(lambda client: client.get(path, params=params), key)
+
+    def post(self, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> APIRequest:
+        return self._submit(lambda client: client.post(path, json=json, params=params))
+
+    def put(self, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> APIRequest:
+        return self._submit(lambda client: client.put(path, json=json, params=params))
+
+    def patch(self, path: str, *, json: Any = None, params: dict[str, Any] | None = None) -> APIRequest:
+        return self._submit(lambda client: client.patch(path, json=json, params=params))
+
+    def delete(self, path: str, *, params: dict[str, Any] | None = None) -> APIRequest:
+        return self._submit(lambda client: client.delete(path, params=params))
+
+    def run(self, factory: Callable[[_AsyncAPIClient], Awaitable[Any]]) -> APIRequest:
+        """Run ``factory(client)`` on the executor's loop; its result (or
+        error) is delivered like a single request's."""
+        return self._submit(factory)
+
+    def shutdown(self) -> None:
+        loop, thread = self._loop, self._thread
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+        self._loop = self._thread = None
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="sarapp-api-executor", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    def _submit(
+        self, factory: Callable[[_AsyncAPIClient], Awaitable[Any]], key: Hashable | None = None
+    ) -> APIRequest:
+        handle = APIRequest(self)
+        with self._lock:
+            call = self._in_flight.get(key) if key is not None else None
+            if call is not None:
+                call.handles.append(handle)
+                handle._call = call
+                return handle
+            call = _Call(key, [handle])
+            handle._call = call
+            if key is not None:
+                self._in_flight[key] = call
+            call.future = asyncio.run_coroutine_threadsafe(self._execute(call, factory), self._ensure_loop())
+        return handle
+
+    async def _execute(self, call: _Call, factory: Callable[[_AsyncAPIClient], Awaitable[Any]]) -> None:
+        result: Any = None
+        error: APIError | None = None
+        try:
+            result = await factory(self.client)
+        except APIError as exc:
+            error = exc
+        except Exception as exc:
+            logger.exception("API executor request failed")
+            error = APIError(f"Request failed: {exc}")
+        with self._lock:
+            if call.key is not None and self._in_flight.get(call.key) is call:
+                del self._in_flight[call.key]
+            handles = list(call.handles)
+        self._finished.emit(handles, result, error)
+
+    def _release(self, handle: APIRequest) -> None:
+        call = handle._call
+        if call is None:
+            return
+        with self._lock:
+            if handle in call.handles:
+                call.handles.remove(handle)
+            if call.handles or call.future is None:
+                return
+            if call.key is not None and self._in_flight.get(call.key) is call:
+                del self._in_flight[call.key]
+        call.future.cancel()
+
+    def _deliver(self, handles: list[APIRequest], result: Any, error: APIError | None) -> None:
+        first = True
+        for handle in handles:
+            if handle.cancelled:
+                continue
+            if error is not None:
+                handle.failed.emit(error)
+                continue
+            # Callers of a shared GET must not see each other's edits.
+            handle.completed.emit(result if first else copy.deepcopy(result))
+            first = False
+
+
+# Module-level singleton — import and use from the GUI thread.
+api_executor = APIExecutor()
@@ -5,21 +5,58 @@ events. CatalogCache is simpler: it memoizes mostly-stable lookup endpoints
 such as resource types, hazard types, organizations, rank structures, and
 radio libraries so every picker/dialog does not re-query the API on open.
 
-Callers should invalidate a key after writing to the matching catalog.
+- Loads are single-flight: ten pickers opening at once on a cold key make
+  one request; the others wait for it and share its result (or its error).
+- An entry past its TTL but still within ``stale_seconds`` is served as-is
+  while one background load refreshes it (stale-while-revalidate); older
+  entries are reloaded before returning.
+- Values are stored frozen (dicts as read-only mappings, lists as tuples).
+  ``view()`` hands that frozen value out without copying; ``get()`` returns
+  a private mutable copy for callers that edit what they read.
+- At most ``max_entries`` keys are kept, least recently used evicted first.
+
+Callers should invalidate a key after writing to the matching catalog; a
+load already in flight when that happens is returned to its waiters but not
+stored.
 """
 
 from __future__ import annotations
 
-import copy
 import logging
 import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Any, Callable, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TTL_SECONDS = 300
+DEFAULT_STALE_SECONDS = 1800
+DEFAULT_MAX_ENTRIES = 256
+
+
+def freeze(value: Any) -> Any:
+    """Read-only equivalent of a JSON-like value."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable copy of a value produced by :func:`freeze`."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    if isinstance(value, frozenset):
+        return set(thaw(v) for v in value)
+    return value
 
 
 @dataclass(frozen=True)
@@ -50,14 +87,38 @@ class _CatalogEntry:
     def is_fresh(self, now: float) -> bool:
         return self.ttl_seconds <= 0 or (now - self.loaded_at) < self.ttl_seconds
 
+    def is_servable(self, now: float, stale_seconds: float) -> bool:
+        return self.is_fresh(now) or (now - self.loaded_at) < self.ttl_seconds + stale_seconds
+
+
+@dataclass(eq=False)
+class _Load:
+    """One in-flight loader call that concurrent readers of a key wait on."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
 
 class CatalogCache:
     """Thread-safe memoizing cache for stable lookup data."""
 
-    def __init__(self, default_ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+    def __init__(
+        self,
+        default_ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        *,
+        stale_seconds: float = DEFAULT_STALE_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
         self._default_ttl_seconds = default_ttl_seconds
+        self._stale_seconds = stale_seconds
+        self._max_entries = max_entries
         self._lock = threading.Lock()
-        self._entries: Dict[CatalogKey, _CatalogEntry] = {}
+        self._entries: "OrderedDict[CatalogKey, _CatalogEntry]" = OrderedDict()
+        self._loads: Dict[CatalogKey, _Load] = {}
+        # Bumped by invalidate() so loads started before it are not stored.
+        self._generation = 0
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
 
     def get(
         self,
@@ -68,44 +129,110 @@ class CatalogCache:
         ttl_seconds: Optional[int] = None,
         loader: Optional[Callable[[], Any]] = None,
     ) -> Any:
-        key = CatalogKey.from_request(name, path, params)
-        now = time.monotonic()
-        with self._lock:
-            entry = self._entries.get(key)
-            if entry and entry.is_fresh(now):
-                return copy.deepcopy(entry.value)
+        """The cached value as a private mutable copy."""
+        return thaw(self.view(name, path, params=params, ttl_seconds=ttl_seconds, loader=loader))
 
+    def view(
+        self,
+        name: str,
+        path: str,
+        *,
+        params: Optional[dict[str, Any]] = None,
+        ttl_seconds: Optional[int] = None,
+        loader: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """The cached value itself, read-only: mappings and tuples in place
+        of dicts and lists. Prefer this for lookups that only read."""
+        key = CatalogKey.from_request(name, path, params)
+        ttl = self._default_ttl_seconds if ttl_seconds is None else int(ttl_seconds)
         if loader is None:
             from utils.api_client import api_client
 
             loader = lambda: api_client.get(path, params=params if params else None)
 
-        value = loader()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.is_servable(now, self._stale_seconds):
+                self._entries.move_to_end(key)
+                if entry.is_fresh(now):
+                    self._stats["hits"] += 1
+                    return entry.value
+                self._stats["stale_hits"] += 1
+                load, owner = self._claim_load(key)
+                if owner:
+                    threading.Thread(
+                        target=self._run_load,
+                        args=(key, load, loader, ttl, self._generation),
+                        name=f"catalog-refresh-{name}",
+                        daemon=True,
+                    ).start()
+                return entry.value
+            load, owner = self._claim_load(key)
+            generation = self._generation
+            self._stats["misses" if owner else "coalesced"] += 1
+
+        if owner:
+            self._run_load(key, load, loader, ttl, generation)
+        else:
+            load.done.wait()
+        if load.error is not None:
+            raise load.error
+        return load.value
+
+    def _claim_load(self, key: CatalogKey) -> tuple[_Load, bool]:
+        """The in-flight load for ``key``, and whether the caller must run it.
+        Call with the lock held."""
+        load = self._loads.get(key)
+        if load is not None:
+            return load, False
+        load = self._loads[key] = _Load()
+        return load, True
+
+    def _run_load(
+        self,
+        key: CatalogKey,
+        load: _Load,
+        loader: Callable[[], Any],
+        ttl_seconds: int,
+        generation: int,
+    ) -> None:
+        try:
+            load.value = freeze(loader())
+        except BaseException as exc:
+            load.error = exc
+            logger.debug("CatalogCache load failed for %s: %s", key.path, exc)
         with self._lock:
-            self._entries[key] = _CatalogEntry(
-                value=copy.deepcopy(value),
-                loaded_at=now,
-                ttl_seconds=self._default_ttl_seconds if ttl_seconds is None else int(ttl_seconds),
-            )
-        return copy.deepcopy(value)
+            if self._loads.get(key) is load:
+                del self._loads[key]
+            if load.error is None and generation == self._generation:
+                self._entries[key] = _CatalogEntry(value=load.value, loaded_at=time.monotonic(), ttl_seconds=ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        load.done.set()
 
     def invalidate(self, name: Optional[str] = None, path: Optional[str] = None) -> None:
         """Drop entries matching a cache namespace and/or path."""
         with self._lock:
-            if name is None and path is None:
-                self._entries.clear()
-                return
-            for key in list(self._entries):
+            self._generation += 1
+            for key in list(self._entries) + list(self._loads):
                 if name is not None and key.name != name:
                     continue
                 if path is not None and key.path != path:
                     continue
                 self._entries.pop(key, None)
+                # Readers arriving from now on start a fresh load.
+                self._loads.pop(key, None)
 
     def telemetry(self) -> dict[str, Any]:
         with self._lock:
             return {
                 "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "loads_in_flight": len(self._loads),
+                **self._stats,
                 "keys": [
                     {
                         "name": key.name,
@@ -119,4 +246,4 @@ class CatalogCache:
 
 catalog_cache = CatalogCache()
 
-__all__ = ["CatalogCache", "CatalogKey", "catalog_cache"]
+__all__ = ["CatalogCache", "CatalogKey", "catalog_cache", "freeze", "thaw"]
@@ -0,0 +1,55 @@
+"""Deliver ConnectionManager snapshots on the GUI thread.
+
+ConnectionManager calls its listeners on whichever thread changed the
+snapshot, and after startup that is the health monitor's background thread
+(core/networking/health_monitor.py). Widgets, ``QTimer.singleShot`` and the
+shared ``api_client`` must only be touched from the GUI thread, so desktop
+code registers through the relay returned by :func:`gui_relay` instead of
+calling ``manager.add_listener`` directly.
+
+The relay lives on the GUI thread; a snapshot emitted from another thread is
+queued and its listeners run from the event loop, in order. Snapshots set on
+the GUI thread itself (startup, Offline Mode) are still delivered at once.
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import Callable, List
+
+from PySide6.QtCore import QObject, Signal
+
+from core.networking import ConnectionManager, ConnectionSnapshot
+
+_relays: "weakref.WeakKeyDictionary[ConnectionManager, ConnectionSnapshotRelay]" = weakref.WeakKeyDictionary()
+
+
+class ConnectionSnapshotRelay(QObject):
+    # Internal: crosses from the health monitor thread to the GUI thread.
+    _snapshot_posted = Signal(object)
+
+    def __init__(self, manager: ConnectionManager, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._listeners: List[Callable[[ConnectionSnapshot], None]] = []
+        self._snapshot_posted.connect(self._deliver)
+        manager.add_listener(self._snapshot_posted.emit)
+
+    def add_listener(self, listener: Callable[[ConnectionSnapshot], None]) -> None:
+        self._listeners.append(listener)
+
+    def _deliver(self, snapshot: ConnectionSnapshot) -> None:
+        for listener in list(self._listeners):
+            listener(snapshot)
+
+
+def gui_relay(manager: ConnectionManager) -> ConnectionSnapshotRelay:
+    """The relay for ``manager``; call from the GUI thread."""
+
+    relay = _relays.get(manager)
+    if relay is None:
+        relay = ConnectionSnapshotRelay(manager)
+        _relays[manager] = relay
+    return relay
+
+
+__all__ = ["ConnectionSnapshotRelay", "gui_relay"]
@@ -161,6 +161,30 @@ class IncidentCache(QObject):
 
         self.changed.emit(collection, op, doc_id)
 
+    def apply_team_position(self, event: Dict[str, Any]) -> None:
+        """Patch a cached team's current_location_* fields from a
+        `team_position` delta. Thread-safe.
+
+        Fixes arrive as these deltas instead of whole `teams` changes, and
+        live views follow them on utils/team_position_stream.py, so no
+        `changed` is emitted; reads of the team document stay current.
+        """
+        doc_id = event.get("id")
+        if doc_id is None:
+            return
+        with self._lock:
+            bucket = self._store.get("teams", {})
+            doc = bucket.get(doc_id)
+            if doc is None:
+                return
+            bucket[doc_id] = {
+                **doc,
+                "current_location_lat": event.get("lat"),
+                "current_location_lon": event.get("lon"),
+                "current_location_updated_at": event.get("ts"),
+                "current_location_person_record": event.get("person_record"),
+            }
+
     # ------------------------------------------------------------------
     # Reads
     # ------------------------------------------------------------------
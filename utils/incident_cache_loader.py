@@ -86,7 +86,8 @@ def activate_incident(incident_id: Optional[str]) -> None:
             incident_id, exc,
         )
 
-    _ws_client = IncidentWebSocketClient(api_client.base_url, incident_id)
+    # Resolved per connect, so reconnects follow a failover to another server.
+    _ws_client = IncidentWebSocketClient(lambda: api_client.base_url, incident_id)
     _ws_client.start()
 
 
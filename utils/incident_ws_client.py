@@ -1,25 +1,30 @@
 """Background WebSocket connector feeding IncidentCache live updates.
 
 Connects to /api/incidents/{incident_id}/ws on the active SARApp server and
-forwards every parsed JSON message into IncidentCache.apply_event(). Runs on
+forwards every parsed JSON message into IncidentCache.apply_event() (team
+position deltas patch the cached team instead and feed
+utils.team_position_stream). Runs on
 its own QThread so the GUI thread never blocks on socket I/O; reconnects with
-a fixed backoff if the connection drops (server restart, network blip).
+a jittered exponential backoff if the connection drops (server restart,
+network blip). The server URL is resolved on every connect, so a reconnect
+follows the connection manager onto whichever server path is now active.
 """
 
 from __future__ import annotations
 
 import json
 import logging
-import time
+import threading
+from typing import Callable
 
 from PySide6.QtCore import QThread
 
+from core.networking.backoff import Backoff
 from utils.incident_cache import incident_cache
+from utils.team_position_stream import team_position_stream
 
 logger = logging.getLogger(__name__)
 
-_RECONNECT_DELAY_SECONDS = 3
-
 
 def _to_ws_url(http_base_url: str, incident_id: str) -> str:
     ws_base = http_base_url.replace("https://", "wss://").replace("http://", "ws://")
@@ -29,28 +34,41 @@ def _to_ws_url(http_base_url: str, incident_id: str) -> str:
 class IncidentWebSocketClient(QThread):
     """One instance per active incident. Call stop() before discarding."""
 
-    def __init__(self, base_url: str, incident_id: str) -> None:
+    def __init__(self, base_url: str | Callable[[], str], incident_id: str) -> None:
         super().__init__()
-        self._url = _to_ws_url(base_url, incident_id)
+        self._base_url = base_url
         self._incident_id = incident_id
+        self._url = self._resolve_url()
+        self._backoff = Backoff(base_seconds=0.5, max_seconds=30.0)
+        self._stop_event = threading.Event()
         self._stop_requested = False
 
+    def _resolve_url(self) -> str:
+        base_url = self._base_url() if callable(self._base_url) else self._base_url
+        return _to_ws_url(base_url, self._incident_id)
+
     def stop(self) -> None:
         self._stop_requested = True
+        self._stop_event.set()
         self.requestInterruption()
         self.wait(2000)
 
+    def _wait_before_reconnect(self) -> None:
+        self._stop_event.wait(self._backoff.next_delay())
+
     def run(self) -> None:
         import websocket  # websocket-client; imported lazily so headless/test envs don't need it
 
         while not self._stop_requested:
+            self._url = self._resolve_url()
             try:
                 ws = websocket.create_connection(self._url, timeout=10)
             except Exception as exc:
                 logger.warning("IncidentCache WS connect failed (%s): %s", self._url, exc)
-                time.sleep(_RECONNECT_DELAY_SECONDS)
+                self._wait_before_reconnect()
                 continue
 
+            self._backoff.reset()
             logger.info("IncidentCache WS connected for incident '%s'.", self._incident_id)
             # create_connection's timeout also governs recv(); idle gaps longer than it
             # would otherwise look like a dropped connection, so poll with short recv
@@ -72,6 +90,9 @@ class IncidentWebSocketClient(QThread):
                     if event.get("type") == "notification":
                         from notifications.services.incident_bridge import handle_notification_event
                         handle_notification_event(self._incident_id, event.get("notification", {}))
+                    elif event.get("type") == "team_position":
+                        incident_cache.apply_team_position(event)
+                        team_position_stream.push(event)
                     else:
                         incident_cache.apply_event(event)
             except Exception as exc:
@@ -84,4 +105,4 @@ class IncidentWebSocketClient(QThread):
                     pass
 
             if not self._stop_requested:
-                time.sleep(_RECONNECT_DELAY_SECONDS)
+                self._wait_before_reconnect()
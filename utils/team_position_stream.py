@@ -0,0 +1,75 @@
+"""Coalescing feed of team position deltas for map views.
+
+The server sends a bare `{"type": "team_position", "id", "team_id", "lat",
+"lon", "ts", "person_record"}` event on the incident WebSocket for every
+recorded or cleared fix (see
+data/db/sarapp_db/api/ws_hub.py::broadcast_team_position) instead of the
+full `teams` document change. IncidentCache patches the cached team from it
+without emitting `changed`, so maps follow positions here, and a burst of
+fixes is delivered as one batch.
+
+`push()` is safe to call from the WebSocket thread. Deltas are keyed by team,
+so only the newest position per team survives until the next flush; the
+flush runs on the GUI thread and emits `positionsUpdated` with a list of
+`{"team_id", "lat", "lon", "ts"}` dicts.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# How long to gather deltas before handing a batch to the map. Short enough
+# to feel live, long enough that 200 teams reporting together land as one
+# JS call instead of 200.
+_FLUSH_INTERVAL_MS = 100
+
+
+class TeamPositionStream(QObject):
+    positionsUpdated = Signal(list)
+    # Internal: crosses from the WebSocket thread to the GUI thread.
+    _pending_available = Signal()
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._timer: QTimer | None = None
+        self._pending_available.connect(self._schedule_flush)
+
+    def push(self, event: Dict[str, Any]) -> None:
+        team_id = event.get("team_id")
+        if team_id is None:
+            return
+        delta = {
+            "team_id": team_id,
+            "lat": event.get("lat"),
+            "lon": event.get("lon"),
+            "ts": event.get("ts"),
+        }
+        with self._lock:
+            first = not self._pending
+            self._pending[team_id] = delta
+        if first:
+            self._pending_available.emit()
+
+    def _schedule_flush(self) -> None:
+        if self._timer is None:
+            self._timer = QTimer(self)
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self.flush)
+        if not self._timer.isActive():
+            self._timer.start(_FLUSH_INTERVAL_MS)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batch = list(self._pending.values())
+            self._pending = {}
+        if batch:
+            self.positionsUpdated.emit(batch)
+        return batch
+
+
+team_position_stream = TeamPositionStream()
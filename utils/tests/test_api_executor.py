@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import httpx
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from utils.api_client import APIError, _APIClient, _AsyncAPIClient
+from utils.api_executor import APIExecutor
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+class _SlowServer:
+    """MockTransport handler that holds every request until released."""
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.release = threading.Event()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(f"{request.method} {request.url.path}?{request.url.query.decode()}")
+        while not self.release.is_set():
+            await asyncio.sleep(0.005)
+        if request.url.path == "/api/missing":
+            return httpx.Response(404, json={"detail": "Not found"})
+        return httpx.Response(200, json={"path": request.url.path, "items": [1, 2]})
+
+
+def _executor(server: _SlowServer) -> APIExecutor:
+    source = _APIClient()
+    source.configure("http://sarapp.test")
+    return APIExecutor(_AsyncAPIClient(source, transport=httpx.MockTransport(server)))
+
+
+def _wait_for(app, predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out waiting for delivery"
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def test_identical_gets_share_one_request_but_not_the_result(app) -> None:
+    server = _SlowServer()
+    executor = _executor(server)
+    results: list[dict] = []
+    try:
+        first = executor.get("/api/master/personnel", params={"active": True, "q": None})
+        second = executor.get("/api/master/personnel", params={"active": True})
+        other = executor.get("/api/master/vehicles")
+        for request in (first, second, other):
+            request.completed.connect(results.append)
+        _wait_for(app, lambda: len(server.calls) == 2)
+        server.release.set()
+        _wait_for(app, lambda: len(results) == 3)
+    finally:
+        executor.shutdown()
+
+    assert sorted(server.calls) == ["GET /api/master/personnel?active=true", "GET /api/master/vehicles?"]
+    personnel = [result for result in results if result["path"] == "/api/master/personnel"]
+    assert len(personnel) == 2 and personnel[0] == personnel[1]
+    assert personnel[0] is not personnel[1]
+
+
+def test_writes_are_never_shared_and_errors_arrive_as_apierror(app) -> None:
+    server = _SlowServer()
+    server.release.set()
+    executor = _executor(server)
+    done: list[object] = []
+    errors: list[APIError] = []
+    try:
+        for _ in range(2):
+            executor.post("/api/objectives", json={"text": "x"}).completed.connect(done.append)
+        executor.get("/api/missing").failed.connect(errors.append)
+        _wait_for(app, lambda: len(done) == 2 and len(errors) == 1)
+    finally:
+        executor.shutdown()
+
+    assert server.calls.count("POST /api/objectives?") == 2
+    assert errors[0].status_code == 404 and str(errors[0]) == "Not found"
+
+
+def test_run_fans_out_concurrently_and_cancel_stops_delivery(app) -> None:
+    server = _SlowServer()
+    executor = _executor(server)
+    gathered: list[list] = []
+    cancelled: list[object] = []
+    try:
+        request = executor.run(
+            lambda client: asyncio.gather(client.get("/api/a"), client.get("/api/b"), client.get("/api/c"))
+        )
+        request.completed.connect(gathered.append)
+        dropped = executor.get("/api/d")
+        dropped.completed.connect(cancelled.append)
+        _wait_for(app, lambda: len(server.calls) == 4)  # all in flight at once
+        dropped.cancel()
+        server.release.set()
+        _wait_for(app, lambda: len(gathered) == 1)
+        app.processEvents()
+    finally:
+        executor.shutdown()
+
+    assert [result["path"] for result in gathered[0]] == ["/api/a", "/api/b", "/api/c"]
+    assert cancelled == []
@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import threading
+import time
+
+import pytest
+
 from utils.catalog_cache import CatalogCache
 
 
@@ -23,3 +28,116 @@ def test_catalog_cache_memoizes_and_invalidates() -> None:
 
     assert third == [{"id": 2}]
     assert len(calls) == 2
+
+
+def test_concurrent_cold_reads_share_one_load() -> None:
+    cache = CatalogCache(default_ttl_seconds=60)
+    release = threading.Event()
+    calls: list[int] = []
+
+    def loader() -> list[dict[str, str]]:
+        calls.append(1)
+        release.wait(5)
+        return [{"name": "Alpha"}]
+
+    results: list[object] = []
+    readers = [
+        threading.Thread(target=lambda: results.append(cache.get("personnel", "/api/master/personnel", loader=loader)))
+        for _ in range(10)
+    ]
+    for reader in readers:
+        reader.start()
+    time.sleep(0.05)
+    release.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert len(calls) == 1
+    assert results == [[{"name": "Alpha"}]] * 10
+    assert len({id(result) for result in results}) == 10  # each reader got its own copy
+    assert cache.telemetry()["coalesced"] == 9
+
+
+def test_failed_load_reaches_waiters_and_is_not_cached() -> None:
+    cache = CatalogCache()
+
+    def loader() -> None:
+        raise RuntimeError("server down")
+
+    with pytest.raises(RuntimeError):
+        cache.get("types", "/api/master/types", loader=loader)
+    assert cache.get("types", "/api/master/types", loader=lambda: ["ok"]) == ["ok"]
+
+
+def test_view_is_read_only_and_get_returns_editable_copy() -> None:
+    cache = CatalogCache()
+    loader = lambda: [{"id": 1, "tags": ["a"]}]
+
+    view = cache.view("orgs", "/api/master/organizations", loader=loader)
+    assert view is cache.view("orgs", "/api/master/organizations", loader=loader)
+    with pytest.raises(TypeError):
+        view[0]["id"] = 2
+
+    copy = cache.get("orgs", "/api/master/organizations", loader=loader)
+    copy[0]["tags"].append("b")
+    assert cache.get("orgs", "/api/master/organizations", loader=loader) == [{"id": 1, "tags": ["a"]}]
+
+
+def test_stale_entry_is_served_while_refreshing_in_background() -> None:
+    cache = CatalogCache(default_ttl_seconds=60, stale_seconds=600)
+    versions = iter(["v1", "v2"])
+    refreshed = threading.Event()
+
+    def loader() -> str:
+        value = next(versions)
+        if value == "v2":
+            refreshed.set()
+        return value
+
+    assert cache.get("channels", "/api/comms/master-channels", loader=loader) == "v1"
+    key = next(iter(cache._entries))
+    cache._entries[key].loaded_at -= 120  # past the TTL, inside the stale window
+
+    assert cache.get("channels", "/api/comms/master-channels", loader=loader) == "v1"
+    assert refreshed.wait(5)
+    deadline = time.monotonic() + 5
+    while cache.view("channels", "/api/comms/master-channels", loader=loader) != "v2":
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    cache = CatalogCache(max_entries=2)
+    calls: list[str] = []
+
+    def loader_for(path: str):
+        return lambda: calls.append(path) or path
+
+    cache.get("n", "/a", loader=loader_for("/a"))
+    cache.get("n", "/b", loader=loader_for("/b"))
+    cache.get("n", "/a", loader=loader_for("/a"))  # /a is now most recent
+    cache.get("n", "/c", loader=loader_for("/c"))  # evicts /b
+    cache.get("n", "/a", loader=loader_for("/a"))
+    cache.get("n", "/b", loader=loader_for("/b"))
+
+    assert calls == ["/a", "/b", "/c", "/b"]
+    assert cache.telemetry()["evictions"] == 2
+
+
+def test_invalidate_during_load_does_not_store_the_old_value() -> None:
+    cache = CatalogCache()
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader() -> str:
+        started.set()
+        release.wait(5)
+        return "before write"
+
+    reader = threading.Thread(target=lambda: cache.get("types", "/api/master/types", loader=slow_loader))
+    reader.start()
+    assert started.wait(5)
+    cache.invalidate("types")
+    release.set()
+    reader.join(5)
+
+    assert cache.get("types", "/api/master/types", loader=lambda: "after write") == "after write"
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+import threading
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from core.networking import ConnectionManager, ConnectionMode, ConnectionState
+from utils.connection_relay import gui_relay
+
+
+def test_snapshots_from_the_monitor_thread_reach_listeners_on_the_gui_thread() -> None:
+    app = QApplication.instance() or QApplication([])
+    manager = ConnectionManager(include_local_server=False)
+    relay = gui_relay(manager)
+    assert gui_relay(manager) is relay
+
+    calls: list[tuple[ConnectionState, threading.Thread]] = []
+    relay.add_listener(lambda snapshot: calls.append((snapshot.state, threading.current_thread())))
+
+    worker = threading.Thread(target=manager.mark_disconnected, args=("Lost connection",))
+    worker.start()
+    worker.join()
+    assert calls == []
+
+    app.processEvents()
+    assert calls == [(ConnectionState.DISCONNECTED, threading.main_thread())]
+
+    manager.enter_offline_mode()
+    assert calls[-1][0] == ConnectionState.OFFLINE
+    assert manager.snapshot.mode == ConnectionMode.OFFLINE
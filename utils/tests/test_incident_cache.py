@@ -80,3 +80,24 @@ def test_is_collection_complete_reflects_server_reported_truncation() -> None:
     assert incident_cache.is_collection_complete("communications_log") is False
 
     incident_cache.clear()
+
+
+def test_team_position_delta_patches_the_cached_team_quietly() -> None:
+    incident_cache.clear()
+    incident_cache.load_snapshot("INC-POS", {"teams": [{"_id": "t1", "int_id": 1, "name": "Team 1"}]})
+    before = incident_cache.get("teams", "t1")
+    emitted: list[tuple] = []
+    incident_cache.changed.connect(lambda *args: emitted.append(args))
+
+    incident_cache.apply_team_position(
+        {"type": "team_position", "id": "t1", "team_id": 1, "lat": 42.9, "lon": -85.6, "ts": "t", "person_record": 100}
+    )
+    incident_cache.apply_team_position({"type": "team_position", "id": "unknown", "lat": 1.0, "lon": 1.0})
+
+    team = incident_cache.get("teams", "t1")
+    assert (team["current_location_lat"], team["current_location_lon"]) == (42.9, -85.6)
+    assert team["current_location_person_record"] == 100 and team["name"] == "Team 1"
+    assert "current_location_lat" not in before
+    assert incident_cache.get("teams", "unknown") is None
+    assert emitted == []
+    incident_cache.clear()
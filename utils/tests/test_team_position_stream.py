@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from utils.team_position_stream import TeamPositionStream
+
+
+def test_stream_keeps_newest_delta_per_team_and_batches() -> None:
+    stream = TeamPositionStream()
+    batches: list[list] = []
+    stream.positionsUpdated.connect(batches.append)
+
+    stream.push({"type": "team_position", "team_id": 1, "lat": 42.0, "lon": -85.0, "ts": "t1"})
+    stream.push({"type": "team_position", "team_id": 2, "lat": 43.0, "lon": -86.0, "ts": "t1"})
+    stream.push({"type": "team_position", "team_id": 1, "lat": 42.5, "lon": -85.5, "ts": "t2"})
+    stream.push({"type": "team_position", "lat": 1.0, "lon": 1.0})  # no team: ignored
+
+    batch = stream.flush()
+
+    assert batches == [batch]
+    assert sorted((d["team_id"], d["lat"], d["ts"]) for d in batch) == [(1, 42.5, "t2"), (2, 43.0, "t1")]
+    assert stream.flush() == []
+    assert len(batches) == 1
+
+
+def test_cleared_position_is_forwarded() -> None:
+    stream = TeamPositionStream()
+    stream.push({"team_id": 7, "lat": None, "lon": None, "ts": "t3"})
+    assert stream.flush() == [{"team_id": 7, "lat": None, "lon": None, "ts": "t3"}]